@@ -1,13 +1,19 @@
+import copy
 import logging
 import os
 from typing import List, Dict, Any, Optional
 import torch
 from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline, BitsAndBytesConfig
-from dataclasses import dataclass
+from transformers import StoppingCriteria, StoppingCriteriaList
+from dataclasses import dataclass, replace
 import json
 
 from config import settings
 from rag.pipeline import RAGPipeline, RetrievalResult
+from retrieval import get_retrieval_core
+from telemetry import stage_timer, record_tokens
+from tabular import answer_numeric_question, get_tabular_catalog
+from serving import CancelToken, NORMAL, NO_RERANK, FEWER_DOCS, SHORT_ANSWERS, SMALL_MODEL, EXTRACTIVE, extractive_answer
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +27,16 @@ class GenerationConfig:
     repetition_penalty: float = 1.1
     do_sample: bool = True
 
+
+class _CancelCriteria(StoppingCriteria):
+    """Stops generation after the current token once the request is cancelled or out of time."""
+    
+    def __init__(self, token: CancelToken):
+        self.token = token
+    
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return self.token.cancelled
+
 class FinancialAgent:
     """
     AI agent for financial literacy, combining RAG with open-source LLM.
@@ -28,17 +44,31 @@ class FinancialAgent:
     """
     
     def __init__(self, rag_pipeline: Optional[RAGPipeline] = None):
-        self.rag_pipeline = rag_pipeline or RAGPipeline()
+        self.rag_pipeline = rag_pipeline or get_retrieval_core().pipeline
         self.generation_config = GenerationConfig()
         self.model = None
         self.tokenizer = None
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self._fallback_pipeline = None
+        self._padded_tokenizer = None
         self._load_model()
     
     def _load_model(self):
         """Load the language model and tokenizer with optimized settings."""
+        self.pipeline = self._build_pipeline(settings.LLM_MODEL)
+    
+    def _fallback(self):
+        """Smaller LLM_FALLBACK_MODEL pipeline used under heavy load, loaded on first use."""
+        if not settings.LLM_FALLBACK_MODEL:
+            return self.pipeline
+        if self._fallback_pipeline is None:
+            self._fallback_pipeline = self._build_pipeline(settings.LLM_FALLBACK_MODEL)
+        return self._fallback_pipeline
+    
+    def _build_pipeline(self, model_name: str):
+        """Build a text-generation pipeline for `model_name` with the configured loading options."""
         try:
-            logger.info(f"Loading model: {settings.LLM_MODEL}")
+            logger.info(f"Loading model: {model_name}")
             
             # Set up model loading kwargs based on settings
             model_kwargs = {
@@ -58,16 +88,17 @@ class FinancialAgent:
                 os.makedirs(settings.OFFLOAD_FOLDER, exist_ok=True)
             
             # Load the model with the specified settings
-            self.pipeline = pipeline(
+            text_pipeline = pipeline(
                 "text-generation",
-                model=settings.LLM_MODEL,
-                tokenizer=settings.LLM_MODEL,
+                model=model_name,
+                tokenizer=model_name,
                 **model_kwargs
             )
             
             logger.info(f"Model loaded successfully on {self.device}")
             
             logger.info("Model and tokenizer loaded successfully")
+            return text_pipeline
             
         except Exception as e:
             logger.error(f"Error loading model: {str(e)}")
@@ -80,6 +111,9 @@ class FinancialAgent:
         region: str,
         language: str = "en",
         max_retrieved_docs: int = 3,
+        endpoint: str = "ask",
+        cancel: Optional[CancelToken] = None,
+        degradation_level: int = NORMAL,
         **generation_kwargs
     ) -> Dict[str, Any]:
         """
@@ -91,57 +125,234 @@ class FinancialAgent:
             region: User's region (india, international)
             language: Preferred language for response
             max_retrieved_docs: Maximum number of documents to retrieve
+            endpoint: Name of the calling endpoint, used for retrieval cache statistics
+            cancel: Cancellation token; checked between stages and after every
+                generated token (raises RequestCancelled once it fires)
+            degradation_level: Load-degradation level; from NO_RERANK up it skips
+                reranking, fewer documents, a smaller token budget, the fallback
+                model and finally no generation (extractive answer)
             **generation_kwargs: Additional generation parameters
             
         Returns:
             Dictionary containing the generated response and metadata
         """
-        # Update generation config with any provided overrides
-        config = self.generation_config
-        for key, value in generation_kwargs.items():
-            if hasattr(config, key):
-                setattr(config, key, value)
+        # Per-request overrides must not leak into the shared defaults
+        config = replace(self.generation_config, **{
+            key: value for key, value in generation_kwargs.items() if hasattr(self.generation_config, key)
+        })
+        cancel = cancel or CancelToken()
+        level = degradation_level
+        if level >= FEWER_DOCS:
+            max_retrieved_docs = max(1, max_retrieved_docs // 2)
+        if level >= SHORT_ANSWERS:
+            config = replace(config, max_new_tokens=min(config.max_new_tokens, settings.DEGRADED_MAX_NEW_TOKENS))
         
         # Retrieve relevant documents
         filter_metadata = self._get_metadata_filters(age_group, region)
-        retrieved_docs = self.rag_pipeline.retrieve(
-            query=query,
-            top_k=max_retrieved_docs * 2,  # Retrieve more initially for better reranking
-            rerank_top_k=max_retrieved_docs,
-            filter_metadata=filter_metadata
-        )
+        with cancel.stage("retrieve", settings.STAGE_DEADLINES_S.get("retrieve")):
+            if level >= NO_RERANK:
+                retrieved_docs = self.rag_pipeline.retrieve(
+                    query=query,
+                    top_k=max_retrieved_docs,
+                    filter_metadata=filter_metadata,
+                    endpoint=endpoint
+                )
+            else:
+                retrieved_docs = self.rag_pipeline.retrieve(
+                    query=query,
+                    top_k=max_retrieved_docs * 2,  # Retrieve more initially for better reranking
+                    rerank_top_k=max_retrieved_docs,
+                    filter_metadata=filter_metadata,
+                    endpoint=endpoint
+                )
         
-        # Format prompt with retrieved context
-        prompt = self._build_prompt(
-            query=query,
-            age_group=age_group,
-            region=region,
-            retrieved_docs=retrieved_docs
-        )
-        
-        # Generate response
-        response_text = self._generate_text(prompt, config)
+        # Numeric questions over tabular data are computed, not left to the LLM
+        computed = self._compute_figures(query)
         
-        # Parse response into structured format
-        response = self._parse_response(response_text)
+        if level >= EXTRACTIVE:
+            # Under the heaviest load, answer from the retrieved text without generating
+            passages = ([computed["summary"]] if computed else []) + [doc.content for doc in retrieved_docs]
+            response = {
+                "answer": extractive_answer(passages) or "We're handling a lot of questions right now. Please try again shortly.",
+                "explanation": "",
+                "example": "",
+                "action_steps": []
+            }
+        else:
+            # Format prompt with retrieved context
+            with stage_timer("agent.build_prompt"):
+                prompt = self._build_prompt(
+                    query=query,
+                    age_group=age_group,
+                    region=region,
+                    retrieved_docs=retrieved_docs,
+                    computed_figures=computed["summary"] if computed else None
+                )
+            
+            # Generate response
+            text_pipeline = self._fallback() if level >= SMALL_MODEL else self.pipeline
+            with cancel.stage("generate", settings.STAGE_DEADLINES_S.get("generate")):
+                response_text = self._generate_text(prompt, config, cancel, text_pipeline)
+            
+            # Parse response into structured format
+            response = self._parse_response(response_text)
         
         # Add metadata
+        return self._with_metadata(response, query, age_group, region, language, retrieved_docs, computed, level)
+    
+    @staticmethod
+    def _with_metadata(
+        response: Dict[str, Any],
+        query: str,
+        age_group: str,
+        region: str,
+        language: str,
+        retrieved_docs: List[RetrievalResult],
+        computed: Optional[Dict[str, Any]],
+        level: int
+    ) -> Dict[str, Any]:
         response.update({
             "query": query,
             "age_group": age_group,
             "region": region,
             "language": language,
-            "sources": [doc.to_dict() for doc in retrieved_docs]
+            "sources": [doc.to_dict() for doc in retrieved_docs],
+            "degradation_level": level
         })
-        
+        if computed:
+            response["computed"] = computed
         return response
     
+    def generate_batch(
+        self,
+        requests: List[Dict[str, str]],
+        max_retrieved_docs: int = 3,
+        batch_size: int = 8,
+        **generation_kwargs
+    ) -> List[Dict[str, Any]]:
+        """
+        Answer many questions offline with batched generation.
+        
+        Retrieval and prompt building run per request as in
+        `generate_response`; the prompts then go through the text-generation
+        pipeline `batch_size` at a time.
+        
+        Args:
+            requests: Dicts with query, age_group, region and optionally language
+            max_retrieved_docs: Documents kept after reranking, per request
+            batch_size: Prompts per generation call
+            **generation_kwargs: Additional generation parameters
+            
+        Returns:
+            One response per request, in order, shaped like `generate_response`'s
+        """
+        config = replace(self.generation_config, **{
+            key: value for key, value in generation_kwargs.items() if hasattr(self.generation_config, key)
+        })
+        
+        prepared = []
+        for request in requests:
+            retrieved_docs = self.rag_pipeline.retrieve(
+                query=request["query"],
+                top_k=max_retrieved_docs * 2,
+                rerank_top_k=max_retrieved_docs,
+                filter_metadata=self._get_metadata_filters(request["age_group"], request["region"]),
+                endpoint="faq"
+            )
+            computed = self._compute_figures(request["query"])
+            prompt = self._build_prompt(
+                query=request["query"],
+                age_group=request["age_group"],
+                region=request["region"],
+                retrieved_docs=retrieved_docs,
+                computed_figures=computed["summary"] if computed else None
+            )
+            prepared.append((request, retrieved_docs, computed, prompt))
+        
+        texts = self._generate_batch_text([prompt for *_, prompt in prepared], config, batch_size)
+        return [
+            self._with_metadata(
+                self._parse_response(text),
+                request["query"],
+                request["age_group"],
+                request["region"],
+                request.get("language", "en"),
+                retrieved_docs,
+                computed,
+                NORMAL
+            )
+            for (request, retrieved_docs, computed, _), text in zip(prepared, texts)
+        ]
+    
+    @stage_timer("agent.generate_batch")
+    def _generate_batch_text(self, prompts: List[str], config: GenerationConfig, batch_size: int) -> List[str]:
+        """Generate completions for several prompts, padded into batches of `batch_size`."""
+        if not prompts:
+            return []
+        tokenizer, model = self._batch_tokenizer(), self.pipeline.model
+        
+        texts = []
+        tokens_in = tokens_out = 0
+        for start in range(0, len(prompts), batch_size):
+            inputs = tokenizer(prompts[start:start + batch_size], return_tensors="pt", padding=True).to(model.device)
+            prompt_len = inputs["input_ids"].shape[1]
+            with torch.no_grad():
+                output_ids = model.generate(**inputs, **self._generate_kwargs(config, tokenizer))
+            new_ids = output_ids[:, prompt_len:]
+            texts.extend(text.strip() for text in tokenizer.batch_decode(new_ids, skip_special_tokens=True))
+            # Token counts come from the ids already at hand: no re-tokenizing for metrics
+            tokens_in += int(inputs["attention_mask"].sum())
+            tokens_out += int((new_ids != tokenizer.pad_token_id).sum())
+        
+        record_tokens(settings.LLM_MODEL, tokens_in, tokens_out)
+        return texts
+    
+    def _batch_tokenizer(self):
+        """
+        Copy of the tokenizer set up for padded batches, made on first use.
+        
+        Decoder-only models continue from the last token, so batches pad on
+        the left; the shared tokenizer is left untouched for concurrent
+        single-prompt generation.
+        """
+        if self._padded_tokenizer is None:
+            tokenizer = copy.deepcopy(self.pipeline.tokenizer)
+            if tokenizer.pad_token_id is None:
+                tokenizer.pad_token_id = tokenizer.eos_token_id
+            tokenizer.padding_side = "left"
+            self._padded_tokenizer = tokenizer
+        return self._padded_tokenizer
+    
+    @staticmethod
+    def _generate_kwargs(config: GenerationConfig, tokenizer) -> Dict[str, Any]:
+        """`model.generate` arguments for a generation config."""
+        return {
+            "max_new_tokens": config.max_new_tokens,
+            "temperature": config.temperature,
+            "top_p": config.top_p,
+            "top_k": config.top_k,
+            "repetition_penalty": config.repetition_penalty,
+            "do_sample": config.do_sample,
+            "eos_token_id": tokenizer.eos_token_id,
+            "pad_token_id": tokenizer.eos_token_id if tokenizer.pad_token_id is None else tokenizer.pad_token_id,
+        }
+    
+    @stage_timer("agent.tabular")
+    def _compute_figures(self, query: str) -> Optional[Dict[str, Any]]:
+        """Answer the numeric part of a question from the columnar tables, if any applies."""
+        try:
+            return answer_numeric_question(get_tabular_catalog(), query)
+        except Exception as e:
+            logger.warning(f"Tabular lookup failed: {str(e)}")
+            return None
+    
     def _build_prompt(
         self,
         query: str,
         age_group: str,
         region: str,
-        retrieved_docs: List[RetrievalResult]
+        retrieved_docs: List[RetrievalResult],
+        computed_figures: Optional[str] = None
     ) -> str:
         """Build a prompt for the language model."""
         # System message with instructions
@@ -153,6 +364,11 @@ class FinancialAgent:
         
         # Format retrieved documents
         context = "\n\n".join([doc.content for doc in retrieved_docs])
+        if computed_figures:
+            context = (
+                "Computed figures (exact; quote these numbers rather than estimating):\n"
+                f"{computed_figures}\n\n{context}"
+            )
         
         # User query with context
         user_prompt = (
@@ -176,27 +392,37 @@ class FinancialAgent:
         
         return prompt
     
-    def _generate_text(self, prompt: str, config: GenerationConfig) -> str:
-        """Generate text using the language model."""
+    @stage_timer("agent.generate_text")
+    def _generate_text(
+        self,
+        prompt: str,
+        config: GenerationConfig,
+        cancel: Optional[CancelToken] = None,
+        text_pipeline=None
+    ) -> str:
+        """Generate text using the language model, stopping early if `cancel` fires."""
+        text_pipeline = text_pipeline or self.pipeline
         try:
-            # Generate response
-            outputs = self.pipeline(
-                prompt,
-                max_new_tokens=config.max_new_tokens,
-                temperature=config.temperature,
-                top_p=config.top_p,
-                top_k=config.top_k,
-                repetition_penalty=config.repetition_penalty,
-                do_sample=config.do_sample,
-                return_full_text=False,
-                eos_token_id=self.pipeline.tokenizer.eos_token_id,
-            )
+            # Tokenize once and generate directly, so the prompt and completion
+            # lengths for the token metrics come from the ids themselves
+            tokenizer, model = text_pipeline.tokenizer, text_pipeline.model
+            inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+            prompt_len = inputs["input_ids"].shape[1]
+            with torch.no_grad():
+                output_ids = model.generate(
+                    **inputs,
+                    **self._generate_kwargs(config, tokenizer),
+                    stopping_criteria=StoppingCriteriaList([_CancelCriteria(cancel)]) if cancel else None,
+                )[0]
             
-            # Extract generated text
-            generated_text = outputs[0]["generated_text"]
+            # Decode only the completion and clean up the response
+            generated_text = tokenizer.decode(output_ids[prompt_len:], skip_special_tokens=True).strip()
             
-            # Clean up the response
-            generated_text = generated_text.strip()
+            record_tokens(
+                settings.LLM_FALLBACK_MODEL if text_pipeline is self._fallback_pipeline else settings.LLM_MODEL,
+                prompt_len,
+                len(output_ids) - prompt_len
+            )
             
             return generated_text
             
@@ -228,7 +454,8 @@ class FinancialAgent:
                 "action_steps": []
             }
     
-    def _get_metadata_filters(self, age_group: str, region: str) -> Dict[str, Any]:
+    @staticmethod
+    def _get_metadata_filters(age_group: str, region: str) -> Dict[str, Any]:
         """Get metadata filters based on user's age group and region."""
         filters = {}
         
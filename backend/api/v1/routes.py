@@ -1,15 +1,24 @@
-from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File, Form
-from typing import List, Optional, Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File, Form, Query, Request, Response
+from typing import List, Optional, Dict, Any, Tuple
 from pydantic import BaseModel, Field, HttpUrl
 from enum import Enum
 import os
+import json
+import hashlib
+import logging
 import tempfile
 from pathlib import Path
 
 from api.v1.services.agent_service import agent_service
 from ingestion.ingestion_service import ingestion_service
+from ingestion.jobs import ingestion_jobs, QueueFullError
+from providers import get_provider_index
+from tabular import get_tabular_catalog, aggregate, trend, top_k, TabularQueryError
+from serving import CLIENT_CLOSED_REQUEST, ClientDisconnected, DeadlineExceeded, run_until_disconnected
 from config import settings
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 # Enums for request validation
@@ -35,6 +44,9 @@ class QueryRequest(BaseModel):
     age_group: AgeGroup = Field(..., description="User's age group (15-20, 21-28, 29-35)")
     region: Region = Field(..., description="User's region (india or international)")
     language: str = Field("en", description="Preferred language for the response", min_length=2, max_length=10)
+    zipcode: Optional[str] = Field(None, description="Zip code for nearby provider suggestions", max_length=10)
+    latitude: Optional[float] = Field(None, description="Latitude for nearby provider suggestions", ge=-90, le=90)
+    longitude: Optional[float] = Field(None, description="Longitude for nearby provider suggestions", ge=-180, le=180)
 
 class QueryResponse(BaseModel):
     answer: str = Field(..., description="Direct answer to the question")
@@ -42,6 +54,23 @@ class QueryResponse(BaseModel):
     example: Optional[str] = Field(None, description="Practical example relevant to the user's context")
     action_steps: List[str] = Field(..., description="Actionable steps the user can take")
     source_documents: List[DocumentReference] = Field(..., description="Sources used to generate the answer")
+    providers: Optional[List["ProviderResponse"]] = Field(None, description="Nearby providers, when a location was given")
+    degradation_level: int = Field(0, description="Load-degradation level the answer was served at (0 = normal)")
+    library_match: Optional[str] = Field(None, description="exact or semantic when served from the precomputed answer library")
+
+class ProviderResponse(BaseModel):
+    organization: str = Field(..., description="Provider name")
+    address: str = Field(..., description="Street address")
+    phone: str = Field(..., description="Phone number")
+    website: str = Field(..., description="Website")
+    email: str = Field(..., description="Contact email")
+    zipcode: str = Field(..., description="Zip code")
+    categories: List[str] = Field(..., description="Services offered")
+    latitude: float = Field(..., description="Provider latitude")
+    longitude: float = Field(..., description="Provider longitude")
+    distance_km: float = Field(..., description="Distance from the query location in kilometres")
+
+QueryResponse.model_rebuild()
 
 class HealthCheckResponse(BaseModel):
     status: str = Field(..., description="Overall service status")
@@ -55,6 +84,21 @@ class IngestResponse(BaseModel):
     message: Optional[str] = Field(None, description="Additional message or error details")
     vector_db_stats: Optional[Dict[str, Any]] = Field(None, description="Vector database statistics")
 
+class IngestJobResponse(BaseModel):
+    job_id: str = Field(..., description="ID of the ingestion job")
+    status: str = Field(..., description="queued, running, succeeded or failed")
+    content_hash: str = Field(..., description="SHA-256 of the uploaded content")
+    filename: str = Field(..., description="Original file name")
+    document_type: str = Field(..., description="Type of the document")
+    size_bytes: int = Field(..., description="Size of the upload in bytes")
+    created_at: str = Field(..., description="When the job was queued (UTC)")
+    started_at: Optional[str] = Field(None, description="When processing started (UTC)")
+    finished_at: Optional[str] = Field(None, description="When processing finished (UTC)")
+    progress: Dict[str, int] = Field(..., description="pages_parsed, total_pages, chunks_total, chunks_embedded")
+    result: Optional[Dict[str, Any]] = Field(None, description="Ingestion result once finished")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+    duplicate_requests: int = Field(0, description="Later uploads of the same content coalesced into this job")
+
 # API Endpoints
 @router.post(
     "/ask",
@@ -63,18 +107,27 @@ class IngestResponse(BaseModel):
     description="Get a personalized response to financial literacy questions based on age group and region.",
     response_description="Structured response with financial advice"
 )
-async def ask_question(query: QueryRequest):
+async def ask_question(query: QueryRequest, request: Request):
     """
     Main endpoint for asking financial literacy questions.
     The response is tailored based on the user's age group and region.
+    Generation stops if the client disconnects; a request past its deadline
+    fails with 504.
     """
     try:
         # Process the query using the agent service
-        response = await agent_service.process_query(
-            question=query.question,
-            age_group=query.age_group.value,
-            region=query.region.value,
-            language=query.language
+        response = await run_until_disconnected(
+            request,
+            agent_service.process_query(
+                question=query.question,
+                age_group=query.age_group.value,
+                region=query.region.value,
+                language=query.language,
+                zipcode=query.zipcode,
+                latitude=query.latitude,
+                longitude=query.longitude
+            ),
+            settings.DISCONNECT_POLL_S
         )
         
         # Convert source documents to the response model
@@ -92,11 +145,23 @@ async def ask_question(query: QueryRequest):
             explanation=response.get('explanation', ''),
             example=response.get('example', ''),
             action_steps=response.get('action_steps', []),
-            source_documents=source_docs
+            source_documents=source_docs,
+            providers=response.get('providers'),
+            degradation_level=response.get('degradation_level', 0),
+            library_match=response.get('library_match')
         )
         
     except HTTPException:
         raise
+    except ClientDisconnected:
+        logger.info("Client disconnected; query processing cancelled")
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except DeadlineExceeded as e:
+        logger.warning(f"Query exceeded its deadline: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f"The answer took too long ({e.stage}). Please try again."
+        )
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -143,11 +208,11 @@ async def health_check():
 
 @router.post(
     "/ingest",
-    response_model=IngestResponse,
-    status_code=status.HTTP_201_CREATED,
+    response_model=IngestJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
     summary="Ingest a document",
-    description="Upload and process a document to add to the knowledge base.",
-    response_description="Status of the ingestion process"
+    description="Upload a document; it is parsed, chunked and embedded by a background job.",
+    response_description="The ingestion job tracking this upload"
 )
 async def ingest_document(
     file: UploadFile = File(..., description="The document file to ingest"),
@@ -156,50 +221,215 @@ async def ingest_document(
 ):
     """
     Ingest a new document into the knowledge base.
-    This will process the document, chunk it, and add it to the vector store.
+    The upload is copied to a spool file and queued; poll
+    `/ingest/jobs/{job_id}` for progress. Re-uploading identical content
+    and metadata while its job is queued or running returns that job
+    instead of ingesting it twice.
     """
     try:
-        # Create a temporary file to save the uploaded content
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{document_type}") as temp_file:
-            # Save uploaded file to temp location
-            content = await file.read()
-            temp_file.write(content)
-            temp_file_path = temp_file.name
-        
-        try:
-            # Parse metadata
-            import json
-            metadata_dict = json.loads(metadata) if metadata else {}
-            
-            # Process the document
-            result = await ingestion_service.ingest_document(
-                file_path=temp_file_path,
-                document_type=document_type,
-                metadata=metadata_dict
-            )
-            
-            return result
-            
-        finally:
-            # Clean up the temporary file
-            try:
-                os.unlink(temp_file_path)
-            except Exception as e:
-                logger.warning(f"Failed to delete temporary file {temp_file_path}: {str(e)}")
-                
+        metadata_dict = json.loads(metadata) if metadata else {}
     except json.JSONDecodeError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid metadata format. Must be a valid JSON string."
         )
+    
+    spool_path, content_hash = await _spool_upload(file, document_type)
+    try:
+        job = ingestion_jobs.submit(
+            spool_path=spool_path,
+            content_hash=content_hash,
+            filename=file.filename or os.path.basename(spool_path),
+            document_type=document_type,
+            metadata=metadata_dict
+        )
+    except QueueFullError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
     except Exception as e:
-        logger.error(f"Error ingesting document: {str(e)}", exc_info=True)
+        logger.error(f"Error queueing document: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to process document: {str(e)}"
+            detail=f"Failed to queue document: {str(e)}"
         )
+    
+    return job.to_dict()
+
+async def _spool_upload(file: UploadFile, document_type: str) -> Tuple[str, str]:
+    """
+    Copy an upload to a spool file in fixed-size chunks, hashing as it goes.
+    
+    The multipart parser has already received the whole body by the time the
+    endpoint runs (in memory, or in a temporary file for large parts), so this
+    is not a streamed upload. Oversized bodies are refused before parsing by
+    UploadLimitMiddleware (main.py); the check here enforces the exact
+    MAX_UPLOAD_BYTES limit on the file itself.
+    
+    Returns:
+        (spool file path, sha256 hex digest of the content)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(
+        delete=False, suffix=f".{document_type}", dir=settings.UPLOAD_SPOOL_DIR
+    ) as spool:
+        spool_path = spool.name
+        try:
+            while True:
+                block = await file.read(settings.UPLOAD_CHUNK_BYTES)
+                if not block:
+                    break
+                size += len(block)
+                if size > settings.MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"File exceeds the {settings.MAX_UPLOAD_BYTES} byte upload limit"
+                    )
+                digest.update(block)
+                spool.write(block)
+        except BaseException:
+            spool.close()
+            os.unlink(spool_path)
+            raise
+    
+    if size == 0:
+        os.unlink(spool_path)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Uploaded file is empty")
+    return spool_path, digest.hexdigest()
+
+@router.get(
+    "/ingest/jobs/{job_id}",
+    response_model=IngestJobResponse,
+    summary="Ingestion job status",
+    description="Status and progress (pages parsed, chunks embedded) of an ingestion job."
+)
+async def get_ingest_job(job_id: str):
+    """Get the status of a background ingestion job."""
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_dict()
+
+@router.get(
+    "/providers/nearest",
+    response_model=List[ProviderResponse],
+    summary="Find nearby financial-help providers",
+    description="Nearest providers offering any of the given services to a location or zip code.",
+    tags=["providers"]
+)
+async def nearest_providers(
+    latitude: Optional[float] = Query(None, ge=-90, le=90),
+    longitude: Optional[float] = Query(None, ge=-180, le=180),
+    zipcode: Optional[str] = Query(None, max_length=10),
+    category: List[str] = Query([], description="Service category (repeatable; partial names match)"),
+    limit: int = Query(5, ge=1, le=50),
+    max_distance_km: Optional[float] = Query(None, gt=0)
+):
+    """Nearest-provider lookup backed by the prebuilt grid index."""
+    if zipcode is None and (latitude is None or longitude is None):
+        raise HTTPException(status_code=400, detail="Provide latitude and longitude or a zipcode")
+    try:
+        index = get_provider_index()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    matches = index.nearest(
+        latitude=latitude,
+        longitude=longitude,
+        zipcode=zipcode,
+        categories=category or None,
+        limit=limit,
+        max_distance_km=max_distance_km
+    )
+    return [match.to_dict() for match in matches]
+
+class TableQueryRequest(BaseModel):
+    operation: str = Field("aggregate", description="aggregate, trend or top_k")
+    measure: str = Field(..., description="Measure column, e.g. 'Totals.Revenue' or just 'Revenue'")
+    filters: Dict[str, Any] = Field(default_factory=dict, description='e.g. {"State": ["TEXAS"], "Year": {"gte": 2000, "lte": 2010}}')
+    group_by: List[str] = Field(default_factory=list, description="Dimension columns to group by (aggregate)")
+    agg: str = Field("sum", description="sum, mean, min, max or count")
+    by: Optional[str] = Field(None, description="Dimension to rank (top_k)")
+    k: int = Field(5, ge=1, le=100, description="Number of groups to return (top_k)")
+    ascending: bool = Field(False, description="Return the lowest groups instead (top_k)")
+    period: str = Field("Year", description="Integer period column (trend)")
+
+@router.get(
+    "/tables",
+    response_model=List[Dict[str, Any]],
+    summary="List tables",
+    description="Columnar tables available to the aggregation API, with their columns.",
+    tags=["tables"]
+)
+async def list_tables():
+    """Describe every columnar table."""
+    return [table.describe() for table in get_tabular_catalog().tables()]
+
+@router.post(
+    "/tables/{table_name}/query",
+    response_model=Dict[str, Any],
+    summary="Query a table",
+    description="Vectorized filter, group-by, trend and top-k over a columnar table.",
+    tags=["tables"]
+)
+async def query_table(table_name: str, request: TableQueryRequest):
+    """Run an aggregation over a columnar table."""
+    table = get_tabular_catalog().get(table_name)
+    if table is None:
+        raise HTTPException(status_code=404, detail=f"Table {table_name} not found")
+    try:
+        if request.operation == "aggregate":
+            return aggregate(table, request.measure, request.filters, request.group_by, request.agg)
+        if request.operation == "trend":
+            return trend(table, request.measure, request.filters, request.period, request.agg)
+        if request.operation == "top_k":
+            if not request.by:
+                raise HTTPException(status_code=400, detail="top_k requires 'by'")
+            return top_k(table, request.measure, request.by, request.k, request.filters, request.agg, request.ascending)
+    except TabularQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    raise HTTPException(status_code=400, detail=f"Unknown operation '{request.operation}'")
 
 # Additional endpoints for document management
+class BulkDeleteRequest(BaseModel):
+    filter: Dict[str, Any] = Field(
+        ...,
+        description='Document metadata filter, e.g. {"source": "old.pdf"} or {"document_type": {"$in": ["csv"]}}'
+    )
+
+@router.get(
+    "/documents",
+    response_model=List[Dict[str, Any]],
+    summary="List documents",
+    description="Documents in the knowledge base with chunk counts, sizes and ingestion times, newest first.",
+    tags=["documents"]
+)
+async def list_documents(limit: int = 100, offset: int = 0):
+    """List documents in the knowledge base."""
+    try:
+        return await ingestion_service.list_documents(limit=min(max(limit, 1), 1000), offset=max(offset, 0))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error listing documents: {str(e)}"
+        )
+
+@router.post(
+    "/documents/delete",
+    response_model=dict,
+    summary="Delete documents by metadata",
+    description="Remove every document whose metadata matches the filter, with all its chunks.",
+    tags=["documents"]
+)
+async def delete_documents(request: BulkDeleteRequest):
+    """Bulk-delete documents matching a metadata filter."""
+    if not request.filter:
+        raise HTTPException(status_code=400, detail="Filter must not be empty")
+    result = await ingestion_service.delete_documents_where(request.filter)
+    if result["status"] == "invalid_filter":
+        raise HTTPException(status_code=400, detail=result["message"])
+    if result["status"] == "error":
+        raise HTTPException(status_code=500, detail=result["message"])
+    return result
+
 @router.delete(
     "/documents/{document_id}",
     response_model=dict,
@@ -230,17 +460,41 @@ async def delete_document(document_id: str):
 async def get_document_stats():
     """Get statistics about the documents in the knowledge base."""
     try:
-        stats = {
-            "total_documents": 0,  # This would come from your actual database
-            "total_chunks": 0,     # This would come from your actual database
+        result = await ingestion_service.get_document_stats()
+        if result["status"] != "success":
+            raise HTTPException(status_code=500, detail=result["message"])
+        stats = result["stats"]
+        return {
+            "total_documents": stats["documents"],
+            "total_chunks": stats["count"],
+            "total_bytes": stats["bytes"],
+            "dimensions": stats["dimensions"],
             "vector_db_status": "ok"
         }
-        return stats
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving document stats: {str(e)}"
         )
 
+@router.get(
+    "/cache/stats",
+    response_model=Dict[str, Any],
+    summary="Retrieval cache statistics",
+    description="Hit ratio and retrieval time saved by the retrieval cache, per endpoint, and answer-library size.",
+    tags=["cache"]
+)
+async def get_cache_stats():
+    """Get retrieval cache statistics."""
+    try:
+        return agent_service.get_cache_stats()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving cache stats: {str(e)}"
+        )
+
 # Export the router for use in main.py
 api_router = router
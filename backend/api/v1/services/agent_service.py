@@ -1,9 +1,15 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+import asyncio
 import logging
 from fastapi import HTTPException
 
 from agent.generator import FinancialAgent
-from rag.pipeline import RAGPipeline
+from retrieval import get_retrieval_core
+from providers import get_provider_index
+from serving import NORMAL, CancelToken, DegradationController, RequestCancelled, SingleFlight, question_key
+from faq import get_answer_library, segment_key
+from config import settings
+from telemetry import run_in_threadpool
 
 logger = logging.getLogger(__name__)
 
@@ -22,8 +28,21 @@ class AgentService:
         """Initialize the agent service with dependencies."""
         try:
             logger.info("Initializing AgentService...")
-            rag_pipeline = RAGPipeline()
-            self.agent = FinancialAgent(rag_pipeline)
+            self.agent = FinancialAgent(get_retrieval_core().pipeline)
+            # Identical questions in flight at the same time share one generation
+            self.inflight = SingleFlight("agent_service.generate")
+            # Sheds work (reranking, documents, tokens, generation) as load rises
+            self.degradation = DegradationController(
+                "agent_service",
+                p95_slo_s=settings.DEGRADATION_P95_SLO_S,
+                max_inflight=settings.DEGRADATION_MAX_INFLIGHT,
+                max_level=settings.DEGRADATION_MAX_LEVEL,
+                step_up_s=settings.DEGRADATION_STEP_UP_S,
+                step_down_s=settings.DEGRADATION_STEP_DOWN_S,
+                enabled=settings.DEGRADATION_ENABLED
+            )
+            # Precomputed answers to frequent questions (None when FAQ_ENABLED is off)
+            self.library = get_answer_library()
             logger.info("AgentService initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize AgentService: {str(e)}")
@@ -35,16 +54,29 @@ class AgentService:
         age_group: str,
         region: str,
         language: str = "en",
+        zipcode: Optional[str] = None,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
         Process a financial literacy query using the AI agent.
         
+        A fresh answer from the precomputed library is served without
+        retrieval or generation. Otherwise generation runs in the thread pool
+        so the event loop stays free, and concurrent requests with the same
+        normalized question and personalization are answered by a single
+        generation. Under load the degradation controller picks a cheaper
+        level for the request.
+        
         Args:
             question: The user's question
             age_group: User's age group (15-20, 21-28, 29-35)
             region: User's region (india, international)
             language: Preferred language for response
+            zipcode: Optional zip code for nearby provider suggestions
+            latitude: Optional latitude for nearby provider suggestions
+            longitude: Optional longitude for nearby provider suggestions
             **kwargs: Additional parameters for the agent
             
         Returns:
@@ -65,18 +97,48 @@ class AgentService:
                     detail="Invalid region. Must be one of: india, international"
                 )
             
-            # Generate response using the agent
-            response = self.agent.generate_response(
-                query=question,
-                age_group=age_group,
-                region=region,
-                language=language,
-                **kwargs
-            )
+            segment = segment_key("ask", age_group, region, language)
+            stored = None
+            if self.library is not None and not kwargs:
+                stored = await run_in_threadpool(self._lookup_library, question, segment)
+            
+            if stored is not None:
+                response = dict(stored.response, query=question, library_match=stored.match)
+            else:
+                # Generate response using the agent
+                level = self.degradation.admit()
+                
+                async def generate():
+                    # Only the call that does the work counts as load, not requests joining it
+                    with self.degradation.track():
+                        return await self._generate(
+                            query=question,
+                            age_group=age_group,
+                            region=region,
+                            language=language,
+                            degradation_level=level,
+                            **kwargs
+                        )
+                
+                if settings.SINGLEFLIGHT_ENABLED:
+                    key = question_key(question, age_group, region, language, level, kwargs)
+                    response = dict(await self.inflight.do(key, generate))
+                else:
+                    response = await generate()
+                
+                # A full-quality answer to a library question replaces its stale entry
+                if self.library is not None and level == NORMAL and not kwargs:
+                    await run_in_threadpool(self._refresh_library, question, segment, response)
+            
+            # Nearby help comes from the provider index, not from retrieved address text
+            if zipcode or (latitude is not None and longitude is not None):
+                response["providers"] = self.find_providers(
+                    question, zipcode=zipcode, latitude=latitude, longitude=longitude
+                )
             
             return response
             
-        except HTTPException:
+        except (HTTPException, RequestCancelled):
             raise
         except Exception as e:
             logger.error(f"Error processing query: {str(e)}", exc_info=True)
@@ -85,6 +147,78 @@ class AgentService:
                 detail="An error occurred while processing your request"
             )
     
+    def _lookup_library(self, question: str, segment: str):
+        try:
+            return self.library.lookup(question, segment)
+        except Exception as e:
+            logger.warning(f"Answer library lookup failed: {str(e)}")
+            return None
+    
+    def _refresh_library(self, question: str, segment: str, response: Dict[str, Any]) -> None:
+        try:
+            self.library.refresh(
+                question,
+                segment,
+                response,
+                sources=[(doc["chunk_id"], doc["content"]) for doc in response.get("sources", [])],
+                corpus_generation=get_retrieval_core().vector_store.storage.generation,
+                model=settings.LLM_MODEL
+            )
+        except Exception as e:
+            logger.warning(f"Could not refresh the answer library: {str(e)}")
+    
+    async def _generate(self, **kwargs) -> Dict[str, Any]:
+        """
+        Run the agent in the thread pool under a request deadline.
+        
+        If the awaiting coroutine is cancelled (every waiting client went
+        away), the token stops the local generation at the next token.
+        """
+        token = CancelToken(settings.REQUEST_DEADLINE_S)
+        try:
+            return await run_in_threadpool(self.agent.generate_response, cancel=token, **kwargs)
+        except asyncio.CancelledError:
+            token.cancel()
+            raise
+    
+    def find_providers(
+        self,
+        question: str,
+        zipcode: Optional[str] = None,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        limit: int = 3
+    ) -> List[Dict[str, Any]]:
+        """
+        Nearest providers offering the services a question mentions.
+        
+        Falls back to the nearest providers of any service when the question
+        names no known category. Returns an empty list if provider data is
+        unavailable.
+        """
+        try:
+            index = get_provider_index()
+            matches = index.nearest(
+                latitude=latitude,
+                longitude=longitude,
+                zipcode=zipcode,
+                categories=index.categories_in_text(question) or None,
+                limit=limit
+            )
+            return [match.to_dict() for match in matches]
+        except Exception as e:
+            logger.warning(f"Provider lookup failed: {str(e)}")
+            return []
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Return retrieval cache size, hit ratio and saved time per endpoint, plus coalescing, load level and answer library."""
+        return {
+            **self.agent.rag_pipeline.cache.stats(),
+            "coalescing": self.inflight.stats(),
+            "degradation": self.degradation.stats(),
+            "answer_library": self.library.stats() if self.library is not None else None,
+        }
+    
     async def health_check(self) -> Dict[str, Any]:
         """Check the health of the agent service."""
         try:
@@ -98,6 +232,7 @@ class AgentService:
                 age_group="21-28",
                 region="international",
                 max_retrieved_docs=0,
+                endpoint="health",
                 max_new_tokens=10
             )
             
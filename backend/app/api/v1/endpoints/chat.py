@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, status
 from typing import List, Optional
 from pydantic import BaseModel
 from loguru import logger
 
 from app.services.rag_service import rag_service
+from app.services.language_id import LANGUAGES, detect_language
+from app.core.config import settings
+from serving import CLIENT_CLOSED_REQUEST, ClientDisconnected, DeadlineExceeded, run_until_disconnected
+from telemetry import stage_timer
 
 router = APIRouter()
 
@@ -15,30 +19,56 @@ class ChatRequest(BaseModel):
     message: str
     chat_history: List[ChatMessage] = []
     user_id: Optional[str] = None
+    language: Optional[str] = None  # Overrides detection when set
 
 class ChatResponse(BaseModel):
     response: str
     sources: List[str] = []
+    language: Optional[str] = None
+    degradation_level: int = 0  # Load-degradation level the answer was served at
+    library_match: Optional[str] = None  # "exact" or "semantic" when served from the answer library
 
-def is_finance_related(message: str) -> bool:
-    """Check if the message is related to finance."""
-    # List of finance-related keywords
-    finance_keywords = [
-        'money', 'finance', 'invest', 'saving', 'budget', 'loan', 'credit', 'bank',
-        'insurance', 'tax', 'scheme', 'fund', 'stock', 'mutual', 'sip', 'ppf', 'fd',
-        'salary', 'income', 'expense', 'debt', 'emi', 'interest', 'retirement',
-        'pension', 'business', 'entrepreneur', 'profit', 'loss', 'account', 'payment',
-        'rupee', 'rupees', '₹', 'wealth', 'asset', 'liability', 'financial',
-        'gold', 'property', 'real estate', 'crypto', 'trading', 'nps', 'epf'
-    ]
-    
+# Finance keywords understood in every language (English terms are common in code-mixed chat)
+FINANCE_KEYWORDS = (
+    'money', 'finance', 'invest', 'saving', 'budget', 'loan', 'credit', 'bank',
+    'insurance', 'tax', 'scheme', 'fund', 'stock', 'mutual', 'sip', 'ppf', 'fd',
+    'salary', 'income', 'expense', 'debt', 'emi', 'interest', 'retirement',
+    'pension', 'business', 'entrepreneur', 'profit', 'loss', 'account', 'payment',
+    'rupee', 'rupees', '₹', 'wealth', 'asset', 'liability', 'financial',
+    'gold', 'property', 'real estate', 'crypto', 'trading', 'nps', 'epf'
+)
+
+# Additional romanized and native-script keywords per detected language
+FINANCE_KEYWORDS_BY_LANGUAGE = {
+    'hindi': ('paisa', 'paise', 'bachat', 'nivesh', 'byaaj', 'karz', 'yojana', 'bima',
+              'kamai', 'aamdani', 'kharcha', 'sona', 'khata', 'पैसा', 'पैसे', 'बचत',
+              'निवेश', 'ब्याज', 'कर्ज', 'योजना', 'बीमा', 'बैंक'),
+    'kannada': ('hana', 'ulitaaya', 'hoodike', 'baddi', 'saala', 'yojane', 'vime',
+                'aadaaya', 'kharchu', 'chinna', 'khaate', 'ಹಣ', 'ಉಳಿತಾಯ', 'ಹೂಡಿಕೆ',
+                'ಬಡ್ಡಿ', 'ಸಾಲ', 'ಯೋಜನೆ', 'ವಿಮೆ', 'ಬ್ಯಾಂಕ್'),
+    'tamil': ('panam', 'semippu', 'muthaleedu', 'vatti', 'kadan', 'thittam',
+              'kaappeedu', 'varumaanam', 'selavu', 'thangam', 'kanakku', 'பணம்',
+              'சேமிப்பு', 'முதலீடு', 'வட்டி', 'கடன்', 'திட்டம்', 'காப்பீடு', 'வங்கி'),
+    'telugu': ('dabbu', 'podupu', 'pettubadi', 'vaddi', 'runam', 'appu', 'pathakam',
+               'bheema', 'aadaayam', 'kharchu', 'bangaram', 'khaata', 'డబ్బు',
+               'పొదుపు', 'పెట్టుబడి', 'వడ్డీ', 'రుణం', 'పథకం', 'బీమా', 'బ్యాంక్'),
+}
+
+@stage_timer("chat.is_finance_related")
+def is_finance_related(message: str, language: str = "english") -> bool:
+    """Check if the message is related to finance, using keywords for its language."""
     message_lower = message.lower()
-    return any(keyword in message_lower for keyword in finance_keywords)
+    if any(keyword in message_lower for keyword in FINANCE_KEYWORDS):
+        return True
+    return any(keyword in message_lower for keyword in FINANCE_KEYWORDS_BY_LANGUAGE.get(language, ()))
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat(chat_request: ChatRequest):
+async def chat(chat_request: ChatRequest, request: Request):
     """
     Handle chat messages and return AI responses with financial literacy support.
+    
+    Generation is abandoned (and the Ollama stream closed) as soon as the
+    client disconnects; a request past its deadline fails with 504.
     """
     try:
         # Get the latest user message
@@ -49,8 +79,16 @@ async def chat(chat_request: ChatRequest):
                 detail="Message cannot be empty"
             )
         
+        # Detect the language up front; it picks the intent keywords, the
+        # prompt template and whether a pronunciation section is added.
+        # Low-confidence guesses (short messages) are served in English
+        language = chat_request.language
+        if language not in LANGUAGES:
+            with stage_timer("chat.identify_language"):
+                language = detect_language(user_message, settings.LANGUAGE_ID_MIN_CONFIDENCE)
+        
         # Check if question is finance-related
-        if not is_finance_related(user_message):
+        if not is_finance_related(user_message, language):
             return ChatResponse(
                 response=(
                     "I'm WomenWealthWave, a specialized financial literacy assistant for women. "
@@ -63,22 +101,41 @@ async def chat(chat_request: ChatRequest):
                     "💼 Women's entrepreneurship\n\n"
                     "Please ask me a question about personal finance or financial literacy!"
                 ),
-                sources=[]
+                sources=[],
+                language=language
             )
         
         # Generate response using RAG
-        result = await rag_service.generate_response(
-            query=user_message,
-            chat_history=[msg.dict() for msg in chat_request.chat_history]
+        result = await run_until_disconnected(
+            request,
+            rag_service.generate_response(
+                query=user_message,
+                chat_history=[msg.dict() for msg in chat_request.chat_history],
+                language=language,
+                user_id=chat_request.user_id
+            ),
+            settings.DISCONNECT_POLL_S
         )
         
         return ChatResponse(
             response=result["response"],
-            sources=result.get("sources", [])
+            sources=result.get("sources", []),
+            language=language,
+            degradation_level=result.get("degradation_level", 0),
+            library_match=result.get("library_match")
         )
         
     except HTTPException:
         raise
+    except ClientDisconnected:
+        logger.info("Client disconnected; chat generation cancelled")
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except DeadlineExceeded as e:
+        logger.warning(f"Chat request exceeded its deadline: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f"The answer took too long ({e.stage}). Please try again."
+        )
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}")
         logger.exception("Full chat endpoint error traceback:")
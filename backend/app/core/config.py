@@ -1,20 +1,57 @@
 import os
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "WomenWealthWave.AI"
     API_V1_STR: str = "/api/v1"
     
-    # ChromaDB Settings
-    CHROMA_DB_PATH: str = "data/chroma_db"
-    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"  # Lightweight model for embeddings
+    # The vector index and embedding models come from the shared retrieval core
+    # (VECTOR_DB_PATH, RETRIEVAL_COLLECTION, EMBEDDING_MODEL, INFERENCE_BACKEND in config.py)
     
     # Ollama Settings
     OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     # Default to a lightweight multilingual Qwen model
     OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "qwen2.5:1.5b-instruct")
     
+    # Request deadlines in seconds; a request past its budget fails fast with 504
+    REQUEST_DEADLINE_S: float = 120.0
+    STAGE_DEADLINES_S: Dict[str, float] = {"retrieve": 5.0, "generate": 90.0}
+    # How often a pending request checks whether its client is still connected
+    DISCONNECT_POLL_S: float = 0.25
+    
+    # Load-aware degradation: 2 fewer docs, 3 shorter answers, 4 fallback model,
+    # 5 extractive answers only (level 1, skip reranking, is a no-op here)
+    DEGRADATION_ENABLED: bool = True
+    DEGRADATION_P95_SLO_S: float = 20.0
+    DEGRADATION_MAX_INFLIGHT: int = 16
+    DEGRADATION_MAX_LEVEL: int = 5
+    DEGRADATION_STEP_UP_S: float = 5.0
+    DEGRADATION_STEP_DOWN_S: float = 30.0
+    DEGRADED_NUM_PREDICT: int = 150
+    OLLAMA_FALLBACK_MODEL: str = os.getenv("OLLAMA_FALLBACK_MODEL", "")  # empty: level 4 keeps OLLAMA_MODEL
+    
+    # Detected languages below this confidence fall back to English
+    LANGUAGE_ID_MIN_CONFIDENCE: float = 0.7
+    
+    # Coalesce identical in-flight chat questions into one generation
+    SINGLEFLIGHT_ENABLED: bool = True
+    
+    # Conversation memory (per user_id, LRU-evicted)
+    CONVERSATION_MAX_SESSIONS: int = 10000
+    CONVERSATION_MEMORY_CAP_MB: int = 64
+    CONVERSATION_RECENT_TOKENS: int = 400
+    CONVERSATION_MAX_RECENT_TURNS: int = 6
+    CONVERSATION_SUMMARY_TOKENS: int = 150
+    
+    # Slow-request profiler (debug endpoints are mounted only when a token is set)
+    PROFILER_ENABLED: bool = False
+    PROFILER_TOKEN: str = os.getenv("PROFILER_TOKEN", "")
+    PROFILER_SLO_MS: float = 5000.0
+    PROFILER_INTERVAL_MS: float = 10.0
+    PROFILER_MAX_CAPTURES: int = 50
+    PROFILER_DIR: str = "data/profiles"
+    
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
@@ -6,6 +6,8 @@ from loguru import logger
 
 from app.core.config import settings
 from app.api.v1.endpoints import chat as chat_endpoints
+from telemetry.http import instrument_app
+from telemetry.profiler import install_profiler
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -33,11 +35,27 @@ app.include_router(
     tags=["chat"]
 )
 
+# Latency metrics and Prometheus /metrics endpoint
+instrument_app(app)
+
+# Opt-in stack sampling of requests slower than the SLO
+install_profiler(
+    app,
+    capture_dir=settings.PROFILER_DIR,
+    token=settings.PROFILER_TOKEN,
+    enabled=settings.PROFILER_ENABLED,
+    slo_ms=settings.PROFILER_SLO_MS,
+    interval_ms=settings.PROFILER_INTERVAL_MS,
+    max_captures=settings.PROFILER_MAX_CAPTURES
+)
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup."""
     logger.info("Starting WomenWealthWave.AI backend...")
-    # Any initialization code can go here
+    # Open the shared retrieval core (index + embedder) before the first request
+    from retrieval import get_retrieval_core
+    logger.info(f"Retrieval core: {get_retrieval_core().stats()}")
     logger.info("Backend services initialized")
 
 @app.on_event("shutdown")
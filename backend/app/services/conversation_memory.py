@@ -0,0 +1,241 @@
+import re
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+
+# (role, content, estimated tokens)
+Turn = Tuple[str, str, int]
+
+_FOLLOW_UP_MARKERS = frozenset({
+    "it", "its", "this", "that", "these", "those", "they", "them", "there",
+    "same", "more", "also", "else", "above", "one", "which",
+})
+_STOPWORDS = frozenset({
+    "what", "when", "where", "which", "who", "whom", "whose", "why", "how", "the", "and",
+    "for", "with", "from", "into", "about", "should", "would", "could", "can", "will",
+    "does", "did", "have", "has", "had", "are", "was", "were", "been", "being", "your",
+    "you", "yours", "mine", "this", "that", "these", "those", "there", "their", "them",
+    "they", "then", "than", "some", "any", "much", "many", "more", "most", "very",
+    "just", "tell", "explain", "please", "want", "need", "know", "like", "also",
+})
+_WORD = re.compile(r"[A-Za-zऀ-ൿ₹0-9]+")
+_FIRST_SENTENCE = re.compile(r"^(.+?[.!?])(\s|$)", re.DOTALL)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def _gist(role: str, content: str, max_chars: int = 160) -> str:
+    """One-line gist of a turn for the rolling summary."""
+    content = " ".join(content.replace("English Response:", "").split())
+    match = _FIRST_SENTENCE.match(content)
+    sentence = match.group(1) if match else content
+    if len(sentence) > max_chars:
+        sentence = sentence[:max_chars].rsplit(" ", 1)[0] + "..."
+    speaker = "User asked" if role == "user" else "Assistant said"
+    return f"{speaker}: {sentence}"
+
+
+class ConversationSession:
+    """Recent turns kept verbatim plus an incrementally maintained summary of older ones."""
+
+    __slots__ = ("turns", "recent_tokens", "summary_lines", "summary_tokens", "size_bytes")
+
+    def __init__(self):
+        self.turns: Deque[Turn] = deque()
+        self.recent_tokens = 0
+        self.summary_lines: Deque[str] = deque()
+        self.summary_tokens = 0
+        self.size_bytes = 0
+
+    @property
+    def summary(self) -> str:
+        return " ".join(self.summary_lines)
+
+    def last_user_message(self) -> Optional[str]:
+        for role, content, _ in reversed(self.turns):
+            if role == "user":
+                return content
+        return None
+
+
+class ConversationStore:
+    """
+    Server-side conversation memory keyed by user_id.
+
+    Each session keeps its last turns verbatim within a token budget; turns
+    that fall out of the window are folded into a bounded rolling summary
+    once, when they are evicted, so the summary is never recomputed.
+    Sessions are evicted least-recently-used when either the session count
+    or the total memory cap is exceeded.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 10000,
+        memory_cap_bytes: int = 64 * 1024 * 1024,
+        recent_token_budget: int = 400,
+        max_recent_turns: int = 6,
+        summary_token_budget: int = 150
+    ):
+        self.max_sessions = max_sessions
+        self.memory_cap_bytes = memory_cap_bytes
+        self.recent_token_budget = recent_token_budget
+        self.max_recent_turns = max_recent_turns
+        self.summary_token_budget = summary_token_budget
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def _session(self, user_id: str) -> ConversationSession:
+        session = self._sessions.get(user_id)
+        if session is None:
+            session = self._sessions[user_id] = ConversationSession()
+        else:
+            self._sessions.move_to_end(user_id)
+        return session
+
+    def has_session(self, user_id: str) -> bool:
+        with self._lock:
+            return user_id in self._sessions
+
+    def append(self, user_id: str, role: str, content: str) -> None:
+        """Record a turn, folding the oldest turns into the summary as needed."""
+        with self._lock:
+            session = self._session(user_id)
+            before = session.size_bytes
+            self._append(session, role, content)
+            self._total_bytes += session.size_bytes - before
+            self._evict()
+
+    def seed(self, user_id: str, history: List[Dict[str, str]]) -> None:
+        """Initialize a new session from client-sent history; ignored once the session exists."""
+        if not history:
+            return
+        with self._lock:
+            if user_id in self._sessions:
+                return
+            session = self._session(user_id)
+            for message in history:
+                self._append(session, message.get("role", "user"), message.get("content", ""))
+            self._total_bytes += session.size_bytes
+            self._evict()
+
+    def _append(self, session: ConversationSession, role: str, content: str) -> None:
+        tokens = estimate_tokens(content)
+        session.turns.append((role, content, tokens))
+        session.recent_tokens += tokens
+        session.size_bytes += len(content)
+
+        while len(session.turns) > 1 and (
+            session.recent_tokens > self.recent_token_budget
+            or len(session.turns) > self.max_recent_turns
+        ):
+            old_role, old_content, old_tokens = session.turns.popleft()
+            session.recent_tokens -= old_tokens
+            session.size_bytes -= len(old_content)
+
+            line = _gist(old_role, old_content)
+            session.summary_lines.append(line)
+            session.summary_tokens += estimate_tokens(line)
+            session.size_bytes += len(line)
+            while session.summary_tokens > self.summary_token_budget and len(session.summary_lines) > 1:
+                dropped = session.summary_lines.popleft()
+                session.summary_tokens -= estimate_tokens(dropped)
+                session.size_bytes -= len(dropped)
+
+    def _evict(self) -> None:
+        while self._sessions and (
+            len(self._sessions) > self.max_sessions or self._total_bytes > self.memory_cap_bytes
+        ):
+            user_id, session = self._sessions.popitem(last=False)
+            self._total_bytes -= session.size_bytes
+            logger.debug(f"Evicted conversation session {user_id}")
+
+    def history(self, user_id: str) -> Tuple[str, List[Dict[str, str]]]:
+        """Return (summary, recent turns as chat messages) for a session."""
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if session is None:
+                return "", []
+            self._sessions.move_to_end(user_id)
+            return session.summary, [
+                {"role": role, "content": content} for role, content, _ in session.turns
+            ]
+
+    def rewrite_query(self, user_id: str, query: str) -> str:
+        """Expand a follow-up question with the topic of the previous user turn."""
+        with self._lock:
+            session = self._sessions.get(user_id)
+            previous = session.last_user_message() if session else None
+        return rewrite_follow_up(query, previous)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._total_bytes,
+                "max_sessions": self.max_sessions,
+                "memory_cap_bytes": self.memory_cap_bytes,
+            }
+
+
+def rewrite_follow_up(query: str, previous_user_message: Optional[str], max_terms: int = 6) -> str:
+    """
+    Make a follow-up question self-contained for retrieval.
+
+    Short questions or ones that point back ("what about its interest rate?")
+    get the salient terms of the previous user message appended; standalone
+    questions are returned unchanged.
+    """
+    if not previous_user_message:
+        return query
+    words = [w.lower() for w in _WORD.findall(query)]
+    if len(words) > 4 and not _FOLLOW_UP_MARKERS.intersection(words):
+        return query
+
+    seen = set(words)
+    terms = []
+    for word in _WORD.findall(previous_user_message):
+        lowered = word.lower()
+        if len(lowered) < 3 or lowered in _STOPWORDS or lowered in seen:
+            continue
+        seen.add(lowered)
+        terms.append(word)
+        if len(terms) >= max_terms:
+            break
+    return f"{query} ({' '.join(terms)})" if terms else query
+
+
+def bounded_history(
+    history: List[Dict[str, str]],
+    token_budget: int,
+    max_turns: int
+) -> List[Dict[str, str]]:
+    """Last turns of a client-sent history that fit the token budget (used without user_id)."""
+    kept: List[Dict[str, str]] = []
+    used = 0
+    for message in reversed(history[-max_turns:]):
+        tokens = estimate_tokens(message.get("content", ""))
+        if kept and used + tokens > token_budget:
+            break
+        kept.append(message)
+        used += tokens
+    kept.reverse()
+    return kept
+
+
+# Global instance
+conversation_store = ConversationStore(
+    max_sessions=settings.CONVERSATION_MAX_SESSIONS,
+    memory_cap_bytes=settings.CONVERSATION_MEMORY_CAP_MB * 1024 * 1024,
+    recent_token_budget=settings.CONVERSATION_RECENT_TOKENS,
+    max_recent_turns=settings.CONVERSATION_MAX_RECENT_TURNS,
+    summary_token_budget=settings.CONVERSATION_SUMMARY_TOKENS
+)
@@ -0,0 +1,172 @@
+"""
+In-process language identification for chat messages.
+
+Native-script messages are classified by Unicode block. Latin-script
+messages (English or romanized Hindi/Kannada/Tamil/Telugu) are scored with a
+character n-gram model: n-grams are extracted with array operations and a
+(languages x n-grams) log-probability table built once at import turns
+scoring into a single gather-and-sum. Results are LRU-cached, so
+repeated messages cost a dictionary lookup.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Tuple
+
+import numpy as np
+
+ENGLISH = "english"
+LANGUAGES: Tuple[str, ...] = (ENGLISH, "hindi", "kannada", "tamil", "telugu")
+
+# Character n-grams over a 27-symbol alphabet (a-z plus space) index the
+# table directly: 27 unigrams + 27^2 bigrams + 27^3 trigrams, no hashing.
+ALPHABET_SIZE = 27
+_UNIGRAM_OFFSET = 0
+_BIGRAM_OFFSET = ALPHABET_SIZE
+_TRIGRAM_OFFSET = _BIGRAM_OFFSET + ALPHABET_SIZE ** 2
+NUM_FEATURES = _TRIGRAM_OFFSET + ALPHABET_SIZE ** 3
+
+# Byte -> symbol code: letters 1-26, everything else 0 (space)
+_CODE_TABLE = np.zeros(256, dtype=np.int64)
+_CODE_TABLE[np.frombuffer(b"abcdefghijklmnopqrstuvwxyz", dtype=np.uint8)] = np.arange(1, 27)
+
+_SCRIPT_RANGES: Tuple[Tuple[str, int, int], ...] = (
+    ("hindi", 0x0900, 0x097F),
+    ("tamil", 0x0B80, 0x0BFF),
+    ("telugu", 0x0C00, 0x0C7F),
+    ("kannada", 0x0C80, 0x0CFF),
+)
+
+# Seed text per language (romanized for the Indian languages), kept short:
+# the table only has to separate five languages on finance chat messages.
+_SEED_TEXT: Dict[str, str] = {
+    ENGLISH: (
+        "how should i start investing with a small amount of money what is the best way to save "
+        "every month which government schemes are available for women can you explain mutual funds "
+        "and fixed deposits is it safe to invest in gold how do i plan a budget for my family "
+        "what are the benefits of a savings account should i take a loan for my business "
+        "how much interest will i get tell me about insurance and retirement planning"
+    ),
+    "hindi": (
+        "mujhe paisa kaise bachana chahiye kya main har mahine nivesh kar sakti hoon mera budget "
+        "kaise banaye sarkari yojana mahilaon ke liye kaun si hai mujhe loan chahiye business ke liye "
+        "byaaj kitna milega kya sona kharidna sahi hai meri beti ke liye kaunsi scheme achhi hai "
+        "bachat khata kaise kholna hai paise ko kahan lagana chahiye mujhe samjhao"
+    ),
+    "kannada": (
+        "nanage hana hege ulisabeku prati tingalu hoodike maadabahuda nanna budget hege maadabeku "
+        "mahileyarige yaavudu sarkaari yojane ide nanage saala beku vyavahaarakke baddi eshtu "
+        "sigutte chinna kollodu olleyada nanna magalige yaava yojane chennagide ulitaaya khaate "
+        "hege teregeyabeku hanavannu elli hoodike maadabeku tiLisi"
+    ),
+    "tamil": (
+        "enakku panam eppadi semikkanum ovvoru maadhamum muthaleedu seiyalaama en budget eppadi "
+        "podanum pengalukku enna arasu thittam irukku enakku kadan venum thozhilukku vatti "
+        "evvalavu kidaikkum thangam vaanguvadhu nalladha en magalukku endha thittam nalladhu "
+        "semippu kanakku eppadi thirakkanum panatha enga podalaam sollunga"
+    ),
+    "telugu": (
+        "naaku dabbu ela podupu cheyali prati nela pettubadi pettavachaa naa budget ela "
+        "veyyali mahilalaku emi prabhutva pathakaalu unnayi naaku runam kavali vyaapaaraniki "
+        "vaddi entha vastundi bangaram konadam manchidaa naa kuthuriki edi manchi pathakam "
+        "podupu khaata ela teravali dabbu ekkada pettali cheppandi"
+    ),
+}
+
+
+@dataclass(frozen=True)
+class LanguageGuess:
+    """Detected language and a confidence in [0, 1]."""
+    language: str
+    confidence: float
+    script: str  # "native" or "latin"
+
+
+def _ngram_features(text: str) -> np.ndarray:
+    """Feature indices of all unigrams, bigrams and trigrams not made only of spaces."""
+    raw = np.frombuffer(text.lower().encode("ascii", "ignore"), dtype=np.uint8)
+    codes = np.concatenate(([0], _CODE_TABLE[raw], [0]))
+    # Collapse runs of separators into a single space
+    keep = np.ones(len(codes), dtype=bool)
+    keep[1:] = (codes[1:] != 0) | (codes[:-1] != 0)
+    codes = codes[keep]
+    if len(codes) < 3:
+        return np.empty(0, dtype=np.int64)
+
+    c0, c1, c2 = codes[:-2], codes[1:-1], codes[2:]
+    unigrams = codes[codes != 0] + _UNIGRAM_OFFSET
+    bigram_codes = codes[:-1] * ALPHABET_SIZE + codes[1:]
+    bigrams = bigram_codes[bigram_codes != 0] + _BIGRAM_OFFSET
+    trigrams = (c0 * ALPHABET_SIZE ** 2 + c1 * ALPHABET_SIZE + c2)[c1 != 0] + _TRIGRAM_OFFSET
+    return np.concatenate((unigrams, bigrams, trigrams))
+
+
+def _build_profile_table() -> np.ndarray:
+    """Add-one smoothed log-probabilities per (language, n-gram)."""
+    table = np.ones((len(LANGUAGES), NUM_FEATURES), dtype=np.float32)
+    for row, language in enumerate(LANGUAGES):
+        table[row] += np.bincount(_ngram_features(_SEED_TEXT[language]), minlength=NUM_FEATURES)
+    table /= table.sum(axis=1, keepdims=True)
+    return np.log(table).astype(np.float32)
+
+
+# Precomputed once at import: 5 x 20439 float32 (~400 KiB)
+_PROFILE_TABLE = _build_profile_table()
+
+
+def _script_language(text: str) -> Tuple[str, float]:
+    counts = dict.fromkeys((name for name, _, _ in _SCRIPT_RANGES), 0)
+    letters = 0
+    for ch in text:
+        if not ch.isalpha():
+            continue
+        letters += 1
+        code = ord(ch)
+        if code < 0x0900:
+            continue
+        for name, low, high in _SCRIPT_RANGES:
+            if low <= code <= high:
+                counts[name] += 1
+                break
+    best = max(counts, key=counts.get)
+    return best, (counts[best] / letters if letters else 0.0)
+
+
+@lru_cache(maxsize=8192)
+def identify_language(text: str) -> LanguageGuess:
+    """
+    Identify the language of a chat message.
+
+    Args:
+        text: The user's message
+
+    Returns:
+        LanguageGuess with one of LANGUAGES
+    """
+    language, share = _script_language(text)
+    if share >= 0.3:
+        return LanguageGuess(language, round(min(1.0, share + 0.3), 3), "native")
+
+    features = _ngram_features(text)
+    if not len(features):
+        return LanguageGuess(ENGLISH, 0.0, "latin")
+
+    # Sum of log-probabilities of every n-gram, for all languages at once
+    scores = _PROFILE_TABLE[:, features].sum(axis=1)
+    # Softmax over per-n-gram average log-likelihoods as a rough confidence
+    scores = scores / len(features)
+    probs = np.exp((scores - scores.max()) * 8.0)
+    probs /= probs.sum()
+    best = int(np.argmax(probs))
+    return LanguageGuess(LANGUAGES[best], round(float(probs[best]), 3), "latin")
+
+
+def detect_language(text: str, min_confidence: float = 0.0, default: str = ENGLISH) -> str:
+    """
+    Shortcut returning only the language name.
+
+    Guesses below `min_confidence` (typical of very short messages such as
+    "PPF?") return `default` instead.
+    """
+    guess = identify_language(text)
+    return guess.language if guess.confidence >= min_confidence else default
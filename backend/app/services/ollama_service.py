@@ -1,7 +1,9 @@
+import json
 import httpx
 from typing import Dict, Any, List, Optional
 from loguru import logger
 from app.core.config import settings
+from telemetry import stage_timer, record_tokens
 
 class OllamaService:
     def __init__(self):
@@ -9,61 +11,98 @@ class OllamaService:
         self.model = settings.OLLAMA_MODEL
         self.client = httpx.AsyncClient(timeout=120.0)  # Increased timeout to 2 minutes
         
-    async def generate(self, prompt: str, context: str = "") -> str:
+    def _system_prompt(self, context: str, language: str, summary: str = "") -> str:
+        """Pick the system prompt template for the detected language."""
+        if language == "english":
+            language_note = ""
+        else:
+            language_note = (
+                f"The user writes in {language.capitalize()} (possibly in Latin letters). "
+                "Answer in plain English only.\n"
+            )
+        return (
+            "You are WomenWealthWave, an AI financial advisor for women. "
+            "Answer ONLY finance questions: budgeting, investing, banking, loans, schemes, business.\n"
+            "Keep answers concise: 20-400 words maximum. Be clear and direct. "
+            "No headings or extra sections.\n"
+            f"{language_note}\n"
+            + (f"Earlier in this conversation: {summary}\n\n" if summary else "")
+            + f"Context:\n{context}\n\n"
+            "Use the context above. Be brief and helpful."
+        )
+    
+    @stage_timer("ollama.generate")
+    async def generate(
+        self,
+        prompt: str,
+        context: str = "",
+        language: str = "english",
+        history: Optional[List[Dict[str, str]]] = None,
+        summary: str = "",
+        model: Optional[str] = None,
+        num_predict: int = 300
+    ) -> str:
         """Generate a response using the Ollama API with the given prompt and context.
         
+        The answer is streamed and assembled here, so cancelling this coroutine
+        (client disconnect, deadline) closes the connection and Ollama stops
+        decoding instead of finishing an answer nobody will read.
+        
         Args:
             prompt: The user's input prompt.
             context: Additional context to include in the system message.
+            language: The user's detected language, used to pick the prompt template.
+            history: Recent conversation turns, sent verbatim before the prompt.
+            summary: Rolling summary of older turns, added to the system message.
+            model: Model to use instead of the configured one (e.g. a smaller one under load).
+            num_predict: Maximum number of tokens to generate.
             
         Returns:
             The generated response from the model.
         """
-        system_prompt = (
-            "You are WomenWealthWave, an AI financial advisor for women. "
-            "Answer ONLY finance questions: budgeting, investing, banking, loans, schemes, business.\n"
-            "Keep answers concise: 20-400 words maximum. Be clear and direct.\n"
-            "VERY IMPORTANT: You must ALWAYS follow this exact output format.\n"
-            "1) First, detect the user's language from their message.\n"
-            "2) If the detected language is NOT English, reply in EXACTLY TWO SECTIONS:\n"
-            "   English Response:\n"
-            "   <clear English answer here>\n\n"
-            "   Pronunciation (<Detected Language>):\n"
-            "   <write the SAME English answer again, but transliterated in Latin letters so it sounds natural in that language (e.g. Hinglish for Hindi, Kanglish for Kannada).>\n"
-            "3) If the user writes in English, reply with ONLY the first section:\n"
-            "   English Response:\n"
-            "   <clear English answer here>\n\n"
-            "Do NOT add any extra sections, titles, or explanations.\n\n"
-            f"Context:\n{context}\n\n"
-            "Use the context above. Be brief and helpful."
-        )
+        system_prompt = self._system_prompt(context, language, summary)
         
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": prompt}
-        ]
+        messages = [{"role": "system", "content": system_prompt}]
+        messages.extend(
+            {"role": turn["role"], "content": turn["content"]} for turn in (history or [])
+        )
+        messages.append({"role": "user", "content": prompt})
+        model = model or self.model
         
         try:
-            response = await self.client.post(
+            parts = []
+            async with self.client.stream(
+                "POST",
                 f"{self.base_url}/api/chat",
                 json={
-                    "model": self.model,
+                    "model": model,
                     "messages": messages,
-                    "stream": False,
+                    "stream": True,
                     "options": {
                         "temperature": 0.7,
                         "top_p": 0.9,
                         "num_ctx": 1024,  # Smaller context for faster processing
-                        "num_predict": 300,  # Max ~400 words (300 tokens ≈ 400 words)
+                        "num_predict": num_predict,  # 300 tokens ≈ 400 words
                         "top_k": 40,  # Limit vocabulary for faster generation
                         "repeat_penalty": 1.1  # Avoid repetition
                     }
                 }
-            )
+            ) as response:
+                if response.is_error:
+                    await response.aread()
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise Exception(chunk["error"])
+                    parts.append(chunk.get("message", {}).get("content", ""))
+                    if chunk.get("done"):
+                        record_tokens(model, chunk.get("prompt_eval_count"), chunk.get("eval_count"))
+                        break
             
-            response.raise_for_status()
-            result = response.json()
-            return result.get("message", {}).get("content", "I'm sorry, I couldn't generate a response. Please try again.")
+            return "".join(parts) or "I'm sorry, I couldn't generate a response. Please try again."
             
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error from Ollama API: {str(e)}")
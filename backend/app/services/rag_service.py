@@ -1,46 +1,228 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from loguru import logger
 
 from app.services.vector_store import vector_store
 from app.services.ollama_service import ollama_service
+from app.services.language_id import detect_language
+from app.services.transliteration import localize_response, clean_english_answer
+from app.services.conversation_memory import (
+    conversation_store,
+    bounded_history,
+    rewrite_follow_up,
+)
+from app.core.config import settings
+from telemetry import run_in_threadpool, stage_timer
+from retrieval import get_retrieval_core
+from faq import get_answer_library, segment_key
+from serving import CancelToken, RequestCancelled, SingleFlight, normalize_question, question_key, run_stage
+from serving import DegradationController, EXTRACTIVE, FEWER_DOCS, NORMAL, SHORT_ANSWERS, SMALL_MODEL, extractive_answer
 
 class RAGService:
     def __init__(self):
         self.vector_store = vector_store
         self.llm = ollama_service
+        self.memory = conversation_store
+        # Identical questions in flight at the same time share one generation
+        self.inflight = SingleFlight("rag_service.generate")
+        # Sheds work (documents, tokens, model size, generation) as load rises
+        self.degradation = DegradationController(
+            "rag_service",
+            p95_slo_s=settings.DEGRADATION_P95_SLO_S,
+            max_inflight=settings.DEGRADATION_MAX_INFLIGHT,
+            max_level=settings.DEGRADATION_MAX_LEVEL,
+            step_up_s=settings.DEGRADATION_STEP_UP_S,
+            step_down_s=settings.DEGRADATION_STEP_DOWN_S,
+            enabled=settings.DEGRADATION_ENABLED
+        )
+        # Precomputed answers to frequent first-turn questions (None when FAQ_ENABLED is off)
+        self.library = get_answer_library()
     
-    async def generate_response(self, query: str, chat_history: List[Dict[str, str]] = None) -> Dict[str, Any]:
+    async def generate_response(
+        self,
+        query: str,
+        chat_history: List[Dict[str, str]] = None,
+        language: Optional[str] = None,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Generate a response using RAG (Retrieval-Augmented Generation).
         
+        The LLM only writes the English answer; the pronunciation section for
+        non-English users is produced locally by the transliteration stage.
+        
+        With a user_id the conversation is kept server-side (client history is
+        only used to seed a new session); without one, the tail of the client
+        history that fits the token budget is used.
+        
+        A first-turn question with a fresh answer in the precomputed library
+        is answered from it. Otherwise concurrent requests with the same
+        normalized question, language and conversation state are answered by
+        a single retrieval and generation.
+        Under load the degradation controller picks a cheaper level for the
+        request, which is reported as `degradation_level`.
+        
         Args:
             query: The user's query.
             chat_history: List of previous messages in the conversation.
+            language: The user's language; detected from the query if omitted.
+            user_id: Key of the server-side conversation session.
             
         Returns:
             A dictionary containing the response and relevant context.
         """
         try:
-            # 1. Retrieve relevant context from the vector store
-            relevant_docs = self.retrieve_relevant_context(query)
+            # 1. Resolve conversation memory and rewrite follow-ups for retrieval
+            summary, history, retrieval_query = self._conversation(query, chat_history, user_id)
             
-            # 2. Format the context for the prompt
-            context = self._format_context(relevant_docs)
+            language = language or detect_language(query, settings.LANGUAGE_ID_MIN_CONFIDENCE)
+            
+            # Library answers assume no conversation to follow up on
+            segment = segment_key("chat", language)
+            use_library = self.library is not None and not history and not summary
+            stored = await run_in_threadpool(self._lookup_library, query, segment) if use_library else None
+            
+            if stored is not None:
+                result, level = stored.response, NORMAL
+            else:
+                # 2-5. Retrieve, generate and localize, sharing identical in-flight requests
+                level = self.degradation.admit()
+                
+                async def answer():
+                    # Only the call that does the work counts as load, not requests joining it
+                    with self.degradation.track():
+                        return await self._answer(query, retrieval_query, language, history, summary, level)
+                
+                if settings.SINGLEFLIGHT_ENABLED:
+                    key = question_key(query, normalize_question(retrieval_query), language, summary, history, level)
+                    result = await self.inflight.do(key, answer)
+                else:
+                    result = await answer()
+                
+                # A full-quality answer to a library question replaces its stale entry
+                if use_library and level == NORMAL:
+                    await run_in_threadpool(self._refresh_library, query, segment, result)
             
-            # 3. Generate a response using the LLM with the retrieved context
-            response = await self.llm.generate(query, context)
+            if user_id:
+                self.memory.append(user_id, "user", query)
+                self.memory.append(user_id, "assistant", clean_english_answer(result["answer"]))
             
             return {
-                "response": response,
-                "context": relevant_docs,
-                "sources": [doc["metadata"].get("source", "") for doc in relevant_docs if doc["metadata"].get("source")]
+                "response": result["response"],
+                "language": language,
+                "context": result["context"],
+                "sources": list(result["sources"]),
+                "degradation_level": level,
+                "library_match": stored.match if stored is not None else None
             }
             
+        except RequestCancelled:
+            raise
         except Exception as e:
             logger.error(f"Error in RAG pipeline: {str(e)}")
             logger.exception("Full RAG error traceback:")
             raise Exception(f"RAG pipeline error: {str(e)}")
     
+    async def _answer(
+        self,
+        query: str,
+        retrieval_query: str,
+        language: str,
+        history: List[Dict[str, str]],
+        summary: str,
+        level: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Retrieve context, generate the answer and localize it for one question.
+        
+        Each stage runs under its STAGE_DEADLINES_S budget within the overall
+        REQUEST_DEADLINE_S; cancelling the coroutine closes the Ollama stream.
+        Degradation levels trim the retrieved documents, the token budget and
+        the model, and at EXTRACTIVE answer from the top document without the LLM.
+        """
+        token = CancelToken(settings.REQUEST_DEADLINE_S)
+        
+        # 2. Retrieve relevant context from the vector store (embedding and search
+        # block, so they run in the thread pool where the deadline can stop waiting)
+        relevant_docs = await run_stage(
+            run_in_threadpool(self.retrieve_relevant_context, retrieval_query, top_k=1 if level >= FEWER_DOCS else 2),
+            "retrieve",
+            token,
+            settings.STAGE_DEADLINES_S.get("retrieve")
+        )
+        
+        # 3. Format the context for the prompt
+        with stage_timer("rag_service.build_context"):
+            context = self._format_context(relevant_docs)
+        
+        # 4. Generate a response using the LLM with the retrieved context
+        if level >= EXTRACTIVE:
+            answer = extractive_answer([doc["text"] for doc in relevant_docs]) or (
+                "I'm answering a lot of questions right now. Please try again in a few minutes."
+            )
+        else:
+            answer = await run_stage(
+                self.llm.generate(
+                    query, context, language=language, history=history, summary=summary,
+                    model=settings.OLLAMA_FALLBACK_MODEL if level >= SMALL_MODEL else None,
+                    num_predict=settings.DEGRADED_NUM_PREDICT if level >= SHORT_ANSWERS else 300
+                ),
+                "generate",
+                token,
+                settings.STAGE_DEADLINES_S.get("generate")
+            )
+        
+        # 5. Add the locally transliterated section for non-English users
+        with stage_timer("rag_service.localize"):
+            response = localize_response(answer, language)
+        
+        return {
+            "answer": answer,
+            "response": response,
+            "context": relevant_docs,
+            "sources": [doc["metadata"].get("source", "") for doc in relevant_docs if doc["metadata"].get("source")]
+        }
+    
+    def _lookup_library(self, query: str, segment: str):
+        try:
+            return self.library.lookup(query, segment)
+        except Exception as e:
+            logger.warning(f"Answer library lookup failed: {str(e)}")
+            return None
+    
+    def _refresh_library(self, query: str, segment: str, result: Dict[str, Any]) -> None:
+        try:
+            self.library.refresh(
+                query,
+                segment,
+                result,
+                sources=[(doc.get("id"), doc["text"]) for doc in result["context"]],
+                corpus_generation=get_retrieval_core().vector_store.storage.generation,
+                model=settings.OLLAMA_MODEL
+            )
+        except Exception as e:
+            logger.warning(f"Could not refresh the answer library: {str(e)}")
+    
+    def _conversation(
+        self,
+        query: str,
+        chat_history: Optional[List[Dict[str, str]]],
+        user_id: Optional[str]
+    ):
+        """Return (summary, recent turns, retrieval query) for this request."""
+        if user_id:
+            self.memory.seed(user_id, chat_history or [])
+            summary, history = self.memory.history(user_id)
+            return summary, history, self.memory.rewrite_query(user_id, query)
+        
+        history = bounded_history(
+            chat_history or [],
+            settings.CONVERSATION_RECENT_TOKENS,
+            settings.CONVERSATION_MAX_RECENT_TURNS
+        )
+        previous = next((m["content"] for m in reversed(history) if m.get("role") == "user"), None)
+        return "", history, rewrite_follow_up(query, previous)
+    
+    @stage_timer("rag_service.retrieve")
     def retrieve_relevant_context(self, query: str, top_k: int = 2) -> List[Dict[str, Any]]:
         """
         Retrieve relevant context from the vector store.
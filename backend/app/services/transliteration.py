@@ -0,0 +1,170 @@
+"""
+Post-generation localization for non-English users.
+
+The LLM writes only the English answer; this module renders the Latin-script
+"Pronunciation" section locally from per-language mapping tables (Hinglish,
+Kanglish, Tanglish, Tenglish). Finance terms that people already use in
+English (SIP, mutual fund, EMI, ...) are left as they are, which is how
+code-mixed finance talk actually sounds.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Optional, Pattern
+
+ENGLISH = "english"
+
+LANGUAGE_NAMES: Dict[str, str] = {
+    ENGLISH: "English",
+    "hindi": "Hindi",
+    "kannada": "Kannada",
+    "tamil": "Tamil",
+    "telugu": "Telugu",
+}
+
+# English word or phrase -> Latin-script rendering. Multi-word entries win
+# over single words because the compiled pattern tries longer keys first.
+_MAPPINGS: Dict[str, Dict[str, str]] = {
+    "hindi": {
+        "every month": "har mahine", "every year": "har saal", "every day": "har din",
+        "emergency fund": "emergency fund", "government scheme": "sarkari yojana",
+        "government schemes": "sarkari yojanayein", "long term": "lambe samay",
+        "money": "paisa", "savings": "bachat", "saving": "bachat", "save": "bachaayein",
+        "investment": "nivesh", "investments": "nivesh", "invest": "nivesh karein",
+        "month": "mahina", "months": "mahine", "monthly": "har mahine",
+        "year": "saal", "years": "saal", "week": "hafta", "daily": "rozana",
+        "income": "aamdani", "salary": "tankhwah", "expense": "kharcha", "expenses": "kharche",
+        "interest": "byaaj", "government": "sarkar", "scheme": "yojana", "schemes": "yojanayein",
+        "women": "mahilaon", "woman": "mahila", "girl": "beti", "girls": "ladkiyan", "daughter": "beti",
+        "family": "parivaar", "future": "bhavishya", "children": "bachche",
+        "education": "shiksha", "health": "swasthya", "gold": "sona", "land": "zameen",
+        "business": "vyapaar", "tax": "kar", "loan": "karz", "debt": "karz",
+        "insurance": "bima", "risk": "jokhim", "goal": "lakshya", "goals": "lakshya",
+        "safe": "surakshit", "important": "zaroori", "small": "chhota", "big": "bada",
+        "first": "pehle", "always": "hamesha", "never": "kabhi nahi", "start": "shuru karein",
+        "help": "madad", "and": "aur", "or": "ya", "but": "lekin", "because": "kyunki",
+        "if": "agar", "very": "bahut", "also": "bhi", "yes": "haan", "no": "nahi",
+    },
+    "kannada": {
+        "every month": "prati tingalu", "every year": "prati varsha", "every day": "prati dina",
+        "government scheme": "sarkaari yojane", "government schemes": "sarkaari yojanegalu",
+        "money": "hana", "savings": "ulitaaya", "saving": "ulitaaya", "save": "ulisi",
+        "investment": "hoodike", "investments": "hoodikegalu", "invest": "hoodike maadi",
+        "month": "tingalu", "months": "tingalugalu", "monthly": "prati tingalu",
+        "year": "varsha", "years": "varshagalu", "week": "vaara", "daily": "dina nitya",
+        "income": "aadaaya", "salary": "sambala", "expense": "kharchu", "expenses": "kharchugalu",
+        "interest": "baddi", "government": "sarkaara", "scheme": "yojane", "schemes": "yojanegalu",
+        "women": "mahileyaru", "woman": "mahile", "girl": "hudugi", "girls": "hudugiyaru", "daughter": "magalu",
+        "family": "kutumba", "future": "bhavishya", "children": "makkalu",
+        "education": "shikshana", "health": "aarogya", "gold": "chinna", "land": "bhoomi",
+        "business": "vyavahaara", "tax": "terige", "loan": "saala", "debt": "saala",
+        "insurance": "vime", "risk": "apaaya", "goal": "guri", "goals": "gurigalu",
+        "safe": "surakshita", "important": "mukhya", "small": "chikka", "big": "dodda",
+        "first": "modalu", "always": "yaavaaglu", "never": "endigu illa", "start": "praarambhisi",
+        "help": "sahaaya", "and": "mattu", "or": "athava", "but": "aadare", "because": "yaakendare",
+        "very": "tumba", "also": "kooda", "yes": "haudu", "no": "illa",
+    },
+    "tamil": {
+        "every month": "ovvoru maadhamum", "every year": "ovvoru varudamum", "every day": "dhinamum",
+        "government scheme": "arasu thittam", "government schemes": "arasu thittangal",
+        "money": "panam", "savings": "semippu", "saving": "semippu", "save": "semiyungal",
+        "investment": "muthaleedu", "investments": "muthaleedugal", "invest": "muthaleedu seiyungal",
+        "month": "maadham", "months": "maadhangal", "monthly": "maadhaandhira",
+        "year": "varudam", "years": "varudangal", "week": "vaaram", "daily": "dhinasari",
+        "income": "varumaanam", "salary": "sambalam", "expense": "selavu", "expenses": "selavugal",
+        "interest": "vatti", "government": "arasu", "scheme": "thittam", "schemes": "thittangal",
+        "women": "pengal", "woman": "penn", "girl": "ponnu", "girls": "ponnunga", "daughter": "magal",
+        "family": "kudumbam", "future": "edhirkaalam", "children": "kuzhandhaigal",
+        "education": "kalvi", "health": "aarogyam", "gold": "thangam", "land": "nilam",
+        "business": "thozhil", "tax": "vari", "loan": "kadan", "debt": "kadan",
+        "insurance": "kaappeedu", "risk": "abaayam", "goal": "ilakku", "goals": "ilakkugal",
+        "safe": "paadhukaappaana", "important": "mukkiyam", "small": "siriya", "big": "periya",
+        "first": "mudhalil", "always": "eppodhum", "never": "eppodhum illai", "start": "thodangungal",
+        "help": "udhavi", "and": "matrum", "or": "allathu", "but": "aanaal", "because": "yenendral",
+        "very": "romba", "also": "kooda", "yes": "aamaam", "no": "illai",
+    },
+    "telugu": {
+        "every month": "prati nela", "every year": "prati samvatsaram", "every day": "prati roju",
+        "government scheme": "prabhutva pathakam", "government schemes": "prabhutva pathakaalu",
+        "money": "dabbu", "savings": "podupu", "saving": "podupu", "save": "podupu cheyandi",
+        "investment": "pettubadi", "investments": "pettubadulu", "invest": "pettubadi pettandi",
+        "month": "nela", "months": "nelalu", "monthly": "nelavaari",
+        "year": "samvatsaram", "years": "samvatsaraalu", "week": "vaaram", "daily": "rojuvaari",
+        "income": "aadaayam", "salary": "jeetham", "expense": "kharchu", "expenses": "kharchulu",
+        "interest": "vaddi", "government": "prabhutvam", "scheme": "pathakam", "schemes": "pathakaalu",
+        "women": "mahilalu", "woman": "mahila", "girl": "ammayi", "girls": "ammayilu", "daughter": "kuthuru",
+        "family": "kutumbam", "future": "bhavishyattu", "children": "pillalu",
+        "education": "chaduvu", "health": "aarogyam", "gold": "bangaram", "land": "bhoomi",
+        "business": "vyaapaaram", "tax": "pannu", "loan": "runam", "debt": "appu",
+        "insurance": "bheema", "risk": "pramaadam", "goal": "lakshyam", "goals": "lakshyaalu",
+        "safe": "surakshitham", "important": "mukhyam", "small": "chinna", "big": "pedda",
+        "first": "modata", "always": "eppudu", "never": "eppudu kaadu", "start": "modalupettandi",
+        "help": "sahaayam", "and": "mariyu", "or": "leda", "but": "kaani", "because": "endukante",
+        "very": "chaala", "also": "kooda", "yes": "avunu", "no": "kaadu",
+    },
+}
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?:\n])(\s+)")
+_ENGLISH_HEADER = re.compile(r"^\s*\**\s*English Response\s*:?\**\s*", re.IGNORECASE)
+_PRONUNCIATION_SECTION = re.compile(r"\n\s*\**\s*Pronunciation\b.*", re.IGNORECASE | re.DOTALL)
+
+
+def _compile(mapping: Dict[str, str]) -> Pattern:
+    keys = sorted(mapping, key=len, reverse=True)
+    return re.compile(r"\b(" + "|".join(re.escape(k) for k in keys) + r")\b", re.IGNORECASE)
+
+
+# Precompiled once at import
+_PATTERNS: Dict[str, Pattern] = {lang: _compile(mapping) for lang, mapping in _MAPPINGS.items()}
+
+
+@lru_cache(maxsize=4096)
+def _transliterate_sentence(language: str, sentence: str) -> str:
+    mapping = _MAPPINGS[language]
+
+    def _replace(match) -> str:
+        word = match.group(0)
+        rendered = mapping[word.lower()]
+        return rendered[:1].upper() + rendered[1:] if word[:1].isupper() else rendered
+
+    rendered = _PATTERNS[language].sub(_replace, sentence)
+    return re.sub(r"[ \t]{2,}", " ", rendered)
+
+
+def transliterate(text: str, language: str) -> str:
+    """
+    Render an English answer in code-mixed Latin script for `language`.
+
+    Sentences are cached individually, so recurring phrasing (disclaimers,
+    scheme names, standard advice) is converted only once.
+    """
+    if language not in _MAPPINGS:
+        return text
+    parts = _SENTENCE_SPLIT.split(text)
+    return "".join(
+        part if part.isspace() else _transliterate_sentence(language, part)
+        for part in parts
+    )
+
+
+def clean_english_answer(text: str) -> str:
+    """Strip a section header or stray pronunciation section the model may still emit."""
+    text = _ENGLISH_HEADER.sub("", text, count=1)
+    return _PRONUNCIATION_SECTION.sub("", text).strip()
+
+
+def localize_response(english_answer: str, language: Optional[str]) -> str:
+    """
+    Build the two-section response format from an English-only answer.
+
+    English users get only the "English Response" section; others also get a
+    locally transliterated "Pronunciation (<Language>)" section.
+    """
+    answer = clean_english_answer(english_answer)
+    response = f"English Response:\n{answer}"
+    if language and language != ENGLISH and language in _MAPPINGS:
+        response += (
+            f"\n\nPronunciation ({LANGUAGE_NAMES[language]}):\n"
+            f"{transliterate(answer, language)}"
+        )
+    return response
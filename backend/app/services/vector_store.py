@@ -1,72 +1,47 @@
 import os
 from typing import List, Dict, Any, Optional
-import chromadb
-from sentence_transformers import SentenceTransformer
-import numpy as np
 from loguru import logger
 import json
 
-from app.core.config import settings
+from telemetry import stage_timer
+from retrieval import get_retrieval_core
+from rag.document_processor import DocumentChunk
 
 class VectorStore:
     def __init__(self):
-        """Initialize the vector store with ChromaDB and sentence transformer."""
-        # Create persist directory if it doesn't exist
-        os.makedirs(settings.CHROMA_DB_PATH, exist_ok=True)
-        
-        # Use the new PersistentClient API
-        self.client = chromadb.PersistentClient(
-            path=settings.CHROMA_DB_PATH
-        )
-        
-        # Initialize the embedding model
-        self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
-        self.collection_name = "financial_literacy"
-        self.collection = self._get_or_create_collection()
-    
-    def _get_or_create_collection(self):
-        """Get or create the collection in ChromaDB."""
-        try:
-            collection = self.client.get_collection(name=self.collection_name)
-            logger.info(f"Loaded existing collection: {self.collection_name}")
-        except Exception as e:
-            # Collection doesn't exist, create it
-            collection = self.client.create_collection(
-                name=self.collection_name,
-                metadata={"hnsw:space": "cosine"}
-            )
-            logger.info(f"Created new collection: {self.collection_name}")
-        return collection
+        """Chat-app view of the shared retrieval core (one index and embedder for both apps)."""
+        self.core = get_retrieval_core()
+        self.store = self.core.vector_store
+        self.collection_name = self.store.collection_name
+        logger.info(f"Using shared collection: {self.collection_name}")
     
     def add_documents(self, documents: List[Dict[str, Any]]):
         """Add documents to the vector store.
         
+        Each document is stored as one chunk of its own document, going
+        through the same dedup, registry and snapshot path as file ingestion.
+        
         Args:
             documents: List of dictionaries containing 'text', 'metadata', and 'id'.
         """
         if not documents:
             return
-            
-        texts = [doc["text"] for doc in documents]
-        embeddings = self.embedding_model.encode(texts, show_progress_bar=True)
-        
-        # Convert to list of lists for ChromaDB
-        embeddings = [embedding.tolist() for embedding in embeddings]
         
-        # Prepare data for ChromaDB
-        ids = [doc["id"] for doc in documents]
-        metadatas = [doc.get("metadata", {}) for doc in documents]
+        chunks = []
+        for doc in documents:
+            metadata = dict(doc.get("metadata", {}))
+            chunks.append(DocumentChunk(
+                content=doc["text"],
+                metadata=metadata,
+                chunk_id=doc["id"],
+                document_id=metadata.get("document_id", doc["id"])
+            ))
+        stored = self.store.add_documents(chunks)
+        self.store.publish_snapshot()
         
-        self.collection.add(
-            embeddings=embeddings,
-            documents=texts,
-            metadatas=metadatas,
-            ids=ids
-        )
-        
-        # Data is automatically persisted with PersistentClient
-        logger.info(f"Added {len(documents)} documents to the vector store.")
+        logger.info(f"Added {len(stored)} of {len(documents)} documents to the vector store.")
     
+    @stage_timer("app.vector_store.search")
     def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
         """Search for similar documents in the vector store.
         
@@ -75,31 +50,20 @@ class VectorStore:
             k: Number of results to return.
             
         Returns:
-            List of dictionaries containing the document text, metadata, and similarity score.
+            List of dictionaries containing the chunk id, document text, metadata, and cosine distance as score.
         """
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode(query, show_progress_bar=False)
-        
-        # Search in ChromaDB
-        results = self.collection.query(
-            query_embeddings=[query_embedding.tolist()],
-            n_results=min(k, 10)  # Limit to 10 results max
-        )
-        
-        # Process and return results
-        documents = []
-        for i in range(len(results["documents"][0])):
-            doc_text = results["documents"][0][i]
-            doc_metadata = results["metadatas"][0][i] if results["metadatas"] else {}
-            doc_score = results["distances"][0][i] if results["distances"] else 0.0
-            
-            documents.append({
-                "text": doc_text,
-                "metadata": doc_metadata,
-                "score": float(doc_score)
-            })
+        results = self.store.similarity_search(query, k=min(k, 10))  # Limit to 10 results max
         
-        return documents
+        # The shared store reports similarity (1 - distance / 2); callers here expect cosine distance
+        return [
+            {
+                "id": chunk.chunk_id,
+                "text": chunk.content,
+                "metadata": chunk.metadata,
+                "score": 2.0 * (1.0 - similarity)
+            }
+            for chunk, similarity in results
+        ]
     
     def load_from_directory(self, directory: str, file_extension: str = ".json"):
         """Load documents from a directory of JSON files.
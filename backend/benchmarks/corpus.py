@@ -0,0 +1,99 @@
+"""Synthetic benchmark corpus built from the knowledge base and the CSV datasets."""
+
+import csv
+import itertools
+import random
+from pathlib import Path
+from typing import Dict, List, Any
+
+from rag.segments import AGE_GROUPS, REGIONS, SHARED
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+KNOWLEDGE_BASE_DIR = BACKEND_DIR / "data" / "knowledge_base"
+DATASET_DIR = BACKEND_DIR.parent / "Dataset"
+
+# Representative user questions, replayed across every personalization segment
+QUERIES = [
+    "How should I start investing with a small amount of money?",
+    "What government schemes are available for women entrepreneurs?",
+    "How do I make a monthly budget on a small salary?",
+    "What is the difference between a SIP and a fixed deposit?",
+    "How much emergency fund should I keep?",
+    "Is PPF a good option for long term savings?",
+    "How does compound interest work?",
+    "How can I improve my credit score?",
+    "What is Sukanya Samriddhi Yojana?",
+    "Should I pay off my loan or invest first?",
+    "How do mutual funds work for beginners?",
+    "What insurance do I need in my twenties?",
+]
+
+
+def _knowledge_base_documents() -> List[Dict[str, Any]]:
+    documents = []
+    for path in sorted(KNOWLEDGE_BASE_DIR.glob("*.md")):
+        documents.append({"text": path.read_text(encoding="utf-8"), "source": path.name})
+    return documents
+
+
+def _csv_documents(rows_per_document: int = 25) -> List[Dict[str, Any]]:
+    documents = []
+    for path in sorted(DATASET_DIR.glob("*.csv")):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                continue
+            while True:
+                rows = list(itertools.islice(reader, rows_per_document))
+                if not rows:
+                    break
+                lines = [", ".join(f"{h}: {v}" for h, v in zip(header, row) if v) for row in rows]
+                documents.append({"text": "\n".join(lines), "source": path.name})
+    return documents
+
+
+def build_corpus(scale: int = 1, chunk_size: int = 1000, chunk_overlap: int = 200, seed: int = 0):
+    """
+    Chunk the knowledge base and CSV datasets into a benchmark corpus.
+
+    Args:
+        scale: Number of copies of the source corpus; copies get distinct IDs
+            and shuffled segment metadata so the index grows realistically
+        chunk_size: Characters per chunk
+        chunk_overlap: Overlap between consecutive chunks
+        seed: Seed for metadata assignment
+
+    Returns:
+        List of DocumentChunk objects
+    """
+    from rag.document_processor import DocumentProcessor
+
+    rng = random.Random(seed)
+    processor = DocumentProcessor(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    sources = _knowledge_base_documents() + _csv_documents()
+
+    chunks = []
+    for copy in range(scale):
+        for index, source in enumerate(sources):
+            document_id = f"bench_{copy}_{index}"
+            metadata = {
+                "source": source["source"],
+                "age_group": rng.choice(AGE_GROUPS + (SHARED,)),
+                "region": rng.choice(REGIONS + (SHARED,)),
+            }
+            chunks.extend(processor.chunk_document(source["text"], metadata, document_id))
+    return chunks
+
+
+def build_workload(n_requests: int, seed: int = 0) -> List[Dict[str, str]]:
+    """Build a replayable list of (question, age_group, region) requests."""
+    rng = random.Random(seed)
+    return [
+        {
+            "question": rng.choice(QUERIES),
+            "age_group": rng.choice(AGE_GROUPS),
+            "region": rng.choice(REGIONS),
+        }
+        for _ in range(n_requests)
+    ]
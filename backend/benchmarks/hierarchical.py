@@ -0,0 +1,122 @@
+"""
+Benchmark: flat vs. coarse-to-fine (document centroid) snapshot search.
+
+Embeds the benchmark corpus once, writes it to a throwaway snapshot grouped
+by document and replays the benchmark questions, with and without segment
+filters, at several HIERARCHICAL_TOP_GROUPS values. For each value reports
+recall@k against the exact flat search, p50/p95 search latency and the
+fraction of chunks scored per query, so a per-collection setting can be
+picked from the recall/latency trade-off.
+
+Run from the backend directory:
+    python -m benchmarks.hierarchical --scale 20 --top-groups 4 8 16 32 --k 6
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.corpus import build_corpus, build_workload
+from rag.segments import SHARED
+from rag.snapshot import EmbeddingSnapshot, current_version, write_snapshot
+
+
+def _segment_filter(request: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "age_group": {"$in": [request["age_group"], SHARED]},
+        "region": {"$in": [request["region"], SHARED]},
+    }
+
+
+def _replay(
+    snapshot: EmbeddingSnapshot,
+    queries: np.ndarray,
+    filters: List[Optional[Dict[str, Any]]],
+    k: int,
+    top_groups: int,
+    exact: Optional[List[set]] = None
+) -> Dict[str, Any]:
+    latencies, scored, hits, results = [], [], 0, []
+    for query, filter_metadata in zip(queries, filters):
+        start = time.perf_counter()
+        found = snapshot.search(query, k, filter_metadata, top_groups=top_groups)
+        latencies.append(time.perf_counter() - start)
+        rows = snapshot.probe_groups(query, snapshot.filter_rows(filter_metadata), top_groups)
+        scored.append(snapshot.count if rows is None else len(rows))
+        found_rows = {row for row, _ in found}
+        results.append(found_rows)
+        if exact is not None:
+            hits += len(found_rows & exact[len(results) - 1])
+
+    report = {
+        "top_groups": top_groups,
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 3),
+        "scored_fraction": round(float(np.mean(scored)) / max(snapshot.count, 1), 4),
+    }
+    if exact is not None:
+        expected = sum(len(rows) for rows in exact)
+        report[f"recall@{k}"] = round(hits / expected, 4) if expected else 1.0
+    return report, results
+
+
+def run(scale: int, top_groups: List[int], k: int, queries: int, seed: int) -> Dict[str, Any]:
+    from retrieval.models import get_embedder
+
+    chunks = build_corpus(scale=scale, seed=seed)
+    workload = build_workload(queries, seed=seed)
+    embedder = get_embedder()
+    embeddings = np.asarray(embedder.encode([chunk.content for chunk in chunks], batch_size=64), dtype=np.float32)
+    query_vectors = np.asarray(embedder.encode([r["question"] for r in workload]), dtype=np.float32)
+
+    metadatas = [dict(chunk.metadata, document_id=chunk.document_id) for chunk in chunks]
+    report: Dict[str, Any] = {
+        "chunks": len(chunks),
+        "documents": len({chunk.document_id for chunk in chunks}),
+        "queries": len(workload),
+        "k": k,
+    }
+
+    with tempfile.TemporaryDirectory() as root:
+        write_snapshot(
+            Path(root), [chunk.chunk_id for chunk in chunks], embeddings,
+            [chunk.content for chunk in chunks], metadatas,
+            filter_keys=("age_group", "region"), group_by="document"
+        )
+        snapshot = EmbeddingSnapshot(Path(root) / current_version(Path(root)))
+
+        for name, filters in (
+            ("unfiltered", [None] * len(workload)),
+            ("segment_filtered", [_segment_filter(r) for r in workload]),
+        ):
+            flat, exact = _replay(snapshot, query_vectors, filters, k, 0)
+            runs = [flat]
+            for groups in top_groups:
+                runs.append(_replay(snapshot, query_vectors, filters, k, groups, exact)[0])
+            report[name] = runs
+        del snapshot
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=10, help="Copies of the source corpus to index")
+    parser.add_argument("--top-groups", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.scale, args.top_groups, args.k, args.queries, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: torch vs. ONNX Runtime (fp32 and int8) for the embedder and reranker.
+
+Exports both models into a throwaway cache directory, checks each ONNX
+variant's outputs against the torch model and times every backend on the
+benchmark query workload at several batch sizes. Reports p50/p95 latency per
+batch, throughput (texts or pairs per second) and the parity figures.
+
+Run from the backend directory:
+    python -m benchmarks.inference_backends --batch-sizes 1 8 32 --threads 4
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from config import settings
+from benchmarks.corpus import build_workload
+from inference.onnx_models import (
+    PARITY_TEXTS,
+    embedder_parity,
+    load_onnx_cross_encoder,
+    load_onnx_embedder,
+    reranker_parity,
+)
+
+
+def _percentile_ms(samples: List[float], pct: float) -> float:
+    return round(float(np.percentile(samples, pct)) * 1000, 3)
+
+
+def _time_batches(call: Callable[[Sequence], Any], items: Sequence, batch_size: int, repeats: int) -> Dict[str, float]:
+    call(items[:batch_size])  # warm-up
+    latencies = []
+    processed = 0
+    wall_start = time.perf_counter()
+    for _ in range(repeats):
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            begin = time.perf_counter()
+            call(batch)
+            latencies.append(time.perf_counter() - begin)
+            processed += len(batch)
+    wall_time = time.perf_counter() - wall_start
+    return {
+        "batch_size": batch_size,
+        "p50_ms": _percentile_ms(latencies, 50),
+        "p95_ms": _percentile_ms(latencies, 95),
+        "items_per_s": round(processed / wall_time, 1),
+    }
+
+
+def run(batch_sizes: List[int], texts: int, repeats: int, threads: int, seed: int) -> Dict[str, Any]:
+    from sentence_transformers import CrossEncoder, SentenceTransformer
+
+    questions = [request["question"] for request in build_workload(texts, seed=seed)]
+    pairs = [(question, PARITY_TEXTS[i % len(PARITY_TEXTS)]) for i, question in enumerate(questions)]
+    report: Dict[str, Any] = {"threads": threads, "texts": len(questions), "embedder": {}, "reranker": {}}
+
+    embedder = SentenceTransformer(settings.EMBEDDING_MODEL, device="cpu")
+    reranker = CrossEncoder(settings.RERANKER_MODEL, device="cpu")
+    backends = {
+        "embedder": {"torch": lambda batch: embedder.encode(list(batch), batch_size=len(batch))},
+        "reranker": {"torch": lambda batch: reranker.predict(list(batch), batch_size=len(batch))},
+    }
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for quantize in (False, True):
+            name = "onnx_int8" if quantize else "onnx_fp32"
+            start = time.perf_counter()
+            onnx_embedder = load_onnx_embedder(
+                settings.EMBEDDING_MODEL, Path(cache_dir), quantize=quantize, threads=threads, min_cosine=0.0
+            )
+            onnx_reranker = load_onnx_cross_encoder(
+                settings.RERANKER_MODEL, Path(cache_dir), quantize=quantize, threads=threads, min_rank_correlation=-1.0
+            )
+            report[f"{name}_export_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            report["embedder"].setdefault("parity", {})[name] = embedder_parity(embedder, onnx_embedder, questions)
+            report["reranker"].setdefault("parity", {})[name] = reranker_parity(reranker, onnx_reranker, pairs)
+            backends["embedder"][name] = lambda batch, m=onnx_embedder: m.encode(list(batch), batch_size=len(batch))
+            backends["reranker"][name] = lambda batch, m=onnx_reranker: m.predict(list(batch), batch_size=len(batch))
+
+        for kind, items in (("embedder", questions), ("reranker", pairs)):
+            for name, call in backends[kind].items():
+                report[kind][name] = [_time_batches(call, items, size, repeats) for size in batch_sizes]
+            for size_index, size in enumerate(batch_sizes):
+                torch_rate = report[kind]["torch"][size_index]["items_per_s"]
+                for name in ("onnx_fp32", "onnx_int8"):
+                    entry = report[kind][name][size_index]
+                    entry["speedup_vs_torch"] = round(entry["items_per_s"] / torch_rate, 2) if torch_rate else None
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=0, help="onnxruntime intra-op threads (0 = all CPUs)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+    print(json.dumps(run(args.batch_sizes, args.texts, args.repeats, args.threads, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Offline benchmark for the RAG hot path.
+
+Builds a synthetic corpus from data/knowledge_base and Dataset/*.csv into a
+throwaway Chroma directory, then replays a query workload at a configurable
+concurrency against VectorStore.search, RAGPipeline.retrieve and both FastAPI
+apps (with stub LLMs). Writes a JSON report with p50/p95/p99 latency, QPS,
+error counts, startup time and peak RSS, suitable for diffing across commits.
+
+Run from the backend directory:
+    python -m benchmarks.run --targets vector_store pipeline ask chat \
+        --requests 500 --concurrency 8 --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BACKEND_DIR))
+
+TARGETS = ("vector_store", "pipeline", "ask", "chat")
+
+
+def _percentile(sorted_samples: List[float], pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, int(round(pct / 100 * (len(sorted_samples) - 1)))))
+    return sorted_samples[index]
+
+
+def summarize(latencies: List[float], errors: int, wall_time: float) -> Dict[str, Any]:
+    """Summarize per-request latencies (seconds) into a report entry."""
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "p50_ms": round(_percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(_percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(_percentile(ordered, 99) * 1000, 3),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "qps": round(len(latencies) / wall_time, 2) if wall_time > 0 else 0.0,
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def replay_sync(call: Callable[[Dict[str, str]], Any], workload, concurrency: int) -> Dict[str, Any]:
+    """Replay a workload against a blocking callable from a thread pool."""
+    latencies: List[float] = []
+    errors = 0
+
+    def _one(request):
+        start = time.perf_counter()
+        call(request)
+        return time.perf_counter() - start
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(_one, request) for request in workload]:
+            try:
+                latencies.append(future.result())
+            except Exception:
+                errors += 1
+    return summarize(latencies, errors, time.perf_counter() - wall_start)
+
+
+async def replay_async(call, workload, concurrency: int) -> Dict[str, Any]:
+    """Replay a workload against an async callable with bounded concurrency."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def _one(request):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call(request)
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(_one(request) for request in workload))
+    return summarize(latencies, errors, time.perf_counter() - wall_start)
+
+
+def _timed(factory: Callable[[], Any]):
+    start = time.perf_counter()
+    value = factory()
+    return value, round((time.perf_counter() - start) * 1000, 1)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def run(args) -> Dict[str, Any]:
+    from benchmarks.corpus import build_corpus, build_workload
+    from benchmarks.stubs import install_stub_llms
+
+    install_stub_llms()
+    chunks = build_corpus(scale=args.scale, seed=args.seed)
+    workload = build_workload(args.requests, seed=args.seed)
+    report: Dict[str, Any] = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "corpus_chunks": len(chunks),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "inference_backend": os.environ.get("INFERENCE_BACKEND", "torch"),
+        "startup_ms": {},
+        "targets": {},
+    }
+
+    if {"vector_store", "pipeline", "ask"} & set(args.targets):
+        from rag.vector_store import VectorStore
+        from rag.pipeline import RAGPipeline
+        from agent.generator import FinancialAgent
+
+        vector_store, report["startup_ms"]["vector_store"] = _timed(VectorStore)
+        start = time.perf_counter()
+        for i in range(0, len(chunks), 500):
+            vector_store.add_documents(chunks[i:i + 500])
+        report["ingest_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+        if "vector_store" in args.targets:
+            report["targets"]["vector_store"] = replay_sync(
+                lambda r: vector_store.similarity_search(
+                    r["question"], k=6,
+                    filter_metadata=FinancialAgent._get_metadata_filters(r["age_group"], r["region"])
+                ),
+                workload, args.concurrency
+            )
+
+        if "pipeline" in args.targets:
+            pipeline, report["startup_ms"]["pipeline"] = _timed(lambda: RAGPipeline(vector_store))
+            report["targets"]["pipeline"] = replay_sync(
+                lambda r: pipeline.retrieve(
+                    r["question"], top_k=6, rerank_top_k=3,
+                    filter_metadata=FinancialAgent._get_metadata_filters(r["age_group"], r["region"]),
+                    endpoint="benchmark"
+                ),
+                workload, args.concurrency
+            )
+            report["retrieval_cache"] = pipeline.cache.stats()
+
+    if "ask" in args.targets:
+        main_module, report["startup_ms"]["ask"] = _timed(lambda: __import__("main"))
+        report["targets"]["ask"] = asyncio.run(_replay_app(
+            main_module.app, "/api/v1/ask",
+            lambda r: {"question": r["question"], "age_group": r["age_group"], "region": r["region"]},
+            workload, args.concurrency
+        ))
+
+    if "chat" in args.targets:
+        from importlib import import_module
+        chat_app, report["startup_ms"]["chat"] = _timed(lambda: import_module("app.main"))
+        # Both apps search the shared retrieval core; index only if no other target did
+        if not {"vector_store", "pipeline", "ask"} & set(args.targets):
+            from app.services.vector_store import vector_store as chat_store
+            chat_store.add_documents([
+                {"id": chunk.chunk_id, "text": chunk.content, "metadata": {"source": chunk.metadata["source"]}}
+                for chunk in chunks
+            ])
+        report["targets"]["chat"] = asyncio.run(_replay_app(
+            chat_app.app, "/api/v1/chat",
+            lambda r: {"message": r["question"]},
+            workload, args.concurrency
+        ))
+
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+async def _replay_app(app, path: str, make_body, workload, concurrency: int) -> Dict[str, Any]:
+    import httpx
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def _call(request):
+            response = await client.post(path, json=make_body(request))
+            response.raise_for_status()
+
+        return await replay_async(_call, workload, concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--scale", type=int, default=1, help="Copies of the source corpus to index")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default=None, help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    # Index into a throwaway directory so runs never touch the real knowledge base
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["VECTOR_DB_PATH"] = os.path.join(tmp, "rag")
+        os.chdir(BACKEND_DIR)
+        report = run(args)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
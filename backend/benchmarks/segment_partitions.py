@@ -0,0 +1,111 @@
+"""
+Benchmark: metadata-filtered search vs. precomputed segment partitions.
+
+Builds synthetic corpora of growing size (random unit vectors with realistic
+age_group/region metadata), then times the same personalized query answered
+by a `$in`-filtered search over the full collection and by an unfiltered
+search over the matching segment partition.
+
+Run from the backend directory:
+    python -m benchmarks.segment_partitions --sizes 1000 5000 20000
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import chromadb
+import numpy as np
+from chromadb.config import Settings
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from rag.segments import AGE_GROUPS, REGIONS, SHARED, SegmentPartitions, to_chroma_where
+
+DIMENSIONS = 384
+
+
+def _random_metadata(rng: random.Random) -> Dict[str, str]:
+    return {
+        "age_group": rng.choice(AGE_GROUPS + (SHARED,)),
+        "region": rng.choice(REGIONS + (SHARED,)),
+    }
+
+
+def _unit_vectors(rng: np.random.Generator, n: int) -> np.ndarray:
+    vectors = rng.standard_normal((n, DIMENSIONS)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _percentile_ms(samples: List[float], pct: float) -> float:
+    return round(float(np.percentile(samples, pct)) * 1000, 3)
+
+
+def run(sizes: List[int], queries: int, k: int, seed: int) -> Dict[str, List[Dict]]:
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    report = []
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as path:
+            client = chromadb.PersistentClient(path=path, settings=Settings(anonymized_telemetry=False))
+            base = client.create_collection("bench", metadata={"hnsw:space": "cosine"})
+            partitions = SegmentPartitions(client, "bench")
+
+            embeddings = _unit_vectors(np_rng, size).tolist()
+            metadatas = [_random_metadata(rng) for _ in range(size)]
+            ids = [f"chunk_{i}" for i in range(size)]
+            documents = [f"synthetic chunk {i}" for i in range(size)]
+            for start in range(0, size, 5000):
+                end = start + 5000
+                base.add(ids=ids[start:end], documents=documents[start:end],
+                         metadatas=metadatas[start:end], embeddings=embeddings[start:end])
+                partitions.add(ids[start:end], documents[start:end],
+                               metadatas[start:end], embeddings[start:end])
+
+            query_vectors = _unit_vectors(np_rng, queries).tolist()
+            filtered, partitioned = [], []
+            for vector in query_vectors:
+                segment = (rng.choice(AGE_GROUPS), rng.choice(REGIONS))
+                where = to_chroma_where({
+                    "age_group": {"$in": [segment[0], SHARED]},
+                    "region": {"$in": [segment[1], SHARED]},
+                })
+
+                start = time.perf_counter()
+                base.query(query_embeddings=[vector], n_results=k, where=where)
+                filtered.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                partitions.query(segment, k, query_embeddings=[vector])
+                partitioned.append(time.perf_counter() - start)
+
+            report.append({
+                "corpus_size": size,
+                "filtered_p50_ms": _percentile_ms(filtered, 50),
+                "filtered_p95_ms": _percentile_ms(filtered, 95),
+                "partition_p50_ms": _percentile_ms(partitioned, 50),
+                "partition_p95_ms": _percentile_ms(partitioned, 95),
+                "speedup_p50": round(float(np.median(filtered) / np.median(partitioned)), 2),
+            })
+
+    return {"results": report}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.queries, args.k, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
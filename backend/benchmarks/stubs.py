@@ -0,0 +1,68 @@
+"""Stub LLM backends so the benchmark measures the serving path, not decoding."""
+
+import json
+
+STUB_ANSWER = {
+    "answer": "Start with a small monthly SIP in a diversified index fund.",
+    "explanation": "Regular investing averages out market ups and downs.",
+    "example": "Investing Rs 500 a month from your first salary.",
+    "action_steps": ["Build an emergency fund", "Open a SIP", "Review yearly"],
+}
+
+
+class _StubInputs(dict):
+    def to(self, device):
+        return self
+
+
+class _StubTokenizer:
+    eos_token_id = 0
+    pad_token_id = 0
+    padding_side = "right"
+
+    def __call__(self, text, return_tensors=None, padding=False):
+        import torch
+
+        texts = [text] if isinstance(text, str) else text
+        ids = torch.ones((len(texts), max(len(t.split()) for t in texts)), dtype=torch.long)
+        return _StubInputs(input_ids=ids, attention_mask=torch.ones_like(ids))
+
+    def decode(self, ids, skip_special_tokens=False):
+        return json.dumps(STUB_ANSWER)
+
+    def batch_decode(self, ids, skip_special_tokens=False):
+        return [self.decode(row) for row in ids]
+
+
+class _StubModel:
+    device = "cpu"
+
+    def generate(self, input_ids, attention_mask=None, **kwargs):
+        import torch
+
+        answer = torch.ones((input_ids.shape[0], len(json.dumps(STUB_ANSWER).split())), dtype=torch.long)
+        return torch.cat([input_ids, answer], dim=1)
+
+
+class StubTextGenerationPipeline:
+    """Drop-in for a transformers text-generation pipeline (its tokenizer and model)."""
+
+    def __init__(self):
+        self.tokenizer = _StubTokenizer()
+        self.model = _StubModel()
+
+
+def install_stub_llms() -> None:
+    """Replace the HF pipeline and the Ollama client with instant stubs."""
+    from agent import generator
+    from app.services import ollama_service as ollama_module
+
+    def _load_stub_model(self):
+        self.pipeline = StubTextGenerationPipeline()
+
+    generator.FinancialAgent._load_model = _load_stub_model
+
+    async def _stub_generate(self, prompt, context="", **kwargs):
+        return "English Response:\n" + STUB_ANSWER["answer"]
+
+    ollama_module.OllamaService.generate = _stub_generate
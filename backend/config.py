@@ -1,6 +1,6 @@
 import os
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 from pathlib import Path
 
 class Settings(BaseSettings):
@@ -21,9 +21,22 @@ class Settings(BaseSettings):
     VECTOR_DB_PATH: Path = DATA_DIR / "chroma_db"
     KNOWLEDGE_BASE_DIR: Path = DATA_DIR / "knowledge_base"
     
+    # Shared retrieval core: the one collection both FastAPI apps search
+    RETRIEVAL_COLLECTION: str = "financial_knowledge"
+    # Single writer / many readers on VECTOR_DB_PATH across worker processes:
+    # readers reopen the Chroma client at most this often after another process wrote
+    STORAGE_REFRESH_INTERVAL_S: float = 1.0
+    STORAGE_LOCK_TIMEOUT_S: float = 60.0
+    
     # Model Configuration
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
     RERANKER_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    
+    # Embedder/reranker inference: "torch" or "onnx" (exported and cached on first use)
+    INFERENCE_BACKEND: str = "torch"
+    ONNX_CACHE_DIR: Path = DATA_DIR / "onnx"
+    ONNX_QUANTIZE: bool = True  # int8 dynamic quantization
+    ONNX_INTRA_OP_THREADS: int = 0  # 0 = all CPUs available to the process
     # Using a smaller model that's more suitable for most systems
     LLM_MODEL: str = "gpt2"  # Using a smaller model for testing
     OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "deepseek-r1:1.5b")
@@ -46,6 +59,110 @@ class Settings(BaseSettings):
     TOP_K_RETRIEVAL: int = 5
     RERANK_TOP_K: int = 3
     
+    # Uploads and background ingestion
+    MAX_UPLOAD_BYTES: int = 50 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+    UPLOAD_SPOOL_DIR: Path = DATA_DIR / "uploads"
+    INGEST_WORKERS: int = 2
+    INGEST_MAX_QUEUED: int = 32
+    INGEST_JOB_HISTORY: int = 200
+    EMBED_BATCH_SIZE: int = 64
+    # PDF text extraction: pages parsed across a process pool (0 = one worker per CPU,
+    # 1 = in the ingestion thread) and cached per (file hash, page, extractor version)
+    PDF_EXTRACT_WORKERS: int = 0
+    PDF_PAGES_PER_TASK: int = 16
+    PDF_TEXT_CACHE_ENABLED: bool = True
+    PDF_TEXT_CACHE_PATH: Path = DATA_DIR / "pdf_text_cache.sqlite3"
+    
+    # Request deadlines in seconds; a request past its budget fails fast with 504
+    REQUEST_DEADLINE_S: float = 120.0
+    STAGE_DEADLINES_S: Dict[str, float] = {"retrieve": 10.0, "generate": 90.0}
+    # How often a pending request checks whether its client is still connected
+    DISCONNECT_POLL_S: float = 0.25
+    
+    # Load-aware degradation: 1 skip rerank, 2 fewer docs, 3 shorter answers,
+    # 4 fallback model, 5 extractive answers only
+    DEGRADATION_ENABLED: bool = True
+    DEGRADATION_P95_SLO_S: float = 30.0
+    DEGRADATION_MAX_INFLIGHT: int = 8
+    DEGRADATION_MAX_LEVEL: int = 5
+    DEGRADATION_STEP_UP_S: float = 5.0
+    DEGRADATION_STEP_DOWN_S: float = 30.0
+    DEGRADED_MAX_NEW_TOKENS: int = 256
+    LLM_FALLBACK_MODEL: str = ""  # empty: level 4 keeps LLM_MODEL
+    
+    # Coalesce identical in-flight /ask questions into one generation
+    SINGLEFLIGHT_ENABLED: bool = True
+    
+    # Retrieval cache (entries hold chunk IDs and scores only)
+    RETRIEVAL_CACHE_ENABLED: bool = True
+    RETRIEVAL_CACHE_SIZE: int = 1024
+
+    # Precomputed answers to frequent questions per segment, served before /ask and
+    # first-turn /chat generation; built with `python -m faq.build --questions faq.txt`
+    FAQ_ENABLED: bool = True
+    FAQ_LIBRARY_PATH: Path = DATA_DIR / "answer_library.sqlite3"
+    FAQ_SEMANTIC_THRESHOLD: float = 0.92  # cosine between question embeddings; 1.0 = exact matches only
+    FAQ_BATCH_SIZE: int = 8  # prompts per batched generation call (/ask answers)
+    FAQ_CHAT_CONCURRENCY: int = 4  # concurrent Ollama generations (/chat answers)
+    FAQ_CHAT_LANGUAGES: List[str] = ["english"]
+
+    # Precomputed (age_group, region) partitions for personalized search
+    SEGMENT_PARTITIONS_ENABLED: bool = True
+    
+    # SQLite index of document -> chunk IDs, sizes and ingestion times
+    DOCUMENT_REGISTRY_PATH: Path = DATA_DIR / "document_registry.sqlite3"
+    
+    # Ingest-time near-duplicate detection (MinHash + LSH); mode "drop", "link" or "off"
+    DEDUP_MODE: str = "drop"
+    DEDUP_THRESHOLD: float = 0.8
+    DEDUP_NUM_PERM: int = 64
+    DEDUP_BANDS: int = 16
+    DEDUP_SCOPE_KEYS: List[str] = ["age_group", "region"]
+    
+    # Memory-mapped embedding snapshots shared by all workers
+    SNAPSHOT_ENABLED: bool = True
+    SNAPSHOT_DIR: Path = DATA_DIR / "snapshots"
+    SNAPSHOT_DTYPE: str = "float32"  # or "int8" (4x smaller, per-row scales)
+    SNAPSHOT_FILTER_KEYS: List[str] = ["age_group", "region", "document_type"]
+    SNAPSHOT_KEEP_VERSIONS: int = 2
+    SNAPSHOT_CHECK_INTERVAL_S: float = 2.0
+    SNAPSHOT_MAX_DELETED_FRACTION: float = 0.2  # merge all segments once this share of rows is deleted
+    # Coarse-to-fine snapshot search: rows are grouped by "document" or "section"
+    # ("" = no groups), each with a centroid; per collection, the number of
+    # best-matching groups whose chunks a query scores (absent or 0 = all chunks).
+    # Measure recall/latency with `python -m benchmarks.hierarchical`
+    HIERARCHICAL_GROUP_BY: str = "document"
+    HIERARCHICAL_TOP_GROUPS: Dict[str, int] = {}
+
+    # Vector index: "chroma" (in-memory HNSW) or "ivf" (on-disk inverted lists for
+    # corpora larger than RAM; replaces the Chroma collection, segment partitions
+    # and snapshots, filtering on SNAPSHOT_FILTER_KEYS per list)
+    VECTOR_INDEX: str = "chroma"
+    IVF_DIR: Path = DATA_DIR / "ivf"
+    IVF_NLIST: int = 1024  # upper bound; grows with the corpus at IVF_MIN_LIST_SIZE rows per list
+    IVF_NPROBE: int = 16
+    IVF_MIN_LIST_SIZE: int = 256
+    IVF_IMBALANCE: float = 4.0  # rebalance when the largest list exceeds this multiple of the mean
+    IVF_TRAIN_SAMPLE: int = 50000
+
+    # Nearest-provider lookup (grid index prebuilt from the provider CSV)
+    PROVIDERS_CSV_PATH: Path = BASE_DIR.parent / "Dataset" / "Money_Management_and_Financial_Literacy.csv"
+    PROVIDER_INDEX_PATH: Path = DATA_DIR / "provider_index.npz"
+    PROVIDER_GRID_DEGREES: float = 0.1
+    
+    # Columnar tables for numeric questions (memory-mapped .npy per column)
+    TABULAR_DIR: Path = DATA_DIR / "tables"
+    TABULAR_SEED_CSVS: List[Path] = [BASE_DIR.parent / "Dataset" / "finance.csv"]
+    
+    # Slow-request profiler (debug endpoints are mounted only when a token is set)
+    PROFILER_ENABLED: bool = False
+    PROFILER_TOKEN: str = ""
+    PROFILER_SLO_MS: float = 5000.0
+    PROFILER_INTERVAL_MS: float = 10.0
+    PROFILER_MAX_CAPTURES: int = 50
+    PROFILER_DIR: Path = DATA_DIR / "profiles"
+    
     # API Configuration
     API_PREFIX: str = "/api/v1"
     CORS_ORIGINS: list = ["*"]
@@ -61,3 +178,4 @@ settings = Settings()
 os.makedirs(settings.DATA_DIR, exist_ok=True)
 os.makedirs(settings.VECTOR_DB_PATH, exist_ok=True)
 os.makedirs(settings.KNOWLEDGE_BASE_DIR, exist_ok=True)
+os.makedirs(settings.UPLOAD_SPOOL_DIR, exist_ok=True)
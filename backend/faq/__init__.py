@@ -0,0 +1,8 @@
+from .library import AnswerLibrary, LibraryAnswer, get_answer_library, segment_key
+
+__all__ = [
+    "AnswerLibrary",
+    "LibraryAnswer",
+    "get_answer_library",
+    "segment_key",
+]
@@ -0,0 +1,201 @@
+"""
+Build or refresh the precomputed answer library.
+
+Reads a question list (plain text, one question per line, or JSONL with a
+"question" field, e.g. mined from request logs), registers the questions and
+generates an answer for every personalization segment that has no fresh
+one:
+
+- ask:  every age group x region, through FinancialAgent with batched
+        generation (FAQ_BATCH_SIZE prompts per call)
+- chat: every FAQ_CHAT_LANGUAGES language, through the chat app's RAG
+        service (FAQ_CHAT_CONCURRENCY concurrent Ollama generations)
+
+Without --questions, the questions already in the library are refreshed:
+run it after ingestion, with --verify to also catch chunk changes made by
+other processes, and only stale or missing answers are regenerated.
+
+Run from the backend directory:
+    python -m faq.build --questions faq.txt --app ask chat
+    python -m faq.build --verify
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from config import settings
+from faq.library import AnswerLibrary, get_answer_library, segment_key
+
+logger = logging.getLogger(__name__)
+
+AGE_GROUPS = ("15-20", "21-28", "29-35")
+REGIONS = ("india", "international")
+ASK_LANGUAGE = "en"
+
+
+def read_questions(path: Path) -> List[str]:
+    """Questions from a text file (one per line) or JSONL records with a "question" field."""
+    questions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if path.suffix == ".jsonl":
+                line = json.loads(line).get("question", "")
+            if line:
+                questions.append(line)
+    return questions
+
+
+def ask_segments() -> Dict[str, Tuple[str, str]]:
+    return {
+        segment_key("ask", age_group, region, ASK_LANGUAGE): (age_group, region)
+        for age_group in AGE_GROUPS
+        for region in REGIONS
+    }
+
+
+def build_ask(library: AnswerLibrary, questions: Sequence[str], force: bool, corpus_generation: int) -> int:
+    segments = ask_segments()
+    todo = (
+        [(q, s) for q in questions for s in segments] if force
+        else library.pending(questions, list(segments))
+    )
+    if not todo:
+        return 0
+
+    from agent.generator import FinancialAgent
+    from retrieval import get_retrieval_core
+
+    agent = FinancialAgent(get_retrieval_core().pipeline)
+    generated = 0
+    # Generate and store one batch at a time so an interrupted run keeps its progress
+    step = max(1, settings.FAQ_BATCH_SIZE)
+    for start in range(0, len(todo), step):
+        batch = todo[start:start + step]
+        responses = agent.generate_batch(
+            [
+                {"query": question, "age_group": segments[segment][0], "region": segments[segment][1],
+                 "language": ASK_LANGUAGE}
+                for question, segment in batch
+            ],
+            batch_size=step
+        )
+        for (question, segment), response in zip(batch, responses):
+            library.put(
+                question,
+                segment,
+                response,
+                sources=[(doc["chunk_id"], doc["content"]) for doc in response["sources"]],
+                corpus_generation=corpus_generation,
+                model=settings.LLM_MODEL
+            )
+        generated += len(batch)
+        logger.info(f"Generated {generated}/{len(todo)} /ask answers")
+    return generated
+
+
+def build_chat(library: AnswerLibrary, questions: Sequence[str], force: bool, corpus_generation: int) -> int:
+    segments = {segment_key("chat", language): language for language in settings.FAQ_CHAT_LANGUAGES}
+    todo = (
+        [(q, s) for q in questions for s in segments] if force
+        else library.pending(questions, list(segments))
+    )
+    if not todo:
+        return 0
+
+    from app.core.config import settings as chat_settings
+    from app.services.rag_service import rag_service
+
+    async def generate_all() -> int:
+        semaphore = asyncio.Semaphore(max(1, settings.FAQ_CHAT_CONCURRENCY))
+        done = 0
+
+        async def generate(question: str, segment: str) -> None:
+            nonlocal done
+            async with semaphore:
+                language = segments[segment]
+                result = await rag_service._answer(question, question, language, [], "")
+            library.put(
+                question,
+                segment,
+                result,
+                sources=[(doc.get("id"), doc["text"]) for doc in result["context"]],
+                corpus_generation=corpus_generation,
+                model=chat_settings.OLLAMA_MODEL
+            )
+            done += 1
+
+        await asyncio.gather(*(generate(question, segment) for question, segment in todo))
+        return done
+
+    return asyncio.run(generate_all())
+
+
+def build_library(
+    questions_path: Optional[Path] = None,
+    apps: Sequence[str] = ("ask", "chat"),
+    verify: bool = False,
+    force: bool = False,
+    library: Optional[AnswerLibrary] = None
+) -> Dict[str, Any]:
+    """
+    Register questions and generate every missing or stale answer.
+
+    Args:
+        questions_path: Question list to add; the library's own questions are used as well
+        apps: Which endpoints to build answers for ("ask", "chat")
+        verify: First mark stale the answers whose source chunks changed in the index
+        force: Regenerate every answer, fresh or not
+        library: Library to build (defaults to the process-wide one)
+
+    Returns:
+        Report with the numbers of questions added, answers invalidated and answers generated
+    """
+    from retrieval import get_retrieval_core
+
+    library = library or get_answer_library()
+    if library is None:
+        raise RuntimeError("The answer library is disabled (FAQ_ENABLED=false)")
+    store = get_retrieval_core().vector_store
+
+    report: Dict[str, Any] = {"questions_added": 0, "invalidated": 0}
+    if questions_path is not None:
+        report["questions_added"] = len(library.add_questions(read_questions(questions_path)))
+    if verify:
+        report["invalidated"] = library.verify(
+            lambda chunk_ids: {chunk.chunk_id: chunk.content for chunk in store.get_chunks(chunk_ids)}
+        )
+
+    questions = library.questions()
+    report["questions"] = len(questions)
+    corpus_generation = store.storage.generation
+    builders = {"ask": build_ask, "chat": build_chat}
+    for app in apps:
+        report[f"generated_{app}"] = builders[app](library, questions, force, corpus_generation)
+    report.update(library.stats())
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=Path, default=None, help="Question list (.txt or .jsonl) to add")
+    parser.add_argument("--app", nargs="+", choices=["ask", "chat"], default=["ask", "chat"])
+    parser.add_argument("--verify", action="store_true", help="Check stored source chunks against the index first")
+    parser.add_argument("--force", action="store_true", help="Regenerate fresh answers too")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    report = build_library(args.questions, apps=args.app, verify=args.verify, force=args.force)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
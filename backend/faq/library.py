@@ -0,0 +1,381 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import settings
+from serving import normalize_question
+from telemetry.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+LIBRARY_LOOKUPS = registry.counter(
+    "answer_library_lookups_total", "Answer-library lookups by outcome (exact, semantic, miss)", ("outcome",)
+)
+
+# Nearest stored questions checked for a fresh answer in the requested segment
+_SEMANTIC_CANDIDATES = 5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    question_key TEXT PRIMARY KEY,
+    question TEXT NOT NULL,
+    embedding BLOB
+);
+CREATE TABLE IF NOT EXISTS answers (
+    segment TEXT NOT NULL,
+    question_key TEXT NOT NULL,
+    response TEXT NOT NULL,
+    corpus_generation INTEGER NOT NULL DEFAULT 0,
+    model TEXT NOT NULL DEFAULT '',
+    generated_at TEXT NOT NULL,
+    stale INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (segment, question_key)
+);
+CREATE TABLE IF NOT EXISTS answer_chunks (
+    segment TEXT NOT NULL,
+    question_key TEXT NOT NULL,
+    chunk_id TEXT NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answer_chunks_by_chunk ON answer_chunks (chunk_id);
+CREATE INDEX IF NOT EXISTS answer_chunks_by_answer ON answer_chunks (segment, question_key);
+CREATE TABLE IF NOT EXISTS library_revision (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    revision INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO library_revision (id, revision) VALUES (0, 0);
+"""
+
+
+def segment_key(app: str, *parts: Optional[str]) -> str:
+    """Personalization segment of an answer, e.g. "ask:21-28:india:en" or "chat:hindi"."""
+    return ":".join([app, *(str(part) for part in parts if part is not None)])
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class LibraryAnswer:
+    """A precomputed answer returned by `AnswerLibrary.lookup`."""
+    question: str
+    segment: str
+    response: Dict[str, Any]
+    corpus_generation: int
+    generated_at: str
+    match: str  # "exact" or "semantic"
+    similarity: float = 1.0
+
+
+class AnswerLibrary:
+    """
+    Precomputed answers to frequent questions, per personalization segment.
+
+    Answers are generated offline (`python -m faq.build`) for every segment
+    and stored with the chunks they were grounded on. A lookup first tries
+    the normalized question, then the nearest stored question by embedding
+    above `semantic_threshold`; only fresh answers are served.
+
+    An answer turns stale when one of its source chunks is deleted or
+    re-added (`invalidate_chunks`, wired to VectorStore writes) or no longer
+    matches its stored content hash (`verify`). Stale answers are rewritten
+    by the next build run, or by the next live answer to the same question
+    (`refresh`).
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        semantic_threshold: float = 0.92,
+        embed: Optional[Callable[[List[str]], Any]] = None
+    ):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self.semantic_threshold = semantic_threshold
+        self._embed = embed  # None disables semantic matching
+
+        # Question embeddings, reloaded when another writer bumps the revision
+        self._keys: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._revision = -1
+
+    @contextmanager
+    def _transaction(self):
+        with self._write_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("UPDATE library_revision SET revision = revision + 1 WHERE id = 0")
+            self._conn.execute("COMMIT")
+
+    def _embed_questions(self, questions: Sequence[str]) -> np.ndarray:
+        vectors = np.asarray(self._embed(list(questions)), dtype=np.float32).reshape(len(questions), -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    def _load_index(self) -> None:
+        revision = self._conn.execute("SELECT revision FROM library_revision WHERE id = 0").fetchone()[0]
+        if revision == self._revision:
+            return
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT question_key, embedding FROM questions WHERE embedding IS NOT NULL"
+            ).fetchall()
+            self._keys = [key for key, _ in rows]
+            self._matrix = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows]) if rows else None
+            self._revision = revision
+
+    # Reads
+
+    def _fresh(self, segment: str, question_key: str) -> Optional[Tuple]:
+        return self._conn.execute(
+            "SELECT q.question, a.response, a.corpus_generation, a.generated_at "
+            "FROM answers a JOIN questions q ON q.question_key = a.question_key "
+            "WHERE a.segment = ? AND a.question_key = ? AND a.stale = 0",
+            (segment, question_key)
+        ).fetchone()
+
+    def lookup(self, question: str, segment: str) -> Optional[LibraryAnswer]:
+        """
+        Fresh precomputed answer for `question` in `segment`, if any.
+
+        Returns:
+            The answer, with `match` set to "exact" or "semantic", or None
+        """
+        row = self._fresh(segment, normalize_question(question))
+        if row is not None:
+            LIBRARY_LOOKUPS.inc(outcome="exact")
+            return self._answer(row, segment, "exact", 1.0)
+
+        if self._embed is not None:
+            self._load_index()
+            keys, matrix = self._keys, self._matrix
+            if matrix is not None:
+                similarities = matrix @ self._embed_questions([question])[0]
+                for i in np.argsort(-similarities)[:_SEMANTIC_CANDIDATES]:
+                    if similarities[i] < self.semantic_threshold:
+                        break
+                    row = self._fresh(segment, keys[i])
+                    if row is not None:
+                        LIBRARY_LOOKUPS.inc(outcome="semantic")
+                        return self._answer(row, segment, "semantic", float(similarities[i]))
+
+        LIBRARY_LOOKUPS.inc(outcome="miss")
+        return None
+
+    @staticmethod
+    def _answer(row: Tuple, segment: str, match: str, similarity: float) -> LibraryAnswer:
+        question, response, corpus_generation, generated_at = row
+        return LibraryAnswer(
+            question=question,
+            segment=segment,
+            response=json.loads(response),
+            corpus_generation=corpus_generation,
+            generated_at=generated_at,
+            match=match,
+            similarity=similarity
+        )
+
+    def is_known(self, question: str) -> bool:
+        """True if `question` is one of the library's questions."""
+        return self._conn.execute(
+            "SELECT 1 FROM questions WHERE question_key = ?", (normalize_question(question),)
+        ).fetchone() is not None
+
+    def questions(self) -> List[str]:
+        return [row[0] for row in self._conn.execute("SELECT question FROM questions ORDER BY question")]
+
+    def pending(self, questions: Sequence[str], segments: Sequence[str]) -> List[Tuple[str, str]]:
+        """(question, segment) pairs without a fresh answer."""
+        missing = []
+        for question in questions:
+            key = normalize_question(question)
+            for segment in segments:
+                if self._fresh(segment, key) is None:
+                    missing.append((question, segment))
+        return missing
+
+    def stats(self) -> Dict[str, Any]:
+        questions = self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+        answers, stale = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(stale), 0) FROM answers"
+        ).fetchone()
+        return {"questions": questions, "answers": answers, "stale": stale}
+
+    # Writes
+
+    def add_questions(self, questions: Sequence[str]) -> List[str]:
+        """
+        Register questions (deduplicated by normalized form).
+
+        Returns:
+            The questions that were new
+        """
+        new: Dict[str, str] = {}
+        for question in questions:
+            key = normalize_question(question)
+            if key and key not in new and not self._conn.execute(
+                "SELECT 1 FROM questions WHERE question_key = ?", (key,)
+            ).fetchone():
+                new[key] = question.strip()
+        if not new:
+            return []
+
+        embeddings = self._embed_questions(list(new.values())) if self._embed is not None else None
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO questions (question_key, question, embedding) VALUES (?, ?, ?)",
+                [
+                    (key, question, embeddings[i].tobytes() if embeddings is not None else None)
+                    for i, (key, question) in enumerate(new.items())
+                ]
+            )
+        return list(new.values())
+
+    def put(
+        self,
+        question: str,
+        segment: str,
+        response: Dict[str, Any],
+        sources: Sequence[Tuple[str, str]],
+        corpus_generation: int = 0,
+        model: str = ""
+    ) -> None:
+        """
+        Store (or replace) the answer to `question` in `segment`.
+
+        Args:
+            sources: (chunk_id, content) of the chunks the answer was grounded on
+            corpus_generation: Storage generation of the index it was generated from
+            model: Model that generated it
+        """
+        self.add_questions([question])
+        key = normalize_question(question)
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO answers "
+                "(segment, question_key, response, corpus_generation, model, generated_at, stale) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (segment, key, json.dumps(response, ensure_ascii=False), corpus_generation, model,
+                 datetime.utcnow().isoformat())
+            )
+            conn.execute("DELETE FROM answer_chunks WHERE segment = ? AND question_key = ?", (segment, key))
+            conn.executemany(
+                "INSERT INTO answer_chunks (segment, question_key, chunk_id, content_hash) VALUES (?, ?, ?, ?)",
+                [(segment, key, chunk_id, content_hash(content)) for chunk_id, content in sources if chunk_id]
+            )
+
+    def refresh(self, question: str, segment: str, response: Dict[str, Any], sources: Sequence[Tuple[str, str]],
+                corpus_generation: int = 0, model: str = "") -> bool:
+        """
+        Store a live answer if `question` is a library question whose answer is missing or stale.
+
+        Returns:
+            True if the answer was stored
+        """
+        key = normalize_question(question)
+        if not self.is_known(question) or self._fresh(segment, key) is not None:
+            return False
+        self.put(question, segment, response, sources, corpus_generation, model)
+        return True
+
+    def invalidate_chunks(self, chunk_ids: Sequence[str]) -> int:
+        """
+        Mark answers grounded on any of `chunk_ids` stale.
+
+        Returns:
+            Number of answers marked stale
+        """
+        marked = 0
+        for start in range(0, len(chunk_ids), 500):
+            batch = list(chunk_ids[start:start + 500])
+            placeholders = ",".join("?" * len(batch))
+            with self._transaction() as conn:
+                marked += conn.execute(
+                    "UPDATE answers SET stale = 1 WHERE stale = 0 AND (segment, question_key) IN ("
+                    f"SELECT segment, question_key FROM answer_chunks WHERE chunk_id IN ({placeholders}))",
+                    batch
+                ).rowcount
+        if marked:
+            logger.info(f"Marked {marked} library answers stale after their source chunks changed")
+        return marked
+
+    def verify(self, fetch_contents: Callable[[List[str]], Dict[str, str]]) -> int:
+        """
+        Mark stale the answers whose source chunks are gone or changed.
+
+        Catches writes that bypassed `invalidate_chunks` (other processes,
+        migrations).
+
+        Args:
+            fetch_contents: Maps chunk IDs to the content currently stored (missing IDs omitted)
+
+        Returns:
+            Number of answers marked stale
+        """
+        rows = self._conn.execute(
+            "SELECT c.chunk_id, c.content_hash FROM answer_chunks c JOIN answers a "
+            "ON a.segment = c.segment AND a.question_key = c.question_key WHERE a.stale = 0"
+        ).fetchall()
+        expected = dict(rows)
+        chunk_ids = list(expected)
+        changed = []
+        for start in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[start:start + 500]
+            contents = fetch_contents(batch)
+            changed.extend(
+                chunk_id for chunk_id in batch
+                if chunk_id not in contents or content_hash(contents[chunk_id]) != expected[chunk_id]
+            )
+        return self.invalidate_chunks(changed) if changed else 0
+
+
+_library: Optional[AnswerLibrary] = None
+_library_lock = threading.Lock()
+
+
+def get_answer_library() -> Optional[AnswerLibrary]:
+    """
+    Process-wide answer library, or None when FAQ_ENABLED is off.
+
+    Deletes and re-adds of chunks in RETRIEVAL_COLLECTION made by this
+    process mark the answers grounded on them stale.
+    """
+    global _library
+    if not settings.FAQ_ENABLED:
+        return None
+    if _library is None:
+        with _library_lock:
+            if _library is None:
+                from rag.vector_store import add_change_listener
+                from retrieval.models import get_embedder
+
+                library = AnswerLibrary(
+                    settings.FAQ_LIBRARY_PATH,
+                    semantic_threshold=settings.FAQ_SEMANTIC_THRESHOLD,
+                    embed=lambda texts: get_embedder().encode(texts, convert_to_numpy=True)
+                )
+                add_change_listener(
+                    lambda collection, chunk_ids: library.invalidate_chunks(chunk_ids)
+                    if collection == settings.RETRIEVAL_COLLECTION else 0
+                )
+                _library = library
+    return _library
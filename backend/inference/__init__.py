@@ -0,0 +1,10 @@
+from .backends import BACKENDS, ONNX, TORCH, EncoderEmbeddingFunction, load_embedder, load_reranker
+
+__all__ = [
+    "BACKENDS",
+    "ONNX",
+    "TORCH",
+    "EncoderEmbeddingFunction",
+    "load_embedder",
+    "load_reranker",
+]
@@ -0,0 +1,91 @@
+import logging
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+TORCH = "torch"  # eager PyTorch via sentence-transformers
+ONNX = "onnx"    # onnxruntime, exported (and optionally int8-quantized) on first use
+BACKENDS = (TORCH, ONNX)
+
+
+def _check_backend(backend: str) -> None:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported inference backend: {backend}; use one of {', '.join(BACKENDS)}")
+
+
+def load_embedder(
+    model_name: str,
+    backend: str = TORCH,
+    cache_dir: Optional[Path] = None,
+    quantize: bool = True,
+    threads: int = 0
+):
+    """
+    Sentence embedder with a `SentenceTransformer`-style `encode`.
+
+    The ONNX backend needs onnxruntime (and torch/transformers for the first
+    export); when it is unavailable or its export fails the parity check, the
+    torch model is used instead.
+
+    Args:
+        model_name: sentence-transformers model name or path
+        backend: One of BACKENDS
+        cache_dir: Directory for exported ONNX models
+        quantize: Use int8 dynamic quantization for the ONNX graph
+        threads: onnxruntime intra-op threads (0 = all CPUs available to the process)
+    """
+    _check_backend(backend)
+    if backend == ONNX and cache_dir is not None:
+        try:
+            from inference.onnx_models import load_onnx_embedder
+
+            embedder = load_onnx_embedder(model_name, cache_dir, quantize=quantize, threads=threads)
+            if embedder is not None:
+                return embedder
+        except ImportError as e:
+            logger.warning(f"ONNX backend unavailable ({str(e)}); using torch for {model_name}")
+        except Exception as e:
+            logger.error(f"Failed to load ONNX embedder for {model_name}: {str(e)}", exc_info=True)
+
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def load_reranker(
+    model_name: str,
+    backend: str = TORCH,
+    cache_dir: Optional[Path] = None,
+    quantize: bool = True,
+    threads: int = 0
+):
+    """
+    Cross-encoder reranker with a `CrossEncoder`-style `predict`.
+
+    Falls back to the torch model exactly like `load_embedder`.
+    """
+    _check_backend(backend)
+    if backend == ONNX and cache_dir is not None:
+        try:
+            from inference.onnx_models import load_onnx_cross_encoder
+
+            reranker = load_onnx_cross_encoder(model_name, cache_dir, quantize=quantize, threads=threads)
+            if reranker is not None:
+                return reranker
+        except ImportError as e:
+            logger.warning(f"ONNX backend unavailable ({str(e)}); using torch for {model_name}")
+        except Exception as e:
+            logger.error(f"Failed to load ONNX reranker for {model_name}: {str(e)}", exc_info=True)
+
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(model_name)
+
+
+class EncoderEmbeddingFunction:
+    """Chroma embedding function backed by any object with an `encode` method."""
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+
+    def __call__(self, input: Sequence[str]) -> List[List[float]]:
+        return self.encoder.encode(list(input), convert_to_numpy=True).tolist()
@@ -0,0 +1,362 @@
+import json
+import logging
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the exported graph or metadata layout changes
+EXPORT_FORMAT = 1
+OPSET_VERSION = 14
+META_FILE = "meta.json"
+
+# Inputs used to check exported models against the torch originals
+PARITY_TEXTS = [
+    "How do I start an emergency fund on a small salary?",
+    "What is the difference between a Roth IRA and a traditional IRA?",
+    "Compound interest grows savings faster the earlier you start.",
+    "Should I pay off credit card debt before investing in index funds?",
+    "A systematic investment plan puts a fixed amount into a mutual fund every month.",
+    "Budgeting apps track spending by category and flag unusual expenses.",
+    "Term life insurance is usually cheaper than whole life insurance.",
+    "Women often retire with less savings because of career breaks.",
+]
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (respects taskset/cgroup affinity)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def artifact_dir(cache_dir: Path, model_name: str, kind: str, quantize: bool) -> Path:
+    """Cache directory of one exported model variant."""
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name).strip("-")
+    return Path(cache_dir) / f"{slug}.{kind}.{'int8' if quantize else 'fp32'}"
+
+
+def _session(path: Path, threads: int):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads or available_cpus()
+    # Requests are already parallel across threads; one graph runs its ops in order
+    options.inter_op_num_threads = 1
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(str(path), sess_options=options, providers=["CPUExecutionProvider"])
+
+
+def _read_meta(directory: Path) -> Dict[str, Any]:
+    with open(Path(directory) / META_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_meta(directory: Path, meta: Dict[str, Any]) -> None:
+    with open(Path(directory) / META_FILE, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+
+def _export_graph(model, tokenizer, staging: Path, output: str, sequence_output: bool, quantize: bool) -> str:
+    """Trace a Hugging Face model to ONNX (optionally int8 dynamic-quantized) in `staging`."""
+    import torch
+
+    sample = tokenizer(PARITY_TEXTS[:2], PARITY_TEXTS[2:4], padding=True, truncation=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class _Graph(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return getattr(self.model(**dict(zip(input_names, inputs)), return_dict=True), output)
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["output"] = {0: "batch", 1: "sequence"} if sequence_output else {0: "batch"}
+
+    fp32_path = staging / "model.onnx"
+    with torch.no_grad():
+        torch.onnx.export(
+            _Graph().eval(),
+            tuple(sample[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["output"],
+            dynamic_axes=dynamic_axes,
+            opset_version=OPSET_VERSION,
+            do_constant_folding=True
+        )
+    tokenizer.save_pretrained(str(staging))
+    if not quantize:
+        return fp32_path.name
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = staging / "model.int8.onnx"
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    fp32_path.unlink()
+    return int8_path.name
+
+
+def _publish(staging: Path, directory: Path) -> None:
+    """Move a finished export into place; another worker may have won the race."""
+    try:
+        os.replace(staging, directory)
+    except OSError:
+        if not (directory / META_FILE).exists():
+            raise
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _ranks(values: np.ndarray) -> np.ndarray:
+    ranks = np.empty(len(values), dtype=np.float64)
+    ranks[np.argsort(values, kind="stable")] = np.arange(len(values))
+    return ranks
+
+
+def embedder_parity(reference, candidate, texts: Sequence[str] = PARITY_TEXTS) -> Dict[str, float]:
+    """Cosine agreement between two encoders' embeddings of `texts`."""
+    expected = np.asarray(reference.encode(list(texts), convert_to_numpy=True), dtype=np.float32)
+    actual = np.asarray(candidate.encode(list(texts)), dtype=np.float32)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    actual /= np.linalg.norm(actual, axis=1, keepdims=True)
+    cosines = np.sum(expected * actual, axis=1)
+    return {
+        "min_cosine": round(float(cosines.min()), 6),
+        "mean_cosine": round(float(cosines.mean()), 6),
+        "max_abs_diff": round(float(np.abs(expected - actual).max()), 6),
+    }
+
+
+def reranker_parity(reference, candidate, pairs: Optional[Sequence[Tuple[str, str]]] = None) -> Dict[str, float]:
+    """Score and ranking agreement between two cross-encoders on query/passage pairs."""
+    if pairs is None:
+        pairs = [(query, passage) for query in PARITY_TEXTS[:4] for passage in PARITY_TEXTS]
+    expected = np.asarray(reference.predict(list(pairs)), dtype=np.float64).reshape(-1)
+    actual = np.asarray(candidate.predict(list(pairs)), dtype=np.float64).reshape(-1)
+    rank_correlation = np.corrcoef(_ranks(expected), _ranks(actual))[0, 1]
+    return {
+        "rank_correlation": round(float(rank_correlation), 6),
+        "max_abs_diff": round(float(np.abs(expected - actual).max()), 6),
+    }
+
+
+class OnnxEmbedder:
+    """
+    Sentence embedder served by onnxruntime.
+
+    `encode` mirrors `SentenceTransformer.encode` for the arguments this
+    codebase uses: a string or list of strings in, a float32 array out.
+    Batches are formed from length-sorted inputs so little work is spent on
+    padding.
+    """
+
+    def __init__(self, directory: Path, threads: int = 0):
+        from transformers import AutoTokenizer
+
+        self.directory = Path(directory)
+        self.meta = _read_meta(self.directory)
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.directory))
+        self.session = _session(self.directory / self.meta["model_file"], threads)
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.meta["max_length"], return_tensors="np"
+        )
+        feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        hidden = self.session.run(None, feeds)[0]
+        if self.meta["pooling"] == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.meta["normalize"]:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+    def encode(
+        self,
+        sentences: Union[str, Sequence[str]],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, self.meta["dimensions"]), dtype=np.float32)
+
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        embeddings = np.empty((len(texts), self.meta["dimensions"]), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            embeddings[rows] = self._embed_batch([texts[i] for i in rows])
+        if normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings[0] if single else embeddings
+
+
+class OnnxCrossEncoder:
+    """
+    Cross-encoder reranker served by onnxruntime.
+
+    `predict` mirrors `CrossEncoder.predict`: single-logit models return
+    sigmoid scores, multi-label models return raw logits.
+    """
+
+    def __init__(self, directory: Path, threads: int = 0):
+        from transformers import AutoTokenizer
+
+        self.directory = Path(directory)
+        self.meta = _read_meta(self.directory)
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.directory))
+        self.session = _session(self.directory / self.meta["model_file"], threads)
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def predict(self, sentences: Sequence[Tuple[str, str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        pairs = list(sentences)
+        scores = []
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            encoded = self.tokenizer(
+                [query for query, _ in batch],
+                [passage for _, passage in batch],
+                padding=True,
+                truncation="longest_first",
+                max_length=self.meta["max_length"],
+                return_tensors="np"
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+            scores.append(self.session.run(None, feeds)[0])
+        if not scores:
+            return np.empty(0, dtype=np.float32)
+        logits = np.concatenate(scores).astype(np.float32)
+        if logits.shape[1] == 1:
+            return 1.0 / (1.0 + np.exp(-logits[:, 0]))
+        return logits
+
+
+def load_onnx_embedder(
+    model_name: str,
+    cache_dir: Path,
+    quantize: bool = True,
+    threads: int = 0,
+    min_cosine: float = 0.99
+) -> Optional[OnnxEmbedder]:
+    """
+    ONNX version of a sentence-transformers model, exported on first use.
+
+    The export (and its parity check against the torch model) is cached under
+    `cache_dir`, so later starts only load the graph.
+
+    Returns:
+        The ONNX embedder, or None if it disagrees with torch by more than
+        `min_cosine` allows
+    """
+    directory = artifact_dir(cache_dir, model_name, "embedder", quantize)
+    meta_path = directory / META_FILE
+    if not meta_path.exists() or _read_meta(directory).get("format") != EXPORT_FORMAT:
+        from sentence_transformers import SentenceTransformer
+
+        logger.info(f"Exporting {model_name} to ONNX ({'int8' if quantize else 'fp32'})")
+        reference = SentenceTransformer(model_name, device="cpu")
+        transformer = reference[0]
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        staging = directory.with_name(f".{directory.name}.staging-{os.getpid()}")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir()
+        try:
+            model_file = _export_graph(
+                transformer.auto_model, transformer.tokenizer, staging,
+                output="last_hidden_state", sequence_output=True, quantize=quantize
+            )
+            meta = {
+                "format": EXPORT_FORMAT,
+                "model": model_name,
+                "kind": "embedder",
+                "model_file": model_file,
+                "quantized": quantize,
+                "max_length": reference.max_seq_length,
+                "dimensions": reference.get_sentence_embedding_dimension(),
+                "pooling": "cls" if any(getattr(m, "pooling_mode_cls_token", False) for m in reference) else "mean",
+                "normalize": any(type(m).__name__ == "Normalize" for m in reference),
+            }
+            _write_meta(staging, meta)
+            meta["parity"] = embedder_parity(reference, OnnxEmbedder(staging, threads))
+            _write_meta(staging, meta)
+            _publish(staging, directory)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    embedder = OnnxEmbedder(directory, threads)
+    parity = embedder.meta["parity"]
+    if parity["min_cosine"] < min_cosine:
+        logger.warning(f"ONNX export of {model_name} fails parity ({parity}); not using it")
+        return None
+    logger.info(f"Serving {model_name} with onnxruntime from {directory} (parity {parity})")
+    return embedder
+
+
+def load_onnx_cross_encoder(
+    model_name: str,
+    cache_dir: Path,
+    quantize: bool = True,
+    threads: int = 0,
+    min_rank_correlation: float = 0.95
+) -> Optional[OnnxCrossEncoder]:
+    """
+    ONNX version of a sentence-transformers CrossEncoder, exported on first use.
+
+    Returns:
+        The ONNX reranker, or None if its ranking disagrees with torch by more
+        than `min_rank_correlation` allows
+    """
+    directory = artifact_dir(cache_dir, model_name, "reranker", quantize)
+    meta_path = directory / META_FILE
+    if not meta_path.exists() or _read_meta(directory).get("format") != EXPORT_FORMAT:
+        from sentence_transformers import CrossEncoder
+
+        logger.info(f"Exporting {model_name} to ONNX ({'int8' if quantize else 'fp32'})")
+        reference = CrossEncoder(model_name, device="cpu")
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        staging = directory.with_name(f".{directory.name}.staging-{os.getpid()}")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir()
+        try:
+            model_file = _export_graph(
+                reference.model, reference.tokenizer, staging,
+                output="logits", sequence_output=False, quantize=quantize
+            )
+            meta = {
+                "format": EXPORT_FORMAT,
+                "model": model_name,
+                "kind": "reranker",
+                "model_file": model_file,
+                "quantized": quantize,
+                "max_length": reference.max_length or reference.tokenizer.model_max_length,
+            }
+            _write_meta(staging, meta)
+            meta["parity"] = reranker_parity(reference, OnnxCrossEncoder(staging, threads))
+            _write_meta(staging, meta)
+            _publish(staging, directory)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    reranker = OnnxCrossEncoder(directory, threads)
+    parity = reranker.meta["parity"]
+    if parity["rank_correlation"] < min_rank_correlation:
+        logger.warning(f"ONNX export of {model_name} fails parity ({parity}); not using it")
+        return None
+    logger.info(f"Serving {model_name} with onnxruntime from {directory} (parity {parity})")
+    return reranker
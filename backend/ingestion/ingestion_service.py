@@ -2,15 +2,22 @@ import os
 import logging
 import uuid
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from datetime import datetime
 
 from rag.document_processor import DocumentProcessor, DocumentChunk
+from rag.pdf_text import get_pdf_extractor
 from rag.vector_store import VectorStore
+from retrieval.core import get_retrieval_core
+from tabular import get_tabular_catalog, looks_tabular, table_name_for
 from config import settings
+from telemetry import run_in_threadpool
 
 logger = logging.getLogger(__name__)
 
+# Document IDs of CSVs stored as columnar tables rather than text chunks
+TABLE_DOCUMENT_PREFIX = "table_"
+
 class IngestionService:
     """
     Service for ingesting and processing financial literacy documents.
@@ -18,8 +25,8 @@ class IngestionService:
     """
     
     def __init__(self, vector_store: Optional[VectorStore] = None):
-        self.vector_store = vector_store or VectorStore()
-        self.document_processor = DocumentProcessor()
+        self.vector_store = vector_store or get_retrieval_core().vector_store
+        self.document_processor = DocumentProcessor(pdf_extractor=get_pdf_extractor())
         
     async def ingest_document(
         self,
@@ -38,6 +45,29 @@ class IngestionService:
         Returns:
             Dictionary with ingestion status and document ID
         """
+        return await run_in_threadpool(self.ingest_file, file_path, document_type, metadata)
+    
+    def ingest_file(
+        self,
+        file_path: str,
+        document_type: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        progress: Optional[Callable[..., None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Blocking ingestion of a document, for background workers.
+        
+        Args:
+            file_path: Path to the document file
+            document_type: Type of document (pdf, txt, csv, etc.)
+            metadata: Additional metadata about the document
+            progress: Optional callback receiving keyword progress updates
+                (pages_parsed, total_pages, chunks_total, chunks_embedded)
+            
+        Returns:
+            Dictionary with ingestion status and document ID
+        """
+        progress = progress or (lambda **_: None)
         try:
             # Validate file exists
             file_path = Path(file_path)
@@ -61,17 +91,47 @@ class IngestionService:
                 **metadata  # Allow overriding default metadata
             })
             
-            # Load and process the document
-            content = self.document_processor.load_document(str(file_path))
-            chunks = self.document_processor.chunk_document(
+            # Numeric CSVs become columnar tables instead of text chunks
+            if document_type == "csv" and metadata.get("tabular", True) and looks_tabular(file_path):
+                return self._ingest_table(file_path, metadata)
+            
+            # Load and process the document; PDF pages are parsed in parallel
+            # (or read from the page cache) and chunks keep their page numbers
+            extraction = None
+            page_starts = None
+            if file_path.suffix.lower() == ".pdf":
+                extraction = self.document_processor.extract_pdf(
+                    str(file_path), progress=progress, file_hash=metadata.get("content_hash")
+                )
+                content, page_starts = self.document_processor.join_pages(extraction.pages)
+            else:
+                content = self.document_processor.load_document(str(file_path), progress=progress)
+            # Columnar chunks: document metadata is held once, not copied per chunk
+            chunks = self.document_processor.chunk_batch(
                 content=content,
                 metadata=metadata,
-                document_id=doc_id
+                document_id=doc_id,
+                page_starts=page_starts
             )
+            progress(chunks_total=len(chunks))
             
-            # Store chunks in vector database
+            # Store chunks in vector database. Embedding runs in batches (so
+            # progress is visible) before the writer lock is taken; the lock
+            # is held once, for the index mutation, giving one generation
             if chunks:
-                self.vector_store.add_documents(chunks)
+                prepared = self.vector_store.prepare_documents(
+                    chunks,
+                    batch_size=settings.EMBED_BATCH_SIZE,
+                    progress=lambda done: progress(chunks_embedded=done)
+                )
+                stored = len(self.vector_store.commit_documents(prepared))
+                # The chunks are committed and searchable; a failed publish must not
+                # report the ingest as failed (a retry would store them again). Search
+                # here uses the collection until the next publish exports everything
+                try:
+                    self.vector_store.publish_snapshot()
+                except Exception as e:
+                    logger.error(f"Error publishing snapshot after ingesting {file_path}: {str(e)}", exc_info=True)
                 
                 # Get collection stats
                 stats = self.vector_store.get_collection_stats()
@@ -79,7 +139,9 @@ class IngestionService:
                 return {
                     "status": "success",
                     "document_id": doc_id,
-                    "chunks_ingested": len(chunks),
+                    "chunks_ingested": stored,
+                    "duplicates_dropped": len(chunks) - stored,
+                    "pdf_extraction": extraction.report() if extraction is not None else None,
                     "vector_db_stats": stats
                 }
             else:
@@ -95,10 +157,25 @@ class IngestionService:
                 "message": f"Failed to ingest document: {str(e)}"
             }
     
+    def _ingest_table(self, file_path: Path, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a CSV as a memory-mapped columnar table for the aggregation API."""
+        name = metadata.get("table_name") or table_name_for(metadata["source"])
+        table = get_tabular_catalog().ingest_csv(
+            file_path, name=name, dimensions=metadata.get("dimensions")
+        )
+        return {
+            "status": "success",
+            "document_id": f"{TABLE_DOCUMENT_PREFIX}{table.name}",
+            "chunks_ingested": 0,
+            "table": table.describe()
+        }
+    
     async def delete_document(self, document_id: str) -> Dict[str, Any]:
         """
         Delete a document and all its chunks from the vector store.
         
+        IDs returned for CSVs stored as tables (`table_<name>`) drop the table.
+        
         Args:
             document_id: ID of the document to delete
             
@@ -106,7 +183,15 @@ class IngestionService:
             Dictionary with deletion status
         """
         try:
-            success = self.vector_store.delete_document(document_id)
+            # Deleting and publishing block on the writer lock and disk: keep them off the event loop
+            if document_id.startswith(TABLE_DOCUMENT_PREFIX):
+                success = await run_in_threadpool(
+                    get_tabular_catalog().drop, document_id[len(TABLE_DOCUMENT_PREFIX):]
+                )
+            else:
+                success = await run_in_threadpool(self.vector_store.delete_document, document_id)
+                if success:
+                    await run_in_threadpool(self.vector_store.publish_snapshot)
             if success:
                 return {
                     "status": "success",
@@ -124,6 +209,49 @@ class IngestionService:
                 "message": f"Failed to delete document: {str(e)}"
             }
     
+    async def delete_documents_where(self, filter_metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Delete all documents whose metadata matches a filter.
+        
+        Args:
+            filter_metadata: Equality or `{"$in": [...]}` conditions on document metadata
+            
+        Returns:
+            Dictionary with deletion status and the number of documents deleted
+        """
+        try:
+            deleted = await run_in_threadpool(self.vector_store.delete_documents_where, filter_metadata)
+            if deleted:
+                await run_in_threadpool(self.vector_store.publish_snapshot)
+            return {
+                "status": "success",
+                "deleted_documents": deleted
+            }
+        except ValueError as e:
+            return {
+                "status": "invalid_filter",
+                "message": str(e)
+            }
+        except Exception as e:
+            logger.error(f"Error deleting documents by filter {filter_metadata}: {str(e)}")
+            return {
+                "status": "error",
+                "message": f"Failed to delete documents: {str(e)}"
+            }
+    
+    async def list_documents(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        List documents in the vector store, newest first.
+        
+        Args:
+            limit: Maximum number of documents to return
+            offset: Number of documents to skip
+            
+        Returns:
+            List of documents with chunk counts, sizes and ingestion times
+        """
+        return self.vector_store.list_documents(limit=limit, offset=offset)
+    
     async def get_document_stats(self) -> Dict[str, Any]:
         """
         Get statistics about documents in the vector store.
@@ -144,5 +272,5 @@ class IngestionService:
                 "message": f"Failed to get document stats: {str(e)}"
             }
 
-# Singleton instance
-ingestion_service = IngestionService()
+# Singleton instance, writing into the shared retrieval core
+ingestion_service = get_retrieval_core().ingestion
@@ -0,0 +1,206 @@
+import os
+import json
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised when the ingestion queue cannot accept more jobs."""
+
+
+@dataclass
+class IngestionJob:
+    """State and progress of one background ingestion."""
+    job_id: str
+    content_hash: str
+    filename: str
+    document_type: str
+    size_bytes: int
+    status: str = JobStatus.QUEUED
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    progress: Dict[str, int] = field(default_factory=lambda: {
+        "pages_parsed": 0,
+        "total_pages": 0,
+        "chunks_total": 0,
+        "chunks_embedded": 0,
+    })
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    duplicate_requests: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class IngestionJobQueue:
+    """
+    Bounded background queue for document ingestion.
+
+    Jobs run on a fixed-size thread pool so parsing, chunking and embedding
+    never block request workers. Uploads are coalesced by content hash and
+    metadata: while a job for the same bytes and metadata is queued or
+    running, a new upload returns that job instead of ingesting the file
+    again. Once it has finished, the same upload starts a new job, so a file
+    can be re-ingested after its document was deleted.
+    """
+
+    def __init__(
+        self,
+        run_job: Callable[[str, str, Dict[str, Any], Callable[..., None]], Dict[str, Any]],
+        max_workers: int = 2,
+        max_queued: int = 32,
+        history_size: int = 200
+    ):
+        self.run_job = run_job
+        self.max_queued = max_queued
+        self.history_size = history_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], str] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        spool_path: str,
+        content_hash: str,
+        filename: str,
+        document_type: str,
+        metadata: Dict[str, Any]
+    ) -> IngestionJob:
+        """
+        Queue a spooled upload for ingestion, or return the job already handling it.
+
+        The spool file is owned by the queue from here on and deleted when the
+        job finishes (or immediately, for a coalesced duplicate).
+
+        Raises:
+            QueueFullError: If too many jobs are already waiting
+        """
+        key = (content_hash, json.dumps(metadata, sort_keys=True, default=str))
+        with self._lock:
+            existing_id = self._inflight.get(key)
+            existing = self._jobs.get(existing_id) if existing_id else None
+            if existing is not None:
+                existing.duplicate_requests += 1
+                self._remove_spool(spool_path)
+                return existing
+
+            if self._pending >= self.max_queued:
+                self._remove_spool(spool_path)
+                raise QueueFullError("Ingestion queue is full, please retry later")
+
+            job = IngestionJob(
+                job_id=f"job_{uuid.uuid4().hex[:12]}",
+                content_hash=content_hash,
+                filename=filename,
+                document_type=document_type,
+                size_bytes=os.path.getsize(spool_path)
+            )
+            self._jobs[job.job_id] = job
+            self._inflight[key] = job.job_id
+            self._pending += 1
+            self._trim_history()
+
+        self._executor.submit(self._run, job, key, spool_path, metadata)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: IngestionJob, key: Tuple[str, str], spool_path: str, metadata: Dict[str, Any]) -> None:
+        def progress(**updates: int) -> None:
+            with self._lock:
+                job.progress.update(updates)
+
+        with self._lock:
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.utcnow().isoformat()
+        try:
+            metadata = dict(metadata, source=job.filename, content_hash=job.content_hash)
+            result = self.run_job(spool_path, job.document_type, metadata, progress)
+            succeeded = result.get("status") == "success"
+            with self._lock:
+                job.result = result
+                job.status = JobStatus.SUCCEEDED if succeeded else JobStatus.FAILED
+                job.error = None if succeeded else result.get("message")
+        except Exception as e:
+            logger.error(f"Ingestion job {job.job_id} failed: {str(e)}", exc_info=True)
+            with self._lock:
+                job.status = JobStatus.FAILED
+                job.error = str(e)
+        finally:
+            with self._lock:
+                job.finished_at = datetime.utcnow().isoformat()
+                self._pending -= 1
+                # Later uploads of the same file start a fresh job
+                if self._inflight.get(key) == job.job_id:
+                    del self._inflight[key]
+            self._remove_spool(spool_path)
+
+    def _trim_history(self) -> None:
+        finished = (JobStatus.SUCCEEDED, JobStatus.FAILED)
+        while len(self._jobs) > self.history_size:
+            oldest = next(iter(self._jobs.values()))
+            if oldest.status not in finished:
+                break
+            self._jobs.popitem(last=False)
+
+    @staticmethod
+    def _remove_spool(spool_path: str) -> None:
+        try:
+            os.unlink(spool_path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to delete spool file {spool_path}: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {"pending": self._pending, "max_queued": self.max_queued, **counts}
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _create_job_queue() -> IngestionJobQueue:
+    from ingestion.ingestion_service import ingestion_service
+
+    return IngestionJobQueue(
+        run_job=lambda path, document_type, metadata, progress: ingestion_service.ingest_file(
+            file_path=path,
+            document_type=document_type,
+            metadata=metadata,
+            progress=progress
+        ),
+        max_workers=settings.INGEST_WORKERS,
+        max_queued=settings.INGEST_MAX_QUEUED,
+        history_size=settings.INGEST_JOB_HISTORY
+    )
+
+
+# Singleton instance
+ingestion_jobs = _create_job_queue()
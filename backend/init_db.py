@@ -1,5 +1,5 @@
 import os
-from rag.vector_store import VectorStore
+from retrieval import get_retrieval_core
 from config import settings
 import logging
 
@@ -12,10 +12,10 @@ def initialize_database():
         logger.info("Initializing database...")
         
         # This will automatically create the collection if it doesn't exist
-        vector_store = VectorStore()
+        core = get_retrieval_core()
         
         # Verify the collection exists
-        stats = vector_store.get_collection_stats()
+        stats = core.stats()
         logger.info(f"Database initialized successfully. Collection stats: {stats}")
         return True
         
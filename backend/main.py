@@ -8,6 +8,9 @@ import logging
 
 from config import settings
 from api.v1 import api_router  # Updated import path
+from serving import MULTIPART_OVERHEAD_BYTES, UploadLimitMiddleware
+from telemetry.http import instrument_app
+from telemetry.profiler import install_profiler
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,13 +19,12 @@ logger = logging.getLogger(__name__)
 def initialize_application():
     """Initialize application components."""
     # Import here to avoid circular imports
-    from rag.vector_store import VectorStore
+    from retrieval import get_retrieval_core
     
     try:
         # This will create the collection if it doesn't exist
         logger.info("Initializing database...")
-        vector_store = VectorStore()
-        stats = vector_store.get_collection_stats()
+        stats = get_retrieval_core().stats()
         logger.info(f"Database initialized. Collection stats: {stats}")
         return True
     except Exception as e:
@@ -55,9 +57,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Refuse oversized uploads before the multipart parser buffers them
+app.add_middleware(
+    UploadLimitMiddleware,
+    paths=[f"{settings.API_PREFIX}/ingest"],
+    max_body_bytes=settings.MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES
+)
+
 # Include API routes
 app.include_router(api_router, prefix=settings.API_PREFIX)
 
+# Latency metrics and Prometheus /metrics endpoint
+instrument_app(app)
+
+# Opt-in stack sampling of requests slower than the SLO
+install_profiler(
+    app,
+    capture_dir=str(settings.PROFILER_DIR),
+    token=settings.PROFILER_TOKEN,
+    enabled=settings.PROFILER_ENABLED,
+    slo_ms=settings.PROFILER_SLO_MS,
+    interval_ms=settings.PROFILER_INTERVAL_MS,
+    max_captures=settings.PROFILER_MAX_CAPTURES
+)
+
 @app.get("/")
 async def root():
     return {
@@ -0,0 +1,7 @@
+from .index import ProviderIndex, ProviderMatch, get_provider_index
+
+__all__ = [
+    "ProviderIndex",
+    "ProviderMatch",
+    "get_provider_index",
+]
@@ -0,0 +1,456 @@
+import csv
+import logging
+import math
+import re
+import threading
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+import numpy as np
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+# Bumped whenever the on-disk layout changes
+INDEX_FORMAT = 1
+
+# Past this many empty-handed rings, a full vectorized scan is cheaper
+_MAX_RING_SCAN = 32
+
+_CATEGORY_COLUMNS = ("CATEGORIES_OF_SERVICE", "ADDITIONAL_SERVICES_MAYINCLUDE", "SERVICE_AVAILABLE_TO")
+_CATEGORY_NOISE = re.compile(r"^(services may include:\s*)|(please ask about other services)$", re.IGNORECASE)
+
+
+@dataclass
+class ProviderMatch:
+    """A provider returned by a nearest-provider query."""
+    organization: str
+    address: str
+    phone: str
+    website: str
+    email: str
+    zipcode: str
+    categories: List[str]
+    latitude: float
+    longitude: float
+    distance_km: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _split_categories(*values: Any) -> List[str]:
+    categories = []
+    for value in values:
+        if not isinstance(value, str):
+            continue
+        for part in value.split(","):
+            part = _CATEGORY_NOISE.sub("", part.strip()).strip()
+            if part and part not in categories:
+                categories.append(part)
+    return categories
+
+
+def _haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class ProviderIndex:
+    """
+    Nearest-provider lookup over geocoded financial-help providers.
+
+    Providers are bucketed into a fixed lat/lon grid and stored sorted by cell,
+    so a cell's providers are one contiguous slice of the coordinate arrays.
+    A query scans rings of cells around the query point and stops as soon as
+    the next ring cannot contain anything closer than the current N-th match.
+    Service categories are bitmasks (one bit per category), so filtering a
+    candidate set is a single vectorized AND.
+    """
+
+    def __init__(
+        self,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        category_masks: np.ndarray,
+        category_names: List[str],
+        fields: Dict[str, np.ndarray],
+        cell_degrees: float = 0.1
+    ):
+        self.cell_degrees = float(cell_degrees)
+        self.n_rows = int(math.ceil(180.0 / self.cell_degrees)) + 1
+        self.n_cols = int(math.ceil(360.0 / self.cell_degrees))
+        self.category_names = list(category_names)
+        self._category_bits = {name.lower(): i for i, name in enumerate(self.category_names)}
+
+        # Sort every per-provider array by grid cell
+        cells = self._cell_keys(np.asarray(latitudes, dtype=np.float64), np.asarray(longitudes, dtype=np.float64))
+        order = np.argsort(cells, kind="stable")
+        self.cells = cells[order]
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)[order]
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)[order]
+        self.category_masks = np.asarray(category_masks, dtype=np.uint64).reshape(len(order), -1)[order]
+        self.fields = {name: np.asarray(values)[order] for name, values in fields.items()}
+        rows, cols = self._cell_rows_cols(self.latitudes, self.longitudes)
+        self._occupied_rows = (int(rows.min()), int(rows.max())) if len(rows) else (0, 0)
+        self._occupied_cols = np.unique(cols)
+
+        # Zip code -> centroid of its providers, for zip-only queries
+        self.zip_centroids: Dict[str, Tuple[float, float]] = {}
+        zipcodes = self.fields.get("zipcode")
+        if zipcodes is not None and len(zipcodes):
+            unique, inverse = np.unique(zipcodes, return_inverse=True)
+            counts = np.bincount(inverse)
+            lat_sums = np.bincount(inverse, weights=self.latitudes)
+            lon_sums = np.bincount(inverse, weights=self.longitudes)
+            for zipcode, count, lat_sum, lon_sum in zip(unique, counts, lat_sums, lon_sums):
+                if zipcode:
+                    self.zip_centroids[str(zipcode)] = (float(lat_sum / count), float(lon_sum / count))
+
+    def __len__(self) -> int:
+        return len(self.latitudes)
+
+    def _cell_rows_cols(self, lats, lons):
+        rows = np.floor((np.asarray(lats) + 90.0) / self.cell_degrees).astype(np.int64)
+        cols = np.floor((np.asarray(lons) + 180.0) / self.cell_degrees).astype(np.int64) % self.n_cols
+        return rows, cols
+
+    def _cell_keys(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        rows, cols = self._cell_rows_cols(lats, lons)
+        return rows * self.n_cols + cols
+
+    @classmethod
+    def from_csv(cls, csv_path: Path, cell_degrees: float = 0.1) -> "ProviderIndex":
+        """
+        Build the index from the provider CSV (MAR_LATITUDE/MAR_LONGITUDE columns).
+
+        Args:
+            csv_path: Path to Money_Management_and_Financial_Literacy.csv or a file with the same columns
+            cell_degrees: Grid cell size in degrees
+
+        Returns:
+            ProviderIndex over every row with valid coordinates
+        """
+        rows: List[Dict[str, str]] = []
+        lats: List[float] = []
+        lons: List[float] = []
+        skipped = 0
+        with open(csv_path, newline="", encoding="utf-8-sig") as f:
+            for record in csv.DictReader(f):
+                try:
+                    lat = float(record.get("MAR_LATITUDE") or "nan")
+                    lon = float(record.get("MAR_LONGITUDE") or "nan")
+                except ValueError:
+                    lat = lon = float("nan")
+                if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+                    skipped += 1
+                    continue
+                rows.append(record)
+                lats.append(lat)
+                lons.append(lon)
+        if skipped:
+            logger.warning(f"Skipping {skipped} providers without valid coordinates in {csv_path}")
+
+        def column(name: str) -> List[str]:
+            return [(record.get(name) or "").strip() for record in rows]
+
+        per_provider = [
+            _split_categories(*values)
+            for values in zip(*(column(name) for name in _CATEGORY_COLUMNS))
+        ]
+        names: List[str] = []
+        bits: Dict[str, int] = {}
+        for categories in per_provider:
+            for category in categories:
+                if category.lower() not in bits:
+                    bits[category.lower()] = len(names)
+                    names.append(category)
+
+        words = max(1, (len(names) + 63) // 64)
+        masks = np.zeros((len(rows), words), dtype=np.uint64)
+        for row, categories in enumerate(per_provider):
+            for category in categories:
+                bit = bits[category.lower()]
+                masks[row, bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+
+        zipcodes = [
+            zipcode or mar_zip for zipcode, mar_zip in zip(column("ZIPCODE"), column("MAR_ZIPCODE"))
+        ]
+        fields = {
+            "organization": np.array(column("ORGANIZATION"), dtype=str),
+            "address": np.array(column("FULL_ADDRESS"), dtype=str),
+            "phone": np.array(column("PHONE"), dtype=str),
+            "website": np.array(column("WEBSITE"), dtype=str),
+            "email": np.array(column("EMAIL"), dtype=str),
+            "zipcode": np.array(zipcodes, dtype=str),
+            "categories": np.array(["|".join(c) for c in per_provider], dtype=str),
+        }
+        return cls(np.array(lats), np.array(lons), masks, names, fields, cell_degrees)
+
+    def save(self, path: Path) -> None:
+        """Write the prebuilt index to an .npz file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            format=np.array(INDEX_FORMAT),
+            cell_degrees=np.array(self.cell_degrees),
+            latitudes=self.latitudes,
+            longitudes=self.longitudes,
+            category_masks=self.category_masks,
+            category_names=np.array(self.category_names, dtype=str),
+            **{f"field_{name}": values for name, values in self.fields.items()}
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "ProviderIndex":
+        """Load an index written by `save`."""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format"]) != INDEX_FORMAT:
+                raise ValueError(f"Unsupported provider index format in {path}")
+            fields = {key[len("field_"):]: data[key] for key in data.files if key.startswith("field_")}
+            return cls(
+                data["latitudes"],
+                data["longitudes"],
+                data["category_masks"],
+                data["category_names"].tolist(),
+                fields,
+                float(data["cell_degrees"])
+            )
+
+    @classmethod
+    def load_or_build(cls, csv_path: Path, index_path: Path, cell_degrees: float = 0.1) -> "ProviderIndex":
+        """Load the prebuilt index, rebuilding it when the CSV is newer or the grid changed."""
+        csv_path, index_path = Path(csv_path), Path(index_path)
+        if index_path.exists() and index_path.stat().st_mtime >= csv_path.stat().st_mtime:
+            try:
+                index = cls.load(index_path)
+                if index.cell_degrees == cell_degrees:
+                    return index
+            except Exception as e:
+                logger.warning(f"Rebuilding provider index {index_path}: {str(e)}")
+
+        index = cls.from_csv(csv_path, cell_degrees)
+        index.save(index_path)
+        logger.info(f"Built provider index with {len(index)} providers and {len(index.category_names)} categories")
+        return index
+
+    def category_mask(self, categories: Iterable[str]) -> Optional[np.ndarray]:
+        """
+        Bitmask of every indexed category matching one of `categories`.
+
+        A name matches a category exactly or as a case-insensitive substring
+        ("money management" matches "Bill Pay and Money Management").
+
+        Returns:
+            Mask words, or None if nothing matches
+        """
+        words = self.category_masks.shape[1]
+        mask = np.zeros(words, dtype=np.uint64)
+        for name in categories:
+            needle = name.strip().lower()
+            if not needle:
+                continue
+            matched = [bit for key, bit in self._category_bits.items() if needle == key or needle in key]
+            for bit in matched:
+                mask[bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+        return mask if mask.any() else None
+
+    def categories_in_text(self, text: str) -> List[str]:
+        """Indexed categories mentioned in free text (e.g. a chat question)."""
+        lowered = text.lower()
+        return [name for name in self.category_names if name.lower() in lowered]
+
+    def locate_zip(self, zipcode: str) -> Optional[Tuple[float, float]]:
+        """Centroid of the providers in a zip code, if any are indexed there."""
+        return self.zip_centroids.get(str(zipcode).strip()[:5])
+
+    def nearest(
+        self,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        zipcode: Optional[str] = None,
+        categories: Optional[Iterable[str]] = None,
+        limit: int = 5,
+        max_distance_km: Optional[float] = None
+    ) -> List[ProviderMatch]:
+        """
+        Find the nearest providers offering any of `categories`.
+
+        Args:
+            latitude: Query latitude (or pass `zipcode`)
+            longitude: Query longitude
+            zipcode: Zip code to search around when no coordinates are given
+            categories: Service categories; providers offering any of them match
+            limit: Maximum number of providers to return
+            max_distance_km: Optional search radius
+
+        Returns:
+            Matches ordered by distance (empty if no category or zip matches)
+
+        Raises:
+            ValueError: If neither coordinates nor a zip code are given
+        """
+        if latitude is None or longitude is None:
+            if zipcode is None:
+                raise ValueError("Provide latitude and longitude or a zipcode")
+            location = self.locate_zip(zipcode)
+            if location is None:
+                return []
+            latitude, longitude = location
+
+        mask = None
+        if categories:
+            mask = self.category_mask(categories)
+            if mask is None:
+                return []
+        if limit <= 0 or not len(self):
+            return []
+
+        indices, distances = self._search(latitude, longitude, mask, limit, max_distance_km)
+        return [self._match(i, d) for i, d in zip(indices, distances)]
+
+    def _search(
+        self,
+        latitude: float,
+        longitude: float,
+        mask: Optional[np.ndarray],
+        limit: int,
+        max_distance_km: Optional[float]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        row, col = (int(v) for v in self._cell_rows_cols(latitude, longitude))
+        best_idx = np.empty(0, dtype=np.int64)
+        best_dist = np.empty(0, dtype=np.float64)
+        # Ring at which every occupied cell has been visited
+        col_gaps = np.abs(self._occupied_cols - col)
+        max_ring = max(
+            abs(row - self._occupied_rows[0]),
+            abs(row - self._occupied_rows[1]),
+            int(np.minimum(col_gaps, self.n_cols - col_gaps).max())
+        )
+
+        for ring in range(max_ring + 1):
+            # Nothing in this ring can be closer than (ring - 1) whole cells
+            if ring > 0:
+                edge_lat = min(89.9, abs(latitude) + ring * self.cell_degrees)
+                lower_bound = (ring - 1) * self.cell_degrees * KM_PER_DEGREE * math.cos(math.radians(edge_lat))
+                if len(best_dist) >= limit and lower_bound > best_dist[-1]:
+                    break
+                if max_distance_km is not None and lower_bound > max_distance_km:
+                    break
+
+            if ring > _MAX_RING_SCAN and len(best_dist) < limit:
+                return self._scan_all(latitude, longitude, mask, limit, max_distance_km)
+
+            candidates = self._ring_candidates(row, col, ring)
+            if not len(candidates):
+                continue
+            if mask is not None:
+                offered = (self.category_masks[candidates] & mask).any(axis=1)
+                candidates = candidates[offered]
+                if not len(candidates):
+                    continue
+            dist = _haversine_km(latitude, longitude, self.latitudes[candidates], self.longitudes[candidates])
+            if max_distance_km is not None:
+                within = dist <= max_distance_km
+                candidates, dist = candidates[within], dist[within]
+
+            best_idx = np.concatenate((best_idx, candidates))
+            best_dist = np.concatenate((best_dist, dist))
+            if len(best_dist) > limit:
+                keep = np.argpartition(best_dist, limit - 1)[:limit]
+                best_idx, best_dist = best_idx[keep], best_dist[keep]
+            order = np.argsort(best_dist, kind="stable")
+            best_idx, best_dist = best_idx[order], best_dist[order]
+
+        return best_idx, best_dist
+
+    def _scan_all(
+        self,
+        latitude: float,
+        longitude: float,
+        mask: Optional[np.ndarray],
+        limit: int,
+        max_distance_km: Optional[float]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact search over every provider, for queries far from all of them."""
+        candidates = np.arange(len(self))
+        if mask is not None:
+            candidates = candidates[(self.category_masks & mask).any(axis=1)]
+        dist = _haversine_km(latitude, longitude, self.latitudes[candidates], self.longitudes[candidates])
+        if max_distance_km is not None:
+            within = dist <= max_distance_km
+            candidates, dist = candidates[within], dist[within]
+        if len(dist) > limit:
+            keep = np.argpartition(dist, limit - 1)[:limit]
+            candidates, dist = candidates[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")
+        return candidates[order], dist[order]
+
+    def _ring_candidates(self, row: int, col: int, ring: int) -> np.ndarray:
+        """Provider indices in the cells at Chebyshev distance `ring` from (row, col)."""
+        if ring == 0:
+            rows = np.array([row])
+            cols = np.array([col])
+        else:
+            span = np.arange(-ring, ring + 1)
+            side = np.arange(-ring + 1, ring)
+            rows = np.concatenate((np.full(len(span), row - ring), np.full(len(span), row + ring), row + side, row + side))
+            cols = np.concatenate((col + span, col + span, np.full(len(side), col - ring), np.full(len(side), col + ring)))
+        valid = (rows >= 0) & (rows < self.n_rows)
+        keys = np.unique(rows[valid] * self.n_cols + cols[valid] % self.n_cols)
+
+        starts = np.searchsorted(self.cells, keys, side="left")
+        ends = np.searchsorted(self.cells, keys, side="right")
+        nonempty = ends > starts
+        if not nonempty.any():
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(s, e) for s, e in zip(starts[nonempty], ends[nonempty])])
+
+    def _match(self, i: int, distance: float) -> ProviderMatch:
+        categories = str(self.fields["categories"][i])
+        return ProviderMatch(
+            organization=str(self.fields["organization"][i]),
+            address=str(self.fields["address"][i]),
+            phone=str(self.fields["phone"][i]),
+            website=str(self.fields["website"][i]),
+            email=str(self.fields["email"][i]),
+            zipcode=str(self.fields["zipcode"][i]),
+            categories=categories.split("|") if categories else [],
+            latitude=float(self.latitudes[i]),
+            longitude=float(self.longitudes[i]),
+            distance_km=round(float(distance), 3)
+        )
+
+
+_provider_index: Optional[ProviderIndex] = None
+_provider_index_lock = threading.Lock()
+
+
+def get_provider_index() -> ProviderIndex:
+    """
+    Shared provider index, loaded (or built from the CSV) on first use.
+
+    Raises:
+        FileNotFoundError: If neither the prebuilt index nor the CSV exists
+    """
+    global _provider_index
+    if _provider_index is None:
+        with _provider_index_lock:
+            if _provider_index is None:
+                csv_path = Path(settings.PROVIDERS_CSV_PATH)
+                if not csv_path.exists():
+                    if Path(settings.PROVIDER_INDEX_PATH).exists():
+                        _provider_index = ProviderIndex.load(settings.PROVIDER_INDEX_PATH)
+                        return _provider_index
+                    raise FileNotFoundError(f"Provider data not found: {csv_path}")
+                _provider_index = ProviderIndex.load_or_build(
+                    csv_path, settings.PROVIDER_INDEX_PATH, settings.PROVIDER_GRID_DEGREES
+                )
+    return _provider_index
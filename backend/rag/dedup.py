@@ -0,0 +1,223 @@
+import hashlib
+import logging
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Sequence, Tuple, Union
+
+import numpy as np
+
+from rag.document_processor import ChunkBatch, DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+DROP = "drop"  # near-duplicates are not embedded or stored
+LINK = "link"  # near-duplicates are stored with canonical_chunk_id pointing at the original
+
+CANONICAL_KEY = "canonical_chunk_id"
+
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles.
+
+    Each of `num_perm` universal hash functions (a * x + b) mod p is applied to
+    the CRC32 of every shingle at once; the signature is the column-wise
+    minimum, so the fraction of equal positions between two signatures
+    estimates the Jaccard similarity of their shingle sets.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_MERSENNE_PRIME), num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_MERSENNE_PRIME), num_perm, dtype=np.uint64)
+
+    def _shingle_hashes(self, text: str) -> np.ndarray:
+        tokens = _TOKEN.findall(text.lower())
+        n = self.shingle_size
+        if len(tokens) < n:
+            shingles = [" ".join(tokens)]
+        else:
+            shingles = [" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in set(shingles)), dtype=np.uint64)
+        return hashes % _MERSENNE_PRIME
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = self._shingle_hashes(text)
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return float(np.mean(a == b))
+
+
+def bucket_keys(signature: np.ndarray, bands: int, scope: str = "") -> List[int]:
+    """
+    LSH bucket keys: one signed 64-bit hash per band of `signature`.
+
+    Two signatures share a bucket when they agree on a whole band, which for
+    Jaccard similarity s happens with probability 1 - (1 - s^r)^b.
+    """
+    rows = len(signature) // bands
+    keys = []
+    for band in range(bands):
+        digest = hashlib.blake2b(
+            scope.encode("utf-8") + b"\0" + signature[band * rows:(band + 1) * rows].tobytes(),
+            digest_size=8,
+            person=band.to_bytes(2, "little")
+        ).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+@dataclass
+class DedupResult:
+    """Outcome of deduplicating one batch of chunks."""
+    keep: Union[List[DocumentChunk], ChunkBatch]
+    dropped: List[Tuple[DocumentChunk, str]] = field(default_factory=list)
+    # chunk_id -> (signature, bucket keys) for the canonical chunks in `keep`
+    canonical: Dict[str, Tuple[np.ndarray, List[int]]] = field(default_factory=dict)
+
+
+class ChunkDeduplicator:
+    """
+    Ingest-time near-duplicate detection against everything already stored.
+
+    Canonical chunks have their signature and LSH bucket keys kept in the
+    document registry, so finding candidates for a new chunk is a handful of
+    indexed bucket lookups rather than a comparison with every stored chunk.
+    Candidates are confirmed by comparing full signatures against
+    `threshold`. Only chunks with the same values for `scope_keys` (e.g.
+    age_group and region) can be duplicates of each other, so personalized
+    filters keep seeing the same content.
+    """
+
+    def __init__(
+        self,
+        registry,
+        mode: str = DROP,
+        threshold: float = 0.8,
+        num_perm: int = 64,
+        bands: int = 16,
+        scope_keys: Sequence[str] = ()
+    ):
+        if mode not in (DROP, LINK):
+            raise ValueError(f"Unsupported dedup mode: {mode}")
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.registry = registry
+        self.mode = mode
+        self.threshold = threshold
+        self.bands = bands
+        self.scope_keys = list(scope_keys)
+        self.hasher = MinHasher(num_perm=num_perm)
+
+    def _scope(self, metadata: Dict[str, Any]) -> str:
+        return "|".join(str(metadata.get(key, "")) for key in self.scope_keys)
+
+    def split(self, chunks: Union[List[DocumentChunk], ChunkBatch]) -> DedupResult:
+        """
+        Separate a batch into canonical chunks and near-duplicates of earlier ones.
+
+        A ChunkBatch is read column by column and `keep` is the batch of kept
+        rows; linked rows get their canonical_chunk_id as a per-row override.
+        """
+        columnar = isinstance(chunks, ChunkBatch)
+        result = DedupResult(keep=[])
+        kept: List[int] = []
+        # Canonical chunks of this batch, grouped by bucket, not yet in the registry
+        batch_buckets: Dict[int, List[str]] = {}
+
+        for index in range(len(chunks)):
+            if columnar:
+                chunk_id, content = chunks.ids[index], chunks.texts[index]
+                scope = "|".join(str(chunks.value(index, key, "")) for key in self.scope_keys)
+            else:
+                chunk = chunks[index]
+                chunk_id, content = chunk.chunk_id, chunk.content
+                scope = self._scope(chunk.metadata)
+            signature = self.hasher.signature(content)
+            keys = bucket_keys(signature, self.bands, scope)
+
+            candidates = {
+                candidate_id: np.frombuffer(blob, dtype=np.uint32)
+                for candidate_id, blob in self.registry.lsh_candidates(keys).items()
+            }
+            for key in keys:
+                for candidate_id in batch_buckets.get(key, ()):
+                    candidates[candidate_id] = result.canonical[candidate_id][0]
+
+            canonical_id = None
+            best = self.threshold
+            for candidate_id, candidate in candidates.items():
+                score = similarity(signature, candidate)
+                if score >= best:
+                    canonical_id, best = candidate_id, score
+
+            if canonical_id is None:
+                kept.append(index)
+                result.canonical[chunk_id] = (signature, keys)
+                for key in keys:
+                    batch_buckets.setdefault(key, []).append(chunk_id)
+            elif self.mode == LINK:
+                if columnar:
+                    chunks.set_override(index, CANONICAL_KEY, canonical_id)
+                else:
+                    chunk.metadata = {**chunk.metadata, CANONICAL_KEY: canonical_id}
+                kept.append(index)
+            else:
+                result.dropped.append((chunks[index], canonical_id))
+
+        result.keep = chunks.take(kept) if columnar else [chunks[index] for index in kept]
+        if result.dropped or len(result.keep) != len(result.canonical):
+            logger.info(
+                f"Dedup: {len(result.canonical)} canonical, {len(result.keep) - len(result.canonical)} linked, "
+                f"{len(result.dropped)} dropped of {len(chunks)} chunks"
+            )
+        return result
+
+    def commit(self, result: DedupResult, document_ids: Dict[str, str]) -> None:
+        """Persist signatures of stored canonical chunks and the dropped duplicates."""
+        self.registry.add_signatures(
+            (chunk_id, document_ids[chunk_id], signature.tobytes(), keys)
+            for chunk_id, (signature, keys) in result.canonical.items()
+        )
+        self.registry.add_duplicates(
+            (chunk.chunk_id, chunk.document_id, canonical_id, chunk.content, chunk.metadata)
+            for chunk, canonical_id in result.dropped
+        )
+
+
+def collapse_duplicates(
+    chunks_with_scores: List[Tuple[DocumentChunk, float]],
+    hasher: MinHasher,
+    threshold: float = 0.8
+) -> List[Tuple[DocumentChunk, float]]:
+    """
+    Keep only the best-scored chunk of each near-duplicate group in a result list.
+
+    Chunks linked to the same canonical chunk collapse directly; the rest are
+    compared by MinHash signature, which also catches duplicates stored before
+    ingest-time dedup existed.
+    """
+    kept: List[Tuple[DocumentChunk, float]] = []
+    seen_canonical = set()
+    signatures: List[np.ndarray] = []
+    for chunk, score in sorted(chunks_with_scores, key=lambda item: item[1], reverse=True):
+        canonical = (chunk.metadata or {}).get(CANONICAL_KEY, chunk.chunk_id)
+        if canonical in seen_canonical:
+            continue
+        signature = hasher.signature(chunk.content)
+        if signatures and np.mean(np.stack(signatures) == signature, axis=1).max() >= threshold:
+            continue
+        seen_canonical.add(canonical)
+        signatures.append(signature)
+        kept.append((chunk, score))
+    return kept
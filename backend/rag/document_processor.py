@@ -1,15 +1,17 @@
 import os
 import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, Sequence, Tuple, Union
 from pathlib import Path
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-import PyPDF2
+import numpy as np
 import docx2txt
 from bs4 import BeautifulSoup
 import pandas as pd
 
+from rag.pdf_text import PdfExtraction, PdfTextExtractor
+
 logger = logging.getLogger(__name__)
 
 class DocumentType(Enum):
@@ -28,19 +30,123 @@ class DocumentChunk:
     document_id: str
     page_number: Optional[int] = None
     section: Optional[str] = None
+
+
+@dataclass
+class ChunkBatch:
+    """
+    Chunks of one document, stored as columns.
+    
+    Texts and chunk IDs are parallel lists. Character offsets into the
+    source text and page numbers (0 = unknown) are numpy arrays. The document's
+    metadata is stored once, and the few per-chunk differences (a
+    section, a canonical_chunk_id link) live in sparse `overrides`. Chunking,
+    dedup, embedding and storage read the columns directly. Indexing or
+    iterating yields DocumentChunk views built on access, for code that still
+    works chunk by chunk; their metadata is a fresh dict, so edits to a view
+    do not reach the batch (use set_override).
+    """
+    document_id: str
+    metadata: Dict[str, Any]
+    texts: List[str]
+    ids: List[str]
+    starts: np.ndarray
+    ends: np.ndarray
+    page_numbers: np.ndarray
+    overrides: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __iter__(self) -> Iterator[DocumentChunk]:
+        return (self.chunk(i) for i in range(len(self.ids)))
+    
+    def __getitem__(self, index: Union[int, slice]) -> Union[DocumentChunk, "ChunkBatch"]:
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(len(self.ids))))
+        return self.chunk(index)
+    
+    def chunk(self, index: int) -> DocumentChunk:
+        """DocumentChunk view of one row."""
+        index = range(len(self.ids))[index]
+        page_number = int(self.page_numbers[index])
+        return DocumentChunk(
+            content=self.texts[index],
+            metadata=self.chunk_metadata(index),
+            chunk_id=self.ids[index],
+            document_id=self.document_id,
+            page_number=page_number or None,
+            section=self.overrides.get(index, {}).get('section')
+        )
+    
+    def value(self, index: int, key: str, default: Any = None) -> Any:
+        """One metadata value of a row without building its metadata dict."""
+        override = self.overrides.get(index)
+        if override is not None and key in override:
+            return override[key]
+        return self.metadata.get(key, default)
+    
+    def set_override(self, index: int, key: str, value: Any) -> None:
+        self.overrides.setdefault(index, {})[key] = value
+    
+    def chunk_metadata(self, index: int) -> Dict[str, Any]:
+        """Metadata of a row as DocumentChunk.metadata has it."""
+        return {**self.metadata, **self.overrides.get(index, {}), 'chunk_id': self.ids[index]}
     
+    def storage_metadatas(self) -> List[Dict[str, Any]]:
+        """Per-row metadata as the vector store writes it (document_id, page, section included)."""
+        metadatas = []
+        for index, (chunk_id, page_number) in enumerate(zip(self.ids, self.page_numbers.tolist())):
+            metadata = {**self.metadata, **self.overrides.get(index, {}), 'chunk_id': chunk_id, 'document_id': self.document_id}
+            if page_number:
+                metadata['page'] = page_number
+            metadatas.append(metadata)
+        return metadatas
+    
+    def take(self, indices: Iterable[int]) -> "ChunkBatch":
+        """Batch of the given rows, sharing this batch's document metadata."""
+        indices = list(indices)
+        positions = np.asarray(indices, dtype=np.int64)
+        return ChunkBatch(
+            document_id=self.document_id,
+            metadata=self.metadata,
+            texts=[self.texts[i] for i in indices],
+            ids=[self.ids[i] for i in indices],
+            starts=self.starts[positions],
+            ends=self.ends[positions],
+            page_numbers=self.page_numbers[positions],
+            overrides={
+                new: dict(self.overrides[old])
+                for new, old in enumerate(indices) if old in self.overrides
+            }
+        )
+
+
 class DocumentProcessor:
     """
     Handles loading and processing of different document types into chunks
     suitable for vector storage and retrieval.
     """
     
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        pdf_extractor: Optional[PdfTextExtractor] = None
+    ):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        # Serial, uncached extraction unless a configured extractor is passed in
+        self.pdf_extractor = pdf_extractor or PdfTextExtractor()
     
-    def load_document(self, file_path: str) -> str:
-        """Load document content based on file extension."""
+    def load_document(self, file_path: str, progress: Optional[Callable[..., None]] = None) -> str:
+        """
+        Load document content based on file extension.
+        
+        Args:
+            file_path: Path to the document
+            progress: Optional callback receiving pages_parsed/total_pages updates
+        """
         file_path = Path(file_path)
         if not file_path.exists():
             raise FileNotFoundError(f"Document not found: {file_path}")
@@ -49,7 +155,7 @@ class DocumentProcessor:
         
         try:
             if ext == 'pdf':
-                return self._load_pdf(file_path)
+                return self._load_pdf(file_path, progress)
             elif ext == 'docx':
                 return self._load_docx(file_path)
             elif ext in ['txt', 'md']:
@@ -66,45 +172,94 @@ class DocumentProcessor:
             logger.error(f"Error loading document {file_path}: {str(e)}")
             raise
     
+    def extract_pdf(
+        self,
+        file_path: str,
+        progress: Optional[Callable[..., None]] = None,
+        file_hash: Optional[str] = None
+    ) -> PdfExtraction:
+        """
+        Per-page text of a PDF through the (parallel, cached) extractor.
+        
+        Args:
+            file_path: Path to the PDF
+            progress: Optional callback receiving pages_parsed/total_pages updates
+            file_hash: SHA-256 of the file, if already known (saves re-hashing it)
+        """
+        file_path = Path(file_path)
+        if not file_path.exists():
+            raise FileNotFoundError(f"Document not found: {file_path}")
+        return self.pdf_extractor.extract(file_path, progress=progress, file_hash=file_hash)
+    
+    @staticmethod
+    def join_pages(pages: Sequence[str]) -> Tuple[str, List[int]]:
+        """Page texts joined as load_document joins them, and the offset where each page begins."""
+        page_starts = []
+        offset = 0
+        for text in pages:
+            page_starts.append(offset)
+            offset += len(text) + 1  # the joining newline
+        return '\n'.join(pages), page_starts
+    
     def chunk_document(self, 
                       content: str, 
                       metadata: Dict[str, Any],
-                      document_id: str) -> List[DocumentChunk]:
+                      document_id: str,
+                      page_starts: Optional[Sequence[int]] = None) -> List[DocumentChunk]:
         """Split document into overlapping chunks with metadata."""
+        return list(self.chunk_batch(content, metadata, document_id, page_starts=page_starts))
+    
+    def chunk_batch(self,
+                    content: str,
+                    metadata: Dict[str, Any],
+                    document_id: str,
+                    page_starts: Optional[Sequence[int]] = None) -> ChunkBatch:
+        """
+        Split document into overlapping chunks, as one columnar ChunkBatch.
+        
+        page_starts holds the offset in content where each page begins; when
+        given, chunks get the number of the page their text starts on.
+        """
         # Simple chunking by character count with overlap
-        chunks = []
+        texts = []
+        ids = []
+        starts = []
         start = 0
         chunk_id = 0
         
         while start < len(content):
             end = min(start + self.chunk_size, len(content))
-            chunk_content = content[start:end].strip()
+            raw_content = content[start:end]
+            chunk_content = raw_content.strip()
             
             if chunk_content:  # Skip empty chunks
-                chunk_metadata = metadata.copy()
-                chunk_metadata['chunk_id'] = f"{document_id}_chunk_{chunk_id}"
-                
-                chunk = DocumentChunk(
-                    content=chunk_content,
-                    metadata=chunk_metadata,
-                    chunk_id=chunk_metadata['chunk_id'],
-                    document_id=document_id
-                )
-                chunks.append(chunk)
+                texts.append(chunk_content)
+                ids.append(f"{document_id}_chunk_{chunk_id}")
+                starts.append(start + len(raw_content) - len(raw_content.lstrip()))
                 
+            if end == len(content):
+                break
             start = end - self.chunk_overlap
             chunk_id += 1
-            
-        return chunks
+        
+        starts = np.asarray(starts, dtype=np.int64)
+        if page_starts:
+            page_numbers = np.searchsorted(np.asarray(page_starts, dtype=np.int64), starts, side='right')
+        else:
+            page_numbers = np.zeros(len(starts), dtype=np.int64)
+        return ChunkBatch(
+            document_id=document_id,
+            metadata=dict(metadata),
+            texts=texts,
+            ids=ids,
+            starts=starts,
+            ends=starts + np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)),
+            page_numbers=page_numbers.astype(np.int32)
+        )
     
-    def _load_pdf(self, file_path: Path) -> str:
+    def _load_pdf(self, file_path: Path, progress: Optional[Callable[..., None]] = None) -> str:
         """Extract text from PDF file."""
-        text = []
-        with open(file_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                text.append(page.extract_text())
-        return '\n'.join(text)
+        return '\n'.join(self.pdf_extractor.extract(file_path, progress=progress).pages)
     
     def _load_docx(self, file_path: Path) -> str:
         """Extract text from DOCX file."""
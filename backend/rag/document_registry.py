@@ -0,0 +1,400 @@
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Chunk-level keys that are not part of a document's own metadata
+_CHUNK_KEYS = ("chunk_id", "page", "section")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    collection TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    chunk_count INTEGER NOT NULL DEFAULT 0,
+    byte_size INTEGER NOT NULL DEFAULT 0,
+    ingested_at TEXT NOT NULL,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    PRIMARY KEY (collection, document_id)
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    collection TEXT NOT NULL,
+    chunk_id TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    byte_size INTEGER NOT NULL,
+    PRIMARY KEY (collection, chunk_id)
+);
+CREATE INDEX IF NOT EXISTS chunks_by_document ON chunks (collection, document_id);
+CREATE TABLE IF NOT EXISTS collection_totals (
+    collection TEXT PRIMARY KEY,
+    documents INTEGER NOT NULL DEFAULT 0,
+    chunks INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    dimensions INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS chunk_signatures (
+    collection TEXT NOT NULL,
+    chunk_id TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    PRIMARY KEY (collection, chunk_id)
+);
+CREATE INDEX IF NOT EXISTS signatures_by_document ON chunk_signatures (collection, document_id);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    collection TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    chunk_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lsh_by_bucket ON lsh_buckets (collection, bucket);
+CREATE INDEX IF NOT EXISTS lsh_by_chunk ON lsh_buckets (collection, chunk_id);
+CREATE TABLE IF NOT EXISTS chunk_duplicates (
+    collection TEXT NOT NULL,
+    chunk_id TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    canonical_id TEXT NOT NULL,
+    content TEXT NOT NULL,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    PRIMARY KEY (collection, chunk_id)
+);
+CREATE INDEX IF NOT EXISTS duplicates_by_canonical ON chunk_duplicates (collection, canonical_id);
+CREATE INDEX IF NOT EXISTS duplicates_by_document ON chunk_duplicates (collection, document_id);
+"""
+
+
+class DocumentRegistry:
+    """
+    SQLite index of document_id -> chunk IDs for one vector store collection.
+
+    Kept in step with the collection on every add and delete, so deletes,
+    listings and statistics are indexed lookups instead of metadata scans
+    over the vector store. Running totals live in their own row and are
+    updated in the same transaction as the documents they describe.
+    """
+
+    def __init__(self, db_path: Path, collection: str):
+        self.collection = collection
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(
+            "INSERT OR IGNORE INTO collection_totals (collection) VALUES (?)", (collection,)
+        )
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def is_empty(self) -> bool:
+        return self.stats()["total_chunks"] == 0
+
+    def add_chunks(
+        self,
+        chunks: Iterable[Tuple[str, str, int, Dict[str, Any]]],
+        dimensions: Optional[int] = None
+    ) -> None:
+        """
+        Register chunks that were just written to the collection.
+
+        Args:
+            chunks: (document_id, chunk_id, byte_size, metadata) tuples
+            dimensions: Embedding dimensionality, recorded once
+        """
+        by_document: Dict[str, List[Tuple[str, int, Dict[str, Any]]]] = {}
+        for document_id, chunk_id, byte_size, metadata in chunks:
+            by_document.setdefault(document_id, []).append((chunk_id, byte_size, metadata))
+        if not by_document:
+            return
+
+        now = datetime.utcnow().isoformat()
+        with self._lock, self._transaction() as conn:
+            added_docs = added_chunks = added_bytes = 0
+            for document_id, rows in by_document.items():
+                inserted = inserted_bytes = 0
+                for chunk_id, size, _ in rows:
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO chunks (collection, chunk_id, document_id, byte_size) "
+                        "VALUES (?, ?, ?, ?)",
+                        (self.collection, chunk_id, document_id, size)
+                    )
+                    if cursor.rowcount:
+                        inserted += 1
+                        inserted_bytes += size
+                if not inserted:
+                    continue
+                document_metadata = {
+                    k: v for k, v in rows[0][2].items() if k not in _CHUNK_KEYS
+                }
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO documents "
+                    "(collection, document_id, chunk_count, byte_size, ingested_at, metadata) "
+                    "VALUES (?, ?, 0, 0, ?, ?)",
+                    (self.collection, document_id,
+                     document_metadata.get("ingestion_date", now), json.dumps(document_metadata))
+                )
+                added_docs += cursor.rowcount
+                conn.execute(
+                    "UPDATE documents SET chunk_count = chunk_count + ?, byte_size = byte_size + ? "
+                    "WHERE collection = ? AND document_id = ?",
+                    (inserted, inserted_bytes, self.collection, document_id)
+                )
+                added_chunks += inserted
+                added_bytes += inserted_bytes
+            conn.execute(
+                "UPDATE collection_totals SET documents = documents + ?, chunks = chunks + ?, "
+                "bytes = bytes + ?, dimensions = CASE WHEN ? > 0 THEN ? ELSE dimensions END "
+                "WHERE collection = ?",
+                (added_docs, added_chunks, added_bytes, dimensions or 0, dimensions or 0, self.collection)
+            )
+
+    def chunk_ids(self, document_id: str) -> List[str]:
+        """IDs of all chunks of a document (empty if unknown)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_id FROM chunks WHERE collection = ? AND document_id = ?",
+                (self.collection, document_id)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def remove_documents(self, document_ids: List[str]) -> int:
+        """Unregister documents and their chunks; returns the number removed."""
+        if not document_ids:
+            return 0
+        removed = 0
+        with self._lock, self._transaction() as conn:
+            for document_id in document_ids:
+                row = conn.execute(
+                    "SELECT chunk_count, byte_size FROM documents WHERE collection = ? AND document_id = ?",
+                    (self.collection, document_id)
+                ).fetchone()
+                if row is None:
+                    continue
+                conn.execute(
+                    "DELETE FROM lsh_buckets WHERE collection = ? AND chunk_id IN "
+                    "(SELECT chunk_id FROM chunks WHERE collection = ? AND document_id = ?)",
+                    (self.collection, self.collection, document_id)
+                )
+                conn.execute(
+                    "DELETE FROM chunk_signatures WHERE collection = ? AND document_id = ?",
+                    (self.collection, document_id)
+                )
+                conn.execute(
+                    "DELETE FROM chunks WHERE collection = ? AND document_id = ?",
+                    (self.collection, document_id)
+                )
+                conn.execute(
+                    "DELETE FROM documents WHERE collection = ? AND document_id = ?",
+                    (self.collection, document_id)
+                )
+                conn.execute(
+                    "UPDATE collection_totals SET documents = documents - 1, chunks = chunks - ?, "
+                    "bytes = bytes - ? WHERE collection = ?",
+                    (row[0], row[1], self.collection)
+                )
+                removed += 1
+        return removed
+
+    def add_signatures(self, rows: Iterable[Tuple[str, str, bytes, List[int]]]) -> None:
+        """
+        Register MinHash signatures and LSH bucket keys of stored chunks.
+
+        Args:
+            rows: (chunk_id, document_id, signature bytes, bucket keys) tuples
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        with self._lock, self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunk_signatures (collection, chunk_id, document_id, signature) "
+                "VALUES (?, ?, ?, ?)",
+                [(self.collection, chunk_id, document_id, signature) for chunk_id, document_id, signature, _ in rows]
+            )
+            conn.executemany(
+                "INSERT INTO lsh_buckets (collection, bucket, chunk_id) VALUES (?, ?, ?)",
+                [(self.collection, bucket, chunk_id) for chunk_id, _, _, buckets in rows for bucket in buckets]
+            )
+
+    def lsh_candidates(self, buckets: List[int]) -> Dict[str, bytes]:
+        """Signatures of stored chunks sharing at least one LSH bucket (an indexed lookup per bucket)."""
+        if not buckets:
+            return {}
+        placeholders = ",".join("?" * len(buckets))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.chunk_id, s.signature FROM chunk_signatures s WHERE s.collection = ? AND s.chunk_id IN "
+                f"(SELECT chunk_id FROM lsh_buckets WHERE collection = ? AND bucket IN ({placeholders}))",
+                [self.collection, self.collection, *buckets]
+            ).fetchall()
+        return {chunk_id: signature for chunk_id, signature in rows}
+
+    def add_duplicates(self, rows: Iterable[Tuple[str, str, str, str, Dict[str, Any]]]) -> None:
+        """
+        Record chunks that were not stored because they duplicate a canonical chunk.
+
+        Args:
+            rows: (chunk_id, document_id, canonical_id, content, metadata) tuples
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        with self._lock, self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunk_duplicates "
+                "(collection, chunk_id, document_id, canonical_id, content, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (self.collection, chunk_id, document_id, canonical_id, content, json.dumps(metadata))
+                    for chunk_id, document_id, canonical_id, content, metadata in rows
+                ]
+            )
+
+    def remove_duplicates_of_documents(self, document_ids: List[str]) -> List[str]:
+        """Forget dropped duplicates belonging to documents; returns the documents that had any."""
+        if not document_ids:
+            return []
+        placeholders = ",".join("?" * len(document_ids))
+        params = [self.collection, *document_ids]
+        with self._lock, self._transaction() as conn:
+            found = [row[0] for row in conn.execute(
+                f"SELECT DISTINCT document_id FROM chunk_duplicates WHERE collection = ? AND document_id IN ({placeholders})",
+                params
+            ).fetchall()]
+            conn.execute(
+                f"DELETE FROM chunk_duplicates WHERE collection = ? AND document_id IN ({placeholders})", params
+            )
+        return found
+
+    def take_orphaned_duplicates(self, canonical_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Remove and return dropped duplicates whose canonical chunks are being deleted,
+        so the caller can store them again in their own right.
+        """
+        orphans: List[Dict[str, Any]] = []
+        with self._lock, self._transaction() as conn:
+            for start in range(0, len(canonical_ids), 500):
+                batch = canonical_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                params = [self.collection, *batch]
+                rows = conn.execute(
+                    "SELECT chunk_id, document_id, content, metadata FROM chunk_duplicates "
+                    f"WHERE collection = ? AND canonical_id IN ({placeholders})",
+                    params
+                ).fetchall()
+                conn.execute(
+                    f"DELETE FROM chunk_duplicates WHERE collection = ? AND canonical_id IN ({placeholders})", params
+                )
+                orphans.extend(
+                    {"chunk_id": chunk_id, "document_id": document_id, "content": content,
+                     "metadata": json.loads(metadata)}
+                    for chunk_id, document_id, content, metadata in rows
+                )
+        return orphans
+
+    def find_documents(self, filter_metadata: Dict[str, Any]) -> List[str]:
+        """
+        IDs of documents whose metadata matches a filter.
+
+        Supports `{"key": value}` equality and `{"key": {"$in": [...]}}`.
+        """
+        clauses, params = [], [self.collection]
+        for key, condition in filter_metadata.items():
+            if not key.replace("_", "").isalnum():
+                raise ValueError(f"Unsupported metadata key: {key}")
+            path = f"$.{key}"
+            if isinstance(condition, dict):
+                if set(condition) != {"$in"}:
+                    raise ValueError(f"Unsupported operator in filter for {key}")
+                values = list(condition["$in"])
+                if not values:
+                    return []
+                clauses.append(f"json_extract(metadata, ?) IN ({','.join('?' * len(values))})")
+                params.extend([path, *values])
+            else:
+                clauses.append("json_extract(metadata, ?) = ?")
+                params.extend([path, condition])
+        where = " AND ".join(["collection = ?"] + clauses)
+        with self._lock:
+            rows = self._conn.execute(f"SELECT document_id FROM documents WHERE {where}", params).fetchall()
+        return [row[0] for row in rows]
+
+    def list_documents(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """Registered documents, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT document_id, chunk_count, byte_size, ingested_at, metadata FROM documents "
+                "WHERE collection = ? ORDER BY ingested_at DESC LIMIT ? OFFSET ?",
+                (self.collection, limit, offset)
+            ).fetchall()
+        return [
+            {
+                "document_id": document_id,
+                "chunk_count": chunk_count,
+                "byte_size": byte_size,
+                "ingested_at": ingested_at,
+                "metadata": json.loads(metadata),
+            }
+            for document_id, chunk_count, byte_size, ingested_at, metadata in rows
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        """Running totals for the collection (a single-row lookup)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT documents, chunks, bytes, dimensions FROM collection_totals WHERE collection = ?",
+                (self.collection,)
+            ).fetchone()
+        documents, chunks, size, dimensions = row or (0, 0, 0, 0)
+        return {
+            "total_documents": documents,
+            "total_chunks": chunks,
+            "total_bytes": size,
+            "dimensions": dimensions,
+        }
+
+    def rebuild_from_collection(self, collection, batch_size: int = 1000) -> int:
+        """
+        Backfill the registry from an existing collection (one full scan).
+
+        Returns:
+            Number of chunks registered
+        """
+        total = collection.count()
+        dimensions = None
+        for offset in range(0, total, batch_size):
+            page = collection.get(
+                limit=batch_size,
+                offset=offset,
+                include=["documents", "metadatas"] + (["embeddings"] if dimensions is None else [])
+            )
+            if dimensions is None and page.get("embeddings"):
+                dimensions = len(page["embeddings"][0])
+            self.add_chunks(
+                (
+                    (metadata or {}).get("document_id", ""),
+                    chunk_id,
+                    len(document.encode("utf-8")) if document else 0,
+                    metadata or {},
+                )
+                for chunk_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"])
+            )
+        if dimensions:
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE collection_totals SET dimensions = ? WHERE collection = ?",
+                    (dimensions, self.collection)
+                )
+        logger.info(f"Registered {total} existing chunks of collection {self.collection}")
+        return total
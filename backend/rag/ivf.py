@@ -0,0 +1,737 @@
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+LOCATIONS_FILE = "locations.sqlite3"
+
+# Rows per matrix product when assigning vectors to lists
+_ASSIGN_BLOCK_ROWS = 65536
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the nearest (highest cosine) centroid for every row of `vectors`."""
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _ASSIGN_BLOCK_ROWS):
+        block = vectors[start:start + _ASSIGN_BLOCK_ROWS]
+        assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+def train_centroids(sample: np.ndarray, nlist: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """
+    Spherical k-means over unit vectors.
+
+    Returns:
+        (min(nlist, len(sample)), d) float32 unit centroids
+    """
+    rng = np.random.default_rng(seed)
+    sample = _normalize(sample)
+    nlist = max(1, min(nlist, len(sample)))
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = assign_lists(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        empty = np.bincount(assignment, minlength=nlist) == 0
+        if empty.any():
+            # Re-seed empty lists with random points so no list stays unused
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+        centroids = _normalize(sums)
+    return centroids.astype(np.float32)
+
+
+def current_version(root: Path) -> Optional[str]:
+    try:
+        with open(Path(root) / CURRENT_FILE, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _replace_file(path: Path, data: bytes) -> None:
+    staging = path.with_name(f".{path.name}.{os.getpid()}")
+    with open(staging, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(staging, path)
+
+
+class _Version:
+    """
+    Files of one IVF version directory.
+
+    Per list `i` under lists/:
+        i.vec            float32 (n, d) unit vectors, appended in place
+        i.alive          uint8 per row; 0 marks a deleted row
+        i.ids / i.ids.off   concatenated UTF-8 chunk IDs and int64 end offsets
+        i.rec / i.rec.off   JSON {document, metadata} per row and int64 end offsets
+        i.f_<key>        int32 dictionary code of filterable metadata (-1 when absent)
+    The manifest holds the committed length of every list: appends write past
+    it, truncating anything a crashed writer left behind, and only then
+    publish the new lengths, so readers never see partial rows.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        with open(self.directory / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            self.manifest: Dict[str, Any] = json.load(f)
+        if self.manifest["format"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported IVF format in {directory}")
+        self.name: str = self.directory.name
+        self.dimensions: int = self.manifest["dimensions"]
+        self.centroids = np.load(self.directory / "centroids.npy")
+        self.lookups = {
+            key: {value: code for code, value in enumerate(values)}
+            for key, values in self.manifest["filters"].items()
+        }
+        self._locations = sqlite3.connect(str(self.directory / LOCATIONS_FILE), check_same_thread=False)
+        self._maps: Dict[Tuple[int, str], Tuple[int, np.ndarray]] = {}
+        self._maps_lock = threading.Lock()
+
+    @classmethod
+    def create(cls, directory: Path, name: str, centroids: np.ndarray, filter_keys: Sequence[str], rows_at_training: int) -> "_Version":
+        directory = Path(directory)
+        (directory / "lists").mkdir(parents=True)
+        np.save(directory / "centroids.npy", centroids.astype(np.float32))
+        manifest = {
+            "format": FORMAT_VERSION,
+            "version": name,
+            "created_at": datetime.utcnow().isoformat(),
+            "dimensions": int(centroids.shape[1]),
+            "nlist": int(len(centroids)),
+            "lengths": [0] * len(centroids),
+            "deleted": 0,
+            "rows_at_training": rows_at_training,
+            "filters": {key: [] for key in filter_keys},
+        }
+        with open(directory / MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        connection = sqlite3.connect(str(directory / LOCATIONS_FILE))
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS locations (chunk_id TEXT PRIMARY KEY, list INTEGER NOT NULL, row INTEGER NOT NULL)"
+        )
+        connection.commit()
+        connection.close()
+        return cls(directory)
+
+    @property
+    def lengths(self) -> List[int]:
+        return self.manifest["lengths"]
+
+    @property
+    def rows(self) -> int:
+        return sum(self.lengths) - self.manifest["deleted"]
+
+    def path(self, list_id: int, kind: str) -> Path:
+        return self.directory / "lists" / f"{list_id}.{kind}"
+
+    def reload_manifest(self) -> bool:
+        """Pick up appends and deletes committed by another process; True if anything changed."""
+        with open(self.directory / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["lengths"] == self.lengths and manifest["deleted"] == self.manifest["deleted"]:
+            return False
+        self.manifest = manifest
+        self.lookups = {
+            key: {value: code for code, value in enumerate(values)}
+            for key, values in manifest["filters"].items()
+        }
+        return True
+
+    def write_manifest(self) -> None:
+        _replace_file(self.directory / MANIFEST_FILE, json.dumps(self.manifest).encode("utf-8"))
+
+    # Reading
+
+    def _map(self, list_id: int, kind: str, dtype, width: int = 1) -> np.ndarray:
+        """Read-only mapping of the committed rows of one list file."""
+        length = self.lengths[list_id]
+        key = (list_id, kind)
+        cached = self._maps.get(key)
+        if cached is not None and cached[0] == length:
+            return cached[1]
+        if length == 0:
+            array = np.empty((0, width) if width > 1 else 0, dtype=dtype)
+        else:
+            shape = (length, width) if width > 1 else (length,)
+            array = np.memmap(self.path(list_id, kind), dtype=dtype, mode="r", shape=shape)
+        with self._maps_lock:
+            self._maps[key] = (length, array)
+        return array
+
+    def vectors(self, list_id: int) -> np.ndarray:
+        return self._map(list_id, "vec", np.float32, self.dimensions)
+
+    def alive(self, list_id: int) -> np.ndarray:
+        return self._map(list_id, "alive", np.uint8)
+
+    def codes(self, list_id: int, key: str) -> np.ndarray:
+        return self._map(list_id, f"f_{key}", np.int32)
+
+    def _read_string(self, list_id: int, kind: str, row: int) -> bytes:
+        ends = self._map(list_id, f"{kind}.off", np.int64)
+        start = int(ends[row - 1]) if row else 0
+        with open(self.path(list_id, kind), "rb") as f:
+            f.seek(start)
+            return f.read(int(ends[row]) - start)
+
+    def chunk_id(self, list_id: int, row: int) -> str:
+        return self._read_string(list_id, "ids", row).decode("utf-8")
+
+    def record(self, list_id: int, row: int) -> Dict[str, Any]:
+        return json.loads(self._read_string(list_id, "rec", row))
+
+    def _read_strings(self, list_id: int, kind: str, rows: Iterable[int]) -> List[bytes]:
+        ends = self._map(list_id, f"{kind}.off", np.int64)
+        found = []
+        with open(self.path(list_id, kind), "rb") as f:
+            for row in rows:
+                start = int(ends[row - 1]) if row else 0
+                f.seek(start)
+                found.append(f.read(int(ends[row]) - start))
+        return found
+
+    def chunk_ids(self, list_id: int, rows: Iterable[int]) -> List[str]:
+        return [value.decode("utf-8") for value in self._read_strings(list_id, "ids", rows)]
+
+    def records(self, list_id: int, rows: Iterable[int]) -> List[Dict[str, Any]]:
+        """Records of several rows of one list, read through a single open file."""
+        return [json.loads(value) for value in self._read_strings(list_id, "rec", rows)]
+
+    def locate(self, chunk_ids: Sequence[str]) -> Dict[str, Tuple[int, int]]:
+        found = {}
+        for start in range(0, len(chunk_ids), 500):
+            batch = list(chunk_ids[start:start + 500])
+            placeholders = ",".join("?" * len(batch))
+            for chunk_id, list_id, row in self._locations.execute(
+                f"SELECT chunk_id, list, row FROM locations WHERE chunk_id IN ({placeholders})", batch
+            ):
+                found[chunk_id] = (list_id, row)
+        return found
+
+    # Writing (callers hold the writer lock)
+
+    def _code(self, key: str, value: Any) -> int:
+        if value is None:
+            return -1
+        value = str(value)
+        lookup = self.lookups[key]
+        if value not in lookup:
+            lookup[value] = len(lookup)
+            self.manifest["filters"][key].append(value)
+        return lookup[value]
+
+    @staticmethod
+    def _append_at(path: Path, offset: int, data: bytes) -> None:
+        with open(path, "r+b" if path.exists() else "w+b") as f:
+            f.seek(offset)
+            f.write(data)
+            f.truncate()
+
+    def append(
+        self,
+        list_id: int,
+        ids: Sequence[str],
+        vectors: np.ndarray,
+        records: Sequence[Dict[str, Any]]
+    ) -> int:
+        """Append rows to one list; returns the first new row. Commit with `write_manifest()`."""
+        first = self.lengths[list_id]
+        self._append_at(self.path(list_id, "vec"), first * self.dimensions * 4, vectors.astype(np.float32).tobytes())
+        self._append_at(self.path(list_id, "alive"), first, b"\x01" * len(ids))
+        for column in self.manifest["filters"]:
+            codes = np.array([self._code(column, record["metadata"].get(column)) for record in records], dtype=np.int32)
+            self._append_at(self.path(list_id, f"f_{column}"), first * 4, codes.tobytes())
+
+        for kind, values in (
+            ("ids", [chunk_id.encode("utf-8") for chunk_id in ids]),
+            ("rec", [json.dumps(record, ensure_ascii=False).encode("utf-8") for record in records]),
+        ):
+            ends_path = self.path(list_id, f"{kind}.off")
+            base = 0
+            if first:
+                with open(ends_path, "rb") as f:
+                    f.seek((first - 1) * 8)
+                    base = int(np.frombuffer(f.read(8), dtype=np.int64)[0])
+            ends = base + np.cumsum([len(value) for value in values], dtype=np.int64)
+            self._append_at(self.path(list_id, kind), base, b"".join(values))
+            self._append_at(ends_path, first * 8, ends.tobytes())
+
+        self.lengths[list_id] = first + len(ids)
+        return first
+
+    def set_locations(self, rows: Iterable[Tuple[str, int, int]]) -> List[Tuple[int, int]]:
+        """Record chunk locations; returns the previous locations of re-added chunk IDs."""
+        rows = list(rows)
+        replaced = list(self.locate([chunk_id for chunk_id, _, _ in rows]).values())
+        with self._locations:
+            self._locations.executemany("INSERT OR REPLACE INTO locations VALUES (?, ?, ?)", rows)
+        return replaced
+
+    def mark_deleted(self, locations: Iterable[Tuple[int, int]]) -> int:
+        deleted = 0
+        for list_id, row in locations:
+            with open(self.path(list_id, "alive"), "r+b") as f:
+                f.seek(row)
+                if f.read(1) == b"\x01":
+                    f.seek(row)
+                    f.write(b"\x00")
+                    deleted += 1
+        self.manifest["deleted"] += deleted
+        return deleted
+
+    def forget(self, chunk_ids: Sequence[str]) -> None:
+        with self._locations:
+            self._locations.executemany("DELETE FROM locations WHERE chunk_id = ?", [(c,) for c in chunk_ids])
+
+    def close(self) -> None:
+        self._locations.close()
+
+
+@dataclass
+class Assignment:
+    """Unit vectors of a batch and their nearest lists in one IVF version."""
+    version: Optional[str]
+    vectors: np.ndarray
+    lists: Optional[np.ndarray]
+
+
+@dataclass
+class Rebuild:
+    """
+    A retrained version staged next to `base`, not yet published.
+
+    `copied` maps, per list of `base`, the live rows copied (below
+    `base_lengths`) to their list and row in the staged version.
+    """
+    base: str
+    base_lengths: List[int]
+    staged: "_Version"
+    staging: Path
+    copied: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]]
+    rows: int
+
+
+class IVFIndex:
+    """
+    Inverted-file vector index kept on disk.
+
+    Vectors are partitioned into `nlist` lists by spherical k-means; each
+    list is a set of contiguous files read through mmap, so memory holds
+    only the centroids and the pages of the lists a query touches. A search
+    scores the centroids, then the rows of the `nprobe` nearest lists,
+    applying metadata filters per list before any vector is scored.
+
+    Ingest appends to the nearest list in place. As the corpus grows or
+    drifts, `needs_rebalance()` asks for new centroids; `rebalance()`
+    retrains on a sample, rewrites live rows into a new version directory
+    and switches the CURRENT pointer, so readers move over atomically.
+    Writers must be serialized by the caller (the storage writer lock).
+    The expensive halves of both, `assign()` and `prepare_rebalance()`,
+    only read and can run before the lock is taken.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        nlist: int = 1024,
+        nprobe: int = 16,
+        filter_keys: Sequence[str] = (),
+        min_list_size: int = 256,
+        imbalance: float = 4.0,
+        train_sample: int = 50000,
+        check_interval: float = 1.0,
+        keep: int = 2
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.filter_keys = list(filter_keys)
+        self.min_list_size = min_list_size
+        self.imbalance = imbalance
+        self.train_sample = train_sample
+        self.check_interval = check_interval
+        self.keep = keep
+
+        self._version: Optional[_Version] = None
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+        self._refresh(force=True)
+
+    def __len__(self) -> int:
+        version = self._version
+        return version.rows if version is not None else 0
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._version.name if self._version is not None else None
+
+    def _refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            name = current_version(self.root)
+            if name is None:
+                return
+            if self._version is None or self._version.name != name:
+                self._version = _Version(self.root / name)
+                logger.info(f"Serving IVF index {name} ({self._version.manifest['nlist']} lists)")
+            else:
+                self._version.reload_manifest()
+
+    def _writable(self) -> _Version:
+        """The current version, re-read from disk so appends start at the committed lengths."""
+        self._refresh(force=True)
+        return self._version
+
+    # Writes
+
+    def assign(self, embeddings: Sequence[Sequence[float]]) -> Assignment:
+        """Nearest lists of a batch under the current centroids; no lock needed."""
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1))
+        self._refresh()
+        version = self._version
+        if version is None or not len(vectors):
+            return Assignment(None, vectors, None)
+        return Assignment(version.name, vectors, assign_lists(vectors, version.centroids))
+
+    def add(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+        assignment: Optional[Assignment] = None
+    ) -> None:
+        """
+        Append chunks to their nearest lists; re-added IDs replace their old rows.
+
+        An `assignment` from `assign()` is reused unless the index was
+        rebalanced in between.
+        """
+        if not len(ids):
+            return
+        if assignment is None:
+            assignment = Assignment(None, _normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)), None)
+        vectors = assignment.vectors
+        with self._lock:
+            version = self._writable()
+            if version is None:
+                # Until there is enough data to train on, everything lives in one list
+                version = self._install(self._create(_normalize(vectors.mean(axis=0, keepdims=True)), rows_at_training=0))
+
+            lists = assignment.lists
+            if lists is None or assignment.version != version.name:
+                lists = assign_lists(vectors, version.centroids)
+            locations = []
+            for list_id in np.unique(lists):
+                rows = np.flatnonzero(lists == list_id)
+                first = version.append(
+                    int(list_id),
+                    [ids[i] for i in rows],
+                    vectors[rows],
+                    [{"document": documents[i], "metadata": metadatas[i] or {}} for i in rows]
+                )
+                locations.extend((ids[i], int(list_id), first + n) for n, i in enumerate(rows))
+            version.mark_deleted(version.set_locations(locations))
+            version.write_manifest()
+
+    def delete(self, chunk_ids: Sequence[str]) -> int:
+        """Mark chunks deleted; their rows are dropped at the next rebalance."""
+        with self._lock:
+            version = self._writable()
+            if version is None or not chunk_ids:
+                return 0
+            deleted = version.mark_deleted(version.locate(chunk_ids).values())
+            version.forget(chunk_ids)
+            version.write_manifest()
+            return deleted
+
+    def target_nlist(self, rows: Optional[int] = None) -> int:
+        rows = len(self) if rows is None else rows
+        return max(1, min(self.nlist, rows // max(1, self.min_list_size)))
+
+    def needs_rebalance(self) -> bool:
+        """True when the corpus outgrew the trained lists, lists are skewed or many rows are dead."""
+        version = self._version
+        if version is None:
+            return False
+        lengths = np.asarray(version.lengths)
+        current = len(lengths)
+        if self.target_nlist() >= 2 * current:
+            return True
+        if current > 1 and lengths.max() > self.imbalance * max(lengths.mean(), 1.0):
+            return True
+        return version.manifest["deleted"] > 0.25 * max(lengths.sum(), 1)
+
+    def rebalance(self, seed: int = 0) -> Optional[str]:
+        """
+        Retrain the centroids and rewrite every live row into a new version.
+
+        Returns:
+            The published version, or None if the index is empty
+        """
+        return self.commit_rebalance(self.prepare_rebalance(seed))
+
+    def prepare_rebalance(self, seed: int = 0) -> Optional[Rebuild]:
+        """
+        Train new centroids and copy the committed live rows into a staged version.
+
+        Only reads the current version, so it runs without the writer lock;
+        rows appended or deleted meanwhile are reconciled by `commit_rebalance()`.
+
+        Returns:
+            The staged rebuild, or None if the index is empty
+        """
+        self._refresh(force=True)
+        old = self._version
+        if old is None or len(self) == 0:
+            return None
+        base_lengths = list(old.lengths)
+        rng = np.random.default_rng(seed)
+        live = {
+            list_id: np.flatnonzero(np.asarray(old.alive(list_id))[:length] == 1)
+            for list_id, length in enumerate(base_lengths)
+        }
+        total = sum(len(rows) for rows in live.values())
+        if total == 0:
+            return None
+        fraction = min(1.0, self.train_sample / max(total, 1))
+        sample = np.concatenate([
+            np.asarray(old.vectors(list_id)[np.sort(rng.choice(rows, max(1, int(len(rows) * fraction)), replace=False))])
+            for list_id, rows in live.items() if len(rows)
+        ])
+        centroids = train_centroids(sample, self.target_nlist(total), seed=seed)
+
+        new = self._create(centroids, rows_at_training=total)
+        copied = {}
+        for list_id, rows in live.items():
+            if not len(rows):
+                continue
+            vectors = np.asarray(old.vectors(list_id)[rows])
+            assignment = assign_lists(vectors, centroids)
+            new_rows = np.empty(len(rows), dtype=np.int64)
+            locations = []
+            for target in np.unique(assignment):
+                picked = np.flatnonzero(assignment == target)
+                chunk_ids = old.chunk_ids(list_id, rows[picked])
+                first = new.append(int(target), chunk_ids, vectors[picked], old.records(list_id, rows[picked]))
+                new_rows[picked] = first + np.arange(len(picked))
+                locations.extend((chunk_id, int(target), first + n) for n, chunk_id in enumerate(chunk_ids))
+            new.set_locations(locations)
+            copied[list_id] = (rows, assignment, new_rows)
+        return Rebuild(old.name, base_lengths, new, new.directory, copied, total)
+
+    def commit_rebalance(self, rebuild: Optional[Rebuild]) -> Optional[str]:
+        """
+        Publish a staged rebuild; the caller holds the writer lock.
+
+        Rows deleted since `prepare_rebalance()` are deleted in the new
+        version and rows appended since are assigned and appended to it. A
+        rebuild whose base is no longer current is discarded.
+
+        Returns:
+            The published version, or None if nothing was published
+        """
+        if rebuild is None:
+            return None
+        with self._lock:
+            old = self._writable()
+            if old is None or old.name != rebuild.base:
+                self._discard(rebuild)
+                return None
+            new = rebuild.staged
+
+            # Copied rows that died since: deleted chunks, or chunks re-added past the base
+            dead = []
+            for list_id, (rows, lists, new_rows) in rebuild.copied.items():
+                gone = np.flatnonzero(np.asarray(old.alive(list_id))[rows] == 0)
+                if len(gone):
+                    dead.extend(old.chunk_ids(list_id, rows[gone]))
+                    new.mark_deleted(zip(lists[gone].tolist(), new_rows[gone].tolist()))
+            new.forget(dead)
+
+            appended = 0
+            for list_id, length in enumerate(old.lengths):
+                base = rebuild.base_lengths[list_id] if list_id < len(rebuild.base_lengths) else 0
+                rows = base + np.flatnonzero(np.asarray(old.alive(list_id))[base:length] == 1)
+                if not len(rows):
+                    continue
+                vectors = np.asarray(old.vectors(list_id)[rows])
+                assignment = assign_lists(vectors, new.centroids)
+                locations = []
+                for target in np.unique(assignment):
+                    picked = rows[assignment == target]
+                    chunk_ids = old.chunk_ids(list_id, picked)
+                    first = new.append(int(target), chunk_ids, vectors[assignment == target], old.records(list_id, picked))
+                    locations.extend((chunk_id, int(target), first + n) for n, chunk_id in enumerate(chunk_ids))
+                new.mark_deleted(new.set_locations(locations))
+                appended += len(rows)
+
+            new.write_manifest()
+            version = self._install(new)
+            logger.info(
+                f"Rebalanced IVF index into {len(new.centroids)} lists over {rebuild.rows} rows "
+                f"(+{appended} appended, -{len(dead)} deleted while training)"
+            )
+            return version.name
+
+    def _discard(self, rebuild: Rebuild) -> None:
+        rebuild.staged.close()
+        shutil.rmtree(rebuild.staging, ignore_errors=True)
+        logger.info(f"Discarded IVF rebuild of {rebuild.base}: the index changed version meanwhile")
+
+    def _create(self, centroids: np.ndarray, rows_at_training: int) -> _Version:
+        """A new, empty version in a staging directory that readers never look at."""
+        name = f"v{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+        return _Version.create(self.root / f".staging-{name}", name, centroids, self.filter_keys, rows_at_training)
+
+    def _install(self, staged: _Version) -> _Version:
+        """Move a staged version into place and make it CURRENT."""
+        staged.close()
+        os.replace(staged.directory, self.root / staged.manifest["version"])
+        version = _Version(self.root / staged.manifest["version"])
+        self._switch(version)
+        return version
+
+    def _switch(self, version: _Version) -> None:
+        _replace_file(self.root / CURRENT_FILE, version.name.encode("utf-8"))
+        previous, self._version = self._version, version
+        if previous is not None:
+            previous.close()
+        # Readers in other processes keep their mappings of pruned versions until they switch
+        versions = sorted(p for p in self.root.iterdir() if p.is_dir() and p.name.startswith("v"))
+        for stale in versions[:-self.keep] if self.keep > 0 else []:
+            shutil.rmtree(stale, ignore_errors=True)
+
+    # Reads
+
+    def _filter_mask(self, version: _Version, list_id: int, filter_metadata: Optional[Dict[str, Any]]) -> np.ndarray:
+        mask = np.asarray(version.alive(list_id)) == 1
+        for key, condition in (filter_metadata or {}).items():
+            if key not in version.lookups:
+                continue
+            wanted = condition["$in"] if isinstance(condition, dict) else [condition]
+            codes = [version.lookups[key][str(v)] for v in wanted if str(v) in version.lookups[key]]
+            mask &= np.isin(np.asarray(version.codes(list_id, key)), np.array(codes, dtype=np.int32))
+        return mask
+
+    @staticmethod
+    def _matches(metadata: Dict[str, Any], filter_metadata: Dict[str, Any]) -> bool:
+        for key, condition in filter_metadata.items():
+            wanted = condition["$in"] if isinstance(condition, dict) else [condition]
+            if metadata.get(key) not in wanted:
+                return False
+        return True
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        k: int,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None
+    ) -> List[Tuple[int, int, float]]:
+        """
+        Approximate cosine search over the `nprobe` nearest lists.
+
+        Filters on indexed keys are applied per list through the code
+        columns; other keys are checked against the stored metadata. Lists
+        with no matching rows do not count towards `nprobe`, so selective
+        filters keep scanning towards farther lists instead of returning
+        too few results.
+
+        Returns:
+            (list, row, cosine similarity) triples, best first
+        """
+        self._refresh()
+        version = self._version
+        if version is None or k <= 0:
+            return []
+        query = _normalize(np.asarray(query_embedding, dtype=np.float32).reshape(-1))
+        nonempty = np.flatnonzero(np.asarray(version.lengths) > 0)
+        if not len(nonempty):
+            return []
+        probe = nprobe or self.nprobe
+        centroid_scores = version.centroids[nonempty] @ query
+        lists = nonempty[np.argsort(-centroid_scores, kind="stable")]
+        unindexed = {key: c for key, c in (filter_metadata or {}).items() if key not in version.lookups}
+
+        found: List[Tuple[int, int, float]] = []
+        probed = 0
+        for list_id in lists:
+            if probed >= probe:
+                break
+            list_id = int(list_id)
+            rows = np.flatnonzero(self._filter_mask(version, list_id, filter_metadata))
+            if len(rows) and unindexed:
+                matches = [self._matches(record["metadata"], unindexed) for record in version.records(list_id, rows)]
+                rows = rows[np.asarray(matches, dtype=bool)]
+            if not len(rows):
+                continue
+            probed += 1
+            scores = np.asarray(version.vectors(list_id)[rows]) @ query
+            if len(scores) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+                rows, scores = rows[top], scores[top]
+            found.extend((list_id, int(row), float(score)) for row, score in zip(rows, scores))
+
+        found.sort(key=lambda hit: -hit[2])
+        return found[:k]
+
+    def chunk_id(self, list_id: int, row: int) -> str:
+        return self._version.chunk_id(list_id, row)
+
+    def record(self, list_id: int, row: int) -> Dict[str, Any]:
+        return self._version.record(list_id, row)
+
+    def get(self, chunk_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored {document, metadata} records of the given chunk IDs that exist."""
+        self._refresh()
+        version = self._version
+        if version is None:
+            return {}
+        return {
+            chunk_id: version.record(list_id, row)
+            for chunk_id, (list_id, row) in version.locate(list(chunk_ids)).items()
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        version = self._version
+        if version is None:
+            return {"version": None, "rows": 0, "lists": 0}
+        lengths = np.asarray(version.lengths)
+        return {
+            "version": version.name,
+            "rows": len(self),
+            "deleted": version.manifest["deleted"],
+            "lists": len(lengths),
+            "max_list": int(lengths.max()),
+            "mean_list": round(float(lengths.mean()), 1),
+            "nprobe": self.nprobe,
+        }
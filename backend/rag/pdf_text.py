@@ -0,0 +1,290 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import PyPDF2
+
+from telemetry.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Part of every cache key: bump the suffix when extraction output changes
+# (PyPDF2 upgrades change it on their own)
+EXTRACTOR_VERSION = f"pypdf2-{PyPDF2.__version__}/1"
+
+PDF_PAGES = registry.counter(
+    "pdf_pages_total", "PDF pages loaded for ingestion, from the text cache or parsed", ("source",)
+)
+PDF_PAGES_PER_SECOND = registry.gauge(
+    "pdf_extraction_pages_per_second", "Parse throughput of the last PDF that had uncached pages"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file_hash TEXT NOT NULL,
+    extractor TEXT NOT NULL,
+    page_count INTEGER NOT NULL,
+    extracted_at TEXT NOT NULL,
+    PRIMARY KEY (file_hash, extractor)
+);
+CREATE TABLE IF NOT EXISTS pages (
+    file_hash TEXT NOT NULL,
+    extractor TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (file_hash, extractor, page)
+);
+"""
+
+
+def file_sha256(path: Path, block_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _extract_pages(path: str, pages: Sequence[int]) -> List[Tuple[int, str]]:
+    """Text of the given 0-based pages; runs in a pool worker, so it opens its own reader."""
+    with open(path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        return [(page, reader.pages[page].extract_text() or "") for page in pages]
+
+
+def _page_count(path: Path) -> int:
+    with open(path, "rb") as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+
+class PageTextCache:
+    """
+    SQLite store of extracted PDF page text keyed by (file hash, page, extractor version).
+
+    Pages are written as soon as they are parsed, so an interrupted
+    extraction resumes where it stopped; re-ingesting the same bytes, or
+    re-chunking them with other settings, reads every page from here.
+    """
+
+    def __init__(self, db_path: Path, extractor: str = EXTRACTOR_VERSION):
+        self.extractor = extractor
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def page_count(self, file_hash: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_count FROM files WHERE file_hash = ? AND extractor = ?",
+                (file_hash, self.extractor)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get(self, file_hash: str) -> Dict[int, str]:
+        """Cached text per 0-based page."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page, text FROM pages WHERE file_hash = ? AND extractor = ?",
+                (file_hash, self.extractor)
+            ).fetchall()
+        return dict(rows)
+
+    def put(self, file_hash: str, page_count: int, pages: Iterable[Tuple[int, str]]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO files (file_hash, extractor, page_count, extracted_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (file_hash, self.extractor, page_count, datetime.utcnow().isoformat())
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO pages (file_hash, extractor, page, text) VALUES (?, ?, ?, ?)",
+                    [(file_hash, self.extractor, page, text) for page, text in pages]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            files, = self._conn.execute(
+                "SELECT COUNT(*) FROM files WHERE extractor = ?", (self.extractor,)
+            ).fetchone()
+            pages, = self._conn.execute(
+                "SELECT COUNT(*) FROM pages WHERE extractor = ?", (self.extractor,)
+            ).fetchone()
+        return {"files": files, "pages": pages}
+
+
+@dataclass
+class PdfExtraction:
+    """Per-page text of one PDF, with where it came from and how fast it was parsed."""
+    file_hash: str
+    pages: List[str]
+    cached_pages: int = 0
+    parsed_pages: int = 0
+    parse_seconds: float = 0.0
+    workers: int = 1
+
+    @property
+    def pages_per_sec(self) -> Optional[float]:
+        """Parse throughput over the uncached pages (None when everything came from the cache)."""
+        if not self.parsed_pages:
+            return None
+        return self.parsed_pages / max(self.parse_seconds, 1e-9)
+
+    def report(self) -> Dict[str, object]:
+        pages_per_sec = self.pages_per_sec
+        return {
+            "pages": len(self.pages),
+            "cached_pages": self.cached_pages,
+            "parsed_pages": self.parsed_pages,
+            "workers": self.workers,
+            "parse_seconds": round(self.parse_seconds, 3),
+            "pages_per_sec": round(pages_per_sec, 1) if pages_per_sec is not None else None,
+        }
+
+
+class PdfTextExtractor:
+    """
+    Page-parallel PDF text extraction with an optional persistent page cache.
+
+    Uncached pages are split into runs of `pages_per_task` consecutive pages
+    and parsed across a process pool (PyPDF2 extraction is CPU-bound, so
+    threads would serialize on the GIL). The pool uses the spawn start method
+    because the parent runs model and database threads that must not be
+    forked, and it is created on first use and shared by every ingestion.
+    With workers=1, or fewer uncached pages than one task, pages are parsed
+    in the calling thread.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        pages_per_task: int = 16,
+        cache: Optional[PageTextCache] = None
+    ):
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.pages_per_task = max(1, pages_per_task)
+        self.cache = cache
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def extract(
+        self,
+        file_path: Path,
+        progress: Optional[Callable[..., None]] = None,
+        file_hash: Optional[str] = None
+    ) -> PdfExtraction:
+        """
+        Text of every page of a PDF, in page order.
+
+        Args:
+            file_path: Path to the PDF
+            progress: Optional callback receiving pages_parsed/total_pages updates
+            file_hash: SHA-256 of the file when the caller already has it
+        """
+        file_path = Path(file_path)
+        file_hash = file_hash or file_sha256(file_path)
+        cached = self.cache.get(file_hash) if self.cache is not None else {}
+        total_pages = self.cache.page_count(file_hash) if self.cache is not None else None
+        if total_pages is None:
+            total_pages = _page_count(file_path)
+        texts = {page: text for page, text in cached.items() if page < total_pages}
+        missing = [page for page in range(total_pages) if page not in texts]
+
+        extraction = PdfExtraction(file_hash=file_hash, pages=[], cached_pages=len(texts))
+        report = (lambda: progress(pages_parsed=len(texts), total_pages=total_pages)) if progress else (lambda: None)
+        report()
+
+        if missing:
+            parse_started = time.perf_counter()
+            tasks = [missing[i:i + self.pages_per_task] for i in range(0, len(missing), self.pages_per_task)]
+            if self.workers > 1 and len(tasks) > 1:
+                extraction.workers = min(self.workers, len(tasks))
+                results = self._extract_parallel(file_path, tasks)
+            else:
+                results = (_extract_pages(str(file_path), task) for task in tasks)
+            for pages in results:
+                texts.update(pages)
+                if self.cache is not None:
+                    self.cache.put(file_hash, total_pages, pages)
+                report()
+            extraction.parse_seconds = time.perf_counter() - parse_started
+            extraction.parsed_pages = len(missing)
+            PDF_PAGES_PER_SECOND.set(extraction.pages_per_sec)
+
+        PDF_PAGES.inc(extraction.cached_pages, source="cache")
+        PDF_PAGES.inc(extraction.parsed_pages, source="parsed")
+        extraction.pages = [texts[page] for page in range(total_pages)]
+        if extraction.parsed_pages:
+            logger.info(
+                f"Extracted {file_path.name}: {extraction.parsed_pages} pages parsed at "
+                f"{extraction.pages_per_sec:.1f} pages/s on {extraction.workers} worker(s), "
+                f"{extraction.cached_pages} from cache"
+            )
+        return extraction
+
+    def _extract_parallel(self, file_path: Path, tasks: List[List[int]]) -> Iterable[List[Tuple[int, str]]]:
+        pool = self._get_pool()
+        futures = [pool.submit(_extract_pages, str(file_path), task) for task in tasks]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        except BrokenProcessPool:
+            # A worker died (e.g. on a malformed file): start a fresh pool next time
+            with self._pool_lock:
+                if self._pool is pool:
+                    self._pool = None
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+_extractor: Optional[PdfTextExtractor] = None
+_extractor_lock = threading.Lock()
+
+
+def get_pdf_extractor() -> PdfTextExtractor:
+    """Process-wide extractor configured from settings (one pool, one cache)."""
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            from config import settings
+            _extractor = PdfTextExtractor(
+                workers=settings.PDF_EXTRACT_WORKERS,
+                pages_per_task=settings.PDF_PAGES_PER_TASK,
+                cache=PageTextCache(settings.PDF_TEXT_CACHE_PATH) if settings.PDF_TEXT_CACHE_ENABLED else None
+            )
+        return _extractor
@@ -1,12 +1,17 @@
 import logging
+import time
 from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
-from sentence_transformers import CrossEncoder
 from dataclasses import dataclass
 
 from config import settings
 from rag.vector_store import VectorStore
 from rag.document_processor import DocumentChunk
+from rag.retrieval_cache import RetrievalCache
+from rag.dedup import MinHasher, collapse_duplicates
+from telemetry import stage_timer, record_cache
+from retrieval.core import get_retrieval_core
+from retrieval.models import get_reranker
 
 logger = logging.getLogger(__name__)
 
@@ -36,28 +41,86 @@ class RAGPipeline:
     """
     
     def __init__(self, vector_store: Optional[VectorStore] = None):
-        self.vector_store = vector_store or VectorStore()
-        self.reranker = CrossEncoder(settings.RERANKER_MODEL)
+        self.vector_store = vector_store or get_retrieval_core().vector_store
+        self.reranker = get_reranker(settings.RERANKER_MODEL)
+        self.cache = RetrievalCache(
+            max_entries=settings.RETRIEVAL_CACHE_SIZE if settings.RETRIEVAL_CACHE_ENABLED else 0
+        )
+        self.hasher = MinHasher(num_perm=settings.DEDUP_NUM_PERM)
         
+    @stage_timer("rag.pipeline.retrieve")
     def retrieve(
         self, 
         query: str, 
         top_k: int = 5,
         rerank_top_k: Optional[int] = None,
-        filter_metadata: Optional[Dict[str, Any]] = None
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        endpoint: str = "default"
     ) -> List[RetrievalResult]:
         """
         Retrieve relevant documents for a query with optional reranking.
         
+        Results are cached by (query, filter, depth, corpus version); a hit
+        skips the dense search and the rerank and only fetches chunk texts.
+        
         Args:
             query: The search query
             top_k: Number of initial documents to retrieve
             rerank_top_k: Number of top documents to return after reranking
             filter_metadata: Optional metadata filters
+            endpoint: Name of the calling endpoint, used for cache statistics
             
         Returns:
             List of retrieval results with scores
         """
+        start = time.perf_counter()
+        cache_key = self.cache.make_key(
+            query, filter_metadata, top_k, rerank_top_k, self.vector_store.corpus_version
+        )
+        
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            results = self._results_from_cache(cached)
+            if results is not None:
+                self.cache.record_hit(endpoint, (time.perf_counter() - start) * 1000)
+                record_cache("retrieval", hit=True)
+                return results
+        
+        results = self._retrieve_uncached(query, top_k, rerank_top_k, filter_metadata)
+        self.cache.put(cache_key, [(r.chunk_id, r.score) for r in results])
+        self.cache.record_miss(endpoint, (time.perf_counter() - start) * 1000)
+        record_cache("retrieval", hit=False)
+        return results
+    
+    def _results_from_cache(
+        self,
+        cached: Tuple[Tuple[str, float], ...]
+    ) -> Optional[List[RetrievalResult]]:
+        """Rebuild retrieval results from cached chunk IDs, or None if any chunk is gone."""
+        chunk_ids = [chunk_id for chunk_id, _ in cached]
+        chunks = self.vector_store.get_chunks(chunk_ids)
+        if len(chunks) != len(chunk_ids):
+            return None
+            
+        return [
+            RetrievalResult(
+                content=chunk.content,
+                metadata=chunk.metadata,
+                score=score,
+                document_id=chunk.document_id,
+                chunk_id=chunk.chunk_id
+            )
+            for chunk, (_, score) in zip(chunks, cached)
+        ]
+    
+    def _retrieve_uncached(
+        self,
+        query: str,
+        top_k: int,
+        rerank_top_k: Optional[int],
+        filter_metadata: Optional[Dict[str, Any]]
+    ) -> List[RetrievalResult]:
+        """Run dense search and optional reranking without consulting the cache."""
         # First-stage retrieval
         chunks_with_scores = self.vector_store.similarity_search(
             query=query,
@@ -67,6 +130,9 @@ class RAGPipeline:
         
         if not chunks_with_scores:
             return []
+        
+        # Collapse near-duplicates so they don't crowd out distinct results
+        chunks_with_scores = collapse_duplicates(chunks_with_scores, self.hasher, settings.DEDUP_THRESHOLD)
             
         # If rerank_top_k is specified and we have enough results, perform reranking
         if rerank_top_k is not None and len(chunks_with_scores) > 1:
@@ -85,6 +151,7 @@ class RAGPipeline:
             
         return results
     
+    @stage_timer("rag.pipeline.rerank")
     def _rerank(
         self, 
         query: str, 
@@ -0,0 +1,135 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (chunk_id, score) pairs in final ranked order
+CachedHits = Tuple[Tuple[str, float], ...]
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case and collapse whitespace so trivially different queries share a key."""
+    return " ".join(query.lower().split())
+
+
+def canonicalize_filter(filter_metadata: Optional[Dict[str, Any]]) -> str:
+    """Render a metadata filter as a stable string, independent of key and `$in` order."""
+    def _canonical(value):
+        if isinstance(value, dict):
+            return {k: _canonical(value[k]) for k in sorted(value)}
+        if isinstance(value, (list, tuple, set)):
+            items = [_canonical(v) for v in value]
+            return sorted(items, key=lambda v: json.dumps(v, sort_keys=True))
+        return value
+
+    if not filter_metadata:
+        return ""
+    return json.dumps(_canonical(filter_metadata), sort_keys=True, separators=(",", ":"))
+
+
+@dataclass
+class EndpointCacheStats:
+    """Hit/miss counters and latency savings for a single endpoint."""
+    hits: int = 0
+    misses: int = 0
+    saved_ms: float = 0.0
+    avg_miss_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "saved_ms": round(self.saved_ms, 3),
+            "avg_miss_ms": round(self.avg_miss_ms, 3),
+        }
+
+
+class RetrievalCache:
+    """
+    LRU cache of retrieval results keyed by normalized query, canonical
+    metadata filter, retrieval depth and corpus version.
+
+    Only chunk IDs and scores are stored; texts are fetched from the vector
+    store on a hit, which keeps entries small. Bumping the corpus version
+    makes every older entry unreachable, and those entries age out of the LRU.
+    """
+
+    def __init__(self, max_entries: int = 1024, miss_ewma_alpha: float = 0.2):
+        self.max_entries = max_entries
+        self.miss_ewma_alpha = miss_ewma_alpha
+        self._entries: "OrderedDict[Tuple, CachedHits]" = OrderedDict()
+        self._stats: Dict[str, EndpointCacheStats] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        query: str,
+        filter_metadata: Optional[Dict[str, Any]],
+        top_k: int,
+        rerank_top_k: Optional[int],
+        corpus_version: Hashable
+    ) -> Tuple:
+        """Build the cache key for a retrieval call."""
+        return (
+            normalize_query(query),
+            canonicalize_filter(filter_metadata),
+            top_k,
+            rerank_top_k,
+            corpus_version,
+        )
+
+    def get(self, key: Tuple) -> Optional[CachedHits]:
+        """Return cached hits for a key, marking it most recently used."""
+        with self._lock:
+            hits = self._entries.get(key)
+            if hits is not None:
+                self._entries.move_to_end(key)
+            return hits
+
+    def put(self, key: Tuple, hits: List[Tuple[str, float]]) -> None:
+        """Store the ranked (chunk_id, score) pairs for a key."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = tuple((chunk_id, float(score)) for chunk_id, score in hits)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached entries (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def record_hit(self, endpoint: str, elapsed_ms: float) -> None:
+        """Record a cache hit and the time it saved versus an average miss."""
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, EndpointCacheStats())
+            stats.hits += 1
+            stats.saved_ms += max(0.0, stats.avg_miss_ms - elapsed_ms)
+
+    def record_miss(self, endpoint: str, elapsed_ms: float) -> None:
+        """Record a cache miss and fold its latency into the running average."""
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, EndpointCacheStats())
+            stats.misses += 1
+            if stats.misses == 1:
+                stats.avg_miss_ms = elapsed_ms
+            else:
+                alpha = self.miss_ewma_alpha
+                stats.avg_miss_ms = alpha * elapsed_ms + (1 - alpha) * stats.avg_miss_ms
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache size and per-endpoint statistics."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "endpoints": {name: s.to_dict() for name, s in self._stats.items()},
+            }
@@ -0,0 +1,207 @@
+import logging
+from typing import List, Dict, Any, Optional, Tuple, Sequence
+
+logger = logging.getLogger(__name__)
+
+AGE_GROUPS = ("15-20", "21-28", "29-35")
+REGIONS = ("india", "international")
+SHARED = "all"
+
+Segment = Tuple[str, str]
+ALL_SEGMENTS: Tuple[Segment, ...] = tuple(
+    (age_group, region) for age_group in AGE_GROUPS for region in REGIONS
+)
+
+
+def to_chroma_where(filter_metadata: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Chroma accepts a single top-level field per `where`; combine several with `$and`."""
+    if not filter_metadata or len(filter_metadata) == 1:
+        return filter_metadata or None
+    if any(key.startswith("$") for key in filter_metadata):
+        return filter_metadata
+    return {"$and": [{key: value} for key, value in filter_metadata.items()]}
+
+
+def _segment_values(condition: Any, values: Sequence[str]) -> Optional[str]:
+    """Return the segment value of a `{"$in": [value, "all"]}` condition, if it is one."""
+    if not isinstance(condition, dict) or set(condition) != {"$in"}:
+        return None
+    members = set(condition["$in"])
+    for value in values:
+        if members == {value, SHARED}:
+            return value
+    return None
+
+
+def segment_for_filter(filter_metadata: Optional[Dict[str, Any]]) -> Optional[Segment]:
+    """
+    Map a personalization filter onto its precomputed segment.
+
+    Recognizes the filters built by `FinancialAgent._get_metadata_filters`
+    (age group and region, each `$in` [value, "all"]), in plain or `$and` form.
+
+    Returns:
+        (age_group, region) tuple, or None if the filter is not a full segment filter
+    """
+    if not filter_metadata:
+        return None
+    if set(filter_metadata) == {"$and"}:
+        merged: Dict[str, Any] = {}
+        for clause in filter_metadata["$and"]:
+            if not isinstance(clause, dict):
+                return None
+            merged.update(clause)
+        filter_metadata = merged
+    if set(filter_metadata) != {"age_group", "region"}:
+        return None
+
+    age_group = _segment_values(filter_metadata["age_group"], AGE_GROUPS)
+    region = _segment_values(filter_metadata["region"], REGIONS)
+    if age_group is None or region is None:
+        return None
+    return age_group, region
+
+
+def segments_for_metadata(metadata: Dict[str, Any]) -> List[Segment]:
+    """
+    List the segments a chunk belongs to.
+
+    A chunk is in segment (a, r) exactly when the segment filter would match it,
+    i.e. its age_group is a or "all" and its region is r or "all". Chunks
+    without these fields match no segment filter and so join no partition.
+    """
+    age_group = metadata.get("age_group")
+    region = metadata.get("region")
+    return [
+        (a, r) for a, r in ALL_SEGMENTS
+        if age_group in (a, SHARED) and region in (r, SHARED)
+    ]
+
+
+class SegmentPartitions:
+    """
+    Per-segment Chroma collections mirroring a base collection.
+
+    Each (age_group, region) segment holds its own chunks plus the shared
+    "all" chunks, so a personalized query becomes an unfiltered search over a
+    small partition instead of a metadata-filtered search over the corpus.
+    With `create=False` the partitions must already exist (opening them is
+    then read-only), otherwise the constructor raises.
+    """
+
+    def __init__(self, client, base_collection_name: str, embedding_function=None, create: bool = True):
+        self.client = client
+        self.base_collection_name = base_collection_name
+        self.embedding_function = embedding_function
+        open_partition = self._get_or_create if create else self._get
+        self.collections = {
+            segment: open_partition(segment) for segment in ALL_SEGMENTS
+        }
+
+    def reopen(self, client) -> None:
+        """Re-fetch every partition from a (re)opened client."""
+        self.client = client
+        self.collections = {
+            segment: self._get(segment) for segment in ALL_SEGMENTS
+        }
+
+    def collection_name(self, segment: Segment) -> str:
+        """Chroma collection name for a segment."""
+        age_group, region = segment
+        return f"{self.base_collection_name}__seg__{age_group}__{region}"
+
+    def _get(self, segment: Segment):
+        kwargs = {}
+        if self.embedding_function is not None:
+            kwargs["embedding_function"] = self.embedding_function
+        return self.client.get_collection(name=self.collection_name(segment), **kwargs)
+
+    def _get_or_create(self, segment: Segment):
+        kwargs = {"metadata": {"hnsw:space": "cosine"}}
+        if self.embedding_function is not None:
+            kwargs["embedding_function"] = self.embedding_function
+        return self.client.get_or_create_collection(
+            name=self.collection_name(segment), **kwargs
+        )
+
+    def add(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: List[List[float]]
+    ) -> None:
+        """Add already-embedded chunks to every segment they belong to."""
+        rows_by_segment: Dict[Segment, List[int]] = {}
+        for row, metadata in enumerate(metadatas):
+            for segment in segments_for_metadata(metadata):
+                rows_by_segment.setdefault(segment, []).append(row)
+
+        for segment, rows in rows_by_segment.items():
+            self.collections[segment].add(
+                ids=[ids[i] for i in rows],
+                documents=[documents[i] for i in rows],
+                metadatas=[metadatas[i] for i in rows],
+                embeddings=[embeddings[i] for i in rows]
+            )
+
+    def delete(self, ids: List[str]) -> None:
+        """Remove chunks from every segment."""
+        if not ids:
+            return
+        for collection in self.collections.values():
+            collection.delete(ids=ids)
+
+    def query(
+        self,
+        segment: Segment,
+        k: int,
+        query_texts: Optional[List[str]] = None,
+        query_embeddings: Optional[List[List[float]]] = None
+    ) -> Dict[str, Any]:
+        """Unfiltered nearest-neighbour search inside one segment."""
+        return self.collections[segment].query(
+            query_texts=query_texts,
+            query_embeddings=query_embeddings,
+            n_results=k
+        )
+
+    def is_empty(self) -> bool:
+        """True if no partition holds any chunk."""
+        return all(collection.count() == 0 for collection in self.collections.values())
+
+    def rebuild(self, base_collection, batch_size: int = 1000) -> int:
+        """
+        Recreate all partitions from the base collection, reusing its stored embeddings.
+
+        Args:
+            base_collection: The Chroma collection to partition
+            batch_size: Number of chunks read per page
+
+        Returns:
+            Number of base chunks partitioned
+        """
+        for segment in ALL_SEGMENTS:
+            try:
+                self.client.delete_collection(self.collection_name(segment))
+            except Exception:
+                pass
+        self.collections = {
+            segment: self._get_or_create(segment) for segment in ALL_SEGMENTS
+        }
+
+        total = base_collection.count()
+        for offset in range(0, total, batch_size):
+            page = base_collection.get(
+                limit=batch_size,
+                offset=offset,
+                include=["documents", "metadatas", "embeddings"]
+            )
+            self.add(
+                ids=page["ids"],
+                documents=page["documents"],
+                metadatas=[m or {} for m in page["metadatas"]],
+                embeddings=page["embeddings"]
+            )
+        logger.info(f"Rebuilt {len(ALL_SEGMENTS)} segment partitions from {total} chunks")
+        return total
@@ -0,0 +1,677 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2  # a version lists segments; a format 1 version is one segment
+SEGMENT_FORMAT = 1
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+SEGMENTS_DIR = "segments"
+
+# Rows scored per matrix product, to bound temporary memory on large snapshots
+_SEARCH_BLOCK_ROWS = 65536
+# After an append, the newest segment is merged into the previous one while that
+# one holds at most this many times its live rows, keeping O(log n) segments
+_MERGE_RATIO = 2
+
+
+def _fsync_file(path: Path) -> None:
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def _write_strings(path: Path, offsets_path: Path, values: Sequence[bytes]) -> None:
+    """Concatenate byte strings into one file plus an int64 (n + 1) offset table."""
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    with open(path, "wb") as f:
+        for i, value in enumerate(values):
+            f.write(value)
+            offsets[i + 1] = offsets[i] + len(value)
+    np.save(offsets_path, offsets)
+
+
+def id_hashes(ids: Sequence[str]) -> np.ndarray:
+    """64-bit hashes of chunk IDs, to find the rows of given IDs without decoding every ID."""
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(i.encode("utf-8"), digest_size=8).digest(), "little", signed=True) for i in ids],
+        dtype=np.int64
+    )
+
+
+def group_key(metadata: Dict[str, Any], group_by: str) -> str:
+    """Top-level index group of a chunk: its document, or its document section."""
+    key = str(metadata.get("document_id", ""))
+    if group_by == "section" and metadata.get("section"):
+        key = f"{key}#{metadata['section']}"
+    return key
+
+
+def _new_name() -> str:
+    return f"v{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+
+
+def _write_segment(
+    root: Path,
+    ids: Sequence[str],
+    embeddings: np.ndarray,
+    documents: Sequence[str],
+    metadatas: Sequence[Dict[str, Any]],
+    dtype: str,
+    filter_keys: Sequence[str],
+    group_by: Optional[str]
+) -> Dict[str, Any]:
+    """
+    Write an immutable segment under root/segments and return its manifest.
+
+    Layout of a segment directory:
+        embeddings.bin   row-major float32 (or int8) vectors, L2-normalized, starting at offset 0
+        scales.npy       per-row dequantization scales (int8 only)
+        ids.bin/ids.npy  concatenated UTF-8 IDs and their offsets
+        id_hashes.npy    int64 hash of every ID
+        records.bin/records.npy  JSON {document, metadata} per row and their offsets
+        filter_<key>.npy int32 dictionary codes of filterable metadata (-1 when absent)
+        groups.npy       int64 (g + 1) row offsets of each group (with `group_by`)
+        centroids.bin    float32 (g, d) L2-normalized mean vector of each group
+        manifest.json    shape, dtype and dictionaries
+
+    With `group_by` ("document" or "section"), rows are stored grouped so each
+    document (or section) is one contiguous slice, and its centroid forms a
+    small top-level index for coarse-to-fine search. Re-normalizing and
+    re-quantizing rows read back from an int8 segment gives the same codes,
+    so merging segments is lossless.
+    """
+    if dtype not in ("float32", "int8"):
+        raise ValueError(f"Unsupported snapshot dtype: {dtype}")
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    vectors = vectors.reshape(len(ids), -1) if len(ids) else np.zeros((0, 0), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms > 0, norms, 1.0)
+
+    group_offsets = None
+    if group_by and len(ids):
+        keys = [group_key(meta or {}, group_by) for meta in metadatas]
+        order = sorted(range(len(ids)), key=keys.__getitem__)
+        ids = [ids[i] for i in order]
+        documents = [documents[i] for i in order]
+        metadatas = [metadatas[i] for i in order]
+        keys = [keys[i] for i in order]
+        vectors = vectors[order]
+        starts = [0] + [i for i in range(1, len(keys)) if keys[i] != keys[i - 1]]
+        group_offsets = np.array(starts + [len(keys)], dtype=np.int64)
+
+    name = _new_name()
+    segments = Path(root) / SEGMENTS_DIR
+    segments.mkdir(parents=True, exist_ok=True)
+    staging = segments / f".staging-{name}"
+    staging.mkdir()
+    try:
+        manifest: Dict[str, Any] = {
+            "format": SEGMENT_FORMAT,
+            "version": name,
+            "created_at": datetime.utcnow().isoformat(),
+            "count": len(ids),
+            "dimensions": int(vectors.shape[1]) if len(ids) else 0,
+            "dtype": dtype,
+            "filters": {},
+        }
+
+        if group_offsets is not None:
+            sums = np.add.reduceat(vectors, group_offsets[:-1], axis=0)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            (sums / np.where(norms > 0, norms, 1.0)).astype(np.float32).tofile(staging / "centroids.bin")
+            np.save(staging / "groups.npy", group_offsets)
+            manifest["groups"] = {"by": group_by, "count": len(group_offsets) - 1}
+
+        if dtype == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+            quantized.tofile(staging / "embeddings.bin")
+            np.save(staging / "scales.npy", scales.astype(np.float32))
+        else:
+            vectors.tofile(staging / "embeddings.bin")
+
+        _write_strings(staging / "ids.bin", staging / "ids.npy", [i.encode("utf-8") for i in ids])
+        np.save(staging / "id_hashes.npy", id_hashes(ids))
+        _write_strings(
+            staging / "records.bin",
+            staging / "records.npy",
+            [
+                json.dumps({"document": doc, "metadata": meta or {}}, ensure_ascii=False).encode("utf-8")
+                for doc, meta in zip(documents, metadatas)
+            ]
+        )
+
+        for key in filter_keys:
+            values = [(meta or {}).get(key) for meta in metadatas]
+            dictionary = sorted({str(v) for v in values if v is not None})
+            lookup = {value: code for code, value in enumerate(dictionary)}
+            codes = np.array([lookup[str(v)] if v is not None else -1 for v in values], dtype=np.int32)
+            np.save(staging / f"filter_{key}.npy", codes)
+            manifest["filters"][key] = dictionary
+
+        with open(staging / MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        for path in staging.iterdir():
+            _fsync_file(path)
+        os.replace(staging, segments / name)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+
+def _publish_version(
+    root: Path,
+    segments: Sequence[Tuple[Dict[str, Any], np.ndarray]],
+    generation: int,
+    keep: int
+) -> str:
+    """
+    Write a version listing (segment manifest, deleted rows) pairs and point CURRENT at it.
+
+    CURRENT never moves to an older storage generation: if a newer one was
+    published meanwhile, the new version is dropped and the current one kept.
+    """
+    published = current_generation(root)
+    if published is not None and published > generation:
+        logger.warning(f"Not publishing snapshot of generation {generation}: {published} is already current")
+        return current_version(root)
+
+    version = _new_name()
+    staging = root / f".staging-{version}"
+    staging.mkdir()
+    try:
+        manifest: Dict[str, Any] = {
+            "format": FORMAT_VERSION,
+            "version": version,
+            "created_at": datetime.utcnow().isoformat(),
+            "generation": generation,
+            "count": sum(segment["count"] - len(deleted) for segment, deleted in segments),
+            "segments": [],
+        }
+        for segment, deleted in segments:
+            manifest["segments"].append({"name": segment["version"], "count": segment["count"], "deleted": len(deleted)})
+            if len(deleted):
+                np.save(staging / f"deleted_{segment['version']}.npy", np.asarray(deleted, dtype=np.int64))
+        with open(staging / MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        for path in staging.iterdir():
+            _fsync_file(path)
+
+        os.replace(staging, root / version)
+        pointer = root / f".{CURRENT_FILE}.{version}"
+        with open(pointer, "w", encoding="utf-8") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer, root / CURRENT_FILE)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    _prune(root, keep)
+    logger.info(
+        f"Published embedding snapshot {version} at generation {generation} "
+        f"({manifest['count']} rows in {len(segments)} segments)"
+    )
+    return version
+
+
+def write_snapshot(
+    root: Path,
+    ids: Sequence[str],
+    embeddings: np.ndarray,
+    documents: Sequence[str],
+    metadatas: Sequence[Dict[str, Any]],
+    generation: int = 0,
+    dtype: str = "float32",
+    filter_keys: Sequence[str] = (),
+    keep: int = 2,
+    group_by: Optional[str] = None
+) -> str:
+    """
+    Write a complete snapshot as a single segment and publish it.
+
+    Versions are built in staging directories, renamed into place and then
+    published by atomically replacing the CURRENT pointer, so readers only
+    ever see complete snapshots. Callers serialize publishes (the storage
+    writer lock) and tag each with the storage `generation` it was read at.
+
+    Returns:
+        Name of the current version afterwards
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    segment = _write_segment(root, ids, embeddings, documents, metadatas, dtype, filter_keys, group_by)
+    return _publish_version(root, [(segment, np.empty(0, dtype=np.int64))], generation, keep)
+
+
+def append_snapshot(
+    root: Path,
+    base: str,
+    ids: Sequence[str],
+    embeddings: np.ndarray,
+    documents: Sequence[str],
+    metadatas: Sequence[Dict[str, Any]],
+    removed_ids: Sequence[str] = (),
+    generation: int = 0,
+    dtype: str = "float32",
+    filter_keys: Sequence[str] = (),
+    keep: int = 2,
+    group_by: Optional[str] = None,
+    max_deleted_fraction: float = 0.2
+) -> str:
+    """
+    Publish `base` plus a delta: new rows in a new segment, removed rows as tombstones.
+
+    Rows of `removed_ids`, and older rows of re-added `ids`, are tombstoned
+    in the base segments. The cost follows the delta, not the corpus,
+    apart from a vectorized ID-hash scan. Small trailing segments are merged
+    as they accumulate, and everything is merged once more than
+    `max_deleted_fraction` of the rows are tombstones.
+
+    Returns:
+        Name of the current version afterwards
+    """
+    root = Path(root)
+    snapshot = EmbeddingSnapshot(root / base)
+    if snapshot.format != FORMAT_VERSION:
+        raise ValueError(f"Snapshot {base} predates segments; write a full snapshot instead")
+
+    removed = list(removed_ids) + list(ids)
+    segments: List[Tuple[Dict[str, Any], np.ndarray]] = []
+    for segment, deleted in zip(snapshot.segments, snapshot.deleted):
+        segments.append((segment.manifest, np.union1d(deleted, segment.rows_of(removed))))
+    if len(ids):
+        segments.append((
+            _write_segment(root, ids, embeddings, documents, metadatas, dtype, filter_keys, group_by),
+            np.empty(0, dtype=np.int64)
+        ))
+
+    live = [segment["count"] - len(deleted) for segment, deleted in segments]
+    rows = sum(segment["count"] for segment, _ in segments)
+    if rows and (rows - sum(live)) > max_deleted_fraction * rows:
+        segments = [_merge(root, segments, dtype, filter_keys, group_by)]
+    else:
+        segments = [entry for entry, n in zip(segments, live) if n]
+        while len(segments) > 1 and _live(segments[-2]) <= _MERGE_RATIO * _live(segments[-1]):
+            segments[-2:] = [_merge(root, segments[-2:], dtype, filter_keys, group_by)]
+    return _publish_version(root, segments, generation, keep)
+
+
+def _live(entry: Tuple[Dict[str, Any], np.ndarray]) -> int:
+    return entry[0]["count"] - len(entry[1])
+
+
+def _merge(
+    root: Path,
+    segments: Sequence[Tuple[Dict[str, Any], np.ndarray]],
+    dtype: str,
+    filter_keys: Sequence[str],
+    group_by: Optional[str]
+) -> Tuple[Dict[str, Any], np.ndarray]:
+    """Rewrite the live rows of several segments into one."""
+    ids, vectors, documents, metadatas = [], [], [], []
+    for manifest, deleted in segments:
+        segment = _Segment(root / SEGMENTS_DIR / manifest["version"])
+        rows = np.setdiff1d(np.arange(segment.count), deleted)
+        if not len(rows):
+            continue
+        ids.extend(segment.chunk_id(row) for row in rows)
+        vectors.append(segment.vectors(rows))
+        for row in rows:
+            record = segment.record(row)
+            documents.append(record["document"])
+            metadatas.append(record["metadata"])
+    embeddings = np.concatenate(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    merged = _write_segment(root, ids, embeddings, documents, metadatas, dtype, filter_keys, group_by)
+    return merged, np.empty(0, dtype=np.int64)
+
+
+def _prune(root: Path, keep: int) -> None:
+    """
+    Remove all but the newest `keep` versions, and segments no kept version lists.
+
+    Readers keep old mappings alive until they swap.
+    """
+    versions = sorted(p for p in root.iterdir() if p.is_dir() and p.name.startswith("v"))
+    for stale in versions[:-keep] if keep > 0 else []:
+        shutil.rmtree(stale, ignore_errors=True)
+    referenced = set()
+    for version in versions[-keep:] if keep > 0 else versions:
+        try:
+            with open(version / MANIFEST_FILE, "r", encoding="utf-8") as f:
+                referenced.update(segment["name"] for segment in json.load(f).get("segments", []))
+        except (FileNotFoundError, ValueError):
+            continue
+    segments = root / SEGMENTS_DIR
+    if segments.is_dir():
+        for segment in segments.iterdir():
+            if segment.name.startswith("v") and segment.name not in referenced:
+                shutil.rmtree(segment, ignore_errors=True)
+
+
+def current_version(root: Path) -> Optional[str]:
+    try:
+        with open(Path(root) / CURRENT_FILE, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def current_generation(root: Path) -> Optional[int]:
+    """Storage generation of the current version, or None if unknown (no snapshot, or format 1)."""
+    version = current_version(root)
+    if version is None:
+        return None
+    try:
+        with open(Path(root) / version / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f).get("generation")
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class _Segment:
+    """Read-only, memory-mapped view of one segment directory (or a format 1 version)."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        with open(self.directory / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            self.manifest: Dict[str, Any] = json.load(f)
+        if self.manifest["format"] != SEGMENT_FORMAT:
+            raise ValueError(f"Unsupported snapshot segment format in {directory}")
+        self.count: int = self.manifest["count"]
+        self.dimensions: int = self.manifest["dimensions"]
+        self.dtype: str = self.manifest["dtype"]
+
+        shape = (self.count, self.dimensions)
+        if self.count:
+            self.embeddings = np.memmap(
+                self.directory / "embeddings.bin", dtype=np.dtype(self.dtype), mode="r", shape=shape
+            )
+        else:
+            self.embeddings = np.empty(shape, dtype=np.dtype(self.dtype))
+        self.scales = np.load(self.directory / "scales.npy", mmap_mode="r") if self.dtype == "int8" else None
+        self._ids = self._open_bytes("ids.bin")
+        self._id_offsets = np.load(self.directory / "ids.npy", mmap_mode="r")
+        self._records = self._open_bytes("records.bin")
+        self._record_offsets = np.load(self.directory / "records.npy", mmap_mode="r")
+        self._filters = {
+            key: (np.load(self.directory / f"filter_{key}.npy", mmap_mode="r"), dictionary)
+            for key, dictionary in self.manifest["filters"].items()
+        }
+        self.group_offsets = None
+        self.centroids = None
+        groups = self.manifest.get("groups")
+        if groups and groups["count"]:
+            self.group_offsets = np.load(self.directory / "groups.npy", mmap_mode="r")
+            self.centroids = np.memmap(
+                self.directory / "centroids.bin", dtype=np.float32, mode="r",
+                shape=(groups["count"], self.dimensions)
+            )
+
+    def _open_bytes(self, name: str) -> np.ndarray:
+        path = self.directory / name
+        if path.stat().st_size == 0:
+            return np.empty(0, dtype=np.uint8)
+        return np.memmap(path, dtype=np.uint8, mode="r")
+
+    def chunk_id(self, row: int) -> str:
+        start, end = self._id_offsets[row], self._id_offsets[row + 1]
+        return bytes(self._ids[start:end]).decode("utf-8")
+
+    def record(self, row: int) -> Dict[str, Any]:
+        start, end = self._record_offsets[row], self._record_offsets[row + 1]
+        return json.loads(bytes(self._records[start:end]))
+
+    def rows_of(self, chunk_ids: Sequence[str]) -> np.ndarray:
+        """Rows holding any of `chunk_ids`."""
+        if not self.count or not len(chunk_ids):
+            return np.empty(0, dtype=np.int64)
+        path = self.directory / "id_hashes.npy"
+        hashes = np.load(path, mmap_mode="r") if path.exists() else id_hashes([self.chunk_id(r) for r in range(self.count)])
+        candidates = np.flatnonzero(np.isin(hashes, id_hashes(chunk_ids)))
+        wanted = set(chunk_ids)
+        return np.array([row for row in candidates if self.chunk_id(row) in wanted], dtype=np.int64)
+
+    def vectors(self, rows) -> np.ndarray:
+        """Float32 vectors of some rows (dequantized for int8)."""
+        block = np.asarray(self.embeddings[rows], dtype=np.float32)
+        if self.scales is not None:
+            block = block * np.asarray(self.scales[rows])[:, None]
+        return block
+
+    def supports_filter(self, filter_metadata: Dict[str, Any]) -> bool:
+        for key, condition in filter_metadata.items():
+            if key not in self._filters:
+                return False
+            if isinstance(condition, dict) and set(condition) != {"$in"}:
+                return False
+        return True
+
+    def filter_mask(self, filter_metadata: Dict[str, Any]) -> np.ndarray:
+        mask = np.ones(self.count, dtype=bool)
+        for key, condition in filter_metadata.items():
+            codes, dictionary = self._filters[key]
+            wanted = condition["$in"] if isinstance(condition, dict) else [condition]
+            lookup = {value: code for code, value in enumerate(dictionary)}
+            wanted_codes = [lookup[str(v)] for v in wanted if str(v) in lookup]
+            mask &= np.isin(codes, np.array(wanted_codes, dtype=np.int32))
+        return mask
+
+    def scores(self, rows, query: np.ndarray) -> np.ndarray:
+        """Cosine of `query` with some rows (a slice or an index array)."""
+        scores = self.embeddings[rows].astype(np.float32, copy=False) @ query
+        if self.scales is not None:
+            scores *= self.scales[rows]
+        return scores
+
+
+class EmbeddingSnapshot:
+    """
+    Read-only, memory-mapped view of one snapshot version.
+
+    A version is a list of immutable segments plus, per segment, the rows
+    deleted since it was written. Rows are numbered across segments in
+    order. Every array is an `np.memmap`/mmap-mode load of a file, so all
+    worker processes serving the same version share a single page-cache
+    copy and opening a snapshot costs a few syscalls per segment.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        with open(self.directory / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            self.manifest: Dict[str, Any] = json.load(f)
+        self.format: int = self.manifest["format"]
+        self.version: str = self.manifest["version"]
+        if self.format == SEGMENT_FORMAT and "segments" not in self.manifest:
+            self.generation = None
+            self.segments = [_Segment(self.directory)]
+            self.deleted = [np.empty(0, dtype=np.int64)]
+        elif self.format == FORMAT_VERSION:
+            self.generation = self.manifest["generation"]
+            self.segments, self.deleted = [], []
+            for entry in self.manifest["segments"]:
+                self.segments.append(_Segment(self.directory.parent / SEGMENTS_DIR / entry["name"]))
+                deleted = self.directory / f"deleted_{entry['name']}.npy"
+                self.deleted.append(np.load(deleted) if entry["deleted"] else np.empty(0, dtype=np.int64))
+        else:
+            raise ValueError(f"Unsupported snapshot format in {directory}")
+
+        self._bases = np.cumsum([0] + [segment.count for segment in self.segments])
+        self.count: int = int(self._bases[-1])
+        self.dimensions: int = max((segment.dimensions for segment in self.segments), default=0)
+        self._alive = None
+        if any(len(deleted) for deleted in self.deleted):
+            self._alive = np.ones(self.count, dtype=bool)
+            for base, deleted in zip(self._bases, self.deleted):
+                self._alive[base + deleted] = False
+
+        # Coarse-to-fine needs every segment grouped; group rows are global rows
+        self.group_offsets = None
+        self.centroids = None
+        grouped = [segment for segment in self.segments if segment.count]
+        if grouped and all(segment.centroids is not None for segment in grouped):
+            bases = [base for base, segment in zip(self._bases, self.segments) if segment.count]
+            self.centroids = np.concatenate([np.asarray(segment.centroids) for segment in grouped])
+            self.group_offsets = np.concatenate(
+                [base + np.asarray(segment.group_offsets[:-1]) for base, segment in zip(bases, grouped)] + [[self.count]]
+            ).astype(np.int64)
+
+    def _locate(self, row: int) -> Tuple[_Segment, int]:
+        index = int(np.searchsorted(self._bases, row, side="right")) - 1
+        return self.segments[index], row - int(self._bases[index])
+
+    def chunk_id(self, row: int) -> str:
+        segment, local = self._locate(row)
+        return segment.chunk_id(local)
+
+    def record(self, row: int) -> Dict[str, Any]:
+        segment, local = self._locate(row)
+        return segment.record(local)
+
+    def supports_filter(self, filter_metadata: Optional[Dict[str, Any]]) -> bool:
+        """True if every condition is an equality or `$in` on an indexed key."""
+        if not filter_metadata:
+            return True
+        return all(segment.supports_filter(filter_metadata) for segment in self.segments)
+
+    def filter_rows(self, filter_metadata: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Live row indices matching the filter, or None for all rows."""
+        if not filter_metadata:
+            return None if self._alive is None else np.flatnonzero(self._alive)
+        mask = np.concatenate([segment.filter_mask(filter_metadata) for segment in self.segments])
+        if self._alive is not None:
+            mask &= self._alive
+        return np.flatnonzero(mask)
+
+    def probe_groups(self, query: np.ndarray, rows: Optional[np.ndarray], top_groups: int) -> Optional[np.ndarray]:
+        """
+        Rows of the `top_groups` groups whose centroids best match `query`.
+
+        Only groups with at least one row in `rows` (all rows if None) compete.
+        Returns `rows` unchanged when there are no more groups than that.
+        """
+        if self.centroids is None or top_groups <= 0:
+            return rows
+        if rows is None:
+            candidates = np.arange(len(self.centroids))
+        else:
+            row_groups = np.searchsorted(self.group_offsets, rows, side="right") - 1
+            candidates = np.unique(row_groups)
+        if len(candidates) <= top_groups:
+            return rows
+
+        scores = self.centroids[candidates] @ query
+        chosen = np.sort(candidates[np.argpartition(-scores, top_groups - 1)[:top_groups]])
+        if rows is not None:
+            return rows[np.isin(row_groups, chosen)]
+        return np.concatenate([
+            np.arange(self.group_offsets[group], self.group_offsets[group + 1]) for group in chosen
+        ])
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        k: int,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        top_groups: int = 0
+    ) -> List[Tuple[int, float]]:
+        """
+        Cosine search, exact over the rows it scores.
+
+        With `top_groups` and a grouped snapshot, only the chunks of the
+        `top_groups` best-matching documents (or sections) are scored, so
+        the cost follows the size of that subset rather than the corpus.
+
+        Returns:
+            (row, cosine similarity) pairs, best first
+        """
+        if not self.count or k <= 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        rows = self.probe_groups(query, self.filter_rows(filter_metadata), top_groups)
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for index, segment in enumerate(self.segments):
+            base = int(self._bases[index])
+            if rows is None:
+                local = None
+                total = segment.count
+            else:
+                lo, hi = np.searchsorted(rows, [base, base + segment.count])
+                local = rows[lo:hi] - base
+                total = len(local)
+            for start in range(0, total, _SEARCH_BLOCK_ROWS):
+                if local is None:
+                    block_rows = np.arange(start, min(start + _SEARCH_BLOCK_ROWS, total))
+                    scores = segment.scores(slice(start, start + _SEARCH_BLOCK_ROWS), query)
+                else:
+                    block_rows = local[start:start + _SEARCH_BLOCK_ROWS]
+                    scores = segment.scores(block_rows, query)
+
+                best_rows = np.concatenate((best_rows, base + block_rows))
+                best_scores = np.concatenate((best_scores, scores))
+                if len(best_scores) > k:
+                    keep = np.argpartition(-best_scores, k - 1)[:k]
+                    best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+        order = np.argsort(-best_scores, kind="stable")
+        return [(int(best_rows[i]), float(best_scores[i])) for i in order]
+
+
+class SnapshotReader:
+    """
+    Follows the CURRENT pointer of a snapshot directory.
+
+    `get()` re-reads the pointer at most every `check_interval` seconds and
+    swaps to a newly published version by replacing a single reference, so
+    in-flight searches keep using the version they started with.
+    """
+
+    def __init__(self, root: Path, check_interval: float = 2.0):
+        self.root = Path(root)
+        self.check_interval = check_interval
+        self._snapshot: Optional[EmbeddingSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[EmbeddingSnapshot]:
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if now - self._checked_at >= self.check_interval:
+                    self._checked_at = now
+                    self._refresh()
+        return self._snapshot
+
+    def _refresh(self) -> None:
+        version = current_version(self.root)
+        if version is None or (self._snapshot is not None and self._snapshot.version == version):
+            return
+        try:
+            self._snapshot = EmbeddingSnapshot(self.root / version)
+            logger.info(f"Serving embedding snapshot {version}")
+        except Exception as e:
+            logger.error(f"Failed to open embedding snapshot {version}: {str(e)}")
+
+    def invalidate(self) -> None:
+        """Force the next `get()` to re-read the CURRENT pointer."""
+        self._checked_at = 0.0
@@ -0,0 +1,247 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+import chromadb
+from chromadb.api.client import SharedSystemClient
+from chromadb.config import Settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within the process
+    fcntl = None
+
+from config import settings
+from telemetry.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+LOCK_FILE = ".writer.lock"
+GENERATION_FILE = "GENERATION"
+
+WRITER_LOCK_WAIT = registry.histogram(
+    "storage_writer_lock_wait_seconds", "Time spent waiting for the cross-process writer lock"
+)
+READER_REFRESHES = registry.counter(
+    "storage_reader_refreshes_total", "Reopened Chroma clients after another process wrote"
+)
+
+
+def read_generation(path: Path) -> int:
+    """Write generation of a Chroma directory (0 before the first coordinated write)."""
+    try:
+        with open(Path(path) / GENERATION_FILE, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _write_generation(path: Path, generation: int) -> None:
+    pointer = path / f".{GENERATION_FILE}.{os.getpid()}"
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(str(generation))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer, path / GENERATION_FILE)
+
+
+class ChromaStorage:
+    """
+    Process-wide access to one Chroma directory.
+
+    - One `PersistentClient` per directory per process, shared by every
+      VectorStore on it.
+    - Writers hold an exclusive `flock` on `.writer.lock` (plus a thread lock),
+      so only one process writes the SQLite/HNSW files at a time. `write()`
+      is reentrant: nested writes, e.g. all batches of one ingestion, take
+      the lock once and publish one generation.
+    - Each outermost write bumps the GENERATION file. Readers never take the
+      file lock; `refresh()` re-reads GENERATION at most every
+      `refresh_interval_s` and, when another process has written, reopens
+      the client so the next query sees the new data. Many small writes
+      within the interval cost readers a single reopen.
+    - Reopening swaps the client behind a reader/writer gate: reads started
+      through `reading()` drain first, and reads arriving meanwhile wait for
+      the new client, so no query runs against a client whose system cache
+      was just cleared. Don't start a write from inside `reading()`.
+    """
+
+    def __init__(self, path: Path, refresh_interval_s: float = 1.0, lock_timeout_s: float = 60.0):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.refresh_interval_s = refresh_interval_s
+        self.lock_timeout_s = lock_timeout_s
+
+        self.client = self._open()
+        self.epoch = 0  # bumped on every reopen; stores re-fetch their collections
+        self.generation = read_generation(self.path)
+
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._dirty = False
+        self._lock_file = None
+        self._gate = threading.Condition()
+        self._readers = 0
+        self._swapping = False
+        self._local = threading.local()
+        self._checked_at = 0.0
+
+    def _open(self):
+        return chromadb.PersistentClient(path=str(self.path), settings=Settings(anonymized_telemetry=False))
+
+    def _acquire_file_lock(self, timeout: float) -> None:
+        if fcntl is None:
+            return
+        self._lock_file = open(self.path / LOCK_FILE, "a+")
+        start = time.monotonic()
+        while True:
+            try:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() - start >= timeout:
+                    self._lock_file.close()
+                    self._lock_file = None
+                    raise TimeoutError(f"Timed out waiting for the writer lock on {self.path}")
+                time.sleep(0.05)
+        WRITER_LOCK_WAIT.observe(time.monotonic() - start)
+
+    def _release_file_lock(self) -> None:
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+    @contextmanager
+    def write(self, timeout: Optional[float] = None):
+        """
+        Hold the writer lock; the outermost exit publishes a new generation if anything changed.
+
+        Raises TimeoutError after `timeout` seconds (`lock_timeout_s` by default).
+        """
+        timeout = self.lock_timeout_s if timeout is None else timeout
+        acquired = self._thread_lock.acquire(timeout=timeout) if timeout > 0 else self._thread_lock.acquire(blocking=False)
+        if not acquired:
+            raise TimeoutError(f"Timed out waiting for the writer lock on {self.path}")
+        try:
+            if self._depth == 0:
+                self._acquire_file_lock(timeout)
+                # Catch up with writes made by other processes before changing anything
+                if read_generation(self.path) != self.generation:
+                    self._reopen()
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        if self._dirty:
+                            self.generation = read_generation(self.path) + 1
+                            _write_generation(self.path, self.generation)
+                            self._dirty = False
+                    finally:
+                        self._release_file_lock()
+        finally:
+            self._thread_lock.release()
+
+    def mark_dirty(self) -> None:
+        """Record that the current write changed the collection(s)."""
+        self._dirty = True
+
+    @contextmanager
+    def reading(self):
+        """Run a read against the current client; a reopen waits for it, and it waits for a reopen."""
+        depth = getattr(self._local, "depth", 0)
+        with self._gate:
+            # Nested reads on one thread must not wait behind a swap their outer read blocks
+            while self._swapping and not depth:
+                self._gate.wait()
+            self._readers += 1
+            client = self.client
+        self._local.depth = depth + 1
+        try:
+            yield client
+        finally:
+            self._local.depth = depth
+            with self._gate:
+                self._readers -= 1
+                if not self._readers:
+                    self._gate.notify_all()
+
+    def refresh(self) -> bool:
+        """
+        Reopen the client if another process has written since we last looked.
+
+        In-flight reads finish on the old client and new reads wait for the
+        swap, so a busy reader still picks up new generations.
+
+        Returns:
+            True if the client was reopened
+        """
+        now = time.monotonic()
+        if now - self._checked_at < self.refresh_interval_s:
+            return False
+        self._checked_at = now
+        if read_generation(self.path) == self.generation:
+            return False
+        # A writer in this process is mid-batch and reopens itself; or this thread is
+        # inside a read it would have to wait for: try again on the next call
+        if getattr(self._local, "depth", 0) or not self._thread_lock.acquire(blocking=False):
+            self._checked_at = 0.0
+            return False
+        try:
+            if read_generation(self.path) == self.generation:
+                return False
+            self._reopen()
+            return True
+        finally:
+            self._thread_lock.release()
+
+    def _reopen(self) -> None:
+        with self._gate:
+            self._swapping = True
+            while self._readers:
+                self._gate.wait()
+        try:
+            # Chroma caches one system per path; drop only ours so the reopened client reloads
+            # from disk while clients on other paths (e.g. a migration source) keep theirs
+            SharedSystemClient._identifer_to_system.pop(self.client._identifier, None)
+            self.client = self._open()
+            self.generation = read_generation(self.path)
+            self.epoch += 1
+        finally:
+            with self._gate:
+                self._swapping = False
+                self._gate.notify_all()
+        READER_REFRESHES.inc()
+        logger.info(f"Reopened Chroma client on {self.path} at generation {self.generation}")
+
+
+_storages: Dict[str, ChromaStorage] = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage(
+    path: Path,
+    refresh_interval_s: Optional[float] = None,
+    lock_timeout_s: Optional[float] = None
+) -> ChromaStorage:
+    """Process-wide storage for a Chroma directory, opened on first use."""
+    key = str(Path(path).resolve())
+    storage = _storages.get(key)
+    if storage is None:
+        with _storages_lock:
+            storage = _storages.get(key)
+            if storage is None:
+                storage = ChromaStorage(
+                    Path(path),
+                    settings.STORAGE_REFRESH_INTERVAL_S if refresh_interval_s is None else refresh_interval_s,
+                    settings.STORAGE_LOCK_TIMEOUT_S if lock_timeout_s is None else lock_timeout_s
+                )
+                _storages[key] = storage
+    return storage
@@ -1,16 +1,80 @@
 import os
 import logging
-from typing import List, Dict, Any, Optional, Tuple
-import chromadb
-from chromadb.config import Settings
-from chromadb.utils import embedding_functions
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Callable, List, Dict, Any, Optional, Tuple, Union
 import numpy as np
 
 from config import settings
-from rag.document_processor import DocumentChunk
+from telemetry import stage_timer
+from retrieval.models import canonical_model_name, get_embedding_function
+from rag.document_processor import ChunkBatch, DocumentChunk
+from rag.document_registry import DocumentRegistry
+from rag.dedup import ChunkDeduplicator, DedupResult
+from rag.snapshot import SnapshotReader, append_snapshot, current_generation, current_version, write_snapshot
+from rag.segments import SegmentPartitions, segment_for_filter, to_chroma_where
+from rag.storage import get_storage
+from rag.ivf import Assignment, IVFIndex
 
 logger = logging.getLogger(__name__)
 
+# Called with (collection name, chunk IDs) after chunks are re-added or deleted,
+# e.g. to invalidate precomputed answers grounded on them
+_change_listeners: List[Callable[[str, List[str]], Any]] = []
+
+
+def add_change_listener(listener: Callable[[str, List[str]], Any]) -> None:
+    """Register a callback for chunk writes made through any VectorStore in this process."""
+    _change_listeners.append(listener)
+
+
+def _writes(method):
+    """Run a VectorStore method under the cross-process writer lock and publish a new generation."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.storage.write():
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.storage.mark_dirty()
+    return wrapper
+
+@dataclass
+class PreparedChunks:
+    """Chunks deduplicated and embedded outside the writer lock, ready for `commit_documents`."""
+    ids: List[str] = field(default_factory=list)
+    documents: List[str] = field(default_factory=list)
+    metadatas: List[Dict[str, Any]] = field(default_factory=list)
+    embeddings: List[List[float]] = field(default_factory=list)
+    dedup: Optional[DedupResult] = None
+    assignment: Optional[Assignment] = None
+
+@dataclass
+class SnapshotDelta:
+    """
+    Chunks this process stored or removed since the storage generation `base`.
+    
+    Writes are recorded with the generation they started from; a gap means
+    another process wrote in between and the delta is incomplete.
+    """
+    base: Optional[int] = None
+    end: Optional[int] = None
+    added: Dict[str, None] = field(default_factory=dict)
+    removed: set = field(default_factory=set)
+    broken: bool = False
+    
+    def record(self, generation: int, added: List[str] = (), removed: List[str] = ()) -> None:
+        if self.end is None:
+            self.base = generation
+        elif generation not in (self.end - 1, self.end):
+            self.broken = True
+        # The write publishes generation + 1 when it ends
+        self.end = generation + 1
+        for chunk_id in removed:
+            self.added.pop(chunk_id, None)
+        self.removed.update(removed)
+        self.added.update(dict.fromkeys(added))
+
 class VectorStore:
     """
     Manages vector storage and retrieval using ChromaDB.
@@ -22,19 +86,148 @@ class VectorStore:
         self.embedding_model = settings.EMBEDDING_MODEL
         self.vector_db_path = settings.VECTOR_DB_PATH
         
-        # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(
-            path=str(self.vector_db_path),
-            settings=Settings(anonymized_telemetry=False)
-        )
+        # One Chroma client per process, with a cross-process writer lock
+        self.storage = get_storage(self.vector_db_path)
         
-        # Initialize embedding function
-        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=self.embedding_model
-        )
+        # Embedding function over the process-wide embedder (loaded once per model)
+        self.embedding_function = get_embedding_function(self.embedding_model)
         
-        # Get or create collection
-        self.collection = self._get_or_create_collection()
+        # On-disk inverted-file index instead of the Chroma collection
+        self.ivf = None
+        if settings.VECTOR_INDEX == "ivf":
+            self.ivf = IVFIndex(
+                settings.IVF_DIR / self.collection_name,
+                nlist=settings.IVF_NLIST,
+                nprobe=settings.IVF_NPROBE,
+                filter_keys=settings.SNAPSHOT_FILTER_KEYS,
+                min_list_size=settings.IVF_MIN_LIST_SIZE,
+                imbalance=settings.IVF_IMBALANCE,
+                train_sample=settings.IVF_TRAIN_SAMPLE,
+                check_interval=settings.STORAGE_REFRESH_INTERVAL_S
+            )
+        
+        self._collection = None
+        self._epoch = self.storage.epoch
+        self.partitions = None
+        # Workers starting during a long ingest must not queue for the writer
+        # lock: open what exists, and lock only to create what is missing
+        if self.ivf is None and not self._open_existing():
+            with self.storage.write():
+                self._collection = self._get_or_create_collection()
+                
+                # Per-(age_group, region) partitions for personalized search
+                if settings.SEGMENT_PARTITIONS_ENABLED:
+                    self.partitions = SegmentPartitions(
+                        self.client, self.collection_name, self.embedding_function
+                    )
+                    if self.partitions.is_empty() and self.collection.count() > 0:
+                        self.partitions.rebuild(self.collection)
+                        self.storage.mark_dirty()
+        
+        # Document -> chunk index for deletes, listings and stats
+        self.registry = DocumentRegistry(settings.DOCUMENT_REGISTRY_PATH, self.collection_name)
+        if self.ivf is None and self.registry.is_empty() and self.collection.count() > 0:
+            self.registry.rebuild_from_collection(self.collection)
+        
+        # Near-duplicate detection at ingest; signatures live in the registry
+        self.deduplicator = None
+        if settings.DEDUP_MODE != "off":
+            self.deduplicator = ChunkDeduplicator(
+                self.registry,
+                mode=settings.DEDUP_MODE,
+                threshold=settings.DEDUP_THRESHOLD,
+                num_perm=settings.DEDUP_NUM_PERM,
+                bands=settings.DEDUP_BANDS,
+                scope_keys=settings.DEDUP_SCOPE_KEYS
+            )
+        
+        # Read-only memory-mapped snapshot used for search, shared across workers
+        self.snapshots = None
+        self._snapshot_stale = False
+        self._snapshot_delta = SnapshotDelta()
+        if settings.SNAPSHOT_ENABLED and self.ivf is None:
+            snapshot_root = settings.SNAPSHOT_DIR / self.collection_name
+            self.snapshots = SnapshotReader(snapshot_root, settings.SNAPSHOT_CHECK_INTERVAL_S)
+            if current_version(snapshot_root) is None and self.collection.count() > 0:
+                try:
+                    self.publish_snapshot(lock_timeout=0)
+                except TimeoutError:
+                    # A writer is busy and publishes when it is done; search Chroma until then
+                    logger.info(f"Skipped the initial snapshot of {self.collection_name}: writer lock is held")
+    
+    @property
+    def client(self):
+        """The process-wide Chroma client for VECTOR_DB_PATH."""
+        return self.storage.client
+    
+    @property
+    def collection(self):
+        """The Chroma collection, re-fetched after the client is reopened."""
+        if self.ivf is not None:
+            raise RuntimeError(f"Collection {self.collection_name} is stored in the IVF index (VECTOR_INDEX=ivf)")
+        if self._epoch != self.storage.epoch:
+            self._epoch = self.storage.epoch
+            self._collection = self.client.get_collection(
+                name=self.collection_name,
+                embedding_function=self.embedding_function
+            )
+            if self.partitions is not None:
+                self.partitions.reopen(self.client)
+        return self._collection
+    
+    def _open_existing(self) -> bool:
+        """Open the collection and its partitions without the writer lock; False if any is missing."""
+        self.storage.refresh()
+        try:
+            with self.storage.reading() as client:
+                self._epoch = self.storage.epoch
+                self._collection = client.get_collection(
+                    name=self.collection_name,
+                    embedding_function=self.embedding_function
+                )
+                # Partitions are filled when they are created, under the lock
+                if settings.SEGMENT_PARTITIONS_ENABLED:
+                    self.partitions = SegmentPartitions(
+                        client, self.collection_name, self.embedding_function, create=False
+                    )
+        except Exception:
+            return False
+        return True
+    
+    def _sync(self) -> None:
+        """Pick up writes made by other processes (at most every STORAGE_REFRESH_INTERVAL_S)."""
+        if self.storage.refresh() and self.snapshots is not None:
+            self.snapshots.invalidate()
+    
+    def write_batch(self):
+        """
+        Group several writes under one writer-lock acquisition.
+        
+        Readers in other processes see one new generation when the batch
+        ends instead of one per write. Prepare chunks with
+        `prepare_documents` first and only commit inside the batch, or the
+        embedding runs under the lock too.
+        """
+        return self.storage.write()
+    
+    @property
+    def corpus_version(self) -> Tuple[int, Optional[str]]:
+        """
+        Version of the corpus searches run against, the same in every process.
+        
+        The storage GENERATION, bumped by every write through any worker or
+        the ingestion process, paired with the snapshot version being served.
+        """
+        self._sync()
+        snapshot = self.snapshots.get() if self.snapshots is not None else None
+        return (self.storage.generation, snapshot.version if snapshot is not None else None)
+    
+    def _notify_changed(self, chunk_ids: List[str]) -> None:
+        for listener in _change_listeners:
+            try:
+                listener(self.collection_name, chunk_ids)
+            except Exception as e:
+                logger.warning(f"Change listener failed: {str(e)}")
     
     def _get_or_create_collection(self):
         """Get existing collection or create a new one if it doesn't exist."""
@@ -53,7 +246,11 @@ class VectorStore:
                 collection = self.client.create_collection(
                     name=self.collection_name,
                     embedding_function=self.embedding_function,
-                    metadata={"hnsw:space": "cosine"}  # Fixed typo: 'cosme' -> 'cosine'
+                    metadata={
+                        "hnsw:space": "cosine",  # Fixed typo: 'cosme' -> 'cosine'
+                        # Lets the migration tool reuse stored vectors when the model matches
+                        "embedding_model": canonical_model_name(self.embedding_model)
+                    }
                 )
                 print(f"Created new collection: {self.collection_name}")
                 return collection
@@ -61,47 +258,166 @@ class VectorStore:
             print(f"Error in _get_or_create_collection: {str(e)}")
             raise
     
-    def add_documents(self, chunks: List[DocumentChunk]) -> List[str]:
+    def add_documents(
+        self,
+        chunks: Union[List[DocumentChunk], ChunkBatch],
+        embeddings: Optional[List[List[float]]] = None
+    ) -> List[str]:
         """
         Add document chunks to the vector store.
         
+        Near-duplicates of chunks already stored (or earlier in the batch) are
+        dropped before embedding, or linked to their canonical chunk, depending
+        on DEDUP_MODE. Embedding happens before the writer lock is taken.
+        
         Args:
-            chunks: List of DocumentChunk objects to add
+            chunks: DocumentChunk objects, or a columnar ChunkBatch whose text
+                and ID columns are embedded and stored without per-chunk objects
+            embeddings: Precomputed vectors for `chunks` (same order), computed
+                with EMBEDDING_MODEL; embedded here when omitted
             
         Returns:
-            List of document IDs that were added
+            List of chunk IDs that were stored
         """
-        if not chunks:
-            return []
+        return self.commit_documents(self.prepare_documents(chunks, embeddings))
+    
+    def prepare_documents(
+        self,
+        chunks: Union[List[DocumentChunk], ChunkBatch],
+        embeddings: Optional[List[List[float]]] = None,
+        batch_size: Optional[int] = None,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> PreparedChunks:
+        """
+        Deduplicate and embed chunks (and assign IVF lists) without the writer lock.
+        
+        Near-duplicate candidates are looked up against what is stored now; a
+        concurrent ingest of the same text can at worst leave one extra
+        near-duplicate stored.
+        
+        Args:
+            chunks: DocumentChunk objects or a columnar ChunkBatch
+            embeddings: Precomputed vectors for `chunks` (same order)
+            batch_size: Texts per embedding call (all at once when omitted)
+            progress: Called with the number of input chunks handled so far
             
-        ids = []
-        documents = []
-        metadatas = []
-        
-        for chunk in chunks:
-            chunk_id = chunk.chunk_id
-            ids.append(chunk_id)
-            documents.append(chunk.content)
+        Returns:
+            PreparedChunks to pass to `commit_documents`
+        """
+        if not chunks:
+            return PreparedChunks()
+        
+        received = len(chunks)
+        columnar = isinstance(chunks, ChunkBatch)
+        precomputed = None
+        if embeddings is not None:
+            chunk_ids = chunks.ids if columnar else [chunk.chunk_id for chunk in chunks]
+            precomputed = dict(zip(chunk_ids, embeddings))
+        
+        dedup = None
+        if self.deduplicator is not None:
+            dedup = self.deduplicator.split(chunks)
+            chunks = dedup.keep
+            if not chunks:
+                return PreparedChunks(dedup=dedup)
+        
+        if columnar:
+            ids = list(chunks.ids)
+            documents = chunks.texts
+            metadatas = chunks.storage_metadatas()
+        else:
+            ids = []
+            documents = []
+            metadatas = []
             
-            # Prepare metadata
-            metadata = chunk.metadata.copy()
-            metadata['document_id'] = chunk.document_id
-            if chunk.page_number is not None:
-                metadata['page'] = chunk.page_number
-            if chunk.section is not None:
-                metadata['section'] = chunk.section
+            for chunk in chunks:
+                chunk_id = chunk.chunk_id
+                ids.append(chunk_id)
+                documents.append(chunk.content)
                 
-            metadatas.append(metadata)
+                # Prepare metadata
+                metadata = chunk.metadata.copy()
+                metadata['document_id'] = chunk.document_id
+                if chunk.page_number is not None:
+                    metadata['page'] = chunk.page_number
+                if chunk.section is not None:
+                    metadata['section'] = chunk.section
+                    
+                metadatas.append(metadata)
         
-        # Add to collection
-        self.collection.add(
+        # Embed once and reuse the vectors for the segment partitions
+        dropped = received - len(ids)
+        if precomputed is not None:
+            embeddings = [list(precomputed[chunk_id]) for chunk_id in ids]
+        else:
+            embeddings = []
+            step = batch_size or len(documents)
+            for start in range(0, len(documents), step):
+                embeddings.extend(self.embedding_function(documents[start:start + step]))
+                if progress is not None:
+                    progress(dropped + min(start + step, len(documents)))
+        
+        return PreparedChunks(
+            ids=ids,
             documents=documents,
             metadatas=metadatas,
-            ids=ids
+            embeddings=embeddings,
+            dedup=dedup,
+            assignment=self.ivf.assign(embeddings) if self.ivf is not None else None
+        )
+    
+    def commit_documents(self, prepared: PreparedChunks) -> List[str]:
+        """
+        Store prepared chunks under one short writer-lock hold.
+        
+        Returns:
+            List of chunk IDs that were stored
+        """
+        ids = self._store(prepared)
+        if self.ivf is not None:
+            self._maintain_ivf()
+        return ids
+    
+    @_writes
+    def _store(self, prepared: PreparedChunks) -> List[str]:
+        """The index mutation of `commit_documents`; only this part holds the writer lock."""
+        ids, documents, metadatas, embeddings = prepared.ids, prepared.documents, prepared.metadatas, prepared.embeddings
+        dedup = prepared.dedup
+        if not ids:
+            if dedup is not None:
+                self.deduplicator.commit(dedup, {})
+            return []
+        
+        # Add to collection
+        if self.ivf is not None:
+            self.ivf.add(ids, embeddings, documents, metadatas, assignment=prepared.assignment)
+        else:
+            self.collection.add(
+                documents=documents,
+                metadatas=metadatas,
+                embeddings=embeddings,
+                ids=ids
+            )
+        if self.partitions is not None:
+            self.partitions.add(ids, documents, metadatas, embeddings)
+        self._snapshot_stale = self.snapshots is not None
+        self._snapshot_delta.record(self.storage.generation, added=ids)
+        self.registry.add_chunks(
+            (
+                (metadata['document_id'], chunk_id, len(document.encode('utf-8')), metadata)
+                for chunk_id, document, metadata in zip(ids, documents, metadatas)
+            ),
+            dimensions=len(embeddings[0]) if len(embeddings) else None
         )
+        if dedup is not None:
+            self.deduplicator.commit(dedup, {
+                chunk_id: metadata['document_id'] for chunk_id, metadata in zip(ids, metadatas)
+            })
+        self._notify_changed(ids)
         
         return ids
     
+    @stage_timer("rag.vector_store.search")
     def similarity_search(
         self, 
         query: str, 
@@ -111,6 +427,9 @@ class VectorStore:
         """
         Search for similar documents to the query.
         
+        Filters that select one (age_group, region) segment are answered by an
+        unfiltered search over that segment's partition.
+        
         Args:
             query: The search query
             k: Number of results to return
@@ -119,11 +438,23 @@ class VectorStore:
         Returns:
             List of (DocumentChunk, similarity_score) tuples
         """
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=k,
-            where=filter_metadata
-        )
+        self._sync()
+        if self.ivf is not None:
+            return self._search_ivf(query, k, filter_metadata)
+        snapshot = self.snapshots.get() if self.snapshots is not None and not self._snapshot_stale else None
+        if snapshot is not None and snapshot.supports_filter(filter_metadata):
+            return self._search_snapshot(snapshot, query, k, filter_metadata)
+        
+        with self.storage.reading():
+            segment = segment_for_filter(filter_metadata) if self.partitions is not None else None
+            if segment is not None:
+                results = self.partitions.query(segment, k, query_texts=[query])
+            else:
+                results = self.collection.query(
+                    query_texts=[query],
+                    n_results=k,
+                    where=to_chroma_where(filter_metadata)
+                )
         
         chunks = []
         for i in range(len(results['ids'][0])):
@@ -148,6 +479,198 @@ class VectorStore:
         
         return chunks
     
+    def _search_snapshot(self, snapshot, query: str, k: int, filter_metadata: Optional[Dict[str, Any]]):
+        """
+        Search the memory-mapped snapshot instead of the Chroma index.
+        
+        Exact over all matching chunks, or coarse-to-fine over the chunks of
+        the best HIERARCHICAL_TOP_GROUPS documents when set for this collection.
+        """
+        query_embedding = self.embedding_function([query])[0]
+        chunks = []
+        top_groups = settings.HIERARCHICAL_TOP_GROUPS.get(self.collection_name, 0)
+        for row, cosine in snapshot.search(query_embedding, k, filter_metadata, top_groups=top_groups):
+            record = snapshot.record(row)
+            metadata = record["metadata"]
+            chunk = DocumentChunk(
+                content=record["document"],
+                metadata=metadata,
+                chunk_id=snapshot.chunk_id(row),
+                document_id=metadata.get('document_id', ''),
+                page_number=metadata.get('page'),
+                section=metadata.get('section')
+            )
+            # Same scale as the Chroma path: 1 - cosine_distance / 2
+            chunks.append((chunk, (1.0 + cosine) / 2.0))
+        return chunks
+    
+    def _search_ivf(self, query: str, k: int, filter_metadata: Optional[Dict[str, Any]]):
+        """Search the IVF_NPROBE nearest inverted lists, filtering each list before scoring."""
+        query_embedding = self.embedding_function([query])[0]
+        chunks = []
+        for list_id, row, cosine in self.ivf.search(query_embedding, k, filter_metadata):
+            record = self.ivf.record(list_id, row)
+            metadata = record["metadata"]
+            chunk = DocumentChunk(
+                content=record["document"],
+                metadata=metadata,
+                chunk_id=self.ivf.chunk_id(list_id, row),
+                document_id=metadata.get('document_id', ''),
+                page_number=metadata.get('page'),
+                section=metadata.get('section')
+            )
+            # Same scale as the Chroma path: 1 - cosine_distance / 2
+            chunks.append((chunk, (1.0 + cosine) / 2.0))
+        return chunks
+    
+    def _maintain_ivf(self) -> None:
+        """
+        Retrain the IVF lists when the corpus has outgrown or skewed them.
+        
+        Retraining is triggered when the target list count doubles, so its
+        cost is amortized over the rows ingested since. Training and copying
+        run outside the writer lock; only the final switch takes it.
+        """
+        if not self.ivf.needs_rebalance():
+            return
+        try:
+            self._commit_rebalance(self.ivf.prepare_rebalance())
+        except Exception as e:
+            logger.warning(f"IVF rebalance of {self.collection_name} failed: {str(e)}")
+    
+    @_writes
+    def _commit_rebalance(self, rebuild) -> Optional[str]:
+        return self.ivf.commit_rebalance(rebuild)
+    
+    def rebalance_index(self) -> Optional[str]:
+        """
+        Retrain the IVF centroids and rewrite the lists now.
+        
+        Returns:
+            The new IVF version, or None if the IVF index is disabled, empty
+            or was changed by another writer while retraining
+        """
+        if self.ivf is None:
+            return None
+        return self._commit_rebalance(self.ivf.prepare_rebalance())
+    
+    def publish_snapshot(self, batch_size: int = 1000, lock_timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Bring the memory-mapped snapshot up to date with the collection and publish it.
+        
+        Call after ingestion or deletion; every worker following the snapshot
+        directory switches to the new version within SNAPSHOT_CHECK_INTERVAL_S.
+        Runs under the writer lock and tags the snapshot with the storage
+        generation, so CURRENT only ever moves forward. When this process
+        made every write since the current snapshot, only those chunks are
+        appended and tombstoned; otherwise the collection is exported in full.
+        
+        Args:
+            batch_size: Records read from Chroma per call
+            lock_timeout: Seconds to wait for the writer lock (STORAGE_LOCK_TIMEOUT_S by default)
+        
+        Returns:
+            The current version afterwards, or None if snapshots are disabled
+        """
+        if self.snapshots is None:
+            return None
+        
+        root = self.snapshots.root
+        with self.storage.write(timeout=lock_timeout):
+            generation = self.storage.generation
+            published = current_generation(root)
+            delta, self._snapshot_delta = self._snapshot_delta, SnapshotDelta()
+            if published is not None and published >= generation:
+                version = current_version(root)
+            elif published is not None and not delta.broken and delta.base == published and delta.end == generation:
+                version = self._publish_delta(root, delta, generation, batch_size)
+            else:
+                version = self._publish_full(root, generation, batch_size)
+        self._snapshot_stale = False
+        self.snapshots.invalidate()
+        return version
+    
+    def _snapshot_options(self) -> Dict[str, Any]:
+        return {
+            "dtype": settings.SNAPSHOT_DTYPE,
+            "filter_keys": settings.SNAPSHOT_FILTER_KEYS,
+            "keep": settings.SNAPSHOT_KEEP_VERSIONS,
+            "group_by": settings.HIERARCHICAL_GROUP_BY or None,
+        }
+    
+    def _read_records(self, batch_size: int, ids: Optional[List[str]] = None) -> Tuple[List, List, List, List]:
+        """Read chunk IDs, embeddings, texts and metadata from Chroma: the given IDs, or everything."""
+        found = ([], [], [], [])
+        include = ["embeddings", "documents", "metadatas"]
+        if ids is None:
+            total = self.collection.count()
+            pages = (self.collection.get(limit=batch_size, offset=offset, include=include) for offset in range(0, total, batch_size))
+        else:
+            pages = (self.collection.get(ids=ids[start:start + batch_size], include=include) for start in range(0, len(ids), batch_size))
+        for page in pages:
+            for column, key in zip(found, ("ids", "embeddings", "documents", "metadatas")):
+                column.extend(page[key])
+        return found
+    
+    def _publish_full(self, root, generation: int, batch_size: int) -> str:
+        ids, embeddings, documents, metadatas = self._read_records(batch_size)
+        return write_snapshot(
+            root, ids, np.asarray(embeddings, dtype=np.float32), documents, metadatas,
+            generation=generation, **self._snapshot_options()
+        )
+    
+    def _publish_delta(self, root, delta: SnapshotDelta, generation: int, batch_size: int) -> str:
+        ids, embeddings, documents, metadatas = self._read_records(batch_size, list(delta.added))
+        try:
+            return append_snapshot(
+                root, current_version(root), ids, np.asarray(embeddings, dtype=np.float32), documents, metadatas,
+                removed_ids=list(delta.removed), generation=generation,
+                max_deleted_fraction=settings.SNAPSHOT_MAX_DELETED_FRACTION, **self._snapshot_options()
+            )
+        except ValueError as e:
+            logger.info(f"Publishing a full snapshot instead of a delta: {str(e)}")
+            return self._publish_full(root, generation, batch_size)
+    
+    def get_chunks(self, chunk_ids: List[str]) -> List[DocumentChunk]:
+        """
+        Fetch stored chunks by ID, preserving the order of `chunk_ids`.
+        
+        Args:
+            chunk_ids: IDs of the chunks to fetch
+            
+        Returns:
+            List of DocumentChunk objects for the IDs that exist
+        """
+        if not chunk_ids:
+            return []
+        
+        self._sync()
+        if self.ivf is not None:
+            records = self.ivf.get(chunk_ids)
+            results = {
+                'ids': list(records),
+                'documents': [record['document'] for record in records.values()],
+                'metadatas': [record['metadata'] for record in records.values()]
+            }
+        else:
+            with self.storage.reading():
+                results = self.collection.get(ids=list(chunk_ids))
+        by_id = {}
+        for chunk_id, document, metadata in zip(
+            results['ids'], results['documents'], results['metadatas']
+        ):
+            metadata = metadata or {}
+            by_id[chunk_id] = DocumentChunk(
+                content=document,
+                metadata=metadata,
+                chunk_id=chunk_id,
+                document_id=metadata.get('document_id', ''),
+                page_number=metadata.get('page'),
+                section=metadata.get('section')
+            )
+        
+        return [by_id[chunk_id] for chunk_id in chunk_ids if chunk_id in by_id]
+    
     def delete_document(self, document_id: str) -> bool:
         """
         Delete all chunks associated with a document.
@@ -159,20 +682,105 @@ class VectorStore:
             True if successful, False otherwise
         """
         try:
-            # Get all chunks for this document
-            results = self.collection.get(
-                where={"document_id": document_id}
-            )
-            
-            if results['ids']:
-                self.collection.delete(ids=results['ids'])
-                return True
-            return False
-            
+            return self.delete_documents([document_id]) > 0
         except Exception as e:
             logger.error(f"Error deleting document {document_id}: {str(e)}")
             return False
     
+    def delete_documents(self, document_ids: List[str], batch_size: int = 1000) -> int:
+        """
+        Delete several documents, looking their chunks up in the registry.
+        
+        Args:
+            document_ids: IDs of the documents to delete
+            batch_size: Maximum number of chunk IDs per delete call
+            
+        Dropped near-duplicates of the deleted chunks that belong to other
+        documents are stored again in their own right, so those documents do
+        not lose content. They are embedded after the delete has released
+        the writer lock.
+        
+        Returns:
+            Number of documents deleted
+        """
+        deleted, chunk_ids = self._delete(document_ids, batch_size)
+        if self.ivf is not None and chunk_ids:
+            self._maintain_ivf()
+        
+        orphans = self.registry.take_orphaned_duplicates(chunk_ids) if chunk_ids else []
+        if orphans:
+            self.add_documents([
+                DocumentChunk(
+                    content=orphan["content"],
+                    metadata=orphan["metadata"],
+                    chunk_id=orphan["chunk_id"],
+                    document_id=orphan["document_id"],
+                    page_number=orphan["metadata"].get("page"),
+                    section=orphan["metadata"].get("section")
+                )
+                for orphan in orphans
+            ])
+            logger.info(f"Promoted {len(orphans)} duplicate chunks of deleted documents")
+        return deleted
+    
+    @_writes
+    def _delete(self, document_ids: List[str], batch_size: int) -> Tuple[int, List[str]]:
+        """The index mutation of `delete_documents`; returns (documents deleted, chunk IDs removed)."""
+        # Documents whose chunks were all dropped as duplicates count as deleted too
+        duplicate_only = set(self.registry.remove_duplicates_of_documents(document_ids))
+        chunk_ids = []
+        known = []
+        for document_id in document_ids:
+            ids = self.registry.chunk_ids(document_id)
+            if ids:
+                known.append(document_id)
+                chunk_ids.extend(ids)
+        if not known:
+            return len(duplicate_only), []
+        
+        for start in range(0, len(chunk_ids), batch_size):
+            batch = chunk_ids[start:start + batch_size]
+            if self.ivf is not None:
+                self.ivf.delete(batch)
+            else:
+                self.collection.delete(ids=batch)
+            if self.partitions is not None:
+                self.partitions.delete(batch)
+        deleted = self.registry.remove_documents(known)
+        self._snapshot_stale = self.snapshots is not None
+        self._snapshot_delta.record(self.storage.generation, removed=chunk_ids)
+        self._notify_changed(chunk_ids)
+        return deleted + len(duplicate_only - set(known)), chunk_ids
+    
+    def delete_documents_where(self, filter_metadata: Dict[str, Any]) -> int:
+        """
+        Delete every document whose metadata matches a filter.
+        
+        Args:
+            filter_metadata: Equality or `{"$in": [...]}` conditions on document metadata
+            
+        Returns:
+            Number of documents deleted
+        """
+        return self.delete_documents(self.registry.find_documents(filter_metadata))
+    
+    def list_documents(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """List stored documents with chunk counts, sizes and ingestion times."""
+        return self.registry.list_documents(limit=limit, offset=offset)
+    
+    @_writes
+    def rebuild_partitions(self) -> int:
+        """
+        Rebuild the segment partitions from the main collection.
+        
+        Returns:
+            Number of chunks partitioned (0 if partitioning is disabled)
+        """
+        if self.partitions is None:
+            return 0
+        count = self.partitions.rebuild(self.collection)
+        return count
+    
     def get_collection_stats(self) -> Dict[str, Any]:
         """
         Get statistics about the vector store.
@@ -180,12 +788,17 @@ class VectorStore:
         Returns:
             Dictionary containing collection statistics
         """
+        totals = self.registry.stats()
         stats = {
             "collection_name": self.collection_name,
             "embedding_model": self.embedding_model,
-            "count": self.collection.count(),
-            "dimensions": len(self.embedding_function(["test"])[0]) if self.collection.count() > 0 else 0
+            "count": totals["total_chunks"],
+            "documents": totals["total_documents"],
+            "bytes": totals["total_bytes"],
+            "dimensions": totals["dimensions"]
         }
+        if self.ivf is not None:
+            stats["ivf"] = self.ivf.stats()
         
         return stats
 
@@ -0,0 +1,11 @@
+from .core import RetrievalCore, get_retrieval_core
+from .models import canonical_model_name, get_embedder, get_embedding_function, get_reranker
+
+__all__ = [
+    "RetrievalCore",
+    "get_retrieval_core",
+    "canonical_model_name",
+    "get_embedder",
+    "get_embedding_function",
+    "get_reranker",
+]
@@ -0,0 +1,67 @@
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from config import settings
+from retrieval.models import loaded_models
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalCore:
+    """
+    The one index, model set and ingestion path shared by both FastAPI apps.
+
+    The vector store is opened eagerly; the reranking pipeline and the
+    ingestion service are built on first use, so an app that never reranks
+    (the chat app) never loads the cross-encoder.
+    """
+
+    def __init__(self, collection_name: Optional[str] = None):
+        from rag.vector_store import VectorStore
+
+        self.collection_name = collection_name or settings.RETRIEVAL_COLLECTION
+        self.vector_store = VectorStore(self.collection_name)
+        self._pipeline = None
+        self._ingestion = None
+        self._lock = threading.Lock()
+
+    @property
+    def pipeline(self):
+        """RAGPipeline (dense search + rerank + cache) over the shared store."""
+        if self._pipeline is None:
+            with self._lock:
+                if self._pipeline is None:
+                    from rag.pipeline import RAGPipeline
+                    self._pipeline = RAGPipeline(self.vector_store)
+        return self._pipeline
+
+    @property
+    def ingestion(self):
+        """IngestionService writing into the shared store."""
+        if self._ingestion is None:
+            with self._lock:
+                if self._ingestion is None:
+                    from ingestion.ingestion_service import IngestionService
+                    self._ingestion = IngestionService(self.vector_store)
+        return self._ingestion
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.vector_store.get_collection_stats()
+        stats["models"] = loaded_models()
+        return stats
+
+
+_core: Optional[RetrievalCore] = None
+_core_lock = threading.Lock()
+
+
+def get_retrieval_core() -> RetrievalCore:
+    """Process-wide retrieval core, opened on first use."""
+    global _core
+    if _core is None:
+        with _core_lock:
+            if _core is None:
+                _core = RetrievalCore()
+                logger.info(f"Retrieval core ready on collection {_core.collection_name}")
+    return _core
@@ -0,0 +1,176 @@
+"""
+Merge an existing Chroma collection into the shared retrieval index.
+
+Before the retrieval core, the chat app kept its own `financial_literacy`
+collection. This copies every record of a source collection into
+RETRIEVAL_COLLECTION through the normal write path (registry, dedup,
+segment partitions, snapshot). When the source was embedded with the same
+model as EMBEDDING_MODEL, the stored vectors are copied as-is; otherwise
+the texts are re-embedded. Records whose IDs already exist in the target
+are skipped, so the tool can be re-run safely.
+
+Run from the backend directory:
+    python -m retrieval.migrate --source financial_literacy --delete-source
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from config import settings
+from rag.storage import get_storage
+from retrieval.models import canonical_model_name
+
+logger = logging.getLogger(__name__)
+
+# The chat app's collection was created without model metadata; this is what it used
+LEGACY_CHAT_COLLECTION = "financial_literacy"
+LEGACY_CHAT_MODEL = "all-MiniLM-L6-v2"
+
+
+def _source_model(collection, override: Optional[str]) -> str:
+    if override:
+        return canonical_model_name(override)
+    metadata = collection.metadata or {}
+    return canonical_model_name(metadata.get("embedding_model", LEGACY_CHAT_MODEL))
+
+
+def migrate_collection(
+    source_name: str = LEGACY_CHAT_COLLECTION,
+    source_path: Optional[Path] = None,
+    source_model: Optional[str] = None,
+    target=None,
+    batch_size: int = 500,
+    delete_source: bool = False,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Copy `source_name` into the shared collection.
+
+    Args:
+        source_name: Collection to merge
+        source_path: Chroma directory holding the source (defaults to VECTOR_DB_PATH)
+        source_model: Model the source was embedded with (read from the
+            collection metadata, else LEGACY_CHAT_MODEL)
+        target: Destination VectorStore (defaults to the retrieval core's)
+        batch_size: Records read and written per batch
+        delete_source: Drop the source collection once everything is copied
+        dry_run: Count what would be copied without writing
+
+    Returns:
+        Report with the numbers of records read, copied, skipped and dropped as duplicates
+    """
+    if target is None:
+        from retrieval.core import get_retrieval_core
+        target = get_retrieval_core().vector_store
+
+    source_path = Path(source_path or settings.VECTOR_DB_PATH)
+    source_storage = get_storage(source_path)
+
+    report = {
+        "source": source_name,
+        "target": target.collection_name,
+        "read": 0,
+        "copied": 0,
+        "already_present": 0,
+        "duplicates_dropped": 0,
+        "reembedded": False,
+        "dry_run": dry_run,
+    }
+    # With VECTOR_INDEX=ivf the target no longer lives in Chroma, so the same name is a valid source
+    if source_name == target.collection_name and source_storage is target.storage and target.ivf is None:
+        raise ValueError("Source and target are the same collection")
+    try:
+        source = source_storage.client.get_collection(name=source_name)
+    except Exception:
+        logger.warning(f"Source collection {source_name} not found in {source_path}; nothing to migrate")
+        return report
+
+    model = _source_model(source, source_model)
+    reuse_vectors = model == canonical_model_name(target.embedding_model)
+    report["reembedded"] = not reuse_vectors
+    if not reuse_vectors:
+        logger.warning(f"{source_name} was embedded with {model}; re-embedding with {target.embedding_model}")
+
+    total = source.count()
+    include = ["documents", "metadatas"] + (["embeddings"] if reuse_vectors else [])
+    # Each page takes the writer lock only to store it; re-embedding happens outside
+    _copy(source, target, total, include, reuse_vectors, batch_size, dry_run, report)
+
+    if not dry_run:
+        target.publish_snapshot()
+        if delete_source:
+            with source_storage.write():
+                source_storage.client.delete_collection(name=source_name)
+                source_storage.mark_dirty()
+            logger.info(f"Deleted source collection {source_name}")
+    return report
+
+
+def _copy(source, target, total: int, include: List[str], reuse_vectors: bool, batch_size: int,
+          dry_run: bool, report: Dict[str, Any]) -> None:
+    from rag.document_processor import DocumentChunk
+
+    source_name = source.name
+    for offset in range(0, total, batch_size):
+        page = source.get(limit=batch_size, offset=offset, include=include)
+        report["read"] += len(page["ids"])
+
+        existing = {chunk.chunk_id for chunk in target.get_chunks(list(page["ids"]))}
+        report["already_present"] += len(existing)
+
+        chunks: List[DocumentChunk] = []
+        embeddings = [] if reuse_vectors else None
+        for i, chunk_id in enumerate(page["ids"]):
+            if chunk_id in existing:
+                continue
+            metadata = dict(page["metadatas"][i] or {})
+            metadata.setdefault("document_id", chunk_id)
+            metadata["migrated_from"] = source_name
+            chunks.append(DocumentChunk(
+                content=page["documents"][i],
+                metadata=metadata,
+                chunk_id=chunk_id,
+                document_id=metadata["document_id"],
+                page_number=metadata.get("page"),
+                section=metadata.get("section")
+            ))
+            if reuse_vectors:
+                embeddings.append(list(page["embeddings"][i]))
+
+        if not chunks or dry_run:
+            report["copied"] += len(chunks)
+            continue
+        stored = target.add_documents(chunks, embeddings=embeddings)
+        report["copied"] += len(stored)
+        report["duplicates_dropped"] += len(chunks) - len(stored)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=LEGACY_CHAT_COLLECTION)
+    parser.add_argument("--source-path", type=Path, default=None, help="Chroma directory of the source collection")
+    parser.add_argument("--source-model", default=None, help="Embedding model of the source collection")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--delete-source", action="store_true")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    report = migrate_collection(
+        args.source,
+        source_path=args.source_path,
+        source_model=args.source_model,
+        batch_size=args.batch_size,
+        delete_source=args.delete_source,
+        dry_run=args.dry_run
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from config import settings
+from inference import EncoderEmbeddingFunction, load_embedder, load_reranker
+
+logger = logging.getLogger(__name__)
+
+_models: Dict[Tuple[str, str, str], Any] = {}
+_models_lock = threading.Lock()
+
+
+def canonical_model_name(model_name: str) -> str:
+    """
+    Fully qualified form of a sentence-transformers model name.
+
+    Bare names ("all-MiniLM-L6-v2") resolve to the sentence-transformers
+    organisation on the Hub, so both spellings name the same weights.
+    """
+    model_name = model_name.strip()
+    if "/" not in model_name:
+        return f"sentence-transformers/{model_name}"
+    return model_name
+
+
+def _get(kind: str, model_name: str, loader) -> Any:
+    key = (kind, canonical_model_name(model_name), settings.INFERENCE_BACKEND)
+    model = _models.get(key)
+    if model is None:
+        with _models_lock:
+            model = _models.get(key)
+            if model is None:
+                logger.info(f"Loading {kind} {key[1]} ({key[2]})")
+                model = loader(
+                    key[1],
+                    backend=settings.INFERENCE_BACKEND,
+                    cache_dir=settings.ONNX_CACHE_DIR,
+                    quantize=settings.ONNX_QUANTIZE,
+                    threads=settings.ONNX_INTRA_OP_THREADS
+                )
+                _models[key] = model
+    return model
+
+
+def get_embedder(model_name: Optional[str] = None):
+    """Process-wide embedder for `model_name` (EMBEDDING_MODEL by default), loaded once."""
+    return _get("embedder", model_name or settings.EMBEDDING_MODEL, load_embedder)
+
+
+def get_reranker(model_name: Optional[str] = None):
+    """Process-wide cross-encoder for `model_name` (RERANKER_MODEL by default), loaded once."""
+    return _get("reranker", model_name or settings.RERANKER_MODEL, load_reranker)
+
+
+def get_embedding_function(model_name: Optional[str] = None) -> EncoderEmbeddingFunction:
+    """Chroma embedding function over the shared embedder."""
+    return EncoderEmbeddingFunction(get_embedder(model_name))
+
+
+def loaded_models() -> Dict[str, str]:
+    """Models currently held by the registry, as "kind:name" -> backend."""
+    return {f"{kind}:{name}": backend for kind, name, backend in list(_models)}
@@ -0,0 +1,46 @@
+from .singleflight import SingleFlight, normalize_question, question_key
+from .degradation import (
+    EXTRACTIVE,
+    FEWER_DOCS,
+    LEVEL_NAMES,
+    NO_RERANK,
+    NORMAL,
+    SHORT_ANSWERS,
+    SMALL_MODEL,
+    DegradationController,
+    extractive_answer,
+)
+from .cancellation import (
+    CLIENT_CLOSED_REQUEST,
+    CancelToken,
+    ClientDisconnected,
+    DeadlineExceeded,
+    RequestCancelled,
+    run_stage,
+    run_until_disconnected,
+)
+from .upload_limit import MULTIPART_OVERHEAD_BYTES, UploadLimitMiddleware
+
+__all__ = [
+    "SingleFlight",
+    "normalize_question",
+    "question_key",
+    "CLIENT_CLOSED_REQUEST",
+    "CancelToken",
+    "ClientDisconnected",
+    "DeadlineExceeded",
+    "RequestCancelled",
+    "run_stage",
+    "run_until_disconnected",
+    "EXTRACTIVE",
+    "FEWER_DOCS",
+    "LEVEL_NAMES",
+    "NO_RERANK",
+    "NORMAL",
+    "SHORT_ANSWERS",
+    "SMALL_MODEL",
+    "DegradationController",
+    "extractive_answer",
+    "MULTIPART_OVERHEAD_BYTES",
+    "UploadLimitMiddleware",
+]
@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Optional, TypeVar
+
+from telemetry.metrics import registry
+
+T = TypeVar("T")
+
+# Non-standard status (nginx convention) logged for requests whose client went away
+CLIENT_CLOSED_REQUEST = 499
+
+CANCELLED_REQUESTS = registry.counter(
+    "cancelled_requests_total", "Requests stopped before completion", ("reason", "stage")
+)
+
+
+class RequestCancelled(Exception):
+    """Base class for requests stopped before they completed."""
+
+    reason = "cancelled"
+
+    def __init__(self, stage: str = ""):
+        super().__init__(f"Request {self.reason} during {stage or 'processing'}")
+        self.stage = stage
+
+
+class ClientDisconnected(RequestCancelled):
+    """The client closed the connection; nobody will read the answer."""
+
+    reason = "disconnected"
+
+
+class DeadlineExceeded(RequestCancelled):
+    """A stage ran past its time budget (or the request past its overall budget)."""
+
+    reason = "deadline"
+
+
+class CancelToken:
+    """
+    Cancellation flag and deadlines shared by the stages of one request.
+
+    Thread-safe, so work running in the thread pool (local generation) can
+    poll `cancelled` between tokens. `stage()` narrows the deadline for the
+    duration of one stage; the overall deadline always applies.
+    """
+
+    def __init__(self, budget_s: Optional[float] = None):
+        self._event = threading.Event()
+        self._exception: Optional[RequestCancelled] = None
+        self.deadline = time.monotonic() + budget_s if budget_s else None
+        self.stage_name = ""
+        self._stage_deadline: Optional[float] = None
+
+    def cancel(self, exception: Optional[RequestCancelled] = None) -> None:
+        if not self._event.is_set():
+            self._exception = exception or ClientDisconnected(self.stage_name)
+            self._event.set()
+
+    def _effective_deadline(self) -> Optional[float]:
+        deadlines = [d for d in (self.deadline, self._stage_deadline) if d is not None]
+        return min(deadlines) if deadlines else None
+
+    def remaining(self, budget_s: Optional[float] = None) -> Optional[float]:
+        """Seconds left for the current stage, capped at `budget_s`; None if unbounded."""
+        deadline = self._effective_deadline()
+        if budget_s is not None:
+            capped = time.monotonic() + budget_s
+            deadline = capped if deadline is None else min(deadline, capped)
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        deadline = self._effective_deadline()
+        return deadline is not None and time.monotonic() >= deadline
+
+    def raise_if_cancelled(self, stage: Optional[str] = None) -> None:
+        stage = stage or self.stage_name
+        if self._event.is_set():
+            raise self._exception
+        if self.cancelled:
+            error = DeadlineExceeded(stage)
+            self.cancel(error)
+            CANCELLED_REQUESTS.inc(reason=error.reason, stage=stage)
+            raise error
+
+    @contextmanager
+    def stage(self, name: str, budget_s: Optional[float] = None):
+        """
+        Run a stage under its own budget.
+
+        Raises DeadlineExceeded on entry if time is already up, and on exit if
+        the stage overran (sync stages cannot be interrupted midway, but the
+        request then stops instead of starting the next stage).
+        """
+        self.raise_if_cancelled(name)
+        previous = self.stage_name, self._stage_deadline
+        self.stage_name = name
+        self._stage_deadline = time.monotonic() + budget_s if budget_s else None
+        try:
+            yield self
+            self.raise_if_cancelled(name)
+        finally:
+            self.stage_name, self._stage_deadline = previous
+
+
+async def run_stage(
+    awaitable: Awaitable[T],
+    stage: str,
+    token: Optional[CancelToken] = None,
+    budget_s: Optional[float] = None
+) -> T:
+    """Await an async stage, raising DeadlineExceeded once its budget (or the request's) runs out."""
+    if token is not None:
+        token.raise_if_cancelled(stage)
+    timeout = token.remaining(budget_s) if token is not None else budget_s
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        error = DeadlineExceeded(stage)
+        if token is not None:
+            token.cancel(error)
+        CANCELLED_REQUESTS.inc(reason=error.reason, stage=stage)
+        raise error from None
+
+
+async def run_until_disconnected(request, awaitable: Awaitable[T], poll_interval_s: float = 0.25) -> T:
+    """
+    Await `awaitable` while watching the client connection.
+
+    If the client disconnects first, the work is cancelled (which closes any
+    pending upstream HTTP call) and ClientDisconnected is raised.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval_s)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                # Give the work a moment to unwind (e.g. close its upstream stream)
+                await asyncio.wait({task}, timeout=poll_interval_s)
+                CANCELLED_REQUESTS.inc(reason=ClientDisconnected.reason, stage=request.url.path)
+                raise ClientDisconnected(request.url.path)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
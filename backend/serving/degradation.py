@@ -0,0 +1,156 @@
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Sequence, Tuple
+
+from telemetry.metrics import registry
+
+# Degradation levels, each including the measures of the levels below it
+NORMAL = 0
+NO_RERANK = 1       # skip cross-encoder reranking
+FEWER_DOCS = 2      # retrieve fewer documents (shorter prompts)
+SHORT_ANSWERS = 3   # lower the generation token budget
+SMALL_MODEL = 4     # route generation to a smaller configured model
+EXTRACTIVE = 5      # no generation: extractive or cached answers only
+
+LEVEL_NAMES = ("normal", "no_rerank", "fewer_docs", "short_answers", "small_model", "extractive")
+
+DEGRADATION_LEVEL = registry.gauge(
+    "degradation_level", "Current load-degradation level (0 = normal)", ("controller",)
+)
+DEGRADATION_CHANGES = registry.counter(
+    "degradation_level_changes_total", "Degradation level transitions", ("controller", "direction")
+)
+DEGRADED_REQUESTS = registry.counter(
+    "degraded_requests_total", "Requests served at a degraded level", ("controller", "level")
+)
+
+
+class DegradationController:
+    """
+    Steps through degradation levels as load rises and falls.
+
+    Load is the larger of in-flight work / `max_inflight` and the p95 of its
+    latencies over the last `window_s` seconds / `p95_slo_s`. Each request's
+    `admit()` re-evaluates the level: above 1.0 it goes up one step at most
+    every `step_up_s`; below `recover_below` it comes down one step at most
+    every `step_down_s`. Between the two, and within those intervals, the
+    level holds, so a level change does not flap back on the next request.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        p95_slo_s: float,
+        max_inflight: int,
+        max_level: int = EXTRACTIVE,
+        window_s: float = 30.0,
+        step_up_s: float = 5.0,
+        step_down_s: float = 30.0,
+        recover_below: float = 0.6,
+        enabled: bool = True
+    ):
+        self.name = name
+        self.p95_slo_s = p95_slo_s
+        self.max_inflight = max(1, max_inflight)
+        self.max_level = max(NORMAL, min(max_level, EXTRACTIVE))
+        self.window_s = window_s
+        self.step_up_s = step_up_s
+        self.step_down_s = step_down_s
+        self.recover_below = recover_below
+        self.enabled = enabled
+
+        self.inflight = 0
+        self._level = NORMAL
+        self._changed_at = float("-inf")
+        self._latencies: Deque[Tuple[float, float]] = deque()
+        self._lock = threading.Lock()
+        DEGRADATION_LEVEL.set(NORMAL, controller=name)
+
+    def _p95(self, now: float) -> float:
+        while self._latencies and now - self._latencies[0][0] > self.window_s:
+            self._latencies.popleft()
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(latency for _, latency in self._latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def load(self) -> float:
+        with self._lock:
+            return self._load(time.monotonic())
+
+    def _load(self, now: float) -> float:
+        return max(self.inflight / self.max_inflight, self._p95(now) / self.p95_slo_s)
+
+    @property
+    def level(self) -> int:
+        """Level last decided by `admit`; reading it never changes the level."""
+        return self._level if self.enabled else NORMAL
+
+    def admit(self) -> int:
+        """Level a new request should be served at, re-evaluated against the latest load."""
+        if not self.enabled:
+            return NORMAL
+        with self._lock:
+            now = time.monotonic()
+            load = self._load(now)
+            since_change = now - self._changed_at
+            if load > 1.0 and self._level < self.max_level and since_change >= self.step_up_s:
+                self._set_level(self._level + 1, now, "up")
+            elif load < self.recover_below and self._level > NORMAL and since_change >= self.step_down_s:
+                self._set_level(self._level - 1, now, "down")
+            level = self._level
+        if level > NORMAL:
+            DEGRADED_REQUESTS.inc(controller=self.name, level=LEVEL_NAMES[level])
+        return level
+
+    def _set_level(self, level: int, now: float, direction: str) -> None:
+        self._level = level
+        self._changed_at = now
+        DEGRADATION_LEVEL.set(level, controller=self.name)
+        DEGRADATION_CHANGES.inc(controller=self.name, direction=direction)
+
+    @contextmanager
+    def track(self):
+        """
+        Count work as in flight and record its latency.
+
+        Wrap only the work a request actually runs: a request that joins an
+        identical in-flight call adds no load of its own.
+        """
+        with self._lock:
+            self.inflight += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            end = time.monotonic()
+            with self._lock:
+                self.inflight -= 1
+                self._latencies.append((end, end - start))
+
+    def stats(self) -> Dict[str, object]:
+        level = self.level
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "level": level,
+                "name": LEVEL_NAMES[level],
+                "inflight": self.inflight,
+                "p95_s": round(self._p95(now), 3),
+                "load": round(self._load(now), 3),
+            }
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def extractive_answer(passages: Sequence[str], max_sentences: int = 3) -> str:
+    """Leading sentences of the first non-empty passage, for answers served without generation."""
+    for passage in passages:
+        text = " ".join(passage.split())
+        if text:
+            return " ".join(_SENTENCE_END.split(text)[:max_sentences])
+    return ""
@@ -0,0 +1,99 @@
+import asyncio
+import re
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from telemetry.metrics import registry
+
+T = TypeVar("T")
+
+COALESCED_REQUESTS = registry.counter(
+    "coalesced_requests_total", "Requests that joined an identical in-flight request", ("flight",)
+)
+INFLIGHT_CALLS = registry.gauge(
+    "singleflight_inflight_calls", "Distinct calls currently running per flight", ("flight",)
+)
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.।]+$")
+
+
+def normalize_question(question: str) -> str:
+    """Case-, whitespace- and trailing-punctuation-insensitive form of a question."""
+    return _TRAILING_PUNCTUATION.sub("", _WHITESPACE.sub(" ", question.strip().lower()))
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one execution.
+
+    The first caller for a key starts the work as a separate task; callers
+    arriving while it runs await the same task instead of starting their
+    own. Every caller, the first included, is only a waiter:
+
+    - A failure is raised to every waiter of that call and is not remembered,
+      so the next request for the key starts afresh.
+    - A cancelled waiter (e.g. a disconnected client) only stops waiting; the
+      work is cancelled once no waiter is left.
+
+    Results are shared, not copied, so callers must not mutate them.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            INFLIGHT_CALLS.inc(flight=self.name)
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            self.coalesced += 1
+            COALESCED_REQUESTS.inc(flight=self.name)
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Forget the call now: a caller arriving while it unwinds must start afresh,
+                # not join a flight that is about to raise CancelledError
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                call.task.cancel()
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        INFLIGHT_CALLS.dec(flight=self.name)
+        # Retrieve the outcome so an unobserved failure isn't logged as "never retrieved"
+        if not call.task.cancelled():
+            call.task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {"inflight": len(self._calls), "coalesced": self.coalesced}
+
+
+def question_key(question: str, *fields: Any) -> Tuple[Any, ...]:
+    """Coalescing key: the normalized question plus the fields that personalize the answer."""
+    return (normalize_question(question),) + tuple(_freeze(field) for field in fields)
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
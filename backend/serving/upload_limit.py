@@ -0,0 +1,83 @@
+import json
+
+from starlette.exceptions import HTTPException
+
+# Room for multipart boundaries, part headers and the small form fields next to the file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class _BodyTooLarge(HTTPException):
+    """Raised from `receive` mid-body; FastAPI re-raises HTTPExceptions from body parsing as they are."""
+
+    def __init__(self, limit: int):
+        super().__init__(status_code=413, detail=_detail(limit))
+
+
+def _detail(limit: int) -> str:
+    return f"Request body exceeds the {limit} byte upload limit"
+
+
+class UploadLimitMiddleware:
+    """
+    Pure ASGI middleware refusing oversized request bodies on upload routes.
+
+    FastAPI parses a multipart body completely (spooling the file to a
+    temporary file) before the endpoint runs, so a limit checked in the
+    endpoint only applies after the whole body was accepted. This refuses
+    the request up front when Content-Length is too large, and otherwise
+    counts body bytes as they arrive and stops at the limit, so a chunked
+    upload without Content-Length is cut off too.
+    """
+
+    def __init__(self, app, paths, max_body_bytes: int):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") != "POST" or scope.get("path") not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        try:
+            declared = int(headers.get(b"content-length", b"0"))
+        except ValueError:
+            declared = 0
+        if declared > self.max_body_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    raise _BodyTooLarge(self.max_body_bytes)
+            return message
+
+        async def send_wrapper(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, send_wrapper)
+        except _BodyTooLarge:
+            if started:
+                raise
+            await self._reject(send)
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": _detail(self.max_body_bytes)}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
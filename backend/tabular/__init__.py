@@ -0,0 +1,18 @@
+from .store import Table, TabularCatalog, looks_tabular, table_name_for
+from .queries import aggregate, trend, top_k, filter_mask, TabularQueryError
+from .questions import answer_numeric_question
+from .catalog import get_tabular_catalog
+
+__all__ = [
+    "Table",
+    "TabularCatalog",
+    "looks_tabular",
+    "table_name_for",
+    "aggregate",
+    "trend",
+    "top_k",
+    "filter_mask",
+    "TabularQueryError",
+    "answer_numeric_question",
+    "get_tabular_catalog",
+]
@@ -0,0 +1,27 @@
+import logging
+import threading
+from typing import Optional
+
+from config import settings
+from tabular.store import TabularCatalog
+
+logger = logging.getLogger(__name__)
+
+_catalog: Optional[TabularCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_tabular_catalog() -> TabularCatalog:
+    """Shared catalog under TABULAR_DIR, seeded from TABULAR_SEED_CSVS on first use."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                catalog = TabularCatalog(settings.TABULAR_DIR)
+                for csv_path in settings.TABULAR_SEED_CSVS:
+                    try:
+                        catalog.ensure(csv_path)
+                    except Exception as e:
+                        logger.error(f"Failed to load table from {csv_path}: {str(e)}")
+                _catalog = catalog
+    return _catalog
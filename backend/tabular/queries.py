@@ -0,0 +1,215 @@
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from tabular.store import Table, CATEGORY, INTEGER, MEASURE
+
+AGGREGATIONS = ("sum", "mean", "min", "max", "count")
+_RANGE_OPS = {"gte": np.greater_equal, "gt": np.greater, "lte": np.less_equal, "lt": np.less}
+
+Filters = Dict[str, Any]
+
+
+class TabularQueryError(ValueError):
+    """Raised for queries naming unknown columns or unsupported operations."""
+
+
+def _column(table: Table, name: str, kinds: Tuple[str, ...]) -> str:
+    column = table.resolve(name)
+    if column is None:
+        raise TabularQueryError(f"Unknown column '{name}' in table {table.name}")
+    if table.kind(column) not in kinds:
+        raise TabularQueryError(f"Column '{column}' is a {table.kind(column)}, expected {' or '.join(kinds)}")
+    return column
+
+
+def filter_mask(table: Table, filters: Optional[Filters]) -> np.ndarray:
+    """
+    Boolean row mask for a filter spec.
+
+    Category columns take a value or list of values; integer dimensions take a
+    value, a list, or a range such as `{"gte": 2000, "lte": 2010}`.
+    """
+    mask = np.ones(table.num_rows, dtype=bool)
+    for name, condition in (filters or {}).items():
+        column = _column(table, name, (CATEGORY, INTEGER))
+        values = table.array(column)
+        if table.kind(column) == CATEGORY:
+            wanted = [condition] if isinstance(condition, str) else list(condition)
+            mask &= np.isin(values, table.codes_for(column, [str(v) for v in wanted]))
+        elif isinstance(condition, dict):
+            for op, bound in condition.items():
+                if op not in _RANGE_OPS:
+                    raise TabularQueryError(f"Unsupported range operator '{op}'")
+                mask &= _RANGE_OPS[op](values, bound)
+        elif isinstance(condition, (list, tuple, set)):
+            mask &= np.isin(values, np.array(list(condition), dtype=np.int64))
+        else:
+            mask &= values == int(condition)
+    return mask
+
+
+def _reduce(values: np.ndarray, inverse: np.ndarray, groups: int, agg: str) -> np.ndarray:
+    """Per-group reduction of `values` (NaNs ignored) given group ids."""
+    present = ~np.isnan(values)
+    counts = np.bincount(inverse[present], minlength=groups).astype(np.float64)
+    if agg == "count":
+        return counts
+    if agg in ("sum", "mean"):
+        sums = np.bincount(inverse[present], weights=values[present], minlength=groups)
+        if agg == "sum":
+            return sums
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    fill = np.inf if agg == "min" else -np.inf
+    out = np.full(groups, fill)
+    ufunc = np.minimum if agg == "min" else np.maximum
+    ufunc.at(out, inverse[present], values[present])
+    out[counts == 0] = np.nan
+    return out
+
+
+def _grouped(
+    table: Table,
+    measure: str,
+    filters: Optional[Filters],
+    group_by: Sequence[str],
+    agg: str
+) -> Tuple[List[str], np.ndarray, np.ndarray, int]:
+    """(group columns, unique group keys per column, aggregated values, rows matched)."""
+    if agg not in AGGREGATIONS:
+        raise TabularQueryError(f"Unsupported aggregation '{agg}'; use one of {', '.join(AGGREGATIONS)}")
+    measure = _column(table, measure, (MEASURE,))
+    group_columns = [_column(table, g, (CATEGORY, INTEGER)) for g in group_by]
+
+    mask = filter_mask(table, filters)
+    rows = np.flatnonzero(mask)
+    values = np.asarray(table.array(measure)[rows], dtype=np.float64)
+
+    if not group_columns:
+        result = _reduce(values, np.zeros(len(rows), dtype=np.int64), 1, agg)
+        return group_columns, np.empty((0, 1), dtype=np.int64), result, len(rows)
+
+    keys = np.stack([np.asarray(table.array(g)[rows], dtype=np.int64) for g in group_columns])
+    unique, inverse = np.unique(keys, axis=1, return_inverse=True)
+    result = _reduce(values, inverse.reshape(-1), unique.shape[1], agg)
+    return group_columns, unique, result, len(rows)
+
+
+def _rows(table: Table, group_columns: List[str], keys: np.ndarray, values: np.ndarray) -> List[Dict[str, Any]]:
+    decoded = [table.decode(column, keys[i]) for i, column in enumerate(group_columns)]
+    return [
+        {**{column: decoded[i][j] for i, column in enumerate(group_columns)},
+         "value": None if np.isnan(values[j]) else float(values[j])}
+        for j in range(len(values))
+    ]
+
+
+def aggregate(
+    table: Table,
+    measure: str,
+    filters: Optional[Filters] = None,
+    group_by: Optional[Union[str, Sequence[str]]] = None,
+    agg: str = "sum"
+) -> Dict[str, Any]:
+    """
+    Aggregate a measure over filtered rows, optionally per group.
+
+    Args:
+        table: Table to query
+        measure: Measure column (exact, last dotted segment or substring)
+        filters: Filter spec, see `filter_mask`
+        group_by: Dimension column(s) to group by
+        agg: One of AGGREGATIONS
+
+    Returns:
+        Dictionary with the resolved measure, rows matched and one entry per group
+    """
+    group_by = [group_by] if isinstance(group_by, str) else list(group_by or [])
+    group_columns, keys, values, matched = _grouped(table, measure, filters, group_by, agg)
+    result = {
+        "table": table.name,
+        "measure": table.resolve(measure),
+        "agg": agg,
+        "filters": filters or {},
+        "rows_matched": matched,
+    }
+    if group_columns:
+        result["group_by"] = group_columns
+        result["groups"] = _rows(table, group_columns, keys, values)
+    else:
+        result["value"] = None if np.isnan(values[0]) else float(values[0])
+    return result
+
+
+def trend(
+    table: Table,
+    measure: str,
+    filters: Optional[Filters] = None,
+    period: str = "Year",
+    agg: str = "sum"
+) -> Dict[str, Any]:
+    """
+    Series of a measure over an integer period column, with overall change.
+
+    Returns:
+        Dictionary with `series` ([{period, value}]), absolute and percentage
+        change, compound annual growth rate and least-squares slope per period
+    """
+    period_column = _column(table, period, (INTEGER,))
+    group_columns, keys, values, matched = _grouped(table, measure, filters, [period_column], agg)
+    periods = keys[0] if len(group_columns) else np.empty(0, dtype=np.int64)
+    valid = ~np.isnan(values)
+    periods, values = periods[valid], values[valid]
+
+    result = {
+        "table": table.name,
+        "measure": table.resolve(measure),
+        "agg": agg,
+        "period": period_column,
+        "filters": filters or {},
+        "rows_matched": matched,
+        "series": [{period_column: int(p), "value": float(v)} for p, v in zip(periods, values)],
+    }
+    if len(values) >= 2:
+        first, last = values[0], values[-1]
+        span = int(periods[-1] - periods[0])
+        result["change"] = float(last - first)
+        result["pct_change"] = float((last - first) / abs(first) * 100) if first else None
+        result["cagr_pct"] = (
+            float(((last / first) ** (1.0 / span) - 1) * 100) if first > 0 and last > 0 and span > 0 else None
+        )
+        result["slope_per_period"] = float(np.polyfit(periods.astype(np.float64), values, 1)[0])
+    return result
+
+
+def top_k(
+    table: Table,
+    measure: str,
+    by: str,
+    k: int = 5,
+    filters: Optional[Filters] = None,
+    agg: str = "sum",
+    ascending: bool = False
+) -> Dict[str, Any]:
+    """
+    The k groups of `by` with the highest (or lowest) aggregated measure.
+
+    Returns:
+        Dictionary with `groups` ordered by value
+    """
+    group_columns, keys, values, matched = _grouped(table, measure, filters, [by], agg)
+    valid = np.flatnonzero(~np.isnan(values))
+    k = max(0, min(k, len(valid)))
+    ranked = valid[np.argsort(values[valid] if ascending else -values[valid], kind="stable")[:k]]
+    return {
+        "table": table.name,
+        "measure": table.resolve(measure),
+        "agg": agg,
+        "by": group_columns[0],
+        "ascending": ascending,
+        "filters": filters or {},
+        "rows_matched": matched,
+        "groups": _rows(table, group_columns, keys[:, ranked], values[ranked]),
+    }
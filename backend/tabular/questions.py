@@ -0,0 +1,187 @@
+import re
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from tabular.store import Table, TabularCatalog, CATEGORY, INTEGER
+from tabular.queries import aggregate, trend, top_k, filter_mask
+
+_YEAR = re.compile(r"\b(19\d{2}|20\d{2})\b")
+_TOP_K = re.compile(r"\btop\s+(\d{1,2})\b|\b(\d{1,2})\s+(?:highest|largest|lowest|smallest)\b")
+_TOP_WORDS = ("top", "highest", "largest", "biggest", "rank")
+_BOTTOM_WORDS = ("lowest", "smallest", "least", "bottom")
+_TREND_WORDS = ("trend", "over time", "grow", "growth", "change", "increase", "decrease", "since", "history")
+_AVERAGE_WORDS = ("average", "mean", "per year")
+# Phrases asking for a sum over every year rather than a single year's figure
+_ALL_YEARS_WORDS = ("all years", "every year", "across years", "combined", "cumulative", "altogether", "in total", "sum of")
+
+
+def _measure_aliases(column: str) -> List[str]:
+    """Phrases that refer to a measure ("Details.Education.Education Total" -> "education total", "education")."""
+    last = column.rsplit(".", 1)[-1].strip().lower()
+    last = re.sub(r"\s+", " ", last)
+    aliases = [last]
+    for suffix in (" total expenditure", " total", " expenditure"):
+        if last.endswith(suffix) and len(last) > len(suffix):
+            aliases.append(last[: -len(suffix)])
+    return aliases
+
+
+def _find_measure(table: Table, question: str) -> Optional[str]:
+    """Measure whose longest alias occurs in the question; "Totals.*" columns win ties."""
+    candidates = [
+        (len(alias), column.startswith("Totals."), column)
+        for column in table.measures
+        for alias in _measure_aliases(column)
+        if re.search(rf"\b{re.escape(alias)}\b", question)
+    ]
+    return max(candidates)[2] if candidates else None
+
+
+def _uses_table_vocabulary(table: Table, question: str, measure: str) -> bool:
+    """
+    True if the question talks about the table rather than personal finance.
+
+    That is: it names a category dimension ("state", "states"), refers to the
+    table as data ("finance data", "finance table"), or asks for "<measure> of".
+    Period names ("year") and bare table names ("finance") are too common in
+    advice questions to count.
+    """
+    dimensions = [c.lower() for c in table.dimensions if table.kind(c) == CATEGORY]
+    if any(re.search(rf"\b{re.escape(word)}s?\b", question) for word in dimensions):
+        return True
+    name = re.escape(table.name.replace("_", " "))
+    if re.search(rf"\b{name} (?:table|data|dataset|figures)\b", question):
+        return True
+    return any(re.search(rf"\b{re.escape(alias)} of\b", question) for alias in _measure_aliases(measure))
+
+
+def _latest_period(table: Table, period: str, filters: Dict[str, Any]) -> Optional[int]:
+    """Most recent value of the period column among rows matching `filters`."""
+    mask = filter_mask(table, filters)
+    if not mask.any():
+        return None
+    return int(np.asarray(table.array(period))[mask].max())
+
+
+def _category_values(table: Table, question: str) -> Dict[str, List[str]]:
+    found: Dict[str, List[str]] = {}
+    for column in table.dimensions:
+        if table.kind(column) != CATEGORY:
+            continue
+        values = [
+            value for value in table.dictionary(column)
+            if len(value) > 2 and re.search(rf"\b{re.escape(value.lower())}\b", question)
+        ]
+        # "WEST VIRGINIA" also contains "VIRGINIA"; keep only the longer match
+        values = [v for v in values if not any(v != o and v.lower() in o.lower() for o in values)]
+        if values:
+            found[column] = values
+    return found
+
+
+def parse_question(table: Table, question: str) -> Optional[Dict[str, Any]]:
+    """
+    Turn a numeric question about `table` into an aggregation call.
+
+    A question qualifies when it names a measure of the table plus either a
+    dimension value (state, year) or table vocabulary ("state", "finance
+    data", "revenue of"), so advice questions that
+    merely mention "tax" or ask for "the most" are left to retrieval.
+    Without a year, sums cover the latest year rather than adding up every
+    year of the panel, unless the question asks for a total across years.
+
+    Returns:
+        {"operation": "aggregate" | "trend" | "top_k", "kwargs": {...}} or None
+    """
+    text = question.lower()
+    measure = _find_measure(table, text)
+    if measure is None:
+        return None
+
+    filters: Dict[str, Any] = dict(_category_values(table, text))
+    period = next((c for c in table.dimensions if table.kind(c) == INTEGER), None)
+    years = sorted({int(y) for y in _YEAR.findall(text)})
+    if period is not None and years:
+        filters[period] = years[0] if len(years) == 1 else {"gte": years[0], "lte": years[-1]}
+    if not filters and not _uses_table_vocabulary(table, text, measure):
+        return None
+
+    agg = "mean" if any(w in text for w in _AVERAGE_WORDS) else "sum"
+    category_columns = [c for c in table.dimensions if table.kind(c) == CATEGORY]
+    by = category_columns[0] if category_columns else None
+
+    wants_trend = any(w in text for w in _TREND_WORDS) or (period is not None and len(years) >= 2)
+    if (
+        period is not None and period not in filters and agg == "sum" and not wants_trend
+        and not any(w in text for w in _ALL_YEARS_WORDS)
+    ):
+        latest = _latest_period(table, period, filters)
+        if latest is not None:
+            filters[period] = latest
+
+    wants_bottom = any(re.search(rf"\b{w}\b", text) for w in _BOTTOM_WORDS)
+    wants_top = wants_bottom or any(re.search(rf"\b{w}\b", text) for w in _TOP_WORDS)
+    if wants_top and by is not None and by not in filters:
+        match = _TOP_K.search(text)
+        k = int(next(g for g in match.groups() if g)) if match else 5
+        return {"operation": "top_k", "kwargs": {
+            "measure": measure, "by": by, "k": k, "filters": filters, "agg": agg, "ascending": wants_bottom,
+        }}
+
+    if wants_trend and period is not None:
+        return {"operation": "trend", "kwargs": {"measure": measure, "filters": filters, "period": period}}
+
+    group_by = [c for c in filters if table.kind(c) == CATEGORY and len(filters[c]) > 1]
+    return {"operation": "aggregate", "kwargs": {
+        "measure": measure, "filters": filters, "group_by": group_by, "agg": agg,
+    }}
+
+
+def _format_number(value: Optional[float]) -> str:
+    if value is None:
+        return "n/a"
+    return f"{value:,.0f}" if abs(value) >= 100 else f"{value:,.2f}"
+
+
+def summarize(result: Dict[str, Any]) -> str:
+    """Plain-text rendering of a query result for the LLM prompt."""
+    filters = ", ".join(
+        f"{k}={v if not isinstance(v, dict) else '-'.join(str(b) for b in v.values())}"
+        for k, v in result["filters"].items()
+    ) or "all rows"
+    header = f"{result['agg']} of {result['measure']} ({filters}; table {result['table']})"
+    lines = [header]
+    if "series" in result:
+        lines += [f"  {point[result['period']]}: {_format_number(point['value'])}" for point in result["series"]]
+        if "change" in result:
+            lines.append(
+                f"  change: {_format_number(result['change'])}"
+                f" ({_format_number(result.get('pct_change'))}%), CAGR {_format_number(result.get('cagr_pct'))}%"
+            )
+    elif "groups" in result:
+        for group in result["groups"]:
+            label = ", ".join(str(v) for k, v in group.items() if k != "value")
+            lines.append(f"  {label}: {_format_number(group['value'])}")
+    else:
+        lines.append(f"  {_format_number(result.get('value'))}")
+    return "\n".join(lines)
+
+
+def answer_numeric_question(catalog: TabularCatalog, question: str) -> Optional[Dict[str, Any]]:
+    """
+    Compute the answer to a numeric question from the first table that can.
+
+    Returns:
+        {"operation", "result", "summary"} or None if no table matches
+    """
+    operations = {"aggregate": aggregate, "trend": trend, "top_k": top_k}
+    for table in catalog.tables():
+        plan = parse_question(table, question)
+        if plan is None:
+            continue
+        result = operations[plan["operation"]](table, **plan["kwargs"])
+        if not result["rows_matched"]:
+            continue
+        return {"operation": plan["operation"], "result": result, "summary": summarize(result)}
+    return None
@@ -0,0 +1,372 @@
+import csv
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CATEGORY = "category"  # dictionary-encoded strings (int32 codes)
+INTEGER = "integer"    # numeric dimension such as a year (int64)
+MEASURE = "measure"    # numeric values (float64, NaN for missing)
+
+SCHEMA_FILE = "schema.json"
+CURRENT_FILE = "CURRENT"  # names the current version directory of a table
+_INTEGER_DIMENSION_NAMES = {"year", "fiscal_year", "fy", "month", "quarter"}
+_TABLE_NAME = re.compile(r"[^a-z0-9_]+")
+
+
+def table_name_for(path: str) -> str:
+    """Table name derived from a file name ("finance.csv" -> "finance")."""
+    name = _TABLE_NAME.sub("_", Path(path).stem.lower()).strip("_")
+    return name or "table"
+
+
+def table_directory(root: Path, name: str) -> Optional[Path]:
+    """
+    Directory of the current version of a table, or None if there is none.
+
+    Each table lives in `root/name/` as version directories plus a CURRENT
+    file naming the live one; tables written before versioning keep their
+    files directly in `root/name/`.
+    """
+    base = Path(root) / name
+    previous = None
+    while True:
+        try:
+            with open(base / CURRENT_FILE, "r", encoding="utf-8") as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            version = ""
+        directory = base / version if version else base
+        if (directory / SCHEMA_FILE).exists():
+            return directory
+        if version == previous:
+            return None
+        # Newer versions were published and this one pruned since CURRENT was read
+        previous = version
+
+
+def _prune_versions(base: Path, current: str, keep: int = 2) -> None:
+    """Remove all but the newest `keep` versions (always keeping `current`) and pre-versioning files."""
+    versions = sorted(p.name for p in base.iterdir() if p.is_dir() and p.name.startswith("v"))
+    for stale in versions[:-keep]:
+        if stale != current:
+            shutil.rmtree(base / stale, ignore_errors=True)
+    for legacy in [base / SCHEMA_FILE, *base.glob("c[0-9]*.npy")]:
+        legacy.unlink(missing_ok=True)
+
+
+def _parse_float(value: str) -> float:
+    value = value.strip().replace(",", "")
+    if not value:
+        return float("nan")
+    return float(value)
+
+
+class Table:
+    """
+    One table stored column by column as memory-mapped .npy files.
+
+    Category columns hold int32 codes into a per-column dictionary, integer
+    dimensions (e.g. Year) and measures hold plain numeric arrays. Every
+    column is mapped when the table is opened, so an open table keeps its
+    version readable after a newer one replaces and prunes it; nothing is
+    read into memory until a query touches a column, and then only the
+    pages it touches.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        with open(self.directory / SCHEMA_FILE, "r", encoding="utf-8") as f:
+            self.schema: Dict[str, Any] = json.load(f)
+        self.name: str = self.schema["name"]
+        self.num_rows: int = self.schema["num_rows"]
+        self.columns: Dict[str, Dict[str, Any]] = {c["name"]: c for c in self.schema["columns"]}
+        self._arrays: Dict[str, np.ndarray] = {
+            name: self._map(column) for name, column in self.columns.items()
+        }
+        self._code_lookup: Dict[str, Dict[str, int]] = {}
+
+    def _map(self, column: Dict[str, Any]) -> np.ndarray:
+        path = self.directory / column["file"]
+        if "offset" not in column:  # written before the layout was recorded
+            return np.load(path, mmap_mode="r")
+        # Mapping at the recorded offset skips np.load's header parsing, which goes
+        # through ast.literal_eval and is not safe from concurrent threads on CPython 3.11
+        dtype = np.dtype(column["dtype"])
+        if not self.num_rows:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(self.num_rows,), offset=column["offset"])
+
+    @property
+    def dimensions(self) -> List[str]:
+        return [name for name, c in self.columns.items() if c["kind"] != MEASURE]
+
+    @property
+    def measures(self) -> List[str]:
+        return [name for name, c in self.columns.items() if c["kind"] == MEASURE]
+
+    def kind(self, column: str) -> str:
+        return self.columns[column]["kind"]
+
+    def array(self, column: str) -> np.ndarray:
+        """Memory-mapped values (codes, for category columns) of a column."""
+        return self._arrays[column]
+
+    def dictionary(self, column: str) -> List[str]:
+        return self.columns[column].get("dictionary", [])
+
+    def codes_for(self, column: str, values: Sequence[str]) -> np.ndarray:
+        """Dictionary codes of `values` (case-insensitive); unknown values are dropped."""
+        lookup = self._code_lookup.get(column)
+        if lookup is None:
+            lookup = {value.lower(): code for code, value in enumerate(self.dictionary(column))}
+            self._code_lookup[column] = lookup
+        codes = [lookup[v.lower()] for v in values if v.lower() in lookup]
+        return np.array(codes, dtype=np.int32)
+
+    def decode(self, column: str, values: np.ndarray) -> List[Any]:
+        """Turn stored values back into user-facing values."""
+        if self.kind(column) == CATEGORY:
+            dictionary = self.dictionary(column)
+            return [dictionary[int(v)] for v in values]
+        return [int(v) for v in values]
+
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        Column matching a user-supplied name.
+
+        Tries an exact (case-insensitive) match, then the last dotted segment
+        ("Revenue" -> "Totals.Revenue"), then a substring match.
+        """
+        lowered = name.strip().lower()
+        if not lowered:
+            return None
+        by_lower = {c.lower(): c for c in self.columns}
+        if lowered in by_lower:
+            return by_lower[lowered]
+        for column in self.columns:
+            if column.lower().rsplit(".", 1)[-1].strip() == lowered:
+                return column
+        matches = [c for c in self.columns if lowered in c.lower()]
+        return min(matches, key=len) if matches else None
+
+    def describe(self) -> Dict[str, Any]:
+        info = {"name": self.name, "num_rows": self.num_rows, "source": self.schema.get("source"), "columns": []}
+        for name, column in self.columns.items():
+            entry = {"name": name, "kind": column["kind"]}
+            if column["kind"] == CATEGORY:
+                entry["cardinality"] = len(column["dictionary"])
+            elif column["kind"] == INTEGER:
+                entry["min"], entry["max"] = column["min"], column["max"]
+            info["columns"].append(entry)
+        return info
+
+
+def write_table_from_csv(
+    csv_path: Path,
+    root: Path,
+    name: Optional[str] = None,
+    dimensions: Optional[Sequence[str]] = None
+) -> Path:
+    """
+    Convert a CSV into a columnar table directory under `root`.
+
+    Non-numeric columns become dictionary-encoded categories. Integer columns
+    named like a period (Year, Month, ...) or listed in `dimensions` become
+    integer dimensions; every other numeric column is a float64 measure. The
+    table is written as a new version directory and published by replacing
+    its CURRENT file, so readers always see either the old or the new table,
+    never a missing or half-written one. Tables opened on the previous
+    version keep reading it.
+
+    Returns:
+        Directory of the written table version
+    """
+    csv_path = Path(csv_path)
+    name = name or table_name_for(str(csv_path))
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    forced = {d.lower() for d in (dimensions or [])}
+
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader)]
+        raw_columns: List[List[str]] = [[] for _ in header]
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            row = row + [""] * (len(header) - len(row))
+            for i, cell in enumerate(row[:len(header)]):
+                raw_columns[i].append(cell)
+    num_rows = len(raw_columns[0]) if header else 0
+
+    base = root / name
+    base.mkdir(exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=base))
+    try:
+        columns = []
+        for i, (column_name, values) in enumerate(zip(header, raw_columns)):
+            file_name = f"c{i:03d}.npy"
+            try:
+                numeric = np.array([_parse_float(v) for v in values], dtype=np.float64)
+            except ValueError:
+                numeric = None
+
+            lowered = column_name.lower()
+            is_integral = (
+                numeric is not None
+                and not np.isnan(numeric).any()
+                and np.array_equal(numeric, np.round(numeric))
+            )
+            if numeric is not None and is_integral and (lowered in _INTEGER_DIMENSION_NAMES or lowered in forced):
+                array = numeric.astype(np.int64)
+                entry = {"kind": INTEGER, "min": int(array.min()) if num_rows else 0,
+                         "max": int(array.max()) if num_rows else 0}
+            elif numeric is not None and lowered not in forced:
+                array = numeric
+                entry = {"kind": MEASURE}
+            else:
+                cleaned = [v.strip() for v in values]
+                dictionary, codes = np.unique(np.array(cleaned, dtype=str), return_inverse=True)
+                array = codes.astype(np.int32)
+                entry = {"kind": CATEGORY, "dictionary": dictionary.tolist()}
+
+            np.save(staging / file_name, array)
+            layout = {"dtype": array.dtype.str, "offset": (staging / file_name).stat().st_size - array.nbytes}
+            columns.append({"name": column_name, "file": file_name, **entry, **layout})
+
+        schema = {
+            "name": name,
+            "source": csv_path.name,
+            "num_rows": num_rows,
+            "columns": columns,
+        }
+        with open(staging / SCHEMA_FILE, "w", encoding="utf-8") as f:
+            json.dump(schema, f, indent=2)
+
+        version = f"v{time.time_ns():020d}"
+        target = base / version
+        os.replace(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    pointer = base / f".{CURRENT_FILE}.{os.getpid()}.{threading.get_ident()}"
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer, base / CURRENT_FILE)
+    _prune_versions(base, version)
+
+    logger.info(f"Stored table {name}: {num_rows} rows, {len(header)} columns")
+    return target
+
+
+def looks_tabular(csv_path: Path, sample_rows: int = 50, min_numeric_share: float = 0.75) -> bool:
+    """True if most columns of a CSV sample are numeric (a data table, not prose)."""
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header or len(header) < 2:
+            return False
+        rows = [row for _, row in zip(range(sample_rows), reader)]
+    if not rows:
+        return False
+
+    numeric_columns = 0
+    for i in range(len(header)):
+        try:
+            for row in rows:
+                if i < len(row):
+                    _parse_float(row[i])
+            numeric_columns += 1
+        except ValueError:
+            continue
+    return numeric_columns / len(header) >= min_numeric_share
+
+
+class TabularCatalog:
+    """All columnar tables under one directory, opened lazily and cached."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._tables: Dict[str, Table] = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        return sorted(
+            p.name for p in self.root.iterdir()
+            if p.is_dir() and not p.name.startswith(".") and table_directory(self.root, p.name) is not None
+        )
+
+    def get(self, name: str) -> Optional[Table]:
+        """The current version of a table, reopened when a newer version was published."""
+        previous = None
+        while True:
+            directory = table_directory(self.root, name)
+            with self._lock:
+                if directory is None:
+                    self._tables.pop(name, None)
+                    return None
+                table = self._tables.get(name)
+                if table is not None and table.directory == directory:
+                    return table
+                try:
+                    table = self._tables[name] = Table(directory)
+                    return table
+                except FileNotFoundError:
+                    # Pruned by newer writes between resolving and opening: resolve again,
+                    # unless nothing newer was published (the version is broken)
+                    if directory == previous:
+                        return None
+                    previous = directory
+
+    def tables(self) -> List[Table]:
+        return [table for table in (self.get(name) for name in self.names()) if table is not None]
+
+    def ingest_csv(
+        self,
+        csv_path: Path,
+        name: Optional[str] = None,
+        dimensions: Optional[Sequence[str]] = None
+    ) -> Table:
+        """Store a CSV as a columnar table, replacing any table of the same name."""
+        directory = write_table_from_csv(csv_path, self.root, name=name, dimensions=dimensions)
+        table = Table(directory)
+        with self._lock:
+            self._tables[table.name] = table
+        return table
+
+    def ensure(self, csv_path: Path, name: Optional[str] = None) -> Optional[Table]:
+        """Ingest `csv_path` unless an up-to-date table already exists."""
+        csv_path = Path(csv_path)
+        name = name or table_name_for(str(csv_path))
+        directory = table_directory(self.root, name)
+        schema = directory / SCHEMA_FILE if directory is not None else None
+        if schema is not None and (not csv_path.exists() or schema.stat().st_mtime >= csv_path.stat().st_mtime):
+            return self.get(name)
+        if not csv_path.exists():
+            return None
+        return self.ingest_csv(csv_path, name=name)
+
+    def drop(self, name: str) -> bool:
+        with self._lock:
+            self._tables.pop(name, None)
+        if table_directory(self.root, name) is None:
+            return False
+        # Unpublish first so readers stop finding the table before its files go
+        (self.root / name / CURRENT_FILE).unlink(missing_ok=True)
+        shutil.rmtree(self.root / name, ignore_errors=True)
+        return True
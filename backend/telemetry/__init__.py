@@ -0,0 +1,21 @@
+from .metrics import (
+    registry,
+    stage_timer,
+    record_tokens,
+    record_cache,
+    Counter,
+    Gauge,
+    Histogram,
+)
+from .profiler import run_in_threadpool
+
+__all__ = [
+    "registry",
+    "stage_timer",
+    "record_tokens",
+    "record_cache",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "run_in_threadpool",
+]
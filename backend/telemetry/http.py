@@ -0,0 +1,53 @@
+import time
+
+from telemetry.metrics import HTTP_LATENCY, registry
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording end-to-end request latency.
+
+    Requests are labelled by their route template (e.g. `/documents/{document_id}`)
+    rather than the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_holder = {"status": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_LATENCY.observe(
+                time.perf_counter() - start,
+                method=scope.get("method", ""),
+                path=path,
+                status=str(status_holder["status"])
+            )
+
+
+def instrument_app(app) -> None:
+    """Add latency middleware and a Prometheus `/metrics` endpoint to a FastAPI app."""
+    from fastapi.responses import Response
+
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(content=registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
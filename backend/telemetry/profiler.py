@@ -0,0 +1,332 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter as _Tally, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def _collapse(frame, thread_name: str, max_depth: int) -> str:
+    """Render a frame chain root-first in collapsed-stack (flamegraph) form."""
+    parts: List[str] = []
+    while frame is not None and len(parts) < max_depth:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    parts.append(thread_name)
+    parts.reverse()
+    return ";".join(parts)
+
+
+class RequestWindow:
+    """One profiled request: the threads working for it and the stacks sampled from them."""
+
+    __slots__ = ("started", "threads", "samples")
+
+    def __init__(self, max_samples: int):
+        self.started = time.monotonic()
+        self.threads: _Tally = _Tally()  # thread ident -> nesting depth
+        self.samples: Deque[str] = deque(maxlen=max_samples)
+
+
+# Profiler and window of the request handled in the current context (None when not profiling)
+_current_request: ContextVar[Optional[Tuple["SlowRequestProfiler", RequestWindow]]] = ContextVar(
+    "profiled_request", default=None
+)
+
+
+class SlowRequestProfiler:
+    """
+    Opt-in sampling profiler that keeps stacks only for slow requests.
+
+    While at least one request is in flight, a daemon thread samples, with
+    `sys._current_frames()`, only the threads registered for a request: the
+    one handling it and thread-pool workers it hands work to through
+    `run_in_threadpool` (below). Each request keeps its own bounded buffer,
+    so background workers and other requests' threads don't pollute it.
+    The event loop thread is shared by concurrent async requests, so its
+    samples go to every request in flight on it. When a request finishes
+    over the SLO, its samples are written as a collapsed-stack file plus a
+    JSON sidecar with request metadata; the capture directory keeps only
+    the newest `max_captures`.
+
+    When disabled, the middleware does a single attribute check per request
+    and no sampler thread runs.
+    """
+
+    def __init__(
+        self,
+        capture_dir: str,
+        enabled: bool = False,
+        slo_ms: float = 2000.0,
+        interval_ms: float = 10.0,
+        max_captures: int = 50,
+        max_samples: int = 60000,
+        max_depth: int = 64
+    ):
+        self.capture_dir = Path(capture_dir)
+        self.slo_ms = slo_ms
+        self.interval_ms = interval_ms
+        self.max_captures = max_captures
+        self.max_depth = max_depth
+        self.max_samples = max_samples
+        self._windows: List[RequestWindow] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.enabled = False
+        if enabled:
+            self.enable()
+
+    def enable(self, slo_ms: Optional[float] = None) -> None:
+        """Start sampling slow requests."""
+        if slo_ms is not None:
+            self.slo_ms = slo_ms
+        self.capture_dir.mkdir(parents=True, exist_ok=True)
+        self.enabled = True
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="slow-request-sampler", daemon=True)
+            self._thread.start()
+
+    def disable(self) -> None:
+        """Stop sampling; the sampler thread exits on its next wakeup."""
+        self.enabled = False
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while self.enabled:
+            if not self._windows:
+                # Idle: sleep until a request starts instead of sampling nothing
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            with self._lock:
+                owners: Dict[int, List[RequestWindow]] = {}
+                for window in self._windows:
+                    for ident in window.threads:
+                        owners.setdefault(ident, []).append(window)
+            frames = sys._current_frames()
+            names = {t.ident: t.name for t in threading.enumerate()} if owners else {}
+            for ident, windows in owners.items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                name = names.get(ident, str(ident))
+                stack = _collapse(frame, name, self.max_depth)
+                for window in windows:
+                    window.samples.append(stack)
+            del frames
+            time.sleep(self.interval_ms / 1000.0)
+
+    def request_started(self) -> RequestWindow:
+        """Open a window for a request handled on the calling thread."""
+        window = RequestWindow(self.max_samples)
+        window.threads[threading.get_ident()] += 1
+        with self._lock:
+            self._windows.append(window)
+        self._wakeup.set()
+        return window
+
+    @contextmanager
+    def attach(self, window: RequestWindow):
+        """Sample the calling thread into `window` while the block runs."""
+        ident = threading.get_ident()
+        with self._lock:
+            window.threads[ident] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                window.threads[ident] -= 1
+                if window.threads[ident] <= 0:
+                    del window.threads[ident]
+
+    def request_finished(self, window: RequestWindow, metadata: Dict[str, Any]) -> Optional[str]:
+        """
+        Close a request window; write a capture if it exceeded the SLO.
+
+        Returns:
+            Capture name, or None if the request was fast
+        """
+        duration_ms = (time.monotonic() - window.started) * 1000
+        with self._lock:
+            self._windows.remove(window)
+            window.threads.clear()
+            if duration_ms < self.slo_ms:
+                return None
+            stacks = _Tally(window.samples)
+        return self._write_capture(stacks, dict(metadata, duration_ms=round(duration_ms, 1)))
+
+    def _write_capture(self, stacks: _Tally, metadata: Dict[str, Any]) -> str:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", metadata.get("path", "")).strip("_") or "root"
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}_{int(time.time() * 1000) % 1000:03d}_{slug}_{int(metadata['duration_ms'])}ms"
+        metadata.update(
+            samples=sum(stacks.values()),
+            interval_ms=self.interval_ms,
+            captured_at=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        )
+        self.capture_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.capture_dir / f"{name}.collapsed", "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(self.capture_dir / f"{name}.json", "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2)
+        self._rotate()
+        return name
+
+    def _rotate(self) -> None:
+        sidecars = sorted(self.capture_dir.glob("*.json"))
+        for sidecar in sidecars[:max(0, len(sidecars) - self.max_captures)]:
+            sidecar.unlink(missing_ok=True)
+            sidecar.with_suffix(".collapsed").unlink(missing_ok=True)
+
+    def list_captures(self) -> List[Dict[str, Any]]:
+        """Metadata of stored captures, newest first."""
+        captures = []
+        for sidecar in sorted(self.capture_dir.glob("*.json"), reverse=True):
+            try:
+                metadata = json.loads(sidecar.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            captures.append({"name": sidecar.stem, **metadata})
+        return captures
+
+    def capture_path(self, name: str) -> Optional[Path]:
+        """Path of a capture's collapsed-stack file, refusing names outside the directory."""
+        if not re.fullmatch(r"[A-Za-z0-9_]+", name):
+            return None
+        path = self.capture_dir / f"{name}.collapsed"
+        return path if path.exists() else None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "slo_ms": self.slo_ms,
+            "interval_ms": self.interval_ms,
+            "capture_dir": str(self.capture_dir),
+            "max_captures": self.max_captures,
+        }
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware feeding request windows to a SlowRequestProfiler."""
+
+    def __init__(self, app, profiler: SlowRequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if not self.profiler.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        window = self.profiler.request_started()
+        context = _current_request.set((self.profiler, window))
+        status_holder = {"status": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(context)
+            self.profiler.request_finished(window, {
+                "method": scope.get("method", ""),
+                "path": scope.get("path", ""),
+                "query_string": scope.get("query_string", b"").decode("latin-1"),
+                "status": status_holder["status"],
+            })
+
+
+async def run_in_threadpool(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    `fastapi.concurrency.run_in_threadpool` that profiles the worker thread
+    as part of the current request, when that request is being profiled.
+    """
+    from fastapi.concurrency import run_in_threadpool as _run_in_threadpool
+
+    current = _current_request.get()
+    if current is None:
+        return await _run_in_threadpool(func, *args, **kwargs)
+    profiler, window = current
+
+    def attached() -> T:
+        with profiler.attach(window):
+            return func(*args, **kwargs)
+
+    return await _run_in_threadpool(attached)
+
+
+def install_profiler(
+    app,
+    capture_dir: str,
+    token: str = "",
+    enabled: bool = False,
+    slo_ms: float = 2000.0,
+    interval_ms: float = 10.0,
+    max_captures: int = 50
+) -> SlowRequestProfiler:
+    """
+    Add slow-request profiling to a FastAPI app.
+
+    The `/debug/profiler` endpoints require an `X-Profiler-Token` header equal
+    to `token`; with an empty token they are not mounted at all.
+    """
+    from fastapi import Header, HTTPException
+    from fastapi.responses import PlainTextResponse
+    from pydantic import BaseModel
+
+    profiler = SlowRequestProfiler(
+        capture_dir=capture_dir,
+        enabled=enabled,
+        slo_ms=slo_ms,
+        interval_ms=interval_ms,
+        max_captures=max_captures
+    )
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+    app.state.profiler = profiler
+
+    if not token:
+        return profiler
+
+    class ProfilerToggle(BaseModel):
+        enabled: bool
+        slo_ms: Optional[float] = None
+
+    def _check(x_profiler_token: Optional[str]) -> None:
+        if x_profiler_token != token:
+            raise HTTPException(status_code=403, detail="Invalid profiler token")
+
+    @app.get("/debug/profiler", include_in_schema=False)
+    async def profiler_status(x_profiler_token: Optional[str] = Header(None)):
+        _check(x_profiler_token)
+        return {**profiler.status(), "captures": profiler.list_captures()}
+
+    @app.post("/debug/profiler", include_in_schema=False)
+    async def toggle_profiler(toggle: ProfilerToggle, x_profiler_token: Optional[str] = Header(None)):
+        _check(x_profiler_token)
+        if toggle.enabled:
+            profiler.enable(slo_ms=toggle.slo_ms)
+        else:
+            profiler.disable()
+        return profiler.status()
+
+    @app.get("/debug/profiler/captures/{name}", include_in_schema=False)
+    async def get_capture(name: str, x_profiler_token: Optional[str] = Header(None)):
+        _check(x_profiler_token)
+        path = profiler.capture_path(name)
+        if path is None:
+            raise HTTPException(status_code=404, detail="Capture not found")
+        return PlainTextResponse(path.read_text(encoding="utf-8"))
+
+    return profiler
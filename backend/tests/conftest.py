@@ -0,0 +1,106 @@
+import hashlib
+import re
+import sys
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import settings
+
+DIMENSIONS = 64
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def hash_vector(text: str, dimensions: int = DIMENSIONS) -> np.ndarray:
+    """Deterministic bag-of-words vector: texts sharing words are close in cosine."""
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for token in _TOKEN.findall(text.lower()):
+        digest = hashlib.md5(token.encode("utf-8")).digest()
+        vector[int.from_bytes(digest[:4], "little") % dimensions] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class HashEmbeddingFunction:
+    """Chroma-compatible embedding function over `hash_vector`, counting its calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, input: Sequence[str]) -> List[List[float]]:
+        self.calls += 1
+        return [hash_vector(text).tolist() for text in input]
+
+
+@pytest.fixture
+def isolated_settings(tmp_path, monkeypatch):
+    """Point every on-disk path at a temporary directory and make refreshes immediate."""
+    data = tmp_path / "data"
+    data.mkdir()
+    for name, value in {
+        "DATA_DIR": data,
+        "VECTOR_DB_PATH": data / "chroma_db",
+        "DOCUMENT_REGISTRY_PATH": data / "document_registry.sqlite3",
+        "SNAPSHOT_DIR": data / "snapshots",
+        "IVF_DIR": data / "ivf",
+        "FAQ_LIBRARY_PATH": data / "answer_library.sqlite3",
+        "TABULAR_DIR": data / "tables",
+        "UPLOAD_SPOOL_DIR": data / "uploads",
+        "PDF_TEXT_CACHE_PATH": data / "pdf_text_cache.sqlite3",
+        "PROFILER_DIR": data / "profiles",
+        "STORAGE_REFRESH_INTERVAL_S": 0.0,
+        "SNAPSHOT_CHECK_INTERVAL_S": 0.0,
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+
+    from rag import storage
+    monkeypatch.setattr(storage, "_storages", {})
+    yield settings
+    from chromadb.api.client import SharedSystemClient
+    SharedSystemClient.clear_system_cache()
+
+
+@pytest.fixture
+def embedder(monkeypatch):
+    """Replace the sentence-transformers embedding function with `HashEmbeddingFunction`."""
+    function = HashEmbeddingFunction()
+    import rag.vector_store
+    monkeypatch.setattr(rag.vector_store, "get_embedding_function", lambda model_name=None: function)
+    return function
+
+
+@pytest.fixture
+def vector_store(isolated_settings, embedder):
+    from rag.vector_store import VectorStore
+    return VectorStore("test_collection")
+
+
+def make_chunks(document_id: str, texts: Sequence[str], **metadata):
+    from rag.document_processor import DocumentChunk
+    return [
+        DocumentChunk(
+            content=text,
+            metadata=dict(metadata),
+            chunk_id=f"{document_id}_chunk_{i}",
+            document_id=document_id
+        )
+        for i, text in enumerate(texts)
+    ]
+
+
+@pytest.fixture
+def retrieval_core(isolated_settings, embedder, monkeypatch):
+    """A fresh process-wide retrieval core over the isolated data directory."""
+    from retrieval import core
+    monkeypatch.setattr(core, "_core", None)
+    return core.get_retrieval_core()
+
+
+@pytest.fixture
+def ingestion(retrieval_core):
+    from ingestion.ingestion_service import IngestionService
+    return IngestionService(retrieval_core.vector_store)
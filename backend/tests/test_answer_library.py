@@ -0,0 +1,40 @@
+from faq import AnswerLibrary, segment_key
+from tests.conftest import HashEmbeddingFunction
+
+SEGMENT = segment_key("ask", "21-28", "india", "en")
+RESPONSE = {"answer": "PPF is a 15 year government savings scheme."}
+SOURCES = [("ppf_chunk_0", "PPF has a fifteen year lock in.")]
+
+
+def test_segment_keys_skip_missing_parts():
+    assert SEGMENT == "ask:21-28:india:en"
+    assert segment_key("chat", None, "hindi") == "chat:hindi"
+
+
+def test_exact_and_semantic_matches_are_served_per_segment(tmp_path):
+    library = AnswerLibrary(tmp_path / "library.sqlite3", semantic_threshold=0.8, embed=HashEmbeddingFunction())
+    library.put("What is PPF?", SEGMENT, RESPONSE, SOURCES)
+
+    exact = library.lookup("  what is ppf?? ", SEGMENT)
+    assert exact.match == "exact" and exact.response == RESPONSE
+    semantic = library.lookup("PPF what is it", SEGMENT)
+    assert semantic is not None and semantic.match == "semantic" and semantic.similarity >= 0.8
+    assert library.lookup("What is PPF?", segment_key("ask", "15-20", "india", "en")) is None
+    assert library.lookup("How do gold loans work?", SEGMENT) is None
+
+
+def test_changed_source_chunks_make_answers_stale_until_refreshed(tmp_path):
+    library = AnswerLibrary(tmp_path / "library.sqlite3")
+    library.put("What is PPF?", SEGMENT, RESPONSE, SOURCES)
+    assert library.verify(lambda ids: {"ppf_chunk_0": "PPF has a fifteen year lock in."}) == 0
+
+    assert library.verify(lambda ids: {"ppf_chunk_0": "PPF now has a ten year lock in."}) == 1
+    assert library.lookup("What is PPF?", SEGMENT) is None
+    assert library.pending(["What is PPF?"], [SEGMENT]) == [("What is PPF?", SEGMENT)]
+
+    # Only library questions are refreshed from live answers
+    assert not library.refresh("What is an ELSS?", SEGMENT, RESPONSE, SOURCES)
+    assert library.refresh("What is PPF?", SEGMENT, RESPONSE, SOURCES)
+    assert library.lookup("What is PPF?", SEGMENT) is not None
+    assert library.invalidate_chunks(["ppf_chunk_0"]) == 1
+    assert library.stats() == {"questions": 1, "answers": 1, "stale": 1}
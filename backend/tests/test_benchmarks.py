@@ -0,0 +1,49 @@
+import asyncio
+
+from benchmarks.corpus import QUERIES, build_workload
+from benchmarks.run import replay_async, replay_sync, summarize
+from rag.segments import AGE_GROUPS, REGIONS
+
+
+def test_workload_is_reproducible_for_a_seed():
+    workload = build_workload(50, seed=7)
+    assert workload == build_workload(50, seed=7)
+    assert workload != build_workload(50, seed=8)
+    assert all(
+        r["question"] in QUERIES and r["age_group"] in AGE_GROUPS and r["region"] in REGIONS
+        for r in workload
+    )
+
+
+def test_summarize_reports_percentiles_and_qps():
+    latencies = [i / 1000 for i in range(1, 101)]  # 1..100 ms
+    report = summarize(latencies, errors=2, wall_time=2.0)
+    assert report["requests"] == 102 and report["errors"] == 2
+    assert report["p50_ms"] == 51.0 and report["p95_ms"] == 95.0 and report["p99_ms"] == 99.0
+    assert report["qps"] == 50.0
+    assert summarize([], errors=0, wall_time=0.0)["p99_ms"] == 0.0
+
+
+def test_replay_sync_counts_failures_as_errors():
+    def call(request):
+        if request["question"] == "fail":
+            raise RuntimeError("boom")
+
+    workload = [{"question": "ok"}] * 6 + [{"question": "fail"}] * 2
+    report = replay_sync(call, workload, concurrency=3)
+    assert report["requests"] == 8 and report["errors"] == 2
+
+
+def test_replay_async_bounds_concurrency():
+    running = peak = 0
+
+    async def call(request):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.005)
+        running -= 1
+
+    report = asyncio.run(replay_async(call, [{}] * 12, concurrency=3))
+    assert report["requests"] == 12 and report["errors"] == 0
+    assert peak == 3
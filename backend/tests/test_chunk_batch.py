@@ -0,0 +1,61 @@
+from rag.dedup import CANONICAL_KEY, LINK
+from rag.document_processor import DocumentProcessor
+
+
+def _batch(content, page_starts=None):
+    processor = DocumentProcessor(chunk_size=40, chunk_overlap=10)
+    return processor.chunk_batch(content, {"source": "guide.txt", "region": "south"}, "doc", page_starts=page_starts)
+
+
+def test_columns_point_back_into_the_source_text():
+    content, page_starts = DocumentProcessor.join_pages([
+        "  Budgeting starts with tracking every rupee you spend each month.",
+        "An emergency fund covers six months of expenses.   ",
+    ])
+    batch = _batch(content, page_starts)
+
+    assert batch.ids == [f"doc_chunk_{i}" for i in range(len(batch))]
+    for text, start, end in zip(batch.texts, batch.starts, batch.ends):
+        assert content[start:end] == text
+    assert batch.page_numbers[0] == 1 and batch.page_numbers[-1] == 2
+    # The list API is the same chunks, built from the columns
+    processor = DocumentProcessor(chunk_size=40, chunk_overlap=10)
+    chunks = processor.chunk_document(content, {"source": "guide.txt", "region": "south"}, "doc", page_starts)
+    assert [(c.chunk_id, c.content, c.page_number) for c in chunks] == [
+        (c.chunk_id, c.content, c.page_number) for c in batch
+    ]
+
+
+def test_document_metadata_is_shared_and_overrides_are_per_row():
+    batch = _batch("Save a little every month and let compound interest do the rest over the years.")
+    batch.set_override(1, "section", "Saving")
+
+    view = batch[0]
+    view.metadata["region"] = "north"
+    assert batch.value(0, "region") == "south"
+    assert batch[1].section == "Saving" and batch.value(1, "section") == "Saving"
+
+    subset = batch.take([1, 2])
+    assert subset.metadata is batch.metadata
+    assert subset.ids == batch.ids[1:3] and subset.overrides == {0: {"section": "Saving"}}
+    assert batch[1:3].ids == subset.ids
+
+    stored = batch.storage_metadatas()
+    assert stored[1] == {
+        "source": "guide.txt", "region": "south", "section": "Saving",
+        "chunk_id": "doc_chunk_1", "document_id": "doc",
+    }
+    assert "page" not in stored[0]
+
+
+def test_vector_store_accepts_batches_and_links_duplicates(vector_store, monkeypatch):
+    monkeypatch.setattr(vector_store.deduplicator, "mode", LINK)
+    text = "The Public Provident Fund has a fifteen year lock in and tax free interest. " * 2
+    vector_store.add_documents(_batch(text))
+    stored = vector_store.add_documents(
+        DocumentProcessor(chunk_size=40, chunk_overlap=10).chunk_batch(text, {"region": "south", "source": "copy.txt"}, "copy")
+    )
+
+    linked = vector_store.get_chunks(stored)
+    assert linked and all(chunk.metadata.get(CANONICAL_KEY, "").startswith("doc_chunk_") for chunk in linked)
+    assert vector_store.get_collection_stats()["documents"] == 2
@@ -0,0 +1,52 @@
+from app.services.conversation_memory import (
+    ConversationStore,
+    bounded_history,
+    estimate_tokens,
+    rewrite_follow_up,
+)
+
+
+def test_old_turns_fold_into_a_bounded_summary():
+    store = ConversationStore(recent_token_budget=1000, max_recent_turns=2, summary_token_budget=1000)
+    store.append("u1", "user", "What is PPF? Tell me everything.")
+    store.append("u1", "assistant", "English Response: PPF is a long term savings scheme.")
+    store.append("u1", "user", "What about its interest rate?")
+
+    summary, recent = store.history("u1")
+    assert summary == "User asked: What is PPF?"
+    assert [m["role"] for m in recent] == ["assistant", "user"]
+    assert store.history("unknown") == ("", [])
+
+
+def test_sessions_are_evicted_least_recently_used():
+    store = ConversationStore(max_sessions=2)
+    store.append("a", "user", "hello")
+    store.append("b", "user", "hello")
+    store.history("a")
+    store.append("c", "user", "hello")
+    assert store.has_session("a") and store.has_session("c") and not store.has_session("b")
+    assert store.stats()["bytes"] == 10
+
+
+def test_seed_only_initializes_new_sessions():
+    store = ConversationStore()
+    store.seed("u1", [{"role": "user", "content": "first"}])
+    store.seed("u1", [{"role": "user", "content": "ignored"}])
+    assert store.history("u1")[1] == [{"role": "user", "content": "first"}]
+
+
+def test_follow_ups_borrow_terms_from_the_previous_question():
+    previous = "How does the Sukanya Samriddhi scheme work?"
+    assert rewrite_follow_up("What is its interest rate?", previous) == (
+        "What is its interest rate? (Sukanya Samriddhi scheme work)"
+    )
+    standalone = "How should I plan my monthly budget carefully?"
+    assert rewrite_follow_up(standalone, previous) == standalone
+    assert rewrite_follow_up("And tax?", None) == "And tax?"
+
+
+def test_bounded_history_keeps_the_newest_turns_within_budget():
+    history = [{"role": "user", "content": "x" * 40} for _ in range(5)]
+    kept = bounded_history(history, token_budget=2 * estimate_tokens("x" * 40), max_turns=4)
+    assert kept == history[-2:]
+    assert bounded_history(history[:1], token_budget=0, max_turns=4) == history[:1]
@@ -0,0 +1,43 @@
+from rag.dedup import CANONICAL_KEY, MinHasher, collapse_duplicates, similarity
+from tests.conftest import make_chunks
+
+TEXT = (
+    "The Public Provident Fund is a long term savings scheme backed by the government. "
+    "It has a lock in period of fifteen years and the interest earned is tax free."
+)
+NEAR_COPY = TEXT.replace("fifteen years", "15 years")
+
+
+def test_signatures_estimate_jaccard_similarity():
+    hasher = MinHasher()
+    assert similarity(hasher.signature(TEXT), hasher.signature(TEXT)) == 1.0
+    assert similarity(hasher.signature(TEXT), hasher.signature(NEAR_COPY)) >= 0.8
+    assert similarity(hasher.signature(TEXT), hasher.signature("Gold loans are secured by jewellery.")) < 0.2
+
+
+def test_near_duplicates_are_dropped_within_a_scope(vector_store):
+    assert len(vector_store.add_documents(make_chunks("a", [TEXT], region="south"))) == 1
+    assert vector_store.add_documents(make_chunks("b", [NEAR_COPY], region="south")) == []
+    # The same text for another region is kept, so region filters still find it
+    assert len(vector_store.add_documents(make_chunks("c", [NEAR_COPY], region="north"))) == 1
+    assert vector_store.get_collection_stats()["count"] == 2
+
+
+def test_deleting_the_original_restores_its_dropped_duplicates(vector_store):
+    vector_store.add_documents(make_chunks("a", [TEXT], region="south"))
+    vector_store.add_documents(make_chunks("b", [NEAR_COPY], region="south"))
+
+    assert vector_store.delete_document("a")
+    restored = vector_store.get_chunks(["b_chunk_0"])
+    assert [chunk.content for chunk in restored] == [NEAR_COPY]
+
+
+def test_collapse_keeps_the_best_scored_chunk_of_each_group():
+    original, linked, copy = (
+        make_chunks("a", [TEXT])[0],
+        make_chunks("b", ["short linked text"], **{CANONICAL_KEY: "a_chunk_0"})[0],
+        make_chunks("c", [NEAR_COPY])[0],
+    )
+    other = make_chunks("d", ["Gold loans are secured by jewellery."])[0]
+    kept = collapse_duplicates([(linked, 0.8), (original, 0.9), (copy, 0.7), (other, 0.5)], MinHasher())
+    assert [(chunk.chunk_id, score) for chunk, score in kept] == [("a_chunk_0", 0.9), ("d_chunk_0", 0.5)]
@@ -0,0 +1,69 @@
+import asyncio
+
+from serving.degradation import NORMAL, NO_RERANK, DegradationController, extractive_answer
+
+
+def _controller(**overrides):
+    options = dict(p95_slo_s=1.0, max_inflight=1, step_up_s=0.0, step_down_s=0.0)
+    options.update(overrides)
+    return DegradationController("test", **options)
+
+
+def _overload(controller):
+    controller._latencies.extend([(float("inf"), 5.0)] * 10)
+
+
+def test_admit_steps_up_one_level_per_decision():
+    controller = _controller()
+    assert controller.admit() == NORMAL
+    _overload(controller)
+    assert [controller.admit() for _ in range(3)] == [1, 2, 3]
+
+
+def test_stats_and_level_do_not_change_the_level():
+    controller = _controller()
+    _overload(controller)
+    for _ in range(5):
+        assert controller.stats()["level"] == NORMAL and controller.level == NORMAL
+    assert controller.stats()["load"] >= 5.0
+    assert controller.admit() == NO_RERANK and controller.stats()["name"] == "no_rerank"
+
+
+def test_track_counts_inflight_and_latency():
+    controller = _controller(max_inflight=2)
+    with controller.track():
+        assert controller.inflight == 1 and controller.load() == 0.5
+    assert controller.inflight == 0 and len(controller._latencies) == 1
+
+
+def test_disabled_controller_stays_normal():
+    controller = _controller(enabled=False)
+    _overload(controller)
+    assert controller.admit() == NORMAL and controller.level == NORMAL
+
+
+def test_coalesced_requests_are_not_load(retrieval_core, monkeypatch):
+    from app.services.rag_service import RAGService
+    monkeypatch.setattr("app.core.config.settings.SINGLEFLIGHT_ENABLED", True)
+    service = RAGService()
+    service.library = None
+    seen = []
+
+    async def answer(query, retrieval_query, language, history, summary, level):
+        seen.append(service.degradation.inflight)
+        await asyncio.sleep(0.05)
+        return {"answer": "a", "response": "a", "context": [], "sources": []}
+
+    monkeypatch.setattr(service, "_answer", answer)
+
+    async def burst():
+        return await asyncio.gather(*(service.generate_response("What is a PPF?", language="english") for _ in range(8)))
+
+    results = asyncio.run(burst())
+    assert seen == [1] and service.inflight.coalesced == 7
+    assert all(result["degradation_level"] == NORMAL for result in results)
+    assert service.degradation.inflight == 0 and len(service.degradation._latencies) == 1
+
+
+def test_extractive_answer_takes_leading_sentences():
+    assert extractive_answer(["", "One. Two!  Three? Four."], max_sentences=2) == "One. Two!"
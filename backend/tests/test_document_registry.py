@@ -0,0 +1,51 @@
+import pytest
+
+from rag.document_registry import DocumentRegistry
+from tests.conftest import make_chunks
+
+
+def _chunks(document_id, count, **metadata):
+    return [(document_id, f"{document_id}_chunk_{i}", 10, {"chunk_id": i, **metadata}) for i in range(count)]
+
+
+def test_totals_follow_adds_and_removes(tmp_path):
+    registry = DocumentRegistry(tmp_path / "registry.sqlite3", "docs")
+    registry.add_chunks(_chunks("a", 3, region="south") + _chunks("b", 2, region="north"), dimensions=64)
+    # Re-registering the same chunks is a no-op
+    registry.add_chunks(_chunks("a", 3, region="south"))
+
+    assert registry.stats() == {"total_documents": 2, "total_chunks": 5, "total_bytes": 50, "dimensions": 64}
+    assert sorted(registry.chunk_ids("b")) == ["b_chunk_0", "b_chunk_1"]
+    assert registry.remove_documents(["a", "missing"]) == 1
+    assert registry.stats()["total_chunks"] == 2 and registry.chunk_ids("a") == []
+
+
+def test_collections_share_a_file_but_not_their_documents(tmp_path):
+    first = DocumentRegistry(tmp_path / "registry.sqlite3", "first")
+    second = DocumentRegistry(tmp_path / "registry.sqlite3", "second")
+    first.add_chunks(_chunks("a", 1))
+    assert second.is_empty() and second.list_documents() == []
+    assert first.list_documents()[0]["metadata"] == {}
+
+
+def test_find_documents_matches_document_metadata(tmp_path):
+    registry = DocumentRegistry(tmp_path / "registry.sqlite3", "docs")
+    registry.add_chunks(
+        _chunks("a", 1, region="south") + _chunks("b", 1, region="north") + _chunks("c", 1, region="east")
+    )
+    assert registry.find_documents({"region": "south"}) == ["a"]
+    assert sorted(registry.find_documents({"region": {"$in": ["north", "east"]}})) == ["b", "c"]
+    assert registry.find_documents({"region": {"$in": []}}) == []
+    with pytest.raises(ValueError):
+        registry.find_documents({"region": {"$ne": "south"}})
+    with pytest.raises(ValueError):
+        registry.find_documents({"region') OR 1=1 --": "x"})
+
+
+def test_delete_where_removes_matching_documents(vector_store):
+    vector_store.add_documents(make_chunks("a", ["PPF basics"], region="south"))
+    vector_store.add_documents(make_chunks("b", ["SIP basics"], region="north"))
+
+    assert vector_store.delete_documents_where({"region": "south"}) == 1
+    assert [d["document_id"] for d in vector_store.list_documents()] == ["b"]
+    assert vector_store.get_collection_stats()["documents"] == 1
@@ -0,0 +1,62 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+
+def _tiny_pipeline():
+    """A randomly initialised 2-layer GPT-2 with a word-level tokenizer, built offline."""
+    from tokenizers import Tokenizer, models, pre_tokenizers
+
+    words = "budget save invest money loan interest bank tax gold the a is what how to".split()
+    vocab = {"[UNK]": 0, "</s>": 1, **{word: i + 2 for i, word in enumerate(words)}}
+    backend = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer = transformers.PreTrainedTokenizerFast(tokenizer_object=backend, unk_token="[UNK]", eos_token="</s>")
+    torch.manual_seed(0)
+    model = transformers.GPT2LMHeadModel(
+        transformers.GPT2Config(vocab_size=len(vocab), n_positions=64, n_embd=16, n_layer=2, n_head=2)
+    ).eval()
+    return transformers.pipeline("text-generation", model=model, tokenizer=tokenizer)
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    from agent import generator
+    monkeypatch.setattr(generator.FinancialAgent, "_load_model", lambda self: setattr(self, "pipeline", _tiny_pipeline()))
+    recorded = []
+    monkeypatch.setattr(generator, "record_tokens", lambda model, tokens_in, tokens_out: recorded.append((tokens_in, tokens_out)))
+    agent = generator.FinancialAgent(rag_pipeline=object())
+    agent.recorded = recorded
+    return agent
+
+
+def _greedy(max_new_tokens=5):
+    from agent.generator import GenerationConfig
+    return GenerationConfig(max_new_tokens=max_new_tokens, do_sample=False, repetition_penalty=1.0)
+
+
+def test_token_counts_come_from_the_generated_ids(agent, monkeypatch):
+    tokenizer = agent.pipeline.tokenizer
+    expected_prompt = len(tokenizer("how to save money")["input_ids"])
+    monkeypatch.setattr(type(tokenizer), "encode", lambda *a, **kw: pytest.fail("re-tokenized for metrics"))
+
+    agent._generate_text("how to save money", _greedy(5))
+    assert agent.recorded == [(expected_prompt, 5)]
+
+    agent.recorded.clear()
+    agent._generate_batch_text(["how to save money", "what is a loan interest"], _greedy(3), batch_size=2)
+    assert agent.recorded == [(4 + 5, 2 * 3)]
+
+
+def test_batched_generation_matches_single_prompts(agent):
+    prompts = ["gold", "what is the interest on a bank loan", "how to save money"]
+    single = [agent._generate_text(prompt, _greedy()) for prompt in prompts]
+    assert agent._generate_batch_text(prompts, _greedy(), batch_size=3) == single
+
+
+def test_batch_generation_leaves_the_shared_tokenizer_alone(agent):
+    tokenizer = agent.pipeline.tokenizer
+    agent._generate_batch_text(["gold", "how to save money"], _greedy(2), batch_size=2)
+    assert tokenizer.padding_side == "right" and tokenizer.pad_token_id is None
+    assert agent._batch_tokenizer().padding_side == "left"
@@ -0,0 +1,67 @@
+import numpy as np
+
+from rag.snapshot import EmbeddingSnapshot, current_version, group_key, write_snapshot
+
+
+def _clustered(documents=10, per_document=8, dimensions=32, seed=0):
+    """Chunks of each document scattered around their own centre; odd documents are 'india'."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(documents, dimensions)).astype(np.float32)
+    ids, vectors, metadatas = [], [], []
+    # Interleave documents so grouping has to reorder rows
+    for chunk in range(per_document):
+        for document in range(documents):
+            ids.append(f"d{document}_chunk_{chunk}")
+            vectors.append(centres[document] + 0.2 * rng.normal(size=dimensions).astype(np.float32))
+            metadatas.append({"document_id": f"d{document}", "region": "india" if document % 2 else "all"})
+    return ids, np.stack(vectors), [f"text {i}" for i in ids], metadatas, centres
+
+
+def _group_of(snapshot, document_id):
+    rows = [row for row in range(snapshot.count) if snapshot.record(row)["metadata"]["document_id"] == document_id]
+    return int(np.searchsorted(snapshot.group_offsets, rows[0], side="right") - 1)
+
+
+def _open(root):
+    return EmbeddingSnapshot(root / current_version(root))
+
+
+def test_group_keys_follow_documents_or_sections():
+    assert group_key({"document_id": "d1", "section": "Tax"}, "document") == "d1"
+    assert group_key({"document_id": "d1", "section": "Tax"}, "section") == "d1#Tax"
+    assert group_key({"document_id": "d1"}, "section") == "d1"
+
+
+def test_top_groups_scores_only_the_best_documents(tmp_path):
+    ids, vectors, documents, metadatas, centres = _clustered()
+    write_snapshot(tmp_path, ids, vectors, documents, metadatas, filter_keys=("region",), group_by="document")
+    snapshot = _open(tmp_path)
+    query = centres[3] / np.linalg.norm(centres[3])
+
+    flat = snapshot.search(query, 5)
+    coarse = snapshot.search(query, 5, top_groups=2)
+    assert [row for row, _ in coarse] == [row for row, _ in flat]
+    assert {snapshot.record(row)["metadata"]["document_id"] for row, _ in coarse} == {"d3"}
+    assert len(snapshot.probe_groups(query, None, 2)) == 16
+
+
+def test_filters_choose_among_matching_groups_only(tmp_path):
+    ids, vectors, documents, metadatas, centres = _clustered()
+    write_snapshot(tmp_path, ids, vectors, documents, metadatas, filter_keys=("region",), group_by="document")
+    snapshot = _open(tmp_path)
+
+    # The closest document is excluded by the filter; the best matching allowed one is searched
+    query = centres[4] / np.linalg.norm(centres[4])
+    results = snapshot.search(query, 3, {"region": "india"}, top_groups=1)
+    allowed = [d for d in range(len(centres)) if d % 2]
+    best = max(allowed, key=lambda d: float(snapshot.centroids[_group_of(snapshot, f"d{d}")] @ query))
+    assert len(results) == 3
+    assert {snapshot.record(row)["metadata"]["document_id"] for row, _ in results} == {f"d{best}"}
+
+
+def test_ungrouped_snapshots_stay_exact(tmp_path):
+    ids, vectors, documents, metadatas, centres = _clustered()
+    write_snapshot(tmp_path, ids, vectors, documents, metadatas)
+    snapshot = _open(tmp_path)
+    assert snapshot.centroids is None
+    assert snapshot.search(centres[0], 4, top_groups=1) == snapshot.search(centres[0], 4)
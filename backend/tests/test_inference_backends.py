@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from inference import ONNX, EncoderEmbeddingFunction, load_embedder
+from inference.onnx_models import PARITY_TEXTS, artifact_dir, embedder_parity, reranker_parity
+
+
+class _Encoder:
+    def __init__(self, noise=0.0):
+        self.noise = noise
+
+    def encode(self, texts, convert_to_numpy=True, **kwargs):
+        rng = np.random.default_rng(0)
+        base = np.stack([np.arange(1, 9, dtype=np.float32) * (i + 1) % 7 + 1 for i in range(len(texts))])
+        return base + self.noise * rng.standard_normal(base.shape).astype(np.float32)
+
+
+class _Scorer:
+    def __init__(self, flip=False):
+        self.flip = flip
+
+    def predict(self, pairs, **kwargs):
+        scores = np.array([len(query) + len(passage) for query, passage in pairs], dtype=np.float64)
+        return -scores if self.flip else scores
+
+
+@pytest.fixture
+def tiny_model(tmp_path):
+    """A two-layer BERT with a vocabulary built from the parity texts, saved offline."""
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    words = sorted({w.lower().strip("?,.") for text in PARITY_TEXTS for w in text.split()})
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words
+    directory = tmp_path / "tiny-bert"
+    directory.mkdir()
+    (directory / "vocab.txt").write_text("\n".join(vocab), encoding="utf-8")
+    config = BertConfig(
+        vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=64, max_position_embeddings=64
+    )
+    BertModel(config).save_pretrained(directory)
+    BertTokenizerFast(vocab_file=str(directory / "vocab.txt")).save_pretrained(directory)
+    return directory
+
+
+def test_parity_checks_detect_disagreeing_exports():
+    assert embedder_parity(_Encoder(), _Encoder())["min_cosine"] == 1.0
+    assert embedder_parity(_Encoder(), _Encoder(noise=5.0))["min_cosine"] < 0.99
+    assert reranker_parity(_Scorer(), _Scorer())["rank_correlation"] == 1.0
+    assert reranker_parity(_Scorer(), _Scorer(flip=True))["rank_correlation"] < 0
+
+
+def test_artifacts_are_cached_per_model_and_precision(tmp_path):
+    int8 = artifact_dir(tmp_path, "BAAI/bge-small-en-v1.5", "embedder", quantize=True)
+    fp32 = artifact_dir(tmp_path, "BAAI/bge-small-en-v1.5", "embedder", quantize=False)
+    assert int8.parent == tmp_path and int8 != fp32
+    assert int8.name == "BAAI--bge-small-en-v1.5.embedder.int8"
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        load_embedder("any-model", backend="tensorflow")
+
+
+def test_onnx_embedder_matches_torch_or_falls_back(tiny_model, tmp_path):
+    torch_embedder = load_embedder(str(tiny_model))
+    embedder = load_embedder(str(tiny_model), backend=ONNX, cache_dir=tmp_path / "onnx", quantize=False)
+
+    # Without onnx/onnxscript the export fails and the torch model is served instead
+    expected = torch_embedder.encode(PARITY_TEXTS[:3], convert_to_numpy=True)
+    actual = np.asarray(EncoderEmbeddingFunction(embedder)(PARITY_TEXTS[:3]))
+    assert actual.shape == expected.shape
+    cosines = np.sum(expected * actual, axis=1) / (
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    )
+    assert cosines.min() > 0.999
@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def job_queue(retrieval_core, tmp_path):
+    # The module builds its singleton from the retrieval core on import
+    from ingestion.jobs import IngestionJobQueue
+    release = threading.Event()
+    runs = []
+
+    def run_job(path, document_type, metadata, progress):
+        runs.append(metadata)
+        release.wait(5)
+        return {"status": "success", "document_id": f"doc_{len(runs)}"}
+
+    queue = IngestionJobQueue(run_job, max_workers=2)
+    queue.release, queue.runs = release, runs
+    yield queue
+    release.set()
+    queue.shutdown()
+
+
+def _spool(tmp_path, name="upload.bin"):
+    path = tmp_path / name
+    path.write_bytes(b"same bytes")
+    return str(path)
+
+
+def _wait(queue, job, status):
+    for _ in range(200):
+        if queue.get(job.job_id).status == status:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"{job.job_id} never reached {status}")
+
+
+def test_duplicate_upload_joins_the_running_job(job_queue, tmp_path):
+    first = job_queue.submit(_spool(tmp_path, "a"), "h1", "a.txt", "txt", {"age_group": "21-25"})
+    second = job_queue.submit(_spool(tmp_path, "b"), "h1", "a.txt", "txt", {"age_group": "21-25"})
+    assert second is first and first.duplicate_requests == 1
+    assert not (tmp_path / "b").exists()
+
+
+def test_same_bytes_with_other_metadata_get_their_own_job(job_queue, tmp_path):
+    first = job_queue.submit(_spool(tmp_path, "a"), "h1", "a.txt", "txt", {"region": "north"})
+    second = job_queue.submit(_spool(tmp_path, "b"), "h1", "a.txt", "txt", {"region": "south"})
+    assert second is not first
+    job_queue.release.set()
+    _wait(job_queue, second, "succeeded")
+    assert sorted(m["region"] for m in job_queue.runs) == ["north", "south"]
+
+
+def test_reupload_after_success_ingests_again(job_queue, tmp_path):
+    job_queue.release.set()
+    first = job_queue.submit(_spool(tmp_path, "a"), "h1", "a.txt", "txt", {})
+    _wait(job_queue, first, "succeeded")
+    # e.g. after DELETE /documents removed what the first job ingested
+    second = job_queue.submit(_spool(tmp_path, "b"), "h1", "a.txt", "txt", {})
+    assert second is not first
+    _wait(job_queue, second, "succeeded")
+    assert len(job_queue.runs) == 2
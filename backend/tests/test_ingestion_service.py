@@ -0,0 +1,54 @@
+import asyncio
+
+
+def _write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_ingest_embeds_before_taking_the_writer_lock(ingestion, embedder, tmp_path, monkeypatch):
+    store = ingestion.vector_store
+    depths = []
+    original = store.embedding_function
+    monkeypatch.setattr(store, "embedding_function", lambda texts: depths.append(store.storage._depth) or original(texts))
+    monkeypatch.setattr("config.settings.EMBED_BATCH_SIZE", 2)
+    paragraphs = [f"Paragraph {i} explains budgeting rule number {i} for first jobs. " * 8 for i in range(6)]
+    path = _write(tmp_path, "budgeting.txt", "\n\n".join(paragraphs))
+    events = []
+
+    result = ingestion.ingest_file(str(path), "txt", {"age_group": "21-25"}, progress=lambda **kw: events.append(kw))
+
+    assert result["status"] == "success" and result["chunks_ingested"] > 2
+    assert depths and set(depths) == {0}
+    embedded = [e["chunks_embedded"] for e in events if "chunks_embedded" in e]
+    assert embedded == sorted(embedded) and embedded[-1] == result["chunks_ingested"] + result["duplicates_dropped"]
+    assert store.list_documents()[0]["document_id"] == result["document_id"]
+
+
+def test_delete_document_removes_every_chunk(ingestion, tmp_path):
+    path = _write(tmp_path, "gold.txt", "Sovereign gold bonds pay interest twice a year. " * 20)
+    document_id = ingestion.ingest_file(str(path), "txt")["document_id"]
+
+    result = asyncio.run(ingestion.delete_document(document_id))
+
+    assert result["status"] == "success"
+    assert ingestion.vector_store.list_documents() == []
+    assert asyncio.run(ingestion.delete_document(document_id))["status"] == "not_found"
+
+
+def test_failed_snapshot_publish_keeps_the_ingest(ingestion, tmp_path, monkeypatch):
+    store = ingestion.vector_store
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "publish_snapshot", fail)
+    path = _write(tmp_path, "ppf.txt", "The Public Provident Fund has a fifteen year lock in. " * 10)
+
+    result = ingestion.ingest_file(str(path), "txt")
+
+    assert result["status"] == "success" and result["chunks_ingested"] > 0
+    # Search falls back to the collection until the next publish
+    results = store.similarity_search("Public Provident Fund lock in", k=1)
+    assert results[0][0].document_id == result["document_id"]
@@ -0,0 +1,78 @@
+import numpy as np
+
+from rag.ivf import IVFIndex
+
+
+def _records(ids, region="india"):
+    return [f"text of {i}" for i in ids], [{"document_id": i.split("_")[0], "region": region} for i in ids]
+
+
+def _add(index, ids, vectors, **kwargs):
+    documents, metadatas = _records(ids)
+    index.add(ids, vectors, documents, metadatas, **kwargs)
+
+
+def test_rebalance_reconciles_writes_made_while_training(tmp_path):
+    rng = np.random.default_rng(0)
+    index = IVFIndex(tmp_path / "ivf", nlist=8, nprobe=8, filter_keys=("region",), min_list_size=4)
+    ids = [f"d{i // 10}_c{i}" for i in range(60)]
+    vectors = rng.normal(size=(60, 16)).astype(np.float32)
+    _add(index, ids, vectors)
+
+    rebuild = index.prepare_rebalance()
+    # Writes that land between training and the switch
+    late = rng.normal(size=(3, 16)).astype(np.float32)
+    _add(index, ["d9_c100", "d9_c101", ids[1]], late)  # ids[1] is re-added with a new vector
+    index.delete([ids[0], ids[2]])
+
+    assert index.commit_rebalance(rebuild) is not None
+    assert len(index) == 60 + 2 - 2
+    found = index.get(ids[:3] + ["d9_c100", "d9_c101"])
+    assert sorted(found) == sorted([ids[1], "d9_c100", "d9_c101"])
+    list_id, row, score = index.search(late[2], 1)[0]
+    assert index.chunk_id(list_id, row) == ids[1] and score > 0.99
+
+
+def test_stale_rebuild_is_discarded(tmp_path):
+    rng = np.random.default_rng(1)
+    index = IVFIndex(tmp_path / "ivf", nlist=4, min_list_size=4)
+    _add(index, [f"d0_c{i}" for i in range(20)], rng.normal(size=(20, 8)))
+    first = index.prepare_rebalance()
+    published = index.rebalance()
+    assert index.commit_rebalance(first) is None
+    assert index.version == published
+    assert not list((tmp_path / "ivf").glob(".staging-*"))
+
+
+def test_assignment_computed_before_a_rebalance_is_recomputed(tmp_path):
+    rng = np.random.default_rng(2)
+    index = IVFIndex(tmp_path / "ivf", nlist=4, min_list_size=4)
+    _add(index, [f"d0_c{i}" for i in range(20)], rng.normal(size=(20, 8)))
+    vector = rng.normal(size=(1, 8))
+    assignment = index.assign(vector)
+    index.rebalance()
+    _add(index, ["d1_c0"], vector, assignment=assignment)
+    list_id, row, score = index.search(vector[0], 1)[0]
+    assert index.chunk_id(list_id, row) == "d1_c0"
+
+
+def test_vector_store_on_ivf_rebalances_outside_the_lock(isolated_settings, embedder, monkeypatch):
+    from rag.vector_store import VectorStore
+    from tests.conftest import make_chunks
+
+    monkeypatch.setattr(isolated_settings, "VECTOR_INDEX", "ivf")
+    monkeypatch.setattr(isolated_settings, "IVF_MIN_LIST_SIZE", 2)
+    monkeypatch.setattr(isolated_settings, "DEDUP_MODE", "off")
+    store = VectorStore("ivf_collection")
+    depth_at_training = []
+    prepare = store.ivf.prepare_rebalance
+    monkeypatch.setattr(store.ivf, "prepare_rebalance", lambda *a: depth_at_training.append(store.storage._depth) or prepare(*a))
+
+    topics = ["tax saving", "home loan", "credit score", "gold bonds", "term insurance", "fixed deposit"]
+    for n, topic in enumerate(topics):
+        store.add_documents(make_chunks(f"doc{n}", [f"{topic} guide part {i}" for i in range(4)]))
+    assert store.ivf.stats()["lists"] > 1
+    assert depth_at_training and set(depth_at_training) == {0}
+    assert store.similarity_search("credit score guide", k=1)[0][0].document_id == "doc2"
+    assert store.delete_documents(["doc2"]) == 1
+    assert all(chunk.document_id != "doc2" for chunk, _ in store.similarity_search("credit score guide", k=4))
@@ -0,0 +1,38 @@
+import asyncio
+
+from app.services.language_id import ENGLISH, detect_language, identify_language
+
+
+def test_native_scripts_and_romanized_messages():
+    assert identify_language("ಹಣ ಉಳಿತಾಯ ಹೇಗೆ").language == "kannada"
+    assert identify_language("पैसे कैसे बचाएं").script == "native"
+    assert detect_language("paisa kaise bachaye") == "hindi"
+    assert detect_language("how do i save money every month") == ENGLISH
+
+
+def test_low_confidence_guesses_fall_back():
+    guess = identify_language("PPF?")
+    assert guess.confidence < 0.7
+    assert detect_language("PPF?", min_confidence=0.7) == ENGLISH
+    assert detect_language("PPF?", min_confidence=0.7, default="hindi") == "hindi"
+    assert detect_language("panam semippu eppadi", min_confidence=0.7) == "tamil"
+
+
+def test_chat_serves_short_messages_in_english(retrieval_core, monkeypatch):
+    from app.api.v1.endpoints import chat
+
+    languages = []
+
+    async def generate_response(query, chat_history, language, user_id):
+        languages.append(language)
+        return {"response": "ok", "sources": []}
+
+    class Client:
+        async def is_disconnected(self):
+            return False
+
+    monkeypatch.setattr(chat.rag_service, "generate_response", generate_response)
+    for message, requested in (("PPF?", None), ("SIP", None), ("PPF?", "telugu"), ("emi kya hai", None)):
+        request = chat.ChatRequest(message=message, language=requested)
+        assert asyncio.run(chat.chat(request, Client())).language == languages[-1]
+    assert languages == [ENGLISH, ENGLISH, "telugu", "hindi"]
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from telemetry.http import instrument_app
+from telemetry.metrics import MetricsRegistry, STAGE_ERRORS, STAGE_LATENCY, stage_timer
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("test_seconds", "Test latency", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, stage="a")
+    text = registry.render()
+    assert '# TYPE test_seconds histogram' in text
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="a",le="1"} 2' in text
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'test_seconds_count{stage="a"} 3' in text
+    with pytest.raises(ValueError):
+        registry.counter("test_seconds", "Same name, other kind")
+
+
+def test_stage_timer_times_sync_and_async_stages_and_counts_errors():
+    before = STAGE_LATENCY.count(stage="test.sync"), STAGE_LATENCY.count(stage="test.async")
+
+    @stage_timer("test.sync")
+    def sync_stage():
+        raise RuntimeError("boom")
+
+    @stage_timer("test.async")
+    async def async_stage():
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        sync_stage()
+    assert asyncio.run(async_stage()) == "ok"
+    assert STAGE_LATENCY.count(stage="test.sync") == before[0] + 1
+    assert STAGE_LATENCY.count(stage="test.async") == before[1] + 1
+    assert STAGE_ERRORS.value(stage="test.sync") >= 1
+
+
+def test_metrics_endpoint_labels_requests_by_route():
+    import httpx
+    from fastapi import FastAPI
+
+    app = FastAPI()
+
+    @app.get("/documents/{document_id}")
+    async def document(document_id: str):
+        return {"id": document_id}
+
+    instrument_app(app)
+
+    async def scrape():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            await client.get("/documents/doc_123")
+            return await client.get("/metrics")
+
+    response = asyncio.run(scrape())
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",path="/documents/{document_id}",status="200"}' in response.text
+    assert "doc_123" not in response.text
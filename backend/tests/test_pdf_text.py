@@ -0,0 +1,75 @@
+from rag import pdf_text
+from rag.pdf_text import PageTextCache, PdfTextExtractor, file_sha256
+
+
+def write_pdf(path, pages):
+    """A minimal PDF with one line of Helvetica text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    path.write_bytes(bytes(out))
+    return path
+
+
+PAGES = ["Emergency fund basics", "Recurring deposits explained", "Gold bonds and taxes"]
+
+
+def test_pages_are_extracted_in_order_and_cached(tmp_path, monkeypatch):
+    pdf = write_pdf(tmp_path / "guide.pdf", PAGES)
+    cache = PageTextCache(tmp_path / "cache.sqlite3")
+    extractor = PdfTextExtractor(workers=1, pages_per_task=2, cache=cache)
+    events = []
+
+    first = extractor.extract(pdf, progress=lambda **kw: events.append(kw))
+    assert [text.strip() for text in first.pages] == PAGES
+    assert (first.parsed_pages, first.cached_pages) == (3, 0)
+    assert events[-1] == {"pages_parsed": 3, "total_pages": 3}
+
+    monkeypatch.setattr(pdf_text, "_extract_pages", lambda *a: (_ for _ in ()).throw(AssertionError("parsed")))
+    again = extractor.extract(pdf)
+    assert again.pages == first.pages and (again.parsed_pages, again.cached_pages) == (0, 3)
+    assert again.report()["pages_per_sec"] is None
+    assert cache.stats() == {"files": 1, "pages": 3}
+
+
+def test_interrupted_extraction_resumes_from_cached_pages(tmp_path, monkeypatch):
+    pdf = write_pdf(tmp_path / "guide.pdf", PAGES)
+    cache = PageTextCache(tmp_path / "cache.sqlite3")
+    cache.put(file_sha256(pdf), 3, [(0, "cached page")])
+    parsed = []
+    original = pdf_text._extract_pages
+    monkeypatch.setattr(pdf_text, "_extract_pages", lambda path, pages: parsed.extend(pages) or original(path, pages))
+
+    extraction = PdfTextExtractor(workers=1, cache=cache).extract(pdf)
+    assert parsed == [1, 2] and extraction.pages[0] == "cached page"
+    # Another extractor version does not reuse the cache
+    assert PageTextCache(tmp_path / "cache.sqlite3", extractor="other/1").get(file_sha256(pdf)) == {}
+
+
+def test_parallel_extraction_matches_serial(tmp_path):
+    pdf = write_pdf(tmp_path / "guide.pdf", PAGES * 2)
+    extractor = PdfTextExtractor(workers=2, pages_per_task=2)
+    try:
+        extraction = extractor.extract(pdf)
+    finally:
+        extractor.shutdown()
+    assert extraction.workers == 2
+    assert extraction.pages == PdfTextExtractor(workers=1).extract(pdf).pages
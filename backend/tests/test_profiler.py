@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+
+from telemetry.profiler import ProfilingMiddleware, SlowRequestProfiler, run_in_threadpool
+
+
+def background_indexing(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def slow_request_work(seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        sum(range(1000))
+
+
+def _stacks(profiler, name):
+    return (profiler.capture_dir / f"{name}.collapsed").read_text(encoding="utf-8")
+
+
+def test_only_the_request_threads_are_sampled(tmp_path):
+    profiler = SlowRequestProfiler(str(tmp_path), enabled=True, slo_ms=50, interval_ms=2)
+    stop = threading.Event()
+    worker = threading.Thread(target=background_indexing, args=(stop,), name="ingest-0")
+    worker.start()
+    try:
+        window = profiler.request_started()
+        slow_request_work(0.2)
+        name = profiler.request_finished(window, {"path": "/ask"})
+    finally:
+        stop.set()
+        worker.join()
+        profiler.disable()
+
+    stacks = _stacks(profiler, name)
+    assert "slow_request_work" in stacks
+    assert "background_indexing" not in stacks and "ingest-0" not in stacks
+
+
+def test_fast_requests_write_nothing(tmp_path):
+    profiler = SlowRequestProfiler(str(tmp_path), enabled=True, slo_ms=10000)
+    assert profiler.request_finished(profiler.request_started(), {"path": "/"}) is None
+    profiler.disable()
+    assert profiler.list_captures() == []
+
+
+def test_thread_pool_work_is_attributed_to_its_request(tmp_path):
+    profiler = SlowRequestProfiler(str(tmp_path), enabled=True, slo_ms=50, interval_ms=2)
+
+    async def app(scope, receive, send):
+        await run_in_threadpool(slow_request_work, 0.2)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    async def main():
+        stop = threading.Event()
+        # Another thread-pool job that no profiled request handed off
+        unrelated = asyncio.ensure_future(asyncio.to_thread(background_indexing, stop))
+        try:
+            await ProfilingMiddleware(app, profiler)({"type": "http", "method": "GET", "path": "/ask"}, None, send)
+        finally:
+            stop.set()
+            await unrelated
+
+    asyncio.run(main())
+    profiler.disable()
+    captures = profiler.list_captures()
+    assert len(captures) == 1 and captures[0]["status"] == 200
+    stacks = _stacks(profiler, captures[0]["name"])
+    assert "slow_request_work" in stacks and "background_indexing" not in stacks
@@ -0,0 +1,76 @@
+import csv
+import random
+
+import numpy as np
+import pytest
+
+from providers import ProviderIndex
+from providers.index import _haversine_km
+
+CATEGORIES = ["Tax Preparation", "Credit Counseling", "Bill Pay and Money Management"]
+COLUMNS = [
+    "ORGANIZATION", "FULL_ADDRESS", "PHONE", "WEBSITE", "EMAIL", "ZIPCODE", "MAR_ZIPCODE",
+    "MAR_LATITUDE", "MAR_LONGITUDE", "CATEGORIES_OF_SERVICE", "ADDITIONAL_SERVICES_MAYINCLUDE",
+    "SERVICE_AVAILABLE_TO",
+]
+
+
+@pytest.fixture
+def providers_csv(tmp_path):
+    rng = random.Random(3)
+    path = tmp_path / "providers.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        for i in range(300):
+            writer.writerow({
+                "ORGANIZATION": f"Provider {i}",
+                "ZIPCODE": f"200{i % 10:02d}",
+                "MAR_LATITUDE": f"{38.8 + rng.uniform(-0.5, 0.5):.6f}",
+                "MAR_LONGITUDE": f"{-77.0 + rng.uniform(-0.5, 0.5):.6f}",
+                "CATEGORIES_OF_SERVICE": ", ".join(rng.sample(CATEGORIES, rng.randint(1, 2))),
+                "ADDITIONAL_SERVICES_MAYINCLUDE": "Services may include: Budgeting" if i % 3 == 0 else "",
+            })
+        writer.writerow({"ORGANIZATION": "Nowhere", "MAR_LATITUDE": "", "MAR_LONGITUDE": ""})
+    return path
+
+
+def _brute_force(index, lat, lon, limit, mask=None):
+    distances = _haversine_km(lat, lon, index.latitudes, index.longitudes)
+    if mask is not None:
+        distances = np.where((index.category_masks & mask).any(axis=1), distances, np.inf)
+    order = np.argsort(distances, kind="stable")[:limit]
+    return [str(index.fields["organization"][i]) for i in order if np.isfinite(distances[i])]
+
+
+def test_grid_search_matches_brute_force(providers_csv):
+    index = ProviderIndex.from_csv(providers_csv, cell_degrees=0.05)
+    assert len(index) == 300 and "Budgeting" in index.category_names
+
+    for lat, lon in [(38.8, -77.0), (39.25, -76.55), (40.5, -75.0)]:
+        assert [m.organization for m in index.nearest(lat, lon, limit=7)] == _brute_force(index, lat, lon, 7)
+        mask = index.category_mask(["credit counseling"])
+        matches = index.nearest(lat, lon, categories=["credit counseling"], limit=4)
+        assert [m.organization for m in matches] == _brute_force(index, lat, lon, 4, mask)
+        assert all("Credit Counseling" in m.categories for m in matches)
+
+
+def test_radius_zip_and_unknown_category_queries(providers_csv):
+    index = ProviderIndex.from_csv(providers_csv)
+    nearby = index.nearest(38.8, -77.0, limit=300, max_distance_km=5)
+    assert nearby and all(m.distance_km <= 5 for m in nearby)
+    assert index.nearest(38.8, -77.0, categories=["astrology"]) == []
+    assert len(index.nearest(zipcode="20003", limit=3)) == 3
+    assert index.nearest(zipcode="99999") == []
+    with pytest.raises(ValueError):
+        index.nearest()
+
+
+def test_saved_index_is_reused_until_the_csv_changes(providers_csv, tmp_path):
+    index_path = tmp_path / "providers.npz"
+    built = ProviderIndex.load_or_build(providers_csv, index_path)
+    loaded = ProviderIndex.load(index_path)
+    assert loaded.category_names == built.category_names
+    assert [m.to_dict() for m in loaded.nearest(38.8, -77.0)] == [m.to_dict() for m in built.nearest(38.8, -77.0)]
+    # A different grid size forces a rebuild
+    assert ProviderIndex.load_or_build(providers_csv, index_path, cell_degrees=0.2).cell_degrees == 0.2
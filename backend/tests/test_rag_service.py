@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from serving import DeadlineExceeded
+
+
+@pytest.fixture
+def rag(retrieval_core):
+    from app.services.rag_service import RAGService
+    service = RAGService()
+    service.library = None
+    return service
+
+
+def test_retrieval_runs_off_the_event_loop_under_its_deadline(rag, monkeypatch):
+    monkeypatch.setitem(settings.STAGE_DEADLINES_S, "retrieve", 0.1)
+    monkeypatch.setattr(rag, "retrieve_relevant_context", lambda query, top_k=2: time.sleep(1.0) or [])
+    ticks = []
+
+    async def heartbeat():
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    async def main():
+        beat = asyncio.ensure_future(heartbeat())
+        start = time.monotonic()
+        try:
+            with pytest.raises(DeadlineExceeded):
+                await rag._answer("what is a ppf", "what is a ppf", "english", [], "")
+            return time.monotonic() - start
+        finally:
+            beat.cancel()
+
+    elapsed = asyncio.run(main())
+    assert elapsed < 0.5
+    # The loop kept serving other coroutines while retrieval was blocked
+    assert len(ticks) >= 5
+
@@ -0,0 +1,35 @@
+from rag.retrieval_cache import RetrievalCache
+from rag.storage import _write_generation, read_generation
+from tests.conftest import make_chunks
+
+
+def test_key_ignores_case_whitespace_and_filter_order():
+    a = RetrievalCache.make_key("What is  SIP?", {"region": "india", "age_group": {"$in": ["b", "a"]}}, 5, None, (1, None))
+    b = RetrievalCache.make_key("what is sip?", {"age_group": {"$in": ["a", "b"]}, "region": "india"}, 5, None, (1, None))
+    assert a == b
+    assert a != RetrievalCache.make_key("what is sip?", None, 5, None, (2, None))
+
+
+def test_lru_evicts_oldest_entry():
+    cache = RetrievalCache(max_entries=2)
+    for i in range(3):
+        cache.put(("q", i), [(f"chunk_{i}", 0.5)])
+    assert cache.get(("q", 0)) is None
+    assert cache.get(("q", 2)) == (("chunk_2", 0.5),)
+
+
+def test_corpus_version_changes_on_local_write(vector_store):
+    before = vector_store.corpus_version
+    vector_store.add_documents(make_chunks("doc_a", ["emergency fund basics"]))
+    assert vector_store.corpus_version != before
+
+
+def test_corpus_version_follows_writes_from_other_processes(vector_store):
+    vector_store.add_documents(make_chunks("doc_a", ["emergency fund basics"]))
+    before = vector_store.corpus_version
+    # Another worker or the ingestion process publishes a new generation
+    path = vector_store.storage.path
+    _write_generation(path, read_generation(path) + 1)
+    after = vector_store.corpus_version
+    assert after != before
+    assert after[0] == read_generation(path)
@@ -0,0 +1,43 @@
+import pytest
+
+from retrieval import get_retrieval_core
+from retrieval.migrate import migrate_collection
+from retrieval.models import canonical_model_name
+from tests.conftest import hash_vector, make_chunks
+
+
+def test_model_names_resolve_to_one_spelling():
+    assert canonical_model_name(" all-MiniLM-L6-v2 ") == "sentence-transformers/all-MiniLM-L6-v2"
+    assert canonical_model_name("BAAI/bge-small-en-v1.5") == "BAAI/bge-small-en-v1.5"
+
+
+def test_both_apps_share_one_store(retrieval_core, ingestion):
+    from app.services.vector_store import VectorStore as ChatVectorStore
+
+    assert get_retrieval_core() is retrieval_core
+    assert ingestion.vector_store is retrieval_core.vector_store
+    chat_store = ChatVectorStore()
+    chat_store.add_documents([{"id": "faq_1", "text": "A SIP invests a fixed amount every month.", "metadata": {}}])
+
+    results = retrieval_core.vector_store.similarity_search("SIP fixed amount every month", k=1)
+    assert [chunk.chunk_id for chunk, _ in results] == ["faq_1"]
+    assert chat_store.search("SIP fixed amount every month", k=1)[0]["id"] == "faq_1"
+    assert retrieval_core.stats()["documents"] == 1
+
+
+def test_legacy_collection_is_merged_once(retrieval_core):
+    target = retrieval_core.vector_store
+    legacy = target.storage.client.create_collection(
+        "financial_literacy", metadata={"embedding_model": target.embedding_model}
+    )
+    texts = ["Keep six months of expenses as an emergency fund.", "PPF has a fifteen year lock in."]
+    legacy.add(ids=["old_1", "old_2"], documents=texts, embeddings=[hash_vector(t).tolist() for t in texts])
+    target.add_documents(make_chunks("new", ["Gold bonds pay interest twice a year."]))
+
+    report = migrate_collection(target=target, batch_size=1)
+    assert (report["read"], report["copied"], report["reembedded"]) == (2, 2, False)
+    assert sorted(chunk.chunk_id for chunk in target.get_chunks(["old_1", "old_2"])) == ["old_1", "old_2"]
+    assert migrate_collection(target=target)["already_present"] == 2
+
+    with pytest.raises(ValueError):
+        migrate_collection(target.collection_name, target=target)
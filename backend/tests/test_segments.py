@@ -0,0 +1,65 @@
+import pytest
+
+from rag.segments import ALL_SEGMENTS, segment_for_filter, segments_for_metadata, to_chroma_where
+from tests.conftest import make_chunks
+
+AGENT_FILTER = {"age_group": {"$in": ["21-28", "all"]}, "region": {"$in": ["india", "all"]}}
+
+
+def test_agent_filters_map_onto_segments():
+    assert segment_for_filter(AGENT_FILTER) == ("21-28", "india")
+    assert segment_for_filter(to_chroma_where(AGENT_FILTER)) == ("21-28", "india")
+    assert segment_for_filter({"age_group": {"$in": ["21-28", "all"]}}) is None
+    assert segment_for_filter({"age_group": "21-28", "region": "india"}) is None
+    assert segment_for_filter(None) is None
+
+
+def test_shared_chunks_join_every_matching_segment():
+    assert segments_for_metadata({"age_group": "all", "region": "all"}) == list(ALL_SEGMENTS)
+    assert segments_for_metadata({"age_group": "15-20", "region": "all"}) == [("15-20", "india"), ("15-20", "international")]
+    assert segments_for_metadata({"age_group": "15-20", "region": "india"}) == [("15-20", "india")]
+    assert segments_for_metadata({}) == []
+
+
+@pytest.fixture
+def chroma_store(isolated_settings, embedder, monkeypatch):
+    # Search through Chroma rather than the snapshot to exercise the partitions
+    monkeypatch.setattr(isolated_settings, "SNAPSHOT_ENABLED", False)
+    from rag.vector_store import VectorStore
+    store = VectorStore("segmented")
+    store.add_documents(make_chunks("doc_young", ["first salary budgeting plan"], age_group="21-28", region="india"))
+    store.add_documents(make_chunks("doc_teen", ["pocket money budgeting plan"], age_group="15-20", region="india"))
+    store.add_documents(make_chunks("doc_shared", ["budgeting plan for everyone"], age_group="all", region="all"))
+    store.add_documents(make_chunks("doc_abroad", ["budgeting plan abroad"], age_group="21-28", region="international"))
+    return store
+
+
+def _ids(results):
+    return sorted(chunk.document_id for chunk, _ in results)
+
+
+def test_segment_search_matches_the_filtered_search(chroma_store, monkeypatch):
+    queried = []
+    original = chroma_store.partitions.query
+    monkeypatch.setattr(chroma_store.partitions, "query", lambda segment, *a, **kw: queried.append(segment) or original(segment, *a, **kw))
+
+    results = chroma_store.similarity_search("budgeting plan", k=10, filter_metadata=AGENT_FILTER)
+    assert queried == [("21-28", "india")]
+    assert _ids(results) == ["doc_shared", "doc_young"]
+
+    # Filters that aren't a full segment fall back to a filtered query
+    region_only = {"region": {"$in": ["india", "all"]}}
+    assert _ids(chroma_store.similarity_search("budgeting plan", k=10, filter_metadata=region_only)) == [
+        "doc_shared", "doc_teen", "doc_young"
+    ]
+    assert queried == [("21-28", "india")]
+
+
+def test_deletes_and_rebuilds_keep_partitions_in_sync(chroma_store):
+    chroma_store.delete_documents(["doc_shared"])
+    assert _ids(chroma_store.similarity_search("budgeting plan", k=10, filter_metadata=AGENT_FILTER)) == ["doc_young"]
+    assert all("doc_shared_chunk_0" not in c.get()["ids"] for c in chroma_store.partitions.collections.values())
+
+    assert chroma_store.rebuild_partitions() == 3
+    counts = {segment: c.count() for segment, c in chroma_store.partitions.collections.items()}
+    assert counts[("21-28", "india")] == 1 and counts[("15-20", "international")] == 0
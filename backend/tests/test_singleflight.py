@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from serving.singleflight import SingleFlight, normalize_question, question_key
+
+
+def test_question_key_normalizes_and_freezes_fields():
+    assert normalize_question("  What is  PPF?? ") == "what is ppf"
+    assert question_key("What is PPF?", {"b": [1], "a": 2}) == question_key("what is ppf", {"a": 2, "b": [1]})
+
+
+def test_concurrent_identical_calls_run_once():
+    flight = SingleFlight("test")
+    runs = 0
+
+    async def work():
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["answer"] * 5
+    assert runs == 1 and flight.coalesced == 4 and flight.stats()["inflight"] == 0
+
+
+def test_caller_arriving_while_abandoned_call_unwinds_starts_afresh():
+    flight = SingleFlight("test")
+
+    async def slow_to_cancel():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            # Cleanup that yields, leaving the task cancelling but not done
+            await asyncio.sleep(0.05)
+            raise
+
+    async def fresh():
+        return "fresh"
+
+    async def main():
+        waiter = asyncio.ensure_future(flight.do("k", slow_to_cancel))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        # The abandoned task is still unwinding; a new caller must not join it
+        return await flight.do("k", fresh)
+
+    assert asyncio.run(main()) == "fresh"
@@ -0,0 +1,167 @@
+import threading
+
+import numpy as np
+import pytest
+
+from rag.snapshot import (
+    EmbeddingSnapshot, SnapshotReader, append_snapshot, current_generation, current_version, write_snapshot
+)
+from tests.conftest import hash_vector, make_chunks
+
+
+def _corpus(n, dimensions=16, seed=0, prefix="d"):
+    rng = np.random.default_rng(seed)
+    ids = [f"{prefix}{i // 4}_chunk_{i}" for i in range(n)]
+    metadatas = [{"document_id": i.split("_")[0], "region": "india" if n % 2 else "all"} for n, i in enumerate(ids)]
+    return ids, rng.normal(size=(n, dimensions)).astype(np.float32), [f"text {i}" for i in ids], metadatas
+
+
+def _open(root):
+    return EmbeddingSnapshot(root / current_version(root))
+
+
+def _exact(ids, vectors, query, k):
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    order = np.argsort(-(vectors @ (query / np.linalg.norm(query))))[:k]
+    return [ids[i] for i in order]
+
+
+@pytest.mark.parametrize("dtype", ["float32", "int8"])
+def test_search_matches_exact_cosine(tmp_path, dtype):
+    ids, vectors, documents, metadatas = _corpus(40)
+    write_snapshot(tmp_path, ids, vectors, documents, metadatas, dtype=dtype, filter_keys=("region",), group_by="document")
+    snapshot = _open(tmp_path)
+    query = vectors[7] + 0.1
+    found = [snapshot.chunk_id(row) for row, _ in snapshot.search(query, 5)]
+    assert found[:3] == _exact(ids, vectors, query, 3)
+    assert snapshot.record(snapshot.search(vectors[3], 1)[0][0])["document"] == "text d0_chunk_3"
+    filtered = snapshot.search(query, 40, {"region": "india"})
+    assert {snapshot.record(row)["metadata"]["region"] for row, _ in filtered} == {"india"}
+
+
+def test_append_tombstones_and_adds_rows(tmp_path):
+    ids, vectors, documents, metadatas = _corpus(20)
+    write_snapshot(tmp_path, ids, vectors, documents, metadatas, generation=1, filter_keys=("region",))
+    new_ids, new_vectors, new_documents, new_metadatas = _corpus(4, seed=1, prefix="n")
+    # d0 is deleted; d1_chunk_4 is re-added with a new vector
+    new_ids.append(ids[4])
+    new_vectors = np.vstack([new_vectors, vectors[10]])
+    new_documents.append("replaced")
+    new_metadatas.append(metadatas[4])
+
+    append_snapshot(
+        tmp_path, current_version(tmp_path), new_ids, new_vectors, new_documents, new_metadatas,
+        removed_ids=ids[:4], generation=2, filter_keys=("region",)
+    )
+    snapshot = _open(tmp_path)
+    assert snapshot.generation == 2 == current_generation(tmp_path)
+    assert snapshot.manifest["count"] == 20 - 4 - 1 + 5
+    live = [snapshot.chunk_id(row) for row in snapshot.filter_rows(None)]
+    assert sorted(live) == sorted(ids[5:] + new_ids)
+    for row, _ in snapshot.search(vectors[0], 30):
+        assert snapshot.chunk_id(row) not in ids[:4]
+    top = [snapshot.record(row)["document"] for row, _ in snapshot.search(vectors[10], 2)]
+    assert sorted(top) == sorted(["replaced", documents[10]])
+
+
+def test_small_appends_are_merged_and_deletes_compacted(tmp_path):
+    ids, vectors, documents, metadatas = _corpus(64)
+    write_snapshot(tmp_path, ids, vectors, documents, metadatas, generation=1)
+    added = []
+    for generation in range(2, 12):
+        new = _corpus(2, seed=generation, prefix=f"g{generation}_")
+        added.extend(new[0])
+        append_snapshot(tmp_path, current_version(tmp_path), *new, generation=generation)
+    snapshot = _open(tmp_path)
+    assert len(snapshot.segments) <= 4
+    assert sorted(snapshot.chunk_id(r) for r in range(snapshot.count)) == sorted(ids + added)
+
+    append_snapshot(tmp_path, current_version(tmp_path), [], np.zeros((0, 16)), [], [], removed_ids=ids[:30], generation=12)
+    snapshot = _open(tmp_path)
+    assert len(snapshot.segments) == 1 and not any(len(d) for d in snapshot.deleted)
+    assert snapshot.count == 64 - 30 + len(added)
+    # Only segments of the two kept versions remain on disk
+    kept = sorted(p for p in tmp_path.iterdir() if p.name.startswith("v"))
+    referenced = {s.directory.name for version in kept for s in EmbeddingSnapshot(version).segments}
+    assert {p.name for p in (tmp_path / "segments").iterdir()} == referenced
+
+
+def test_int8_rows_survive_merges_unchanged(tmp_path):
+    ids, vectors, documents, metadatas = _corpus(8)
+    write_snapshot(tmp_path, ids[:4], vectors[:4], documents[:4], metadatas[:4], dtype="int8")
+    before = np.asarray(_open(tmp_path).segments[0].embeddings).copy()
+    append_snapshot(tmp_path, current_version(tmp_path), ids[4:], vectors[4:], documents[4:], metadatas[4:], dtype="int8", generation=1)
+    snapshot = _open(tmp_path)
+    assert len(snapshot.segments) == 1
+    rows = {snapshot.chunk_id(r): r for r in range(snapshot.count)}
+    merged = np.asarray(snapshot.segments[0].embeddings)
+    assert all((merged[rows[ids[i]]] == before[i]).all() for i in range(4))
+
+
+def test_current_never_moves_to_an_older_generation(tmp_path):
+    ids, vectors, documents, metadatas = _corpus(8)
+    newer = write_snapshot(tmp_path, ids, vectors, documents, metadatas, generation=5)
+    assert write_snapshot(tmp_path, ids[:2], vectors[:2], documents[:2], metadatas[:2], generation=3) == newer
+    assert current_version(tmp_path) == newer and _open(tmp_path).count == 8
+
+
+def test_format_1_versions_are_still_readable(tmp_path):
+    import json
+    ids, vectors, documents, metadatas = _corpus(8)
+    write_snapshot(tmp_path, ids, vectors, documents, metadatas)
+    segment = _open(tmp_path).segments[0].directory
+    (tmp_path / "CURRENT").write_text(segment.name)
+    legacy = tmp_path / segment.name
+    segment.rename(legacy)
+    snapshot = EmbeddingSnapshot(legacy)
+    assert snapshot.generation is None and snapshot.count == 8
+    assert snapshot.chunk_id(snapshot.search(vectors[2], 1)[0][0]) == ids[2]
+
+
+def test_vector_store_publishes_deltas(vector_store):
+    vector_store.add_documents(make_chunks("doc_a", [f"savings topic number {i}" for i in range(10)]))
+    vector_store.add_documents(make_chunks("doc_c", ["tax saving under section 80c"]))
+    vector_store.publish_snapshot()
+    vector_store.add_documents(make_chunks("doc_b", ["credit card interest free period"]))
+    vector_store.delete_documents(["doc_c"])
+    vector_store.publish_snapshot()
+
+    # The second publish appended one segment and tombstoned one row of the first
+    snapshot = vector_store.snapshots.get()
+    assert snapshot.generation == vector_store.storage.generation
+    assert [s.count for s in snapshot.segments] == [11, 1] and len(snapshot.deleted[0]) == 1
+    ids = [snapshot.chunk_id(row) for row, _ in snapshot.search(np.asarray(hash_vector("tax credit card")), 20)]
+    assert "doc_b_chunk_0" in ids and "doc_c_chunk_0" not in ids
+
+
+def test_publish_after_another_process_wrote_exports_everything(vector_store):
+    from rag.storage import _write_generation, read_generation
+    vector_store.add_documents(make_chunks("doc_a", ["recurring deposit basics"]))
+    vector_store.publish_snapshot()
+    vector_store.add_documents(make_chunks("doc_b", ["health insurance waiting period"]))
+    # A write from another process lands between ours and the publish
+    path = vector_store.storage.path
+    _write_generation(path, read_generation(path) + 1)
+    vector_store.publish_snapshot()
+    snapshot = vector_store.snapshots.get()
+    assert len(snapshot.segments) == 1 and snapshot.count == 2
+    assert snapshot.generation == read_generation(path)
+
+
+def test_concurrent_publishes_leave_the_newest_generation_current(vector_store):
+    vector_store.add_documents(make_chunks("doc_a", ["nominee rules for bank accounts"]))
+    errors = []
+
+    def publish():
+        try:
+            vector_store.publish_snapshot()
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=publish) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert current_generation(vector_store.snapshots.root) == vector_store.storage.generation
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+from rag.storage import ChromaStorage, _write_generation, read_generation
+from tests.conftest import make_chunks
+
+
+def test_write_bumps_generation_only_when_dirty(tmp_path):
+    storage = ChromaStorage(tmp_path / "db", refresh_interval_s=0)
+    with storage.write():
+        pass
+    assert read_generation(storage.path) == 0
+    with storage.write():
+        with storage.write():
+            storage.mark_dirty()
+    assert read_generation(storage.path) == 1 == storage.generation
+
+
+def test_refresh_reopens_while_reads_are_in_flight(tmp_path):
+    storage = ChromaStorage(tmp_path / "db", refresh_interval_s=0)
+    _write_generation(storage.path, 5)
+    in_read = threading.Event()
+    release = threading.Event()
+    seen = []
+
+    def reader():
+        with storage.reading() as client:
+            in_read.set()
+            release.wait(5)
+            # The client a read started with is never swapped out under it
+            seen.append(client is storage.client)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    in_read.wait(5)
+    refresher = threading.Thread(target=storage.refresh)
+    refresher.start()
+    time.sleep(0.1)
+    assert storage.generation == 0  # waiting for the read to drain
+    release.set()
+    thread.join(5)
+    refresher.join(5)
+    assert seen == [True]
+    assert storage.generation == 5
+    with storage.reading() as client:
+        assert client is storage.client
+
+
+def test_refresh_inside_a_read_does_not_deadlock(tmp_path):
+    storage = ChromaStorage(tmp_path / "db", refresh_interval_s=0)
+    _write_generation(storage.path, 3)
+    with storage.reading():
+        assert storage.refresh() is False
+    assert storage.refresh() is True
+
+
+def test_refresh_leaves_other_paths_open(tmp_path):
+    storage = ChromaStorage(tmp_path / "db", refresh_interval_s=0)
+    other = ChromaStorage(tmp_path / "source", refresh_interval_s=0)
+    collection = other.client.get_or_create_collection("legacy")
+    collection.add(ids=["a"], documents=["kept"], embeddings=[[1.0, 0.0]])
+
+    _write_generation(storage.path, 2)
+    assert storage.refresh() is True
+    # The other path's cached system survives: a new client there shares it instead of
+    # opening a second system over the same files
+    assert other._open()._server is other.client._server
+    assert collection.get(ids=["a"])["documents"] == ["kept"]
+    assert storage.client._server is not other.client._server
+
+
+def test_startup_does_not_wait_for_a_writer(vector_store, isolated_settings):
+    from rag.vector_store import VectorStore
+
+    vector_store.add_documents(make_chunks("doc_a", ["index funds for beginners"]))
+    storage = vector_store.storage
+    storage.lock_timeout_s = 0.2
+    held = threading.Event()
+    done = threading.Event()
+
+    def long_ingest():
+        with storage.write():
+            held.set()
+            done.wait(5)
+
+    thread = threading.Thread(target=long_ingest)
+    thread.start()
+    held.wait(5)
+    try:
+        # Another worker booting while the ingest holds the lock
+        started = time.monotonic()
+        other = VectorStore("test_collection")
+        assert time.monotonic() - started < 1.0
+        assert other.get_chunks(["doc_a_chunk_0"])[0].content == "index funds for beginners"
+    finally:
+        done.set()
+        thread.join(5)
+
+
+def test_embedding_runs_outside_the_writer_lock(vector_store, embedder, monkeypatch):
+    storage = vector_store.storage
+    locked_while_embedding = []
+    original = embedder.__call__
+
+    def embed(texts):
+        locked_while_embedding.append(storage._depth > 0)
+        return original(texts)
+
+    monkeypatch.setattr(vector_store, "embedding_function", embed)
+    prepared = vector_store.prepare_documents(
+        make_chunks("doc_a", ["one two three", "four five six", "seven eight nine"]), batch_size=2
+    )
+    assert vector_store.commit_documents(prepared) == [f"doc_a_chunk_{i}" for i in range(3)]
+    assert locked_while_embedding == [False, False]
+
+
+def test_delete_promotes_duplicates_of_deleted_chunks(vector_store):
+    text = "a systematic investment plan invests a fixed amount every month in a mutual fund"
+    vector_store.add_documents(make_chunks("doc_a", [text]))
+    assert vector_store.add_documents(make_chunks("doc_b", [text])) == []
+    assert vector_store.delete_documents(["doc_a"]) == 1
+    assert [c.document_id for c in vector_store.get_chunks(["doc_b_chunk_0"])] == ["doc_b"]
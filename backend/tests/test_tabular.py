@@ -0,0 +1,133 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from tabular import TabularCatalog, aggregate, answer_numeric_question, looks_tabular
+from tabular.store import CURRENT_FILE
+
+
+def _csv(path, revenue):
+    rows = ["State,Year,Revenue,Expenses"] + [f"{state},{year},{revenue},1" for state in ("TEXAS", "OHIO") for year in (2000, 2001)]
+    path.write_text("\n".join(rows) + "\n", encoding="utf-8")
+    return path
+
+
+def _total(table):
+    return aggregate(table, "Revenue")["value"]
+
+
+def test_tables_are_columnar_and_queryable(tmp_path):
+    catalog = TabularCatalog(tmp_path / "tables")
+    path = _csv(tmp_path / "finance.csv", 10)
+    assert looks_tabular(path)
+    table = catalog.ingest_csv(path)
+    assert table.name == "finance" and table.num_rows == 4
+    assert set(table.dimensions) == {"State", "Year"} and table.measures == ["Revenue", "Expenses"]
+    assert _total(table) == 40
+    groups = aggregate(table, "Revenue", filters={"State": ["texas"]}, group_by="Year")
+    assert groups["groups"] == [{"Year": 2000, "value": 10.0}, {"Year": 2001, "value": 10.0}]
+    # Columns are mapped at their recorded offsets, matching what np.load reads
+    for name, column in table.columns.items():
+        assert np.array_equal(table.array(name), np.load(table.directory / column["file"]))
+
+
+def test_replacing_a_table_never_exposes_a_missing_or_partial_one(tmp_path):
+    root = tmp_path / "tables"
+    writer, reader = TabularCatalog(root), TabularCatalog(root)
+    paths = [_csv(tmp_path / "a.csv", 1), _csv(tmp_path / "b.csv", 2)]
+    writer.ingest_csv(paths[0], name="finance")
+    opened = reader.get("finance")
+    stop, seen, errors = threading.Event(), set(), []
+
+    def read():
+        while not stop.is_set():
+            try:
+                seen.add(_total(reader.get("finance")))
+            except Exception as e:
+                errors.append(e)
+                return
+
+    thread = threading.Thread(target=read)
+    thread.start()
+    for i in range(20):
+        writer.ingest_csv(paths[i % 2], name="finance")
+    stop.set()
+    thread.join()
+
+    assert not errors and seen <= {4.0, 8.0}
+    # A table opened before the swaps still reads its own version
+    assert _total(opened) == 4.0 and _total(reader.get("finance")) == 8.0
+    assert len([p for p in (root / "finance").iterdir() if p.is_dir()]) <= 2
+
+
+def test_tables_written_before_versioning_are_still_read(tmp_path):
+    root = tmp_path / "tables"
+    catalog = TabularCatalog(root)
+    version = catalog.ingest_csv(_csv(tmp_path / "finance.csv", 3)).directory
+    for f in version.iterdir():
+        f.rename(root / "finance" / f.name)
+    version.rmdir()
+    (root / "finance" / CURRENT_FILE).unlink()
+
+    legacy = TabularCatalog(root)
+    assert legacy.names() == ["finance"] and _total(legacy.get("finance")) == 12.0
+    legacy.ingest_csv(_csv(tmp_path / "finance.csv", 5))
+    assert _total(legacy.get("finance")) == 20.0
+    assert not (root / "finance" / "schema.json").exists()
+
+
+@pytest.fixture
+def tables(isolated_settings, monkeypatch):
+    from tabular import catalog
+    monkeypatch.setattr(catalog, "_catalog", None)
+    monkeypatch.setattr(isolated_settings, "TABULAR_SEED_CSVS", [])
+    return catalog.get_tabular_catalog()
+
+
+def test_table_documents_can_be_deleted(ingestion, tables, tmp_path):
+    result = ingestion.ingest_file(str(_csv(tmp_path / "state_revenue.csv", 7)), "csv", {})
+    assert result["document_id"] == "table_state_revenue"
+    assert tables.get("state_revenue") is not None
+
+    deleted = asyncio.run(ingestion.delete_document(result["document_id"]))
+    assert deleted["status"] == "success" and tables.get("state_revenue") is None
+    assert asyncio.run(ingestion.delete_document(result["document_id"]))["status"] == "not_found"
+
+
+def _panel(path):
+    rows = ["State,Year,Tax,Revenue"] + [
+        f"{state},{year},{base + year - 2000},{2 * base}"
+        for state, base in (("TEXAS", 100), ("OHIO", 50)) for year in (2000, 2001, 2002)
+    ]
+    path.write_text("\n".join(rows) + "\n", encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("question", [
+    "What is the most tax-efficient way to invest?",
+    "How do I pay less tax on my revenue from freelancing?",
+    "How much tax should I set aside per year?",
+    "How should I finance a car and still save tax?",
+])
+def test_advice_questions_are_not_table_queries(tmp_path, question):
+    catalog = TabularCatalog(tmp_path / "tables")
+    catalog.ingest_csv(_panel(tmp_path / "finance.csv"))
+    assert answer_numeric_question(catalog, question) is None
+
+
+def test_table_questions_default_to_the_latest_year(tmp_path):
+    catalog = TabularCatalog(tmp_path / "tables")
+    catalog.ingest_csv(_panel(tmp_path / "finance.csv"))
+
+    single = answer_numeric_question(catalog, "What is the tax of Texas?")["result"]
+    assert single["filters"] == {"State": ["TEXAS"], "Year": 2002} and single["value"] == 102.0
+    assert answer_numeric_question(catalog, "Texas tax in 2000")["result"]["value"] == 100.0
+    total = answer_numeric_question(catalog, "Texas tax across all years combined")["result"]
+    assert total["value"] == 303.0
+    assert answer_numeric_question(catalog, "Texas tax trend")["operation"] == "trend"
+
+    ranked = answer_numeric_question(catalog, "Which states have the highest tax?")
+    assert ranked["operation"] == "top_k" and ranked["result"]["filters"] == {"Year": 2002}
+    assert [g["State"] for g in ranked["result"]["groups"]] == ["TEXAS", "OHIO"]
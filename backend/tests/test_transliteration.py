@@ -0,0 +1,21 @@
+from app.services.transliteration import clean_english_answer, localize_response, transliterate
+
+
+def test_longer_phrases_win_and_capitalization_is_kept():
+    assert transliterate("Save money every month.", "hindi") == "Bachaayein paisa har mahine."
+    # Finance terms people already say in English stay as they are
+    assert transliterate("Start a SIP.", "tamil") == "Thodangungal a SIP."
+    assert transliterate("Save money.", "french") == "Save money."
+
+
+def test_model_headers_and_pronunciation_sections_are_stripped():
+    raw = "**English Response:** Save money.\n\nPronunciation (Hindi):\nBachaayein paisa."
+    assert clean_english_answer(raw) == "Save money."
+
+
+def test_english_users_get_one_section_and_others_two():
+    assert localize_response("Save money.", "english") == "English Response:\nSave money."
+    assert localize_response("Save money.", None) == "English Response:\nSave money."
+    assert localize_response("Save money.", "kannada") == (
+        "English Response:\nSave money.\n\nPronunciation (Kannada):\nUlisi hana."
+    )
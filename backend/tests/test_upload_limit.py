@@ -0,0 +1,59 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI, File, UploadFile
+
+from serving import UploadLimitMiddleware
+
+
+def _app(limit):
+    app = FastAPI()
+    parsed = []
+
+    @app.post("/ingest")
+    async def ingest(file: UploadFile = File(...)):
+        parsed.append(file.filename)
+        return {"size": len(await file.read())}
+
+    @app.post("/other")
+    async def other(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    app.add_middleware(UploadLimitMiddleware, paths=["/ingest"], max_body_bytes=limit)
+    return app, parsed
+
+
+def _post(app, path, **kwargs):
+    async def post():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post(path, **kwargs)
+
+    return asyncio.run(post())
+
+
+def test_declared_oversized_bodies_are_refused_before_parsing():
+    app, parsed = _app(limit=1024)
+    assert _post(app, "/ingest", files={"file": ("a.txt", b"x" * 100)}).json() == {"size": 100}
+
+    response = _post(app, "/ingest", files={"file": ("b.txt", b"x" * 4096)})
+    assert response.status_code == 413 and "1024 byte" in response.json()["detail"]
+    assert parsed == ["a.txt"]
+    # Other routes are not limited
+    assert _post(app, "/other", files={"file": ("c.txt", b"x" * 4096)}).status_code == 200
+
+
+def test_chunked_bodies_are_cut_off_at_the_limit():
+    app, parsed = _app(limit=1024)
+    boundary = "limit-test"
+    head = f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="big.txt"\r\n\r\n'.encode()
+
+    async def body():
+        yield head
+        for _ in range(16):
+            yield b"x" * 512
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    response = _post(
+        app, "/ingest", content=body(), headers={"content-type": f"multipart/form-data; boundary={boundary}"}
+    )
+    assert response.status_code == 413 and parsed == []